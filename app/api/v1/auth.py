@@ -13,6 +13,7 @@ from app.utils.security import (
 )
 from app.models.user import User
 from app.config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,9 +55,9 @@ async def login(
                 detail="Username and password are required"
             )
 
-        # Autentica usuário
+        # Autentica usuário (bcrypt leva centenas de ms: roda em thread, fora do event loop)
         logger.debug(f"Authenticating user: {form_data.username}")
-        user = auth_service.authenticate_user(db, form_data.username, form_data.password)
+        user = await asyncio.to_thread(auth_service.authenticate_user, db, form_data.username, form_data.password)
 
         if not user:
             logger.warning(f"Authentication failed for username: {form_data.username}")
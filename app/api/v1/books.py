@@ -1,13 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import Optional
+from app.config import settings
 from app.database import get_db
-from app.schemas.book import BookResponse, BookListResponse
+from app.schemas.book import (
+    AutocompleteResponse, BookBatchRequest, BookBatchResponse, BookResponse, BookListResponse
+)
+from app.services.autocomplete_service import AUTOCOMPLETE_MAX_K, autocomplete_service
 from app.services.book_service import book_service
+from app.services.cover_service import cover_service
+from app.utils.singleflight import flight_key, single_flight
 import math
+import re
 
 router = APIRouter()
 
+book_list_adapter = TypeAdapter(list[BookResponse])
+
+# entity-tag da RFC 9110 (seção 8.8.3): aspas podem conter vírgulas, então a
+# lista do If-None-Match é lida tag a tag, não dividida nas vírgulas
+ENTITY_TAG = re.compile(r'(?:W/)?"[^"]*"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match com o ETag da resposta (RFC 9110, seção 13.1.2)
+
+    Comparação fraca: `W/"x"` e `"x"` são a mesma tag; aceita listas
+    separadas por vírgula e `*`.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in ENTITY_TAG.findall(if_none_match))
+
+
+def serialize_books(books) -> bytes:
+    """JSON de uma lista de livros, compartilhado pelas requisições coalescidas"""
+    return book_list_adapter.dump_json([BookResponse.model_validate(book) for book in books])
+
 
 @router.get("/books", response_model=BookListResponse)
 async def get_books(
@@ -36,8 +71,7 @@ async def get_books(
 @router.get("/books/search", response_model=list[BookResponse])
 async def search_books(
     title: Optional[str] = Query(None, description="Buscar por título do livro (não diferencia maiúsculas/minúsculas)"),
-    category: Optional[str] = Query(None, description="Filtrar por categoria"),
-    db: Session = Depends(get_db)
+    category: Optional[str] = Query(None, description="Filtrar por categoria")
 ):
     """
     Busca livros por título e/ou categoria
@@ -45,7 +79,8 @@ async def search_books(
     - **title**: Termo de busca para título do livro (correspondência parcial, não diferencia maiúsculas)
     - **category**: Nome exato da categoria
 
-    Pelo menos um parâmetro deve ser fornecido.
+    Pelo menos um parâmetro deve ser fornecido. Buscas idênticas simultâneas
+    compartilham a mesma consulta (single-flight).
     """
     if not title and not category:
         raise HTTPException(
@@ -53,9 +88,33 @@ async def search_books(
             detail="Pelo menos um parâmetro de busca (título ou categoria) deve ser fornecido"
         )
 
-    books = book_service.search_books(db, title, category)
+    body = await single_flight.do(
+        flight_key("/books/search", title=title, category=category),
+        lambda db: serialize_books(book_service.search_books(db, title, category)),
+        settings.SINGLEFLIGHT_TIMEOUT_SECONDS
+    )
 
-    return [BookResponse.model_validate(book) for book in books]
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/books/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete_books(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto digitado (a última palavra é um prefixo)"),
+    k: int = Query(10, ge=1, le=AUTOCOMPLETE_MAX_K, description="Número de sugestões"),
+    db: Session = Depends(get_db)
+):
+    """
+    Sugestões para a caixa de busca (typeahead)
+
+    - **q**: Texto digitado; as palavras anteriores devem aparecer inteiras no
+      título e a última é tratada como prefixo (sem diferenciar maiúsculas e acentos)
+    - **k**: Número máximo de livros e de categorias sugeridos (padrão: 10, máx: 50)
+
+    Livros ordenados por avaliação e disponibilidade; categorias por número de
+    livros. Usa um índice de prefixos em memória, reconstruído a cada versão do
+    catálogo, em vez de uma busca ILIKE a cada tecla.
+    """
+    return AutocompleteResponse(**autocomplete_service.autocomplete(db, q, k))
 
 
 @router.get("/books/top-rated", response_model=list[BookResponse])
@@ -78,14 +137,15 @@ async def get_top_rated_books(
 @router.get("/books/price-range", response_model=list[BookResponse])
 async def get_books_by_price_range(
     min: float = Query(0, ge=0, description="Preço mínimo"),
-    max: float = Query(100, ge=0, description="Preço máximo"),
-    db: Session = Depends(get_db)
+    max: float = Query(100, ge=0, description="Preço máximo")
 ):
     """
     Obtém livros dentro de uma faixa de preço específica
 
     - **min**: Preço mínimo (padrão: 0)
     - **max**: Preço máximo (padrão: 100)
+
+    Consultas idênticas simultâneas compartilham a mesma execução (single-flight).
     """
     if min > max:
         raise HTTPException(
@@ -93,9 +153,114 @@ async def get_books_by_price_range(
             detail="O preço mínimo não pode ser maior que o preço máximo"
         )
 
-    books = book_service.get_books_by_price_range(db, min, max)
+    body = await single_flight.do(
+        flight_key("/books/price-range", min=min, max=max),
+        lambda db: serialize_books(book_service.get_books_by_price_range(db, min, max)),
+        settings.SINGLEFLIGHT_TIMEOUT_SECONDS
+    )
 
-    return [BookResponse.model_validate(book) for book in books]
+    return Response(content=body, media_type="application/json")
+
+
+def batch_response(db: Session, ids: list[int]) -> Response:
+    if len(ids) > settings.BOOKS_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No máximo {settings.BOOKS_BATCH_MAX_IDS} ids por requisição"
+        )
+
+    books, missing = book_service.get_books_by_ids(db, ids)
+    body = BookBatchResponse(
+        books=[BookResponse.model_validate(book) for book in books],
+        missing=missing
+    ).model_dump_json()
+
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/books/batch", response_model=BookBatchResponse)
+async def get_books_batch(
+    ids: str = Query(..., description="IDs separados por vírgula (ex.: 1,2,3)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtém vários livros por ID em uma única requisição
+
+    - **ids**: IDs separados por vírgula
+
+    Os livros vêm na ordem pedida (IDs repetidos aparecem uma vez); os IDs não
+    encontrados vêm em `missing`. Uma única consulta IN no banco (ou buscas no
+    snapshot), em vez de uma requisição e uma consulta por livro.
+    """
+    try:
+        book_ids = [int(book_id) for book_id in ids.split(",") if book_id.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="ids deve ser uma lista de inteiros separados por vírgula"
+        )
+    if not book_ids:
+        raise HTTPException(status_code=400, detail="Informe pelo menos um id")
+
+    return batch_response(db, book_ids)
+
+
+@router.post("/books/batch", response_model=BookBatchResponse)
+async def post_books_batch(
+    request: BookBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Obtém vários livros por ID, com os IDs no corpo (`{"ids": [1, 2, 3]}`)
+
+    Mesmo resultado de `GET /books/batch`, para listas longas demais para a URL.
+    """
+    return batch_response(db, request.ids)
+
+
+@router.get("/books/{book_id}/cover")
+async def get_book_cover(
+    book_id: int,
+    request: Request,
+    size: str = Query("full", pattern="^(full|thumb)$", description="full (original) ou thumb (miniatura)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtém a capa do livro a partir do cache local
+
+    - **book_id**: ID do livro
+    - **size**: full (imagem original) ou thumb (miniatura JPEG)
+
+    A resposta tem ETag (hash do conteúdo) e Cache-Control de longa duração;
+    If-None-Match (RFC 9110: `W/`, listas e `*`) retorna 304. Com
+    COVER_ACCEL_REDIRECT_PREFIX configurado, o arquivo é entregue pelo nginx
+    (X-Accel-Redirect, sendfile).
+    """
+    cover = cover_service.get_cover_file(db, book_id, thumbnail=(size == "thumb"))
+
+    if not cover:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Capa do livro com ID {book_id} não encontrada"
+        )
+
+    path, row = cover
+    etag = f'"{row.content_hash}-{size}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.COVER_CACHE_MAX_AGE}",
+    }
+    media_type = "image/jpeg" if path.suffix == ".jpg" else row.content_type
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.COVER_ACCEL_REDIRECT_PREFIX:
+        relative_path = path.relative_to(cover_service.store.root).as_posix()
+        headers["X-Accel-Redirect"] = f"{settings.COVER_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{relative_path}"
+        return Response(headers=headers, media_type=media_type)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 
 # IMPORTANTE: Esta deve ser a última rota porque possui um parâmetro de caminho dinâmico
@@ -1,22 +1,52 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
-from app.schemas.book import CategoryResponse
+from app.schemas.book import BookResponse, CategoryResponse
 from app.services.book_service import book_service
+from app.utils.singleflight import flight_key, single_flight
 
 router = APIRouter()
 
+category_list_adapter = TypeAdapter(list[CategoryResponse])
+
 
 @router.get("/categories", response_model=list[CategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories():
     """
     Obtém todas as categorias únicas de livros com contagens
 
-    Retorna uma lista de categorias ordenadas por contagem de livros (decrescente)
+    Retorna uma lista de categorias ordenadas por contagem de livros (decrescente).
+    Requisições simultâneas compartilham a mesma consulta (single-flight).
+    """
+    body = await single_flight.do(
+        flight_key("/categories"),
+        lambda db: category_list_adapter.dump_json([
+            CategoryResponse(category=category, count=count)
+            for category, count in book_service.get_categories(db)
+        ]),
+        settings.SINGLEFLIGHT_TIMEOUT_SECONDS
+    )
+
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/categories/{category}/top-rated", response_model=list[BookResponse])
+async def get_top_rated_books_by_category(
+    category: str,
+    limit: int = Query(10, ge=1, le=100, description="Número de livros a retornar"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtém os livros mais bem avaliados (avaliação >= 4) de uma categoria
+
+    Livros são ordenados por avaliação (decrescente), depois por preço (crescente)
+
+    - **category**: Nome exato da categoria
+    - **limit**: Número máximo de livros a retornar (padrão: 10, máx: 100)
     """
-    categories = book_service.get_categories(db)
+    books = book_service.get_top_rated_books(db, limit, category)
 
-    return [
-        CategoryResponse(category=category, count=count)
-        for category, count in categories
-    ]
+    return [BookResponse.model_validate(book) for book in books]
@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.config import settings
+from app.models.user import User
+from app.utils.security import get_current_admin_user
+from app.utils.sampling_profiler import ProfilerBusy, sampling_profiler
+from app.utils.sql_profiler import sql_profiler
+
+router = APIRouter()
+
+
+@router.get("/admin/sql/top")
+async def top_sql_statements(
+    limit: int = Query(20, ge=1, le=500, description="Number of statements"),
+    order_by: str = Query("total", pattern="^(total|count|mean|max)$", description="Ranking criteria"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Top normalized SQL statements since startup (Admin Only)
+
+    Statements are normalized (literals and IN lists collapsed) and ranked by
+    total time, count, mean or max duration. Requires SQL_PROFILING_ENABLED.
+    """
+    return {
+        "enabled": settings.SQL_PROFILING_ENABLED,
+        "slow_query_ms": settings.SQL_SLOW_QUERY_MS,
+        "order_by": order_by,
+        "statements": sql_profiler.top(limit, order_by)
+    }
+
+
+@router.delete("/admin/sql/top", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_sql_statements(current_user: User = Depends(get_current_admin_user)):
+    """Clear the statement ranking (Admin Only)"""
+    sql_profiler.reset()
+
+
+@router.post("/admin/profiler/start", status_code=status.HTTP_202_ACCEPTED)
+async def start_profiler(
+    seconds: Optional[float] = Query(None, gt=0, description="Profile every thread for this many seconds"),
+    requests: Optional[int] = Query(None, ge=1, description="Profile the next N requests matching `route`"),
+    route: Optional[str] = Query(None, description="Route template, e.g. /api/v1/books/{book_id}"),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000, description="Sampling interval"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Start the sampling profiler (Admin Only)
+
+    Pass either `seconds`, or `requests` together with `route`. Sessions end
+    after PROFILER_MAX_SECONDS at the latest. Download the stacks from
+    `/admin/profiler/result` once the session finishes.
+
+    **Returns:**
+    - 202 Accepted: Session started
+    - 400 Bad Request: Invalid combination of parameters
+    - 409 Conflict: A session is already running
+    """
+    try:
+        session = sampling_profiler.start(
+            seconds=seconds,
+            requests=requests,
+            route=route,
+            interval_ms=interval_ms or settings.PROFILER_INTERVAL_MS,
+            max_seconds=settings.PROFILER_MAX_SECONDS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return session.to_dict()
+
+
+@router.get("/admin/profiler/status")
+async def profiler_status(current_user: User = Depends(get_current_admin_user)):
+    """Current or last profiling session (Admin Only)"""
+    session = sampling_profiler.session
+    return session.to_dict() if session else {"running": False}
+
+
+@router.post("/admin/profiler/stop")
+def stop_profiler(current_user: User = Depends(get_current_admin_user)):
+    """Stop the running profiling session early (Admin Only)"""
+    session = sampling_profiler.stop()
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiling session")
+    return session.to_dict()
+
+
+@router.get("/admin/profiler/result", response_class=PlainTextResponse)
+async def profiler_result(current_user: User = Depends(get_current_admin_user)):
+    """
+    Stacks of the last session in collapsed-stack format (Admin Only)
+
+    One line per distinct stack, `root;...;leaf count`, readable by
+    flamegraph.pl, speedscope and inferno.
+    """
+    session = sampling_profiler.session
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiling session")
+    if session.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Profiling session {session.id} is still running"
+        )
+
+    return PlainTextResponse(
+        sampling_profiler.collapsed(session),
+        headers={"Content-Disposition": f'attachment; filename="profile-{session.id}.folded"'}
+    )
@@ -1,29 +1,59 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.database import get_db
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.config import settings
+from app.core.startup import startup_state
+from app.services.health_checker import health_checker
 
 router = APIRouter()
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """
     Endpoint de verificação de saúde
     Verifica conectividade da API e banco de dados
+
+    O estado do banco vem da última verificação em segundo plano (a cada
+    HEALTH_CHECK_INTERVAL_SECONDS), sem abrir uma sessão por requisição.
     """
-    try:
-        # Testa conexão com banco de dados
-        db.execute(text("SELECT 1"))
+    report = health_checker.report
+    if report is None:
+        db_status = "não verificado"
+    elif report["checks"]["database"]["ok"]:
         db_status = "conectado"
-    except Exception as e:
-        db_status = f"erro: {str(e)}"
+    else:
+        db_status = f"erro: {report['checks']['database']['error']}"
 
     return {
         "status": "saudável",
         "app_name": settings.APP_NAME,
         "version": settings.APP_VERSION,
         "environment": settings.ENVIRONMENT,
-        "database": db_status
+        "database": db_status,
+        "ready": health_checker.readiness()["ready"]
     }
+
+
+@router.get("/health/live")
+async def liveness_check():
+    """
+    Liveness: o processo responde
+
+    Não consulta o banco nem outros serviços; falhar aqui significa que o
+    worker deve ser reiniciado.
+    """
+    return {"status": "vivo", "ready": startup_state.ready}
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness: 200 quando o worker pode receber tráfego, 503 caso contrário
+
+    Lê o último relatório do verificador em segundo plano (banco, inicialização
+    e aquecimento dos caches, fila de logs, pools e atraso do event loop), sem
+    consultar o banco. Com SERVE_WHILE_WARMING a API responde (liveness)
+    antes de estar pronta; o orquestrador deve enviar tráfego só após 200.
+    """
+    report = health_checker.readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from app.config import settings
+from app.models.user import User
+from app.services.api_log_store import api_log_store
+from app.utils.metrics import (
+    CONTENT_TYPE, event_loop_lag, histogram_quantile, http_request_duration, registry, summarize_interval
+)
+from app.utils.security import get_current_admin_user
+import asyncio
+import json
+import time
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Métricas no formato texto do Prometheus
+
+    Latência por rota/método/status, duração das queries, acertos de cache e
+    atraso do event loop. Com METRICS_MULTIPROC_DIR, soma os valores de todos
+    os workers.
+    """
+    collection = registry.collect_all(settings.METRICS_MULTIPROC_DIR)
+    return Response(content=registry.render(collection), media_type=CONTENT_TYPE)
+
+
+@router.get("/metrics/stream", include_in_schema=False)
+async def metrics_stream(
+    request: Request,
+    interval: float = Query(1.0, ge=0.2, le=60, description="Segundos entre eventos"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Métricas ao vivo deste worker como server-sent events (somente admin)
+
+    A cada `interval` segundos envia um evento com as requisições do
+    intervalo (taxa, erros, latência média/p50/p95/p99), o p99 do atraso do
+    event loop e os logs aguardando gravação. Calculado das métricas em
+    memória, sem consultar o banco. Cada conexão fica aberta enquanto o
+    cliente quiser, por isso o stream exige admin e passa pelos limites de
+    requisições e pelo controle de admissão, como as outras rotas.
+    """
+    async def events():
+        previous = http_request_duration.samples()
+        previous_lag = event_loop_lag.samples().get((), [0] * (len(event_loop_lag.buckets) + 2))
+        last = time.monotonic()
+        while not await request.is_disconnected():
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            current = http_request_duration.samples()
+            lag = event_loop_lag.samples().get((), previous_lag)
+            lag_p99 = histogram_quantile(
+                event_loop_lag.buckets, [a - b for a, b in zip(lag[:-1], previous_lag[:-1])], 0.99
+            )
+
+            event = summarize_interval(previous, current, http_request_duration.buckets, now - last)
+            event["time"] = time.time()
+            event["event_loop_lag_p99_ms"] = None if lag_p99 is None else round(lag_p99 * 1000, 3)
+            event["log_buffer"] = api_log_store.buffered
+            yield f"data: {json.dumps(event)}\n\n"
+
+            previous, previous_lag, last = current, lag, now
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
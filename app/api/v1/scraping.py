@@ -1,71 +1,24 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-import subprocess
-import sys
-from pathlib import Path
 from app.database import get_db
 from app.models.user import User
+from app.schemas.job import JobResponse, ScraperStatusResponse
 from app.utils.security import get_current_admin_user
-from app.services.stats_service import stats_service
+from app.services.job_service import job_runner, JobAlreadyRunning
 
 router = APIRouter()
 
 
-def run_scraper_task():
-    """Background task to run the web scraper"""
-    try:
-        # Get the path to the scraping script
-        script_path = Path(__file__).parent.parent.parent.parent / "scripts" / "scraping.py"
-
-        # Run the scraping script
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-
-        if result.returncode == 0:
-            print("✅ Scraper executed successfully")
-            print(result.stdout)
-
-            # Run migration to update database
-            migration_script = Path(__file__).parent.parent.parent.parent / "scripts" / "migrate_csv_to_db.py"
-            migration_result = subprocess.run(
-                [sys.executable, str(migration_script)],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-
-            if migration_result.returncode == 0:
-                print("✅ Database updated successfully")
-                # Invalidate stats cache
-                stats_service.invalidate_cache()
-            else:
-                print(f"❌ Error updating database: {migration_result.stderr}")
-
-        else:
-            print(f"❌ Error running scraper: {result.stderr}")
-
-    except subprocess.TimeoutExpired:
-        print("❌ Scraper timed out after 5 minutes")
-    except Exception as e:
-        print(f"❌ Error running scraper: {str(e)}")
-
-
-@router.post("/scraping/trigger")
+@router.post("/scraping/trigger", status_code=status.HTTP_202_ACCEPTED)
 async def trigger_scraper(
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_admin_user)
 ):
     """
     Trigger web scraper to update book data (Admin Only)
 
     This endpoint is protected and requires admin privileges.
-    The scraper runs in the background and updates the database
-    with the latest book data from books.toscrape.com.
+    The scraper runs as a background job inside the API process and updates
+    the database with the latest book data from books.toscrape.com.
 
     **Authentication Required:**
     - Must be logged in as an admin user
@@ -73,39 +26,98 @@ async def trigger_scraper(
       `Authorization: Bearer your_access_token`
 
     **Process:**
-    1. Runs the web scraper (scripts/scraping.py)
+    1. Runs the web scraper (app/services/scraper_service.py)
     2. Updates CSV with new data
-    3. Re-runs migration to update database
-    4. Invalidates statistics cache
+    3. Loads the new data into the database
+    4. Publishes the catalogue snapshot file
+    5. Bumps the catalogue version (invalidates caches and leaderboards)
+
+    Only one scrape job runs at a time. Progress is available at
+    `/scraping/status` and `/scraping/jobs/{job_id}`.
 
     **Returns:**
     - 202 Accepted: Scraper job started
+    - 409 Conflict: A scrape job is already running
     - 403 Forbidden: User is not an admin
     - 401 Unauthorized: Invalid or missing token
     """
-
-    # Add scraping task to background
-    background_tasks.add_task(run_scraper_task)
+    try:
+        job = await job_runner.start_scrape(triggered_by=current_user.username)
+    except JobAlreadyRunning as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Scrape job {e.job_id} is already running"
+        )
 
     return {
         "status": "accepted",
         "message": "Scraper triggered successfully. Running in background.",
+        "job_id": job.id,
         "triggered_by": current_user.username,
-        "note": "This may take a few minutes to complete. Check logs for progress."
+        "note": "This may take a few minutes to complete. Check /scraping/status for progress."
     }
 
 
-@router.get("/scraping/status")
+@router.get("/scraping/status", response_model=ScraperStatusResponse)
 async def get_scraper_status(
-    current_user: User = Depends(get_current_admin_user)
+    limit: int = Query(10, ge=1, le=100, description="Number of recent jobs to return"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get scraper status (Admin Only)
 
-    Returns information about the last scraping operation.
+    Returns the running scrape job (if any) with its progress, and the most
+    recent scrape jobs with their outcome.
     """
-    return {
-        "status": "info",
-        "message": "Scraper status endpoint - implementation pending",
-        "note": "Check application logs for detailed scraper execution history"
-    }
+    current_job = job_runner.get_active_job(db)
+
+    return ScraperStatusResponse(
+        running=current_job is not None,
+        current_job=JobResponse.model_validate(current_job) if current_job else None,
+        recent_jobs=[JobResponse.model_validate(job) for job in job_runner.get_recent_jobs(db, limit=limit)]
+    )
+
+
+@router.get("/scraping/jobs/{job_id}", response_model=JobResponse)
+async def get_scraper_job(
+    job_id: int,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a scrape job by ID (Admin Only)
+
+    - **job_id**: Job ID returned by `/scraping/trigger`
+    """
+    job = job_runner.get_job(db, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} not found"
+        )
+
+    return JobResponse.model_validate(job)
+
+
+@router.post("/scraping/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_scraper_job(
+    job_id: int,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Cancel a pending or running scrape job (Admin Only)
+
+    Cancellation is cooperative: the scraper stops before the next book and
+    the loader rolls back its transaction, leaving the current catalogue intact.
+    """
+    job = job_runner.cancel(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} not found"
+        )
+
+    return JobResponse.model_validate(job)
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.config import settings
 from app.schemas.stats import OverviewStats, CategoryStats, CategoryStatsResponse
 from app.services.stats_service import stats_service
+from app.utils.singleflight import flight_key, single_flight
 
 router = APIRouter()
 
 
 @router.get("/stats/overview", response_model=OverviewStats)
-async def get_overview_statistics(db: Session = Depends(get_db)):
+async def get_overview_statistics():
     """
     Obtém estatísticas gerais para toda a coleção de livros
 
@@ -17,14 +19,20 @@ async def get_overview_statistics(db: Session = Depends(get_db)):
     - Preço médio de todos os livros
     - Distribuição de avaliações (contagem por avaliação 1-5)
     - Número total de categorias
+
+    Requisições simultâneas compartilham a mesma consulta (single-flight).
     """
-    stats = stats_service.get_overview_stats(db)
+    body = await single_flight.do(
+        flight_key("/stats/overview"),
+        lambda db: OverviewStats(**stats_service.get_overview_stats(db)).model_dump_json().encode(),
+        settings.SINGLEFLIGHT_TIMEOUT_SECONDS
+    )
 
-    return OverviewStats(**stats)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/stats/categories", response_model=CategoryStatsResponse)
-async def get_category_statistics(db: Session = Depends(get_db)):
+async def get_category_statistics():
     """
     Obtém estatísticas detalhadas para cada categoria
 
@@ -33,11 +41,16 @@ async def get_category_statistics(db: Session = Depends(get_db)):
     - Preço médio
     - Avaliação média
 
-    Categorias são ordenadas por contagem de livros (decrescente)
+    Categorias são ordenadas por contagem de livros (decrescente). Requisições
+    simultâneas compartilham a mesma consulta (single-flight).
     """
-    category_stats = stats_service.get_category_stats(db)
+    def compute(db: Session) -> bytes:
+        category_stats = stats_service.get_category_stats(db)
+        return CategoryStatsResponse(
+            categories=[CategoryStats(**stats) for stats in category_stats],
+            total_categories=len(category_stats)
+        ).model_dump_json().encode()
 
-    return CategoryStatsResponse(
-        categories=[CategoryStats(**stats) for stats in category_stats],
-        total_categories=len(category_stats)
-    )
+    body = await single_flight.do(flight_key("/stats/categories"), compute, settings.SINGLEFLIGHT_TIMEOUT_SECONDS)
+
+    return Response(content=body, media_type="application/json")
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -14,6 +14,104 @@ class Settings(BaseSettings):
     # Banco de Dados
     DATABASE_URL: str
 
+    # Inicialização
+    SERVE_WHILE_WARMING: bool = False  # Aceita conexões enquanto a inicialização roda (readiness em /api/v1/health/ready)
+    WARMUP_ENABLED: bool = True  # Pré-calcula as respostas mais acessadas ao iniciar e após cada recarga do catálogo
+    WARMUP_STEPS: List[str] = ["stats_overview", "categories", "top_rated", "ml_features", "autocomplete"]  # Também: category_stats
+    WARMUP_PRETOUCH_SQLITE: bool = False  # Lê a tabela books e seus índices antes (cache de páginas)
+
+    # Catálogo
+    CATALOG_SNAPSHOT_ENABLED: bool = False  # Serve leituras de um snapshot colunar em memória
+    CATALOG_SNAPSHOT_PATH: str = "data/catalog.snap"  # Arquivo binário publicado pelos loaders (mmap)
+    CATALOG_VERSION_POLL_SECONDS: float = 1.0  # Intervalo de verificação (em segundo plano) de recargas feitas por outros processos e de novos snapshots
+    CATALOG_LOAD_MODE: str = "sync"  # sync (aplica só o diff) ou swap (recarga completa blue/green)
+    CATALOG_LOAD_YIELD_RATIO: float = 1.0  # Pausa da recarga blue/green após cada lote/índice, relativa à sua duração
+    BOOKS_BATCH_MAX_IDS: int = 500  # Ids por requisição em /books/batch
+    BOOKS_BATCH_CHUNK_SIZE: int = 500  # Ids por consulta IN (limite de parâmetros do SQLite)
+
+    # Jobs em background
+    SCRAPER_JOB_TIMEOUT_SECONDS: int = 600  # Limite do job de scraping: a thread é cancelada e o job falha
+    SCRAPER_JOB_STOP_GRACE_SECONDS: float = 30.0  # Espera pela thread cancelada antes de encerrar o job assim mesmo
+    JOB_PROGRESS_FLUSH_SECONDS: float = 1.0  # Intervalo de gravação do progresso na tabela jobs
+    JOB_HEARTBEAT_TIMEOUT_SECONDS: float = 60.0  # Job ativo sem progresso gravado há esse tempo é considerado interrompido
+    SCRAPER_BASE_URL: str = "https://books.toscrape.com/"  # Site raspado pelo job de scraping
+    SCRAPER_STATE_PATH: str = "data/crawl_state.db"  # Fronteira/checkpoint do crawl (retomado após falhas)
+    SCRAPER_CHECKPOINT_EVERY: int = 200  # Páginas de produto por checkpoint
+    SCRAPER_FETCH_CONCURRENCY: int = 8  # Downloads simultâneos de páginas de produto
+    SCRAPER_PARSE_WORKERS: int = 2  # Processos de parsing do HTML (0 = na thread do scraper)
+    SCRAPER_CONNECT_TIMEOUT_SECONDS: float = 5.0  # Timeout de conexão de cada download
+    SCRAPER_READ_TIMEOUT_SECONDS: float = 30.0  # Timeout de leitura de cada download
+
+    # Capas dos livros
+    COVERS_ENABLED: bool = True  # Baixa as capas no job de scraping
+    COVERS_DIR: str = "data/covers"  # Armazenamento local endereçado por conteúdo
+    COVER_FETCH_CONCURRENCY: int = 16  # Downloads simultâneos de capas
+    COVER_THUMBNAIL_SIZE: int = 200  # Maior lado da miniatura, em pixels
+    COVER_CACHE_MAX_AGE: int = 604800  # Cache-Control max-age das capas (7 dias)
+    COVER_ACCEL_REDIRECT_PREFIX: Optional[str] = None  # Ex.: /protected-covers (X-Accel-Redirect do nginx)
+
+    # Coalescência de leituras idênticas concorrentes
+    SINGLEFLIGHT_ENABLED: bool = True  # Requisições iguais em andamento compartilham a mesma consulta
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 30.0  # Espera máxima por uma consulta compartilhada (504 depois disso)
+
+    # Limites de taxa e controle de admissão
+    RATE_LIMIT_ENABLED: bool = True  # Token buckets por cliente e por cliente+rota (429 com Retry-After)
+    RATE_LIMIT_CLIENT_RATE: float = 100.0  # Tokens por segundo de cada cliente (todas as rotas)
+    RATE_LIMIT_CLIENT_BURST: float = 200.0  # Rajada máxima de cada cliente
+    RATE_LIMIT_ROUTE_RATE: float = 50.0  # Tokens por segundo de cada cliente em uma mesma rota
+    RATE_LIMIT_ROUTE_BURST: float = 100.0  # Rajada máxima de cada cliente em uma mesma rota
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, float] = {  # Custo em tokens por rota (demais rotas custam 1)
+        "/api/v1/auth/login": 50.0,
+        "/api/v1/auth/refresh": 5.0,
+        "/api/v1/books/batch": 5.0,
+        "/api/v1/ml/training-data": 50.0,
+        "/api/v1/ml/features": 10.0,
+        "/api/v1/scraping/trigger": 50.0,
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Buckets ativos por limitador (os menos recentes saem antes)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # Identifica o cliente pelo X-Forwarded-For (atrás de proxy)
+    RATE_LIMIT_TRUSTED_PROXIES: List[str] = ["127.0.0.1", "10.0.0.0/8"]  # Proxies (IPs ou redes) cujo X-Forwarded-For vale
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = [  # Fora dos limites e do controle de admissão
+        "/api/v1/health", "/api/v1/health/live", "/api/v1/health/ready", "/metrics"
+    ]
+    ADMISSION_MAX_CONCURRENT: int = 32  # Requisições em andamento no worker (0 desliga o controle de admissão)
+    ADMISSION_MAX_QUEUE: int = 128  # Requisições esperando vaga; acima disso responde 503
+    ADMISSION_MAX_WAIT_SECONDS: float = 5.0  # Espera máxima por uma vaga antes do 503
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1  # Retry-After das respostas 503
+
+    # Verificações de saúde
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 2.0  # Intervalo do verificador em segundo plano lido por /health/ready
+    HEALTH_MAX_EVENT_LOOP_LAG_MS: float = 500.0  # Atraso do event loop acima disso deixa o worker não pronto
+    HEALTH_MAX_LOG_BUFFER_RATIO: float = 0.9  # Fração de API_LOG_BUFFER_MAX acima da qual o worker não está pronto
+
+    # Métricas
+    METRICS_ENABLED: bool = True  # Expõe /metrics e registra latências das requisições e queries
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # Diretório compartilhado pelos workers (soma as métricas de todos)
+    METRICS_FLUSH_SECONDS: float = 5.0  # Intervalo de gravação das métricas do worker no diretório
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.5  # Intervalo de medição do atraso do event loop
+
+    # Logs da API
+    LOG_DATABASE_URL: Optional[str] = None  # Banco SQLite próprio para logs e rollups (vazio = mesmo banco do catálogo)
+    API_LOG_FLUSH_SECONDS: float = 1.0  # Intervalo de gravação em lote dos logs acumulados em memória
+    API_LOG_BUFFER_MAX: int = 100_000  # Logs pendentes além disso são descartados (e contados)
+    API_LOG_EXCLUDED_PATHS: List[str] = ["/api/v1/health", "/api/v1/health/live", "/api/v1/health/ready"]  # Probes fora de api_logs
+    API_LOG_ROLLUPS_ENABLED: bool = True  # Mantém rollups por minuto/hora de api_logs (usados pelo dashboard)
+    API_LOG_ROLLUP_FLUSH_SECONDS: float = 10.0  # Intervalo de gravação dos rollups acumulados em memória
+    API_LOG_RETENTION_DAYS: int = 14  # Partições diárias de logs brutos mais antigas são removidas (0 = nunca)
+    API_LOG_MINUTE_ROLLUP_RETENTION_DAYS: int = 30  # Rollups por hora são mantidos para sempre
+    API_LOG_ARCHIVE_DIR: Optional[str] = "data/api_logs_archive"  # NDJSON.gz das partições removidas (vazio = sem arquivo)
+    API_LOG_COMPACTION_INTERVAL_SECONDS: float = 3600.0
+
+    # Diagnóstico de SQL
+    SQL_PROFILING_ENABLED: bool = False  # Server-Timing, log de queries lentas e ranking de statements
+    SQL_SLOW_QUERY_MS: float = 100.0  # Queries acima disso são logadas com o EXPLAIN QUERY PLAN
+    SQL_EXPLAIN_SLOW_QUERIES: bool = True  # Inclui o plano de execução no log de queries lentas
+    SQL_TOP_STATEMENTS: int = 1000  # Statements normalizados distintos guardados no ranking
+
+    # Profiler de amostragem (ligado sob demanda pelo admin)
+    PROFILER_INTERVAL_MS: float = 5.0  # Intervalo padrão entre amostras das pilhas
+    PROFILER_MAX_SECONDS: float = 300.0  # Duração máxima de uma sessão
+
     # Segurança
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -0,0 +1,181 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import asyncio
+import threading
+import logging
+from typing import Any, Callable, List, Optional
+from app.database import worker_engine
+
+logger = logging.getLogger(__name__)
+
+# Increments the shared catalogue version (catalog_meta, a single row). Loaders
+# run it in the transaction that changes the books table, so the new version
+# becomes visible to other processes together with the new rows. Plain SQL so
+# loaders writing through sqlite3 directly can run it too.
+RECORD_RELOAD_SQL = (
+    "INSERT INTO catalog_meta (id, version) VALUES (1, 1) "
+    "ON CONFLICT (id) DO UPDATE SET version = version + 1"
+)
+
+
+class CatalogVersion:
+    """
+    Monotonic version of the book catalogue
+
+    Every reload of the ``books`` table bumps the version. In-process structures
+    derived from the catalogue (leaderboards, snapshots, caches) remember the
+    version they were built from and rebuild when it changes.
+
+    Diff-based reloads pass their changeset to ``bump``; consumers that can
+    apply it incrementally subscribe with ``subscribe_changes``.
+
+    The version itself is local to the process. Reloads made elsewhere (another
+    worker's job, scripts/migrate_csv_to_db.py) are noticed through the shared
+    version in ``catalog_meta``, which every loader increments with
+    ``record_reload``: ``run_poller`` checks it every
+    CATALOG_VERSION_POLL_SECONDS in a background thread and bumps when it
+    moved, so the listeners never run on the request path. Each reload moves
+    the shared version once, and each process bumps once for it: the poller
+    or, in the process that made the reload, ``bump_recorded``, whichever
+    sees it first.
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._listeners: List[Callable[[int], None]] = []
+        self._change_listeners: List[Callable[[int, Any], None]] = []
+        self._watchers: List[Callable[[], None]] = []
+        self._stored_version: Optional[int] = None
+        self.last_changeset: Optional[Any] = None
+
+    @property
+    def current(self) -> int:
+        return self._version
+
+    @staticmethod
+    def record_reload(db: Session) -> None:
+        """Increment the shared version; call inside the reload's transaction, before its commit"""
+        db.execute(text(RECORD_RELOAD_SQL))
+
+    @staticmethod
+    def read_stored() -> Optional[int]:
+        """Shared version in catalog_meta (None if the table or its row does not exist yet)"""
+        try:
+            with worker_engine.connect() as conn:
+                return conn.execute(text("SELECT version FROM catalog_meta WHERE id = 1")).scalar()
+        except Exception as e:
+            logger.debug(f"Could not read the shared catalogue version: {type(e).__name__}: {e}")
+            return None
+
+    def poll(self) -> bool:
+        """
+        Bump if another process reloaded the catalogue since the last check
+
+        Returns:
+            True if the version was bumped
+        """
+        # One check at a time. Callers wait for a check in progress and then run
+        # their own, so a reload committed before the call is always seen; the
+        # lock only covers the read of catalog_meta, listeners run after it
+        with self._poll_lock:
+            stored = self.read_stored()
+            if stored is None or stored == self._stored_version:
+                return False
+            if self._stored_version is None:
+                # First check: the in-process structures are built after it
+                self._stored_version = stored
+                return False
+            version = self._advance(stored, None)
+
+        self._notify(version, None)
+        return True
+
+    def watch(self, check: Callable[[], None]) -> None:
+        """Register a check run by the poller after each read of catalog_meta (e.g. the snapshot file)"""
+        self._watchers.append(check)
+
+    async def run_poller(self, interval: float) -> None:
+        """Poll catalog_meta and run the watchers every ``interval`` seconds, in a thread, until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.poll_all)
+            except Exception as e:
+                logger.error(f"Catalog version poll failed: {type(e).__name__}: {e}")
+
+    def poll_all(self) -> bool:
+        """``poll``, then the watchers; returns whether the version was bumped"""
+        bumped = self.poll()
+        for check in self._watchers:
+            try:
+                check()
+            except Exception as e:
+                logger.error(f"Catalog version watcher failed: {type(e).__name__}: {e}")
+        return bumped
+
+    def subscribe(self, listener: Callable[[int], None]) -> None:
+        """Register a callback invoked with the new version after each bump"""
+        self._listeners.append(listener)
+
+    def subscribe_changes(self, listener: Callable[[int, Any], None]) -> None:
+        """Register a callback invoked with (new version, changeset) after diff-based reloads"""
+        self._change_listeners.append(listener)
+
+    def bump(self, changeset: Optional[Any] = None) -> int:
+        """
+        Mark the catalogue as changed
+
+        Args:
+            changeset: Changes applied by the reload (see catalog_sync.Changeset),
+                or None when the whole catalogue was replaced
+
+        Returns:
+            The new catalogue version
+        """
+        # This process' own reload already moved the shared version: remember
+        # it so the next poll does not bump a second time
+        version = self._advance(self.read_stored(), changeset)
+        self._notify(version, changeset)
+        return version
+
+    def bump_recorded(self, changeset: Optional[Any] = None) -> int:
+        """
+        Bump for a reload this process has just recorded and committed
+
+        The poller may have seen the new shared version first and bumped
+        already (as a full reload, without the changeset); then this returns
+        the current version instead of bumping a second time.
+        """
+        with self._poll_lock:
+            stored = self.read_stored()
+            if stored is not None and stored == self._stored_version:
+                return self._version
+            version = self._advance(stored, changeset)
+
+        self._notify(version, changeset)
+        return version
+
+    def _advance(self, stored: Optional[int], changeset: Optional[Any]) -> int:
+        with self._lock:
+            if stored is not None:
+                self._stored_version = stored
+            self._version += 1
+            self.last_changeset = changeset
+            return self._version
+
+    def _notify(self, version: int, changeset: Optional[Any]) -> None:
+        calls = [(listener, (version,)) for listener in self._listeners]
+        if changeset is not None:
+            calls += [(listener, (version, changeset)) for listener in self._change_listeners]
+
+        for listener, args in calls:
+            try:
+                listener(*args)
+            except Exception as e:
+                logger.error(f"Catalog version listener failed: {type(e).__name__}: {e}")
+
+
+# Create singleton instance
+catalog_version = CatalogVersion()
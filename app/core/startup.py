@@ -0,0 +1,88 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class StartupState:
+    """
+    Progress of the application startup
+
+    The startup work (database checks, catalogue snapshot, ...) runs as named
+    stages. With SERVE_WHILE_WARMING the server accepts connections while they
+    run, so liveness (the process answers) and readiness (the stages are done)
+    are reported separately: orchestrators route traffic only once ``ready``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.current_stage: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a startup stage
+
+        Errors are recorded and swallowed: the server keeps running (liveness)
+        but ``mark_ready`` refuses to mark it ready, and ``snapshot`` and
+        ``check`` report the failed stages.
+        """
+        with self._lock:
+            self.current_stage = name
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self.stages[name] = time.monotonic() - start
+                self.current_stage = None
+
+    def mark_ready(self) -> bool:
+        """Mark the startup as done, unless a stage failed (returns whether it is ready)"""
+        with self._lock:
+            if self.errors:
+                return False
+            if self.ready_at is None:
+                self.ready_at = time.monotonic()
+            return True
+
+    def reset(self) -> None:
+        """Forget the previous run (a new startup in the same process)"""
+        with self._lock:
+            self.started_at = time.monotonic()
+            self.ready_at = None
+            self.current_stage = None
+            self.stages = {}
+            self.errors = {}
+
+    def check(self) -> Dict[str, Any]:
+        """Startup entry of the readiness checks"""
+        with self._lock:
+            return {"ok": self.ready_at is not None, "stage": self.current_stage, "errors": dict(self.errors)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Readiness, elapsed seconds and per-stage durations"""
+        with self._lock:
+            end = self.ready_at if self.ready_at is not None else time.monotonic()
+            return {
+                "ready": self.ready_at is not None,
+                "startup_seconds": round(end - self.started_at, 3),
+                "current_stage": self.current_stage,
+                "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+                "errors": dict(self.errors),
+            }
+
+
+# Create singleton instance
+startup_state = StartupState()
@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from app.config import settings
+from app.utils.metrics import instrument_engine
+from app.utils.sql_profiler import sql_profiler
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,9 +41,98 @@ def set_sqlite_pragma(dbapi_conn, connection_record):
 # Cria classe SessionLocal
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine dedicado para cargas do catálogo executadas dentro do processo da API. Com StaticPool todas as
+# sessões de `engine` compartilham a mesma conexão, então uma carga longa
+# precisa de conexão própria para não misturar sua transação com as leituras
+# das requisições.
+loader_engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": 30
+    },
+    poolclass=NullPool
+)
+event.listen(loader_engine, "connect", set_sqlite_pragma)
+
+
+# O driver sqlite3 só abre transações implicitamente antes de DML, então DDL
+# (CREATE/ALTER/DROP) seria auto-commitado. As cargas trocam tabelas com DDL e
+# precisam que cada transação seja atômica, então o BEGIN é emitido explicitamente.
+@event.listens_for(loader_engine, "connect")
+def disable_pysqlite_transactions(dbapi_conn, connection_record):
+    dbapi_conn.isolation_level = None
+
+
+# Transações que leem antes de escrever (ex.: sync do catálogo) pedem
+# BEGIN IMMEDIATE com a opção de execução sqlite_begin_immediate: o lock de
+# escrita é obtido no início. Com um BEGIN comum, um commit de outra conexão
+# depois da leitura faz a escrita falhar com "database is locked" (o snapshot
+# de leitura do WAL ficou velho e o busy timeout não ajuda).
+@event.listens_for(loader_engine, "begin")
+def begin_sqlite_transaction(conn):
+    if conn.get_execution_options().get("sqlite_begin_immediate"):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+
+# Engine das consultas que rodam em threads de trabalho (single-flight). Com
+# StaticPool a sessão da requisição usa a mesma conexão sqlite3 de todas as
+# outras sessões, e não pode ser usada de outra thread sem misturar
+# transações. Este engine tem um pool comum: cada thread pega a sua conexão.
+worker_engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": 30
+    }
+)
+event.listen(worker_engine, "connect", set_sqlite_pragma)
+
+
+# Engine da telemetria (logs da API e seus rollups). Com LOG_DATABASE_URL os
+# logs vão para outro arquivo SQLite, com seu próprio writer: as gravações de
+# logs deixam de disputar o lock de escrita do banco do catálogo com recargas e
+# criação de usuários. Sem ele, usa o mesmo arquivo do catálogo, por conexões
+# próprias. Só é usado por tarefas em segundo plano (gravação em lote,
+# compactação), nunca pelas requisições.
+log_engine = create_engine(
+    settings.LOG_DATABASE_URL or settings.DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": 30
+    }
+)
+event.listen(log_engine, "connect", set_sqlite_pragma)
+event.listen(log_engine, "connect", disable_pysqlite_transactions)
+event.listen(log_engine, "begin", begin_sqlite_transaction)
+
+
+# Conta e cronometra as queries dos engines (exposto em /metrics)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "api")
+    instrument_engine(worker_engine, "api")
+    instrument_engine(loader_engine, "loader")
+    instrument_engine(log_engine, "log")
+
+# Perfil das queries das requisições (Server-Timing, log de lentas, ranking).
+# Desligado, nenhum listener é registrado e as queries não pagam nada.
+if settings.SQL_PROFILING_ENABLED:
+    sql_profiler.configure(settings.SQL_SLOW_QUERY_MS, settings.SQL_EXPLAIN_SLOW_QUERIES, settings.SQL_TOP_STATEMENTS)
+    sql_profiler.instrument(engine)
+    sql_profiler.instrument(worker_engine)
+
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+LoaderSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=loader_engine)
+LogSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=log_engine)
+
 # Cria classe Base para modelos
 Base = declarative_base()
 
+# Base dos modelos de telemetria, criados no banco de log_engine
+LogBase = declarative_base()
+
 
 def get_db():
     """
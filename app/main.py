@@ -1,8 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.api.v1 import health, books, categories, stats, auth, scraping, ml
-from app.utils.middleware import LoggingMiddleware
+from app.core.startup import startup_state
+from app.api.v1 import health, books, categories, stats, auth, scraping, ml, metrics, diagnostics
+from app.utils.middleware import (
+    LoggingMiddleware, MetricsMiddleware, ProfilerMiddleware, RateLimitMiddleware, SQLProfilerMiddleware
+)
+from app.utils.singleflight import SingleFlightTimeout
 
 # Cria aplicação FastAPI
 app = FastAPI(
@@ -13,7 +19,23 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Configura CORS
+# Adiciona middleware de logging
+app.add_middleware(LoggingMiddleware)
+
+# Acompanha as requisições de uma sessão do profiler de amostragem
+app.add_middleware(ProfilerMiddleware)
+
+# Adiciona header Server-Timing com as queries da requisição
+if settings.SQL_PROFILING_ENABLED:
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Limites de taxa e controle de admissão: rejeita antes do logging e das rotas
+# (as rejeições aparecem nas métricas)
+if settings.RATE_LIMIT_ENABLED or settings.ADMISSION_MAX_CONCURRENT > 0:
+    app.add_middleware(RateLimitMiddleware)
+
+# Configura CORS (por fora dos limites: as respostas 429/503 também levam os
+# headers de CORS, senão o navegador as reporta como erro de rede)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS if settings.ALLOWED_ORIGINS != ["*"] else ["*"],
@@ -22,8 +44,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Adiciona middleware de logging
-app.add_middleware(LoggingMiddleware)
+# Adiciona middleware de métricas (mais externo, mede também o logging)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Inclui routers
 app.include_router(health.router, prefix="/api/v1", tags=["Saúde"])
@@ -32,7 +55,23 @@ app.include_router(categories.router, prefix="/api/v1", tags=["Categorias"])
 app.include_router(stats.router, prefix="/api/v1", tags=["Estatísticas"])
 app.include_router(auth.router, prefix="/api/v1", tags=["Autenticação"])
 app.include_router(scraping.router, prefix="/api/v1", tags=["Admin"])
+app.include_router(diagnostics.router, prefix="/api/v1", tags=["Admin"])
 app.include_router(ml.router, prefix="/api/v1", tags=["Pipeline ML"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["Monitoramento"])
+
+
+@app.exception_handler(SingleFlightTimeout)
+async def single_flight_timeout_handler(request: Request, exc: SingleFlightTimeout):
+    """Consulta compartilhada (single-flight) não terminou a tempo"""
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "A consulta não terminou dentro do tempo limite; tente novamente"}
+    )
+
+
+# Tarefas periódicas em execução (métricas, rollups dos logs)
+background_tasks = []
 
 
 @app.get("/")
@@ -46,17 +85,14 @@ async def root():
     }
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Executado ao iniciar a aplicação"""
-    print(f"🚀 Iniciando {settings.APP_NAME} v{settings.APP_VERSION}")
-    print(f"📝 Ambiente: {settings.ENVIRONMENT}")
-    print(f"📚 Documentação da API disponível em: /docs")
-
-    # Inicializa banco de dados se necessário
+def initialize_database():
+    """Cria as tabelas que faltam (e o admin, em bancos novos) e recupera jobs interrompidos"""
     try:
-        from app.database import engine, Base
-        from sqlalchemy import inspect
+        from app.database import engine, Base, LogBase, log_engine
+        from sqlalchemy import inspect, text
+
+        # Tabelas de logs e rollups (no banco de telemetria, se separado)
+        LogBase.metadata.create_all(bind=log_engine)
 
         inspector = inspect(engine)
         tables = inspector.get_table_names()
@@ -98,14 +134,184 @@ async def startup_event():
             except Exception as e:
                 print(f"⚠️  Erro ao criar admin: {e}")
         else:
+            # Cria tabelas novas (ex.: jobs) em bancos já existentes
+            missing_tables = [table for table in Base.metadata.tables if table not in tables]
+            if missing_tables:
+                Base.metadata.create_all(bind=engine)
+                print(f"✅ Tabelas criadas: {', '.join(missing_tables)}")
+
+            # Colunas novas (anuláveis) de tabelas existentes, ex.: jobs.owner
+            for table in Base.metadata.sorted_tables:
+                if table.name not in tables:
+                    continue
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing and column.nullable:
+                        column_type = column.type.compile(dialect=engine.dialect)
+                        with engine.begin() as conn:
+                            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                        print(f"✅ Coluna criada: {table.name}.{column.name}")
+
             print(f"✅ Banco de dados OK - Tabelas: {', '.join(tables)}")
 
+        # Jobs de processos que terminaram (dono morto ou sem heartbeat recente) não vão terminar;
+        # os dos outros workers vivos continuam
+        from app.services.job_service import job_runner
+
+        interrupted = job_runner.recover_interrupted_jobs()
+        if interrupted:
+            print(f"⚠️  {interrupted} job(s) interrompido(s) marcados como falha")
+
     except Exception as e:
         print(f"⚠️  Erro ao verificar banco de dados: {e}")
         print("   A API pode não funcionar corretamente sem as tabelas")
+        raise
+
+
+def load_catalog_snapshot():
+    """Carrega o snapshot colunar do catálogo"""
+    from app.services.catalog_snapshot import catalog_snapshot_service
+
+    catalog_snapshot_service.enable()
+    snapshot = catalog_snapshot_service.get()
+    if snapshot is not None:
+        print(f"✅ Snapshot do catálogo carregado: {snapshot.total_books} livros")
+
+
+def start_background_tasks():
+    """Inicia as tarefas periódicas (depois das tabelas de logs existirem)"""
+    # Grava em lote os logs da API acumulados pelo middleware
+    from app.services.api_log_store import api_log_store
+
+    background_tasks.append(asyncio.create_task(
+        api_log_store.run_flusher(settings.API_LOG_FLUSH_SECONDS)
+    ))
+
+    # Percebe recargas do catálogo feitas por outros processos (e novos snapshots)
+    from app.core.catalog_version import catalog_version
+
+    background_tasks.append(asyncio.create_task(
+        catalog_version.run_poller(settings.CATALOG_VERSION_POLL_SECONDS)
+    ))
+
+    # Grava periodicamente os rollups por minuto/hora dos logs da API
+    if settings.API_LOG_ROLLUPS_ENABLED:
+        from app.services.api_log_rollup_service import api_log_rollup_service
+
+        background_tasks.append(asyncio.create_task(
+            api_log_rollup_service.run_flusher(settings.API_LOG_ROLLUP_FLUSH_SECONDS)
+        ))
+
+    # Remove (e arquiva) as partições diárias de logs fora do período de retenção
+    if settings.API_LOG_RETENTION_DAYS > 0:
+        background_tasks.append(asyncio.create_task(
+            api_log_store.run_compaction(
+                settings.API_LOG_COMPACTION_INTERVAL_SECONDS,
+                settings.API_LOG_RETENTION_DAYS,
+                settings.API_LOG_ARCHIVE_DIR or None,
+                settings.API_LOG_MINUTE_ROLLUP_RETENTION_DAYS
+            )
+        ))
+
+    # Grava as métricas para os outros workers
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        from app.utils.metrics import flush_snapshots
+
+        background_tasks.append(asyncio.create_task(
+            flush_snapshots(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS)
+        ))
+
+
+async def warm_up():
+    """
+    Etapas de inicialização, fora do event loop
+
+    Cada etapa roda em uma thread e tem a duração registrada em startup_state;
+    a aplicação fica pronta (GET /api/v1/health/ready) quando todas terminam
+    sem erros, incluindo o aquecimento dos caches.
+    """
+    with startup_state.stage("database"):
+        await asyncio.to_thread(initialize_database)
+
+    # Versão compartilhada atual do catálogo: as estruturas montadas a seguir
+    # correspondem a ela, e o poller só incrementa em recargas posteriores
+    from app.core.catalog_version import catalog_version
+
+    await asyncio.to_thread(catalog_version.poll)
+
+    if settings.CATALOG_SNAPSHOT_ENABLED:
+        with startup_state.stage("catalog_snapshot"):
+            await asyncio.to_thread(load_catalog_snapshot)
+
+    # Pré-calcula as respostas mais acessadas (repetido a cada recarga do catálogo)
+    if settings.WARMUP_ENABLED:
+        from app.services.warmup_service import warmup_service
+
+        with startup_state.stage("warm_up"):
+            await asyncio.to_thread(warmup_service.run)
+
+    start_background_tasks()
+
+    # Uma etapa com erro deixa o worker vivo, mas fora do tráfego (readiness 503 com os erros)
+    if not startup_state.mark_ready():
+        print(f"❌ Inicialização com erros, worker não está pronto: {startup_state.errors}")
+        return
+    print(f"✅ Pronto para receber requisições ({startup_state.snapshot()['startup_seconds']:.2f}s)")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Executado ao iniciar a aplicação"""
+    print(f"🚀 Iniciando {settings.APP_NAME} v{settings.APP_VERSION}")
+    print(f"📝 Ambiente: {settings.ENVIRONMENT}")
+    print(f"📚 Documentação da API disponível em: /docs")
+
+    startup_state.reset()
+
+    # Inicia medição do event loop
+    if settings.METRICS_ENABLED:
+        from app.utils.metrics import monitor_event_loop
+
+        background_tasks.append(asyncio.create_task(
+            monitor_event_loop(settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)
+        ))
+
+    # Verificações de saúde em segundo plano, lidas por /api/v1/health/ready
+    from app.services.health_checker import health_checker
+
+    background_tasks.append(asyncio.create_task(
+        health_checker.run(settings.HEALTH_CHECK_INTERVAL_SECONDS)
+    ))
+
+    # Com SERVE_WHILE_WARMING o servidor aceita conexões (liveness) enquanto a
+    # inicialização roda; o readiness só fica ok quando ela termina
+    if settings.SERVE_WHILE_WARMING:
+        print("⏳ Inicializando em segundo plano (SERVE_WHILE_WARMING)")
+        background_tasks.append(asyncio.create_task(warm_up()))
+    else:
+        await warm_up()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado ao encerrar a aplicação"""
     print(f"👋 Encerrando {settings.APP_NAME}")
+
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+
+    # Grava os logs e rollups ainda em memória
+    from app.services.api_log_store import api_log_store
+
+    await api_log_store.flush()
+    if settings.API_LOG_ROLLUPS_ENABLED:
+        from app.services.api_log_rollup_service import api_log_rollup_service
+
+        await api_log_rollup_service.flush()
+
+    # Grava as métricas finais deste worker
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        from app.utils.metrics import registry
+
+        registry.write_snapshot(settings.METRICS_MULTIPROC_DIR)
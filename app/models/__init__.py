@@ -1,5 +1,9 @@
 from app.models.book import Book
 from app.models.user import User
 from app.models.api_log import APILog
+from app.models.job import Job
+from app.models.cover import Cover
+from app.models.catalog_meta import CatalogMeta
+from app.models.api_log_rollup import APILogMinuteRollup, APILogHourRollup
 
-__all__ = ["Book", "User", "APILog"]
+__all__ = ["Book", "User", "APILog", "Job", "Cover", "CatalogMeta", "APILogMinuteRollup", "APILogHourRollup"]
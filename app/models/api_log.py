@@ -1,10 +1,15 @@
 from sqlalchemy import Column, Integer, String, Float, DateTime, Text
 from datetime import datetime
-from app.database import Base
+from app.database import LogBase
 
 
-class APILog(Base):
-    """Modelo de log da API para monitoramento e analytics"""
+class APILog(LogBase):
+    """
+    Modelo de log da API para monitoramento e analytics
+
+    Tabela legada: os logs novos vão para partições diárias api_logs_YYYYMMDD
+    (ver app/services/api_log_store.py), com as mesmas colunas.
+    """
 
     __tablename__ = "api_logs"
 
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from app.database import LogBase
+
+
+class APILogRollupMixin:
+    """Colunas comuns dos rollups de api_logs (uma linha por intervalo, rota, método e status)"""
+
+    bucket_start = Column(DateTime, primary_key=True)  # Início do minuto/hora (UTC)
+    endpoint = Column(String(200), primary_key=True)  # Template da rota, ex.: /api/v1/books/{book_id}
+    method = Column(String(10), primary_key=True)
+    status_code = Column(Integer, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)  # status >= 400
+    latency_sum_ms = Column(Float, nullable=False, default=0.0)
+    latency_max_ms = Column(Float, nullable=False, default=0.0)
+    latency_sketch = Column(Text, nullable=False, default="")  # DDSketch serializado (percentis mescláveis)
+
+    def __repr__(self):
+        return (f"<{type(self).__name__}(bucket_start={self.bucket_start}, endpoint='{self.endpoint}', "
+                f"status={self.status_code}, count={self.count})>")
+
+
+class APILogMinuteRollup(APILogRollupMixin, LogBase):
+    """Rollup de api_logs por minuto"""
+
+    __tablename__ = "api_log_rollups_minute"
+
+
+class APILogHourRollup(APILogRollupMixin, LogBase):
+    """Rollup de api_logs por hora"""
+
+    __tablename__ = "api_log_rollups_hour"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer
+from app.database import Base
+
+
+class CatalogMeta(Base):
+    """Estado do catálogo compartilhado entre processos (uma única linha, id = 1)"""
+
+    __tablename__ = "catalog_meta"
+
+    id = Column(Integer, primary_key=True)
+    # Incrementada por cada carga do catálogo, na mesma transação que altera a tabela books
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogMeta(version={self.version})>"
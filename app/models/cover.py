@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from datetime import datetime
+from app.database import Base
+
+
+class Cover(Base):
+    """Modelo de capa de livro baixada para o armazenamento local (endereçado por conteúdo)"""
+
+    __tablename__ = "covers"
+
+    # Chave pela URL de origem: os ids dos livros podem mudar entre recargas do catálogo
+    image_url = Column(String(1000), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA-256 do arquivo original
+    extension = Column(String(10), nullable=False)  # jpg, png, gif, webp
+    content_type = Column(String(50), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    has_thumbnail = Column(Boolean, default=False)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Cover(image_url='{self.image_url}', content_hash='{self.content_hash[:12]}')>"
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from datetime import datetime
+from app.database import Base
+
+
+class Job(Base):
+    """Modelo de job em background (scraping e carga do catálogo)"""
+
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False, index=True)  # scrape
+    status = Column(String(20), nullable=False, index=True, default="pending")  # pending, running, succeeded, failed, cancelled
+    stage = Column(String(50), nullable=True)  # scraping, loading, publishing, covers
+    triggered_by = Column(String(50), nullable=True)  # Username do admin que disparou o job
+    cancel_requested = Column(Boolean, default=False)
+    owner = Column(String(100), nullable=True)  # host:pid do worker que executa o job
+    heartbeat_at = Column(DateTime, nullable=True)  # Última gravação de progresso pelo dono
+
+    # Progresso
+    pages_fetched = Column(Integer, default=0)
+    rows_scraped = Column(Integer, default=0)
+    rows_upserted = Column(Integer, default=0)
+    rows_per_second = Column(Float, nullable=True)
+
+    message = Column(Text, nullable=True)
+    error_message = Column(Text, nullable=True)  # Armazena detalhes de erro se houver
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, job_type='{self.job_type}', status='{self.status}')>"
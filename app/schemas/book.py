@@ -34,7 +34,33 @@ class BookListResponse(BaseModel):
     total_pages: int
 
 
+class BookBatchRequest(BaseModel):
+    """Schema for a batch lookup by id"""
+    ids: list[int] = Field(..., min_length=1)
+
+
+class BookBatchResponse(BaseModel):
+    """Schema for a batch lookup: found books in the requested order and the ids not found"""
+    books: list[BookResponse]
+    missing: list[int]
+
+
 class CategoryResponse(BaseModel):
     """Schema for category with count"""
     category: str
     count: int
+
+
+class AutocompleteBook(BaseModel):
+    """Book suggested by the typeahead"""
+    id: int
+    title: str
+    rating: int
+    category: str
+
+
+class AutocompleteResponse(BaseModel):
+    """Typeahead suggestions for a partial query"""
+    query: str
+    books: list[AutocompleteBook]
+    categories: list[CategoryResponse]
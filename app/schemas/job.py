@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class JobResponse(BaseModel):
+    """Schema for background job status and progress"""
+    id: int
+    job_type: str
+    status: str
+    stage: Optional[str] = None
+    triggered_by: Optional[str] = None
+    cancel_requested: bool = False
+    pages_fetched: int = 0
+    rows_scraped: int = 0
+    rows_upserted: int = 0
+    rows_per_second: Optional[float] = None
+    message: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScraperStatusResponse(BaseModel):
+    """Response for the scraper status endpoint"""
+    running: bool
+    current_job: Optional[JobResponse] = None
+    recent_jobs: list[JobResponse]
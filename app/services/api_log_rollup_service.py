@@ -0,0 +1,243 @@
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from app.database import LogSessionLocal
+from app.models.api_log_rollup import APILogHourRollup, APILogMinuteRollup
+from app.utils.latency_sketch import LatencySketch
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (bucket start, route template, method, status code)
+RollupKey = Tuple[datetime, str, str, int]
+
+
+@dataclass
+class RollupDelta:
+    """Requests of one rollup key not yet written to the database"""
+    count: int = 0
+    error_count: int = 0
+    latency_sum_ms: float = 0.0
+    latency_max_ms: float = 0.0
+    sketch: LatencySketch = field(default_factory=LatencySketch)
+
+    def add(self, status_code: int, response_time_ms: float) -> None:
+        self.count += 1
+        if status_code >= 400:
+            self.error_count += 1
+        self.latency_sum_ms += response_time_ms
+        if response_time_ms > self.latency_max_ms:
+            self.latency_max_ms = response_time_ms
+        self.sketch.add(response_time_ms)
+
+    def merge(self, other: "RollupDelta") -> None:
+        self.count += other.count
+        self.error_count += other.error_count
+        self.latency_sum_ms += other.latency_sum_ms
+        self.latency_max_ms = max(self.latency_max_ms, other.latency_max_ms)
+        self.sketch.merge(other.sketch)
+
+
+def _merge_into(target: Dict[RollupKey, RollupDelta], deltas: Dict[RollupKey, RollupDelta]) -> None:
+    for key, delta in deltas.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = delta
+        else:
+            current.merge(delta)
+
+
+class APILogRollupService:
+    """
+    Maintains per-minute and per-hour rollups of the API request log
+
+    The logging middleware calls ``record`` for every request; deltas are
+    aggregated in memory and written every API_LOG_ROLLUP_FLUSH_SECONDS.
+    Counters are upserted with ``count = count + excluded.count``, and the
+    latency sketches are merged in the same transaction, after the upserts
+    have taken SQLite's write lock. Workers therefore flush concurrently
+    without losing updates, and the dashboard answers any time range by
+    reading O(buckets) rows instead of every request.
+    """
+
+    def __init__(self):
+        self._pending: Dict[RollupKey, RollupDelta] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        status_code: int,
+        response_time_ms: float,
+        timestamp: Optional[datetime] = None
+    ) -> None:
+        """Count one request (called on the event loop thread)"""
+        minute = (timestamp or datetime.utcnow()).replace(second=0, microsecond=0)
+        key = (minute, endpoint, method, status_code)
+        delta = self._pending.get(key)
+        if delta is None:
+            delta = self._pending[key] = RollupDelta()
+        delta.add(status_code, response_time_ms)
+
+    def take_pending(self) -> Dict[RollupKey, RollupDelta]:
+        """Detach the deltas recorded so far (new requests go to a fresh dict)"""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, deltas: Dict[RollupKey, RollupDelta]) -> None:
+        """Put back deltas whose write failed, so the next flush retries them"""
+        _merge_into(self._pending, deltas)
+
+    @staticmethod
+    def hourly(minute_deltas: Dict[RollupKey, RollupDelta]) -> Dict[RollupKey, RollupDelta]:
+        """Fold minute deltas into hour deltas"""
+        hours: Dict[RollupKey, RollupDelta] = {}
+        for (minute, endpoint, method, status_code), delta in minute_deltas.items():
+            key = (minute.replace(minute=0), endpoint, method, status_code)
+            hour = hours.get(key)
+            if hour is None:
+                hour = hours[key] = RollupDelta(sketch=LatencySketch(delta.sketch.alpha))
+            hour.merge(delta)
+        return hours
+
+    @staticmethod
+    def write(minute_deltas: Dict[RollupKey, RollupDelta]) -> int:
+        """
+        Add deltas to the minute and hour rollup tables in one transaction
+
+        Uses the telemetry database (log engine), never the connection shared
+        by the request sessions.
+
+        Returns:
+            Number of rollup rows touched
+        """
+        if not minute_deltas:
+            return 0
+
+        db = LogSessionLocal()
+        try:
+            touched = 0
+            for model, deltas in (
+                (APILogMinuteRollup, minute_deltas),
+                (APILogHourRollup, APILogRollupService.hourly(minute_deltas))
+            ):
+                table = model.__table__
+                statement = insert(table)
+                db.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[column.name for column in table.primary_key],
+                        set_={
+                            "count": table.c.count + statement.excluded.count,
+                            "error_count": table.c.error_count + statement.excluded.error_count,
+                            "latency_sum_ms": table.c.latency_sum_ms + statement.excluded.latency_sum_ms,
+                            # Two-argument max() is SQLite's scalar maximum
+                            "latency_max_ms": func.max(table.c.latency_max_ms, statement.excluded.latency_max_ms),
+                        }
+                    ),
+                    [
+                        {
+                            "bucket_start": bucket_start,
+                            "endpoint": endpoint,
+                            "method": method,
+                            "status_code": status_code,
+                            "count": delta.count,
+                            "error_count": delta.error_count,
+                            "latency_sum_ms": delta.latency_sum_ms,
+                            "latency_max_ms": delta.latency_max_ms,
+                            "latency_sketch": "",
+                        }
+                        for (bucket_start, endpoint, method, status_code), delta in deltas.items()
+                    ]
+                )
+
+                # The upserts above hold the write lock, so read-merge-write is safe
+                buckets = sorted({key[0] for key in deltas})
+                stored = {}
+                for i in range(0, len(buckets), 500):
+                    rows = db.execute(
+                        select(table.c.bucket_start, table.c.endpoint, table.c.method,
+                               table.c.status_code, table.c.latency_sketch)
+                        .where(table.c.bucket_start.in_(buckets[i:i + 500]))
+                    )
+                    for bucket_start, endpoint, method, status_code, sketch in rows:
+                        stored[(bucket_start, endpoint, method, status_code)] = sketch
+
+                db.execute(
+                    update(table)
+                    .where(
+                        (table.c.bucket_start == bindparam("b_bucket_start"))
+                        & (table.c.endpoint == bindparam("b_endpoint"))
+                        & (table.c.method == bindparam("b_method"))
+                        & (table.c.status_code == bindparam("b_status_code"))
+                    )
+                    .values(latency_sketch=bindparam("b_sketch")),
+                    [
+                        {
+                            "b_bucket_start": key[0],
+                            "b_endpoint": key[1],
+                            "b_method": key[2],
+                            "b_status_code": key[3],
+                            "b_sketch": LatencySketch.from_json(stored.get(key)).merge(delta.sketch).to_json(),
+                        }
+                        for key, delta in deltas.items()
+                    ]
+                )
+                touched += len(deltas)
+
+            db.commit()
+            return touched
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def flush(self) -> int:
+        """Write the pending deltas in a worker thread; on failure keep them for the next flush"""
+        pending = self.take_pending()
+        if not pending:
+            return 0
+        try:
+            return await asyncio.to_thread(self.write, pending)
+        except Exception as e:
+            logger.warning(f"Could not write API log rollups ({len(pending)} keys, will retry): {e}")
+            self.restore(pending)
+            return 0
+
+    async def run_flusher(self, interval: float) -> None:
+        """Flush every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def backfill(self, rows: Iterable[Tuple[str, str, int, float, datetime]], batch_size: int = 100_000) -> int:
+        """
+        Build rollups from existing log rows ``(endpoint, method, status, response_time_ms, timestamp)``
+
+        Rows are aggregated in memory and written every ``batch_size`` rows.
+        Run it once, on an empty rollup table, or the counts will be doubled.
+
+        Returns:
+            Number of rows aggregated
+        """
+        deltas: Dict[RollupKey, RollupDelta] = {}
+        total = 0
+        for endpoint, method, status_code, response_time_ms, timestamp in rows:
+            key = (timestamp.replace(second=0, microsecond=0), endpoint, method, status_code)
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = RollupDelta()
+            delta.add(status_code, response_time_ms)
+            total += 1
+            if total % batch_size == 0:
+                self.write(deltas)
+                deltas = {}
+        self.write(deltas)
+        return total
+
+
+# Create singleton instance
+api_log_rollup_service = APILogRollupService()
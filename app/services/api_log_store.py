@@ -0,0 +1,405 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, MetaData, Table, func, literal, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable, DropTable
+from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from app.config import settings
+from app.database import engine, log_engine
+from app.models.api_log_rollup import APILogHourRollup, APILogMinuteRollup
+from app.services.api_log_rollup_service import api_log_rollup_service
+import asyncio
+import gzip
+import logging
+import os
+import re
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no cross-process compaction lock on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "api_logs_"
+_PARTITION_NAME = re.compile(r"^api_logs_(\d{8})$")
+
+# (partition day, row id) of the newest log row a reader has seen
+LogCursor = Tuple[date, int]
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+@lru_cache(maxsize=128)
+def partition_table(day: date) -> Table:
+    """
+    Table object of one daily partition (cached, so statements against it
+    hit SQLAlchemy's compiled cache)
+
+    Same columns as APILog plus ``route`` (the route template), and no
+    secondary indexes: rows are appended in id order, and reads go by id,
+    so inserts only touch the primary-key B-tree.
+    """
+    return Table(
+        partition_name(day),
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("endpoint", String(200), nullable=False),
+        Column("route", String(200), nullable=True),
+        Column("method", String(10), nullable=False),
+        Column("status_code", Integer, nullable=False),
+        Column("response_time", Float, nullable=False),
+        Column("timestamp", DateTime, nullable=False),
+        Column("user_id", Integer, nullable=True),
+        Column("query_params", Text, nullable=True),
+        Column("error_message", Text, nullable=True),
+    )
+
+
+@dataclass
+class CompactionResult:
+    """What one compaction run did"""
+    partitions_dropped: int = 0
+    rows_archived: int = 0
+    rows_rolled_up: int = 0
+    minute_rollups_deleted: int = 0
+    skipped: bool = False
+
+    def summary(self) -> str:
+        if self.skipped:
+            return "compaction already running in another worker"
+        return (
+            f"{self.partitions_dropped} partitions dropped ({self.rows_archived} rows archived, "
+            f"{self.rows_rolled_up} rolled up), {self.minute_rollups_deleted} minute rollups deleted"
+        )
+
+
+class APILogStore:
+    """
+    Request log split into one table per UTC day (``api_logs_YYYYMMDD``)
+
+    Retention is a DROP TABLE of whole partitions instead of a DELETE over a
+    table and indexes that grow forever. Before a partition is dropped its
+    rows are checked against the hour rollups (and rolled up if missing) and,
+    if an archive directory is configured, written to
+    ``<archive>/api_logs_YYYYMMDD.ndjson.gz``.
+
+    Requests are not written one by one: the logging middleware calls
+    ``record`` (an append to an in-memory buffer), and a background task
+    writes the buffer every API_LOG_FLUSH_SECONDS in one transaction on the
+    telemetry database (``log_engine``, see LOG_DATABASE_URL).
+
+    The original ``api_logs`` table (APILog) is no longer written;
+    scripts/compact_api_logs.py --migrate-legacy moves its rows into partitions.
+    """
+
+    def __init__(self, max_buffer: int = 100_000):
+        self._tables: Dict[date, Table] = {}
+        self._lock = threading.Lock()
+        self._buffer: List[Dict] = []
+        self.max_buffer = max_buffer
+        self.dropped = 0
+
+    def table_for(self, day: date) -> Table:
+        """Partition of ``day``, created on first use"""
+        table = self._tables.get(day)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(day)
+                if table is None:
+                    table = partition_table(day)
+                    # DDL in its own transaction, before the insert transaction opens.
+                    # IF NOT EXISTS instead of checkfirst: a read before the write would
+                    # make SQLite fail the lock upgrade at once (no busy wait) if another
+                    # connection wrote in between.
+                    with log_engine.begin() as conn:
+                        conn.execute(CreateTable(table, if_not_exists=True))
+                    self._tables[day] = table
+        return table
+
+    def insert(self, db: Union[Session, Connection], rows: List[Dict]) -> None:
+        """Insert log rows (dicts with APILog columns + route) into their day's partition"""
+        by_day: Dict[date, List[Dict]] = {}
+        for row in rows:
+            by_day.setdefault(row["timestamp"].date(), []).append(row)
+        for day, day_rows in by_day.items():
+            db.execute(self.table_for(day).insert(), day_rows)
+
+    # Buffered writes
+
+    def record(self, row: Dict) -> None:
+        """Queue one log row (called on the event loop thread); dropped if the buffer is full"""
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append(row)
+
+    @property
+    def buffered(self) -> int:
+        """Rows waiting for the next flush"""
+        return len(self._buffer)
+
+    def write(self, rows: List[Dict]) -> int:
+        """Insert rows in one transaction on the telemetry database"""
+        if not rows:
+            return 0
+        for day in {row["timestamp"].date() for row in rows}:
+            self.table_for(day)
+        with log_engine.begin() as conn:
+            self.insert(conn, rows)
+        return len(rows)
+
+    async def flush(self) -> int:
+        """Write the buffer in a worker thread; on failure keep the rows for the next flush"""
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            return await asyncio.to_thread(self.write, rows)
+        except Exception as e:
+            logger.warning(f"Could not write {len(rows)} API logs (will retry): {type(e).__name__}: {e}")
+            # Oldest rows first; anything beyond the buffer limit is dropped
+            pending = rows + self._buffer
+            self.dropped += max(0, len(pending) - self.max_buffer)
+            self._buffer = pending[:self.max_buffer]
+            return 0
+
+    async def run_flusher(self, interval: float) -> None:
+        """Flush every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    @staticmethod
+    def partitions(conn) -> List[date]:
+        """Existing partitions, oldest first"""
+        names = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'api\\_logs\\_%' ESCAPE '\\'"
+        )).scalars()
+        days = []
+        for name in names:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                days.append(datetime.strptime(match.group(1), "%Y%m%d").date())
+        return sorted(days)
+
+    @staticmethod
+    def recent(conn, limit: int = 20) -> List[Dict]:
+        """Most recent log rows, newest first, reading only the newest partitions"""
+        return APILogStore.tail(conn, None, limit)[0]
+
+    @staticmethod
+    def tail(conn, after: Optional[LogCursor] = None, limit: int = 20) -> Tuple[List[Dict], Optional[LogCursor]]:
+        """
+        Log rows newer than ``after`` (newest first, at most ``limit``) and the cursor of the newest row
+
+        Only partitions from the cursor's day onwards are read, by primary key,
+        so a reader polling with its last cursor pays for the new rows only.
+        """
+        rows: List[Dict] = []
+        cursor = after
+        for day in reversed(APILogStore.partitions(conn)):
+            if after is not None and day < after[0]:
+                break
+            table = partition_table(day)
+            query = (
+                select(table.c.id, table.c.timestamp, table.c.method, table.c.endpoint, table.c.status_code,
+                       table.c.response_time)
+                .order_by(table.c.id.desc())
+                .limit(limit - len(rows))
+            )
+            if after is not None and day == after[0]:
+                query = query.where(table.c.id > after[1])
+            result = [dict(row._mapping) for row in conn.execute(query)]
+            if result and not rows:
+                cursor = (day, result[0]["id"])
+            rows.extend(result)
+            if len(rows) >= limit:
+                break
+        return rows, cursor
+
+    # Compaction
+
+    @staticmethod
+    def archive_partition(conn, day: date, archive_dir: str) -> int:
+        """Write a partition to ``<archive_dir>/api_logs_YYYYMMDD.ndjson.gz`` (atomic rename)"""
+        table = partition_table(day)
+        path = Path(archive_dir) / f"{partition_name(day)}.ndjson.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # SQLite builds each JSON line (json_object), about twice as fast as json.dumps per row
+        fields = []
+        for column in table.columns:
+            fields.extend((literal(column.name), column))
+        lines_result = conn.execute(select(func.json_object(*fields)).order_by(table.c.id)).scalars()
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        count = 0
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8", compresslevel=6) as f:
+                while True:
+                    lines = lines_result.fetchmany(10_000)
+                    if not lines:
+                        break
+                    f.write("\n".join(lines))
+                    f.write("\n")
+                    count += len(lines)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return count
+
+    @staticmethod
+    def _roll_up_if_missing(conn, day: date) -> int:
+        """Roll up a partition whose requests are absent from the hour rollups (e.g. logged with rollups off)"""
+        table = partition_table(day)
+        start = datetime.combine(day, datetime.min.time())
+        rolled_up = conn.execute(
+            select(func.count()).select_from(APILogHourRollup)
+            .where(APILogHourRollup.bucket_start >= start, APILogHourRollup.bucket_start < start + timedelta(days=1))
+        ).scalar()
+        if rolled_up:
+            return 0
+
+        rows = conn.execute(
+            select(func.coalesce(table.c.route, table.c.endpoint), table.c.method, table.c.status_code,
+                   table.c.response_time, table.c.timestamp)
+            .execution_options(yield_per=10_000)
+        )
+        return api_log_rollup_service.backfill(tuple(row) for row in rows)
+
+    def compact(
+        self,
+        retention_days: int,
+        archive_dir: Optional[str] = None,
+        minute_rollup_retention_days: Optional[int] = None,
+        today: Optional[date] = None
+    ) -> CompactionResult:
+        """
+        Drop partitions older than ``retention_days`` (archived and rolled up first)
+        and delete minute rollups older than ``minute_rollup_retention_days``
+
+        Only one process compacts at a time (file lock next to the archive).
+        """
+        today = today or datetime.utcnow().date()
+        result = CompactionResult()
+
+        lock_file = None
+        if fcntl is not None:
+            lock_path = Path(archive_dir or tempfile.gettempdir()) / ".api_logs_compaction.lock"
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(lock_path, "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                result.skipped = True
+                return result
+
+        try:
+            cutoff = today - timedelta(days=retention_days)
+            with log_engine.connect() as conn:
+                expired = [day for day in self.partitions(conn) if day < cutoff]
+                conn.rollback()
+
+                for day in expired:
+                    result.rows_rolled_up += self._roll_up_if_missing(conn, day)
+                    if archive_dir:
+                        result.rows_archived += self.archive_partition(conn, day, archive_dir)
+                    conn.rollback()
+
+                    with conn.begin():
+                        conn.execute(DropTable(partition_table(day), if_exists=True))
+                    with self._lock:
+                        self._tables.pop(day, None)
+                    result.partitions_dropped += 1
+                    logger.info(f"Dropped log partition {partition_name(day)}")
+
+                if minute_rollup_retention_days is not None:
+                    minute_cutoff = datetime.combine(today - timedelta(days=minute_rollup_retention_days),
+                                                     datetime.min.time())
+                    with conn.begin():
+                        result.minute_rollups_deleted = conn.execute(
+                            APILogMinuteRollup.__table__.delete()
+                            .where(APILogMinuteRollup.bucket_start < minute_cutoff)
+                        ).rowcount
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+        return result
+
+    async def run_compaction(
+        self,
+        interval: float,
+        retention_days: int,
+        archive_dir: Optional[str],
+        minute_rollup_retention_days: Optional[int]
+    ) -> None:
+        """Compact now and then every ``interval`` seconds until cancelled"""
+        while True:
+            try:
+                result = await asyncio.to_thread(
+                    self.compact, retention_days, archive_dir, minute_rollup_retention_days
+                )
+                if result.partitions_dropped or result.minute_rollups_deleted:
+                    logger.info(f"API log compaction: {result.summary()}")
+            except Exception as e:
+                logger.error(f"API log compaction failed: {type(e).__name__}: {e}")
+            await asyncio.sleep(interval)
+
+    def migrate_legacy(self) -> int:
+        """
+        Move the rows of the old ``api_logs`` table into daily partitions
+
+        The legacy table is read from the catalogue database (attached when
+        the telemetry database is a separate file). One transaction per day:
+        copy with INSERT ... SELECT, then delete the copied rows.
+
+        Returns:
+            Number of rows moved
+        """
+        moved = 0
+        with log_engine.connect() as conn:
+            source = "api_logs"
+            attached = log_engine.url.database != engine.url.database
+            if attached:
+                conn.exec_driver_sql("ATTACH DATABASE ? AS catalog", (engine.url.database,))
+                source = "catalog.api_logs"
+            try:
+                days = conn.execute(text(
+                    f"SELECT DISTINCT date(timestamp) FROM {source} WHERE timestamp IS NOT NULL ORDER BY 1"
+                )).scalars().all()
+                conn.rollback()
+
+                for value in days:
+                    day = datetime.strptime(value, "%Y-%m-%d").date()
+                    table = self.table_for(day)
+                    start = datetime.combine(day, datetime.min.time())
+                    bounds = {"start": start.isoformat(sep=" "), "end": (start + timedelta(days=1)).isoformat(sep=" ")}
+                    with conn.begin():
+                        moved += conn.execute(text(
+                            f"INSERT INTO {table.name} "
+                            "(endpoint, method, status_code, response_time, timestamp, user_id, query_params, error_message) "
+                            "SELECT endpoint, method, status_code, response_time, timestamp, user_id, query_params, error_message "
+                            f"FROM {source} WHERE timestamp >= :start AND timestamp < :end ORDER BY id"
+                        ), bounds).rowcount
+                        conn.execute(text(f"DELETE FROM {source} WHERE timestamp >= :start AND timestamp < :end"), bounds)
+            finally:
+                if attached:
+                    conn.rollback()
+                    conn.exec_driver_sql("DETACH DATABASE catalog")
+        return moved
+
+
+# Create singleton instance
+api_log_store = APILogStore(settings.API_LOG_BUFFER_MAX)
@@ -0,0 +1,296 @@
+from sqlalchemy.orm import Session
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.models.book import Book
+from app.core.catalog_version import catalog_version
+from app.utils.metrics import cache_requests
+import numpy as np
+import re
+import sys
+import threading
+import unicodedata
+
+# Largest k served; top-k lists memoized for short prefixes are kept at this size
+AUTOCOMPLETE_MAX_K = 50
+# Prefixes up to this length match too many tokens to merge per request
+MEMOIZED_PREFIX_LENGTH = 2
+
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Case-folded text without accents (``"Café"`` -> ``"cafe"``)"""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(normalize(text))
+
+
+@dataclass
+class AutocompleteIndex:
+    """
+    Prefix index over the title tokens of one catalogue version
+
+    Books are numbered by rank (rating DESC, availability DESC, id ASC), so a
+    smaller rank is a better suggestion. ``tokens`` is the sorted list of
+    distinct normalized title tokens; the books containing ``tokens[i]`` are
+    ``postings[offsets[i]:offsets[i + 1]]``, ascending. Tokens sharing a
+    prefix are adjacent, so a prefix maps to one bisect range of tokens and
+    one contiguous slice of ``postings``. The other way round, the token
+    positions of book ``rank`` are ``book_tokens[book_offsets[rank]:book_offsets[rank + 1]]``.
+    """
+    version: int
+    tokens: List[str]
+    offsets: np.ndarray
+    postings: np.ndarray
+    book_offsets: np.ndarray
+    book_tokens: np.ndarray
+    ids: np.ndarray
+    ratings: np.ndarray
+    category_codes: np.ndarray
+    titles: List[str]
+    categories: List[Tuple[str, int, Tuple[str, ...]]]
+    category_names: List[str]
+    _memo: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, rows: Sequence[Tuple[int, str, int, str]], version: int) -> "AutocompleteIndex":
+        """
+        Build the index from (id, title, rating, category) rows already in rank order
+        """
+        count = len(rows)
+        postings_by_token: Dict[str, List[int]] = {}
+        category_index: Dict[str, int] = {}
+        category_counts: Dict[str, int] = {}
+        category_codes = np.empty(count, dtype=np.int16)
+
+        for rank, (_, title, _, category) in enumerate(rows):
+            for token in set(tokenize(title)):
+                postings = postings_by_token.get(token)
+                if postings is None:
+                    postings_by_token[token] = [rank]
+                else:
+                    postings.append(rank)
+            category_codes[rank] = category_index.setdefault(category, len(category_index))
+            category_counts[category] = category_counts.get(category, 0) + 1
+
+        tokens = sorted(postings_by_token)
+        lengths = np.fromiter((len(postings_by_token[token]) for token in tokens), dtype=np.int64, count=len(tokens))
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        postings = np.empty(int(offsets[-1]), dtype=np.int32)
+        for position, token in enumerate(tokens):
+            postings[offsets[position]:offsets[position + 1]] = postings_by_token.pop(token)
+
+        # Transpose the postings; a stable sort keeps each book's tokens ascending
+        token_positions = np.repeat(np.arange(len(tokens), dtype=np.min_scalar_type(len(tokens))), lengths)
+        order = np.argsort(postings, kind="stable")
+        book_offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(postings, minlength=count), out=book_offsets[1:])
+
+        return cls(
+            version=version,
+            tokens=[sys.intern(token) for token in tokens],
+            offsets=offsets,
+            postings=postings,
+            book_offsets=book_offsets,
+            book_tokens=token_positions[order],
+            ids=np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+            ratings=np.fromiter((row[2] for row in rows), dtype=np.int8, count=count),
+            category_codes=category_codes,
+            titles=[row[1] for row in rows],
+            categories=sorted(
+                ((name, total, tuple(tokenize(name))) for name, total in category_counts.items()),
+                key=lambda category: (-category[1], category[0])
+            ),
+            category_names=list(category_index),
+        )
+
+    def nbytes(self) -> int:
+        """Approximate memory footprint in bytes (titles included)"""
+        arrays = (
+            self.offsets, self.postings, self.book_offsets, self.book_tokens,
+            self.ids, self.ratings, self.category_codes,
+        )
+        size = sum(array.nbytes for array in arrays)
+        for strings in (self.tokens, self.titles):
+            size += sys.getsizeof(strings) + sum(sys.getsizeof(string) for string in strings)
+        return size
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self.tokens, prefix), bisect_left(self.tokens, prefix + "\U0010ffff")
+
+    def _top_for_prefix(self, prefix: str, k: int) -> np.ndarray:
+        """Best ``k`` ranks among the books with a token starting with ``prefix``"""
+        if len(prefix) <= MEMOIZED_PREFIX_LENGTH:
+            top = self._memo.get(prefix)
+            if top is None:
+                top = self._memo[prefix] = self._merge_prefix(prefix, AUTOCOMPLETE_MAX_K)
+            return top[:k]
+        return self._merge_prefix(prefix, k)
+
+    def _merge_prefix(self, prefix: str, k: int) -> np.ndarray:
+        low, high = self._range(prefix)
+        if low == high:
+            return self.postings[:0]
+        # Each token's postings are sorted, so the best k overall are among
+        # the first k of each token in the range
+        starts = self.offsets[low:high]
+        ends = self.offsets[low + 1:high + 1]
+        positions = starts[:, None] + np.arange(k)
+        candidates = self.postings[positions[positions < ends[:, None]]]
+        return np.unique(candidates)[:k]
+
+    def _filter(self, candidates: np.ndarray, ranges: List[Tuple[int, int]], k: int) -> np.ndarray:
+        """
+        First ``k`` candidates (ascending ranks) having, for each ``(low, high)``
+        in ``ranges``, a token whose position is in ``[low, high)``
+        """
+        if not ranges:
+            return candidates[:k]
+        found = []
+        remaining = k
+        start, chunk = 0, 4 * k
+        while start < len(candidates):
+            ranks = candidates[start:start + chunk]
+            starts = self.book_offsets[ranks]
+            lengths = self.book_offsets[ranks + 1] - starts
+            # Where each candidate's tokens begin once laid out back to back
+            segments = np.zeros(len(ranks), dtype=np.int64)
+            np.cumsum(lengths[:-1], out=segments[1:])
+            flat = np.arange(int(segments[-1] + lengths[-1])) + np.repeat(starts - segments, lengths)
+            tokens = self.book_tokens[flat]
+            keep = np.ones(len(ranks), dtype=bool)
+            for low, high in ranges:
+                keep &= np.logical_or.reduceat((tokens >= low) & (tokens < high), segments)
+            matched = ranks[keep][:remaining]
+            found.append(matched)
+            remaining -= len(matched)
+            if not remaining:
+                break
+            start, chunk = start + chunk, 2 * chunk
+        return np.concatenate(found) if found else candidates[:0]
+
+    def search(self, query: str, k: int = 10) -> List[int]:
+        """
+        Ranks of the best ``k`` books matching ``query``
+
+        Every word but the last must be a whole title token; the last one is a
+        prefix, unless the query ends with a space.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        k = min(k, AUTOCOMPLETE_MAX_K)
+        prefix = None if query[-1:].isspace() else words.pop()
+
+        if not words:
+            return self._top_for_prefix(prefix, k).tolist()
+
+        # Each word is a range of token positions: a single one for a whole
+        # word, every token it starts for the prefix
+        ranges = []
+        for word in words:
+            position = bisect_left(self.tokens, word)
+            if position == len(self.tokens) or self.tokens[position] != word:
+                return []
+            ranges.append((position, position + 1))
+        if prefix is not None:
+            low, high = self._range(prefix)
+            if low == high:
+                return []
+            ranges.append((low, high))
+
+        # Walk the shortest single-token postings list best first and check the
+        # other words against each candidate's own tokens, rather than
+        # intersecting whole postings lists
+        driver = min(
+            (low for low, high in ranges if high - low == 1),
+            key=lambda low: self.offsets[low + 1] - self.offsets[low]
+        )
+        candidates = self.postings[self.offsets[driver]:self.offsets[driver + 1]]
+        others = [(low, high) for low, high in ranges if (low, high) != (driver, driver + 1)]
+        return self._filter(candidates, others, k).tolist()
+
+    def suggest_categories(self, query: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Categories whose name matches ``query`` like titles do, by book count"""
+        words = tokenize(query)
+        if not words:
+            return []
+        prefix = None if query[-1:].isspace() else words.pop()
+        suggestions = []
+        for name, total, tokens in self.categories:
+            if all(word in tokens for word in words) and (
+                prefix is None or any(token.startswith(prefix) for token in tokens)
+            ):
+                suggestions.append((name, total))
+                if len(suggestions) == k:
+                    break
+        return suggestions
+
+    def book(self, rank: int) -> Dict[str, Any]:
+        return {
+            "id": int(self.ids[rank]),
+            "title": self.titles[rank],
+            "rating": int(self.ratings[rank]),
+            "category": self.category_names[self.category_codes[rank]],
+        }
+
+
+class AutocompleteService:
+    """Service class for the title/category typeahead, rebuilt per catalogue version"""
+
+    def __init__(self):
+        self._index: Optional[AutocompleteIndex] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build(db: Session, version: int) -> AutocompleteIndex:
+        """Build the index with a single scan of the books in rank order"""
+        rows = (
+            db.query(Book.id, Book.title, Book.rating, Book.category)
+            .order_by(Book.rating.desc(), Book.availability.desc(), Book.id.asc())
+            .all()
+        )
+        return AutocompleteIndex.build(rows, version)
+
+    def get_index(self, db: Session) -> AutocompleteIndex:
+        """Return the index, rebuilding it if the catalogue version changed"""
+        version = catalog_version.current
+        index = self._index
+
+        if index is None or index.version != version:
+            with self._lock:
+                index = self._index
+                if index is None or index.version != version:
+                    cache_requests.inc(("autocomplete", "miss"))
+                    index = self.build(db, version)
+                    self._index = index
+                    return index
+
+        cache_requests.inc(("autocomplete", "hit"))
+        return index
+
+    def autocomplete(self, db: Session, query: str, k: int = 10) -> Dict[str, Any]:
+        """
+        Typeahead suggestions: books by title and categories by name
+
+        Books are ranked by rating, then availability; categories by book count.
+        """
+        index = self.get_index(db)
+        return {
+            "query": query,
+            "books": [index.book(rank) for rank in index.search(query, k)],
+            "categories": [
+                {"category": name, "count": total} for name, total in index.suggest_categories(query, k)
+            ],
+        }
+
+
+# Create singleton instance
+autocomplete_service = AutocompleteService()
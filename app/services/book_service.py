@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Tuple, Optional
+from app.config import settings
 from app.models.book import Book
+from app.services.leaderboard_service import leaderboard_service
+from app.services.catalog_snapshot import catalog_snapshot_service
+from app.services.response_cache import response_cache
 
 
 class BookService:
@@ -13,6 +17,10 @@ class BookService:
         Get paginated list of books
         Returns: (books, total_count)
         """
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            return snapshot.get_books(page, page_size)
+
         offset = (page - 1) * page_size
         total = db.query(Book).count()
         books = db.query(Book).offset(offset).limit(page_size).all()
@@ -23,6 +31,30 @@ class BookService:
         """Get a book by its ID"""
         return db.query(Book).filter(Book.id == book_id).first()
 
+    @staticmethod
+    def get_books_by_ids(db: Session, ids: List[int]) -> Tuple[List[Book], List[int]]:
+        """
+        Get many books by id, in the requested order
+        Returns: (books, missing_ids); repeated ids are returned once
+
+        One ``IN`` query per BOOKS_BATCH_CHUNK_SIZE ids (SQLite caps the bound
+        parameters per statement), or binary searches over the snapshot.
+        """
+        ids = list(dict.fromkeys(ids))
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            found = snapshot.get_books_by_ids(ids)
+        else:
+            found = {}
+            chunk_size = settings.BOOKS_BATCH_CHUNK_SIZE
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                found.update((book.id, book) for book in db.query(Book).filter(Book.id.in_(chunk)))
+
+        books = [found[book_id] for book_id in ids if book_id in found]
+        missing = [book_id for book_id in ids if book_id not in found]
+        return books, missing
+
     @staticmethod
     def search_books(
         db: Session,
@@ -49,26 +81,36 @@ class BookService:
         Get all unique categories with book counts
         Returns: List of (category, count) tuples
         """
-        return (
-            db.query(Book.category, func.count(Book.id))
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            return snapshot.get_categories()
+
+        return response_cache.get("categories", lambda: [
+            (category, count)
+            for category, count in db.query(Book.category, func.count(Book.id))
             .group_by(Book.category)
             .order_by(func.count(Book.id).desc())
             .all()
-        )
+        ])
 
     @staticmethod
-    def get_top_rated_books(db: Session, limit: int = 10) -> List[Book]:
+    def get_top_rated_books(
+        db: Session,
+        limit: int = 10,
+        category: Optional[str] = None
+    ) -> List[Book]:
         """
-        Get top rated books (rating >= 4)
+        Get top rated books (rating >= 4), optionally within one category
         Ordered by rating DESC, then by price ASC
+
+        Served from the precomputed leaderboard, so the cost is O(limit)
+        instead of a filtered sort over the whole table.
         """
-        return (
-            db.query(Book)
-            .filter(Book.rating >= 4)
-            .order_by(Book.rating.desc(), Book.price.asc())
-            .limit(limit)
-            .all()
-        )
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            return snapshot.get_top_rated_books(limit, category)
+
+        return leaderboard_service.get_top_rated_books(db, limit, category)
 
     @staticmethod
     def get_books_by_price_range(
@@ -77,6 +119,10 @@ class BookService:
         max_price: float = 100
     ) -> List[Book]:
         """Get books within a specific price range"""
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            return snapshot.get_books_by_price_range(min_price, max_price)
+
         return (
             db.query(Book)
             .filter(Book.price >= min_price, Book.price <= max_price)
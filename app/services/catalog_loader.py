@@ -0,0 +1,177 @@
+from sqlalchemy import MetaData, insert, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from app.core.catalog_version import catalog_version
+from app.models.book import Book
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT executemany batch
+BATCH_SIZE = 5000
+
+# Blue/green table names: the new catalogue is built in the shadow table and
+# the previous one is kept as the retired table until it is dropped
+SHADOW_TABLE = "books_shadow"
+RETIRED_TABLE = "books_retired"
+
+# Index names get a color suffix so the shadow table's indexes never collide
+# with the live table's, and can be built before the swap
+INDEX_COLORS = ("blue", "green")
+
+
+def read_books_csv(csv_path: Path) -> List[Dict]:
+    """
+    Read the scraped books CSV into row dictionaries
+
+    Returns:
+        List of dictionaries with the Book column names
+    """
+    # Imported on use: loading pandas costs more than the rest of app startup
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+
+    return [
+        {
+            "id": int(row["id"]),
+            "title": str(row["title"]),
+            "price": float(row["price"]),
+            "rating": int(row["rating"]),
+            "availability": int(row["availability"]),
+            "category": str(row["category"]),
+            "image_url": str(row["image_url"]) if pd.notna(row["image_url"]) else None
+        }
+        for row in df.to_dict("records")
+    ]
+
+
+def _live_index_color(db: Session) -> Optional[str]:
+    """Color suffix of the live books table's indexes (None for the original names)"""
+    names = db.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+        {"table": Book.__tablename__}
+    ).scalars().all()
+
+    for color in INDEX_COLORS:
+        if any(name.endswith(f"__{color}") for name in names):
+            return color
+    return None
+
+
+def load_books(
+    db: Session,
+    books: Iterable[Dict],
+    on_progress: Optional[Callable[[int], None]] = None,
+    batch_size: int = BATCH_SIZE,
+    yield_ratio: float = 0.0,
+    record_reload: bool = True
+) -> int:
+    """
+    Replace the catalogue with the given books using a blue/green table swap
+
+    1. Bulk load the books into an index-less shadow table
+    2. Build the indexes on the shadow table (suffixed with the inactive color)
+    3. Swap in one short transaction: books -> books_retired, shadow -> books
+    4. Drop the retired table
+
+    Readers keep querying the old ``books`` table until the swap commits and
+    never see a partially loaded catalogue; the swap itself only renames.
+    Steps 1 and 2 commit after every batch and index, since the shadow table is
+    invisible to the API, so other writers (request logging, admin creation)
+    only ever wait for one batch instead of the whole load.
+
+    With ``yield_ratio`` the load also sleeps after each batch and index for
+    that ratio of the time the step took, leaving CPU and disk to the API
+    workers serving reads on the same machine. Each index is still built in
+    one step, so a reader can still coincide with a burst of
+    index-building work.
+
+    Args:
+        db: Database session (should own its connection, see LoaderSessionLocal)
+        books: Row dictionaries with the Book column names
+        on_progress: Callback called after each batch with the rows written so far
+        batch_size: Rows per INSERT batch
+        yield_ratio: Pause after each step, relative to its duration (0 never pauses)
+        record_reload: Increment the shared version in the swap transaction
+            (False when a snapshot publish records it afterwards)
+
+    Returns:
+        Number of rows inserted
+    """
+    shadow = Book.__table__.to_metadata(MetaData(), name=SHADOW_TABLE)
+    # The schema reads below are followed by DDL in the same transaction:
+    # BEGIN IMMEDIATE, or a commit by another writer in between (request
+    # logging) fails the write with "database is locked"
+    db.connection(execution_options={"sqlite_begin_immediate": True})
+    live_color = _live_index_color(db)
+    shadow_color = INDEX_COLORS[1] if live_color == INDEX_COLORS[0] else INDEX_COLORS[0]
+
+    def commit_step(started: float) -> None:
+        db.commit()
+        if yield_ratio > 0:
+            time.sleep((time.perf_counter() - started) * yield_ratio)
+
+    inserted = 0
+    try:
+        # 1. Shadow table without secondary indexes
+        db.execute(text(f"DROP TABLE IF EXISTS {SHADOW_TABLE}"))
+        db.execute(CreateTable(shadow))
+        db.commit()
+
+        batch = []
+        started = time.perf_counter()
+        for book in books:
+            batch.append(book)
+            if len(batch) >= batch_size:
+                db.execute(insert(shadow), batch)
+                commit_step(started)
+                inserted += len(batch)
+                batch = []
+                if on_progress:
+                    on_progress(inserted)
+                started = time.perf_counter()
+
+        if batch:
+            db.execute(insert(shadow), batch)
+            commit_step(started)
+            inserted += len(batch)
+            if on_progress:
+                on_progress(inserted)
+
+        # 2. Indexes built once, after the bulk load
+        for index in Book.__table__.indexes:
+            columns = ", ".join(column.name for column in index.columns)
+            unique = "UNIQUE " if index.unique else ""
+            started = time.perf_counter()
+            db.execute(text(
+                f"CREATE {unique}INDEX {index.name}__{shadow_color} ON {SHADOW_TABLE} ({columns})"
+            ))
+            commit_step(started)
+
+        # 3. Atomic swap
+        db.connection(execution_options={"sqlite_begin_immediate": True})
+        db.execute(text(f"DROP TABLE IF EXISTS {RETIRED_TABLE}"))
+        db.execute(text(f"ALTER TABLE {Book.__tablename__} RENAME TO {RETIRED_TABLE}"))
+        db.execute(text(f"ALTER TABLE {SHADOW_TABLE} RENAME TO {Book.__tablename__}"))
+        if record_reload:
+            catalog_version.record_reload(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        db.execute(text(f"DROP TABLE IF EXISTS {SHADOW_TABLE}"))
+        db.commit()
+        raise
+
+    # 4. Old catalogue is no longer reachable by readers
+    try:
+        db.execute(text(f"DROP TABLE IF EXISTS {RETIRED_TABLE}"))
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Could not drop {RETIRED_TABLE}, it will be dropped on the next reload: {e}")
+        db.rollback()
+
+    return inserted
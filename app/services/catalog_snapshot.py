@@ -0,0 +1,408 @@
+from sqlalchemy.orm import Session
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.models.book import Book
+from app.config import settings
+from app.core.catalog_version import catalog_version
+from app.database import SessionLocal
+from app.services.catalog_snapshot_file import open_snapshot_file, read_version, write_snapshot_file
+from app.utils.metrics import cache_requests
+import numpy as np
+import logging
+import os
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no cross-process publish lock on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Immutable columnar copy of the ``books`` table
+
+    Rows are stored in id order (the same order SQLite returns them without an
+    ORDER BY). Numeric columns are NumPy arrays, categories are dictionary
+    encoded and titles are interned Python strings. When loaded from a snapshot
+    file the arrays are read-only views over a shared ``mmap`` and the strings
+    are decoded lazily from its heap.
+    """
+    version: int
+    ids: np.ndarray
+    prices: np.ndarray
+    ratings: np.ndarray
+    availability: np.ndarray
+    category_codes: np.ndarray
+    categories: Sequence[str]
+    titles: Sequence[str]
+    image_urls: Sequence[Optional[str]]
+    # Row positions sorted by price ASC (id ASC on ties)
+    price_order: np.ndarray
+    # prices[price_order], searched by the price range queries
+    sorted_prices: np.ndarray
+    # Row positions with rating >= 4 sorted by rating DESC, price ASC, id ASC
+    top_rated_order: np.ndarray
+
+    @classmethod
+    def from_columns(
+        cls,
+        version: int,
+        ids: np.ndarray,
+        prices: np.ndarray,
+        ratings: np.ndarray,
+        availability: np.ndarray,
+        category_codes: np.ndarray,
+        categories: Sequence[str],
+        titles: Sequence[str],
+        image_urls: Sequence[Optional[str]]
+    ) -> "CatalogSnapshot":
+        """Build a snapshot from id-ordered columns, precomputing sort orders"""
+        price_order = np.argsort(prices, kind="stable").astype(np.int32)
+
+        top_rated = np.flatnonzero(ratings >= 4).astype(np.int32)
+        top_rated_order = top_rated[np.lexsort((prices[top_rated], -ratings[top_rated].astype(np.int16)))]
+
+        return cls(
+            version=version,
+            ids=ids,
+            prices=prices,
+            ratings=ratings,
+            availability=availability,
+            category_codes=category_codes,
+            categories=categories,
+            titles=titles,
+            image_urls=image_urls,
+            price_order=price_order,
+            sorted_prices=prices[price_order],
+            top_rated_order=top_rated_order
+        )
+
+    @classmethod
+    def load(cls, db: Session, version: int) -> "CatalogSnapshot":
+        """Load the whole catalogue with a single ordered scan"""
+        rows = (
+            db.query(Book.id, Book.title, Book.price, Book.rating,
+                     Book.availability, Book.category, Book.image_url)
+            .order_by(Book.id.asc())
+            .all()
+        )
+        count = len(rows)
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        prices = np.fromiter((row[2] for row in rows), dtype=np.float64, count=count)
+        ratings = np.fromiter((row[3] for row in rows), dtype=np.int8, count=count)
+        availability = np.fromiter((row[4] for row in rows), dtype=np.int32, count=count)
+
+        category_index: Dict[str, int] = {}
+        category_codes = np.fromiter(
+            (category_index.setdefault(row[5], len(category_index)) for row in rows),
+            dtype=np.int16,
+            count=count
+        )
+
+        return cls.from_columns(
+            version=version,
+            ids=ids,
+            prices=prices,
+            ratings=ratings,
+            availability=availability,
+            category_codes=category_codes,
+            categories=list(category_index),
+            titles=[sys.intern(row[1]) for row in rows],
+            image_urls=[row[6] for row in rows]
+        )
+
+    @classmethod
+    def from_file(cls, path: Path, version: int) -> "CatalogSnapshot":
+        """Map a snapshot file written by ``write`` without copying its columns"""
+        header, columns, strings = open_snapshot_file(path)
+        if "sorted_prices" not in columns:
+            # File published before the column existed
+            columns["sorted_prices"] = columns["prices"][columns["price_order"]]
+        return cls(
+            version=version,
+            categories=header["categories"],
+            titles=strings["titles"],
+            image_urls=strings["image_urls"],
+            **columns
+        )
+
+    def write(self, path: Path, version: int) -> Path:
+        """Publish the snapshot as a memory-mappable file stamped with ``version``"""
+        return write_snapshot_file(
+            path,
+            version,
+            columns={
+                "ids": self.ids,
+                "prices": self.prices,
+                "ratings": self.ratings,
+                "availability": self.availability,
+                "category_codes": self.category_codes,
+                "price_order": self.price_order,
+                "sorted_prices": self.sorted_prices,
+                "top_rated_order": self.top_rated_order
+            },
+            strings={"titles": self.titles, "image_urls": self.image_urls},
+            categories=list(self.categories)
+        )
+
+    @property
+    def total_books(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the snapshot in bytes"""
+        arrays = (self.ids, self.prices, self.ratings, self.availability,
+                  self.category_codes, self.price_order, self.sorted_prices, self.top_rated_order)
+        size = sum(array.nbytes for array in arrays)
+        if isinstance(self.titles, list):
+            size += sys.getsizeof(self.titles) + sum(sys.getsizeof(title) for title in self.titles)
+        if isinstance(self.image_urls, list):
+            size += sys.getsizeof(self.image_urls) + sum(sys.getsizeof(url) for url in self.image_urls)
+        return size
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """Materialize one row as a dictionary compatible with BookResponse"""
+        return {
+            "id": int(self.ids[position]),
+            "title": self.titles[position],
+            "price": float(self.prices[position]),
+            "rating": int(self.ratings[position]),
+            "availability": int(self.availability[position]),
+            "category": self.categories[self.category_codes[position]],
+            "image_url": self.image_urls[position]
+        }
+
+    def rows(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+        return [self.row(position) for position in positions.tolist()]
+
+    def get_books_by_ids(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Rows of the given ids that exist, keyed by id (binary search over the id column)"""
+        wanted = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, wanted)
+        positions[positions == self.total_books] = 0
+        found = positions[self.ids[positions] == wanted] if self.total_books else positions[:0]
+        return {row["id"]: row for row in self.rows(found)}
+
+    def category_code(self, category: str) -> Optional[int]:
+        try:
+            return self.categories.index(category)
+        except ValueError:
+            return None
+
+    def get_books(self, page: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+        offset = (page - 1) * page_size
+        positions = np.arange(offset, min(offset + page_size, self.total_books))
+        return self.rows(positions), self.total_books
+
+    def get_books_by_price_range(self, min_price: float, max_price: float) -> List[Dict[str, Any]]:
+        start = np.searchsorted(self.sorted_prices, min_price, side="left")
+        end = np.searchsorted(self.sorted_prices, max_price, side="right")
+        return self.rows(self.price_order[start:end])
+
+    def get_top_rated_books(self, limit: int, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        order = self.top_rated_order
+        if category is not None:
+            code = self.category_code(category)
+            if code is None:
+                return []
+            order = order[self.category_codes[order] == code]
+        return self.rows(order[:limit])
+
+    def get_categories(self) -> List[Tuple[str, int]]:
+        counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        order = np.argsort(-counts, kind="stable")
+        return [(self.categories[code], int(counts[code])) for code in order.tolist() if counts[code]]
+
+    def _price_cents(self) -> np.ndarray:
+        """
+        Prices in integer cents
+
+        Float sums depend on the order of the terms (AVG in SQLite follows the
+        index it scans), so the averages are summed exactly in cents (exact in
+        float64 too): a mean of 26.925 rounds to 26.93, as the SQL query
+        returns, never to 26.92.
+        """
+        return np.rint(self.prices * 100).astype(np.int64)
+
+    @staticmethod
+    def _average_price(total_cents: int, count: int) -> float:
+        return round(int(total_cents) / count / 100, 2) if count else 0.0
+
+    def get_overview_stats(self) -> Dict:
+        counts = np.bincount(self.ratings)
+        return {
+            "total_books": self.total_books,
+            "average_price": self._average_price(self._price_cents().sum(), self.total_books),
+            "rating_distribution": {rating: int(count) for rating, count in enumerate(counts) if count},
+            "total_categories": int(np.count_nonzero(np.bincount(self.category_codes)))
+        }
+
+    def get_category_stats(self) -> List[Dict]:
+        minlength = len(self.categories)
+        counts = np.bincount(self.category_codes, minlength=minlength)
+        price_sums = np.bincount(self.category_codes, weights=self._price_cents(), minlength=minlength)
+        rating_sums = np.bincount(self.category_codes, weights=self.ratings, minlength=minlength)
+
+        stats = []
+        for code in np.argsort(-counts, kind="stable").tolist():
+            count = int(counts[code])
+            if not count:
+                continue
+            stats.append({
+                "category": self.categories[code],
+                "book_count": count,
+                "average_price": self._average_price(price_sums[code], count),
+                "average_rating": round(float(rating_sums[code] / count), 2)
+            })
+        return stats
+
+
+class CatalogSnapshotService:
+    """
+    Service class holding the current catalogue snapshot
+
+    The snapshot is rebuilt at startup and on every catalogue version bump and
+    swapped in with a single reference assignment, so readers always see either
+    the old or the new snapshot, never a partial one.
+
+    When the loader has published a snapshot file at CATALOG_SNAPSHOT_PATH the
+    snapshot is mapped from it instead of read from SQLite, so all workers share
+    the same pages. ``publish`` records the reload in catalog_meta only once
+    the file is in place, so the bump every worker makes for it maps the new
+    file. The catalogue version poller also checks the file (``poll_file``)
+    and maps a file replaced without a reload, keeping the version: the
+    rows it serves did not change.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._file_identity: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def enable(self) -> None:
+        """Turn on snapshot serving and load the first snapshot"""
+        self.enabled = True
+        self.refresh()
+
+    def get(self) -> Optional[CatalogSnapshot]:
+        """Return the current snapshot, or None when the SQLite path should be used"""
+        if not self.enabled:
+            return None
+
+        snapshot = self._snapshot
+        cache_requests.inc(("catalog_snapshot", "miss" if snapshot is None else "hit"))
+        return snapshot
+
+    def poll_file(self) -> bool:
+        """
+        Map the snapshot file again if it was replaced since it was loaded
+
+        Run by the catalogue version poller, off the request path. The version
+        is not bumped: a publish bumps it through catalog_meta.
+
+        Returns:
+            True if a new file was mapped
+        """
+        if not self.enabled:
+            return False
+        identity = self._stat(Path(settings.CATALOG_SNAPSHOT_PATH))
+        if identity is None or identity == self._file_identity:
+            return False
+        current = self._snapshot
+        self.refresh(None if current is None else current.version)
+        return True
+
+    def refresh(self, version: Optional[int] = None) -> None:
+        """Rebuild the snapshot (from the snapshot file if present, else SQLite) and swap it in"""
+        if not self.enabled:
+            return
+
+        version = catalog_version.current if version is None else version
+        path = Path(settings.CATALOG_SNAPSHOT_PATH)
+
+        with self._lock:
+            identity = self._stat(path)
+            current = self._snapshot
+            if identity is not None and identity == self._file_identity and current is not None:
+                # Same file: only the version moved (e.g. a reload that published nothing new)
+                self._snapshot = replace(current, version=version)
+                return
+            try:
+                if identity is not None:
+                    snapshot = CatalogSnapshot.from_file(path, version)
+                    source = str(path)
+                else:
+                    db = SessionLocal()
+                    try:
+                        snapshot = CatalogSnapshot.load(db, version)
+                    finally:
+                        db.close()
+                    source = "database"
+            except Exception as e:
+                logger.error(f"Failed to build catalog snapshot: {type(e).__name__}: {e}")
+                return
+
+            self._snapshot = snapshot
+            self._file_identity = identity
+
+        logger.info(f"Catalog snapshot v{version} loaded from {source}: {snapshot.total_books} books")
+
+    @staticmethod
+    def publish(db: Session, path: Optional[Path] = None, record_reload: bool = True) -> Tuple[Path, int]:
+        """
+        Build a snapshot from the database and publish it as a snapshot file
+
+        Used by the loaders after each catalogue reload has been committed
+        (the session's transaction is rolled back). The file version is the
+        previous published version plus one; concurrent publishers (scripts, jobs
+        of other workers) are serialized by a lock file next to the snapshot, so
+        each one reads the version left by the previous and versions never repeat.
+
+        With ``record_reload`` the reload is recorded in catalog_meta after the
+        file is in place (the loaders skip recording it themselves), so no
+        worker bumps before it can map the new file. It is recorded even if
+        the publish fails, so the workers still move on to the new rows.
+
+        Returns:
+            (published path, file version)
+        """
+        path = Path(path or settings.CATALOG_SNAPSHOT_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with open(path.with_name(f".{path.name}.lock"), "w") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                version = (read_version(path) or 0) + 1
+                CatalogSnapshot.load(db, version).write(path, version)
+        finally:
+            if record_reload:
+                db.rollback()
+                catalog_version.record_reload(db)
+                db.commit()
+        return path, version
+
+
+# Create singleton instance
+catalog_snapshot_service = CatalogSnapshotService()
+
+# Rebuild the snapshot whenever the catalogue is reloaded, and map files
+# published without a reload
+catalog_version.subscribe(catalog_snapshot_service.refresh)
+catalog_version.watch(catalog_snapshot_service.poll_file)
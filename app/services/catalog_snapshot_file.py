@@ -0,0 +1,199 @@
+"""
+Binary on-disk format of the catalogue snapshot
+
+Layout of a snapshot file::
+
+    b"BOOKSNAP" | header length (uint32 LE) | JSON header | padding | sections
+
+Each section is either a fixed-width column (raw little-endian NumPy data) or
+a string heap (concatenated UTF-8 bytes addressed by a uint64 offsets column
+of ``count + 1`` entries). Sections start on 64-byte boundaries so columns can
+be viewed in place with ``np.frombuffer`` over a read-only ``mmap``: every
+worker mapping the same file shares its pages through the OS page cache.
+
+A new version is published by writing a temporary file (unique per writer)
+next to the target and ``os.replace``-ing it over the published name, which is
+atomic on POSIX.
+Readers that already mapped the previous file keep using its inode until they
+swap to the new one.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import mmap
+import os
+import struct
+import tempfile
+import numpy as np
+
+MAGIC = b"BOOKSNAP"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+class MappedStrings(Sequence):
+    """Read-only sequence of strings decoded lazily from a mapped string heap"""
+
+    def __init__(self, buffer: mmap.mmap, heap_offset: int, offsets: np.ndarray, nullable: bool = False):
+        self._buffer = buffer
+        self._heap_offset = heap_offset
+        self._offsets = offsets
+        self._nullable = nullable
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        start = self._heap_offset + int(self._offsets[index])
+        end = self._heap_offset + int(self._offsets[index + 1])
+        if self._nullable and start == end:
+            return None
+        return self._buffer[start:end].decode("utf-8")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, bytes]:
+    encoded = [value.encode("utf-8") if value else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+    return offsets, b"".join(encoded)
+
+
+def read_version(path: Path) -> Optional[int]:
+    """Return the catalogue version stored in a snapshot file, or None if unreadable"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_length,) = struct.unpack("<I", f.read(4))
+            return json.loads(f.read(header_length))["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_snapshot_file(
+    path: Path,
+    version: int,
+    columns: Dict[str, np.ndarray],
+    strings: Dict[str, Sequence[Optional[str]]],
+    categories: List[str]
+) -> Path:
+    """
+    Write a snapshot file and atomically publish it at ``path``
+
+    Args:
+        path: Published file name (e.g. data/catalog.snap)
+        version: Catalogue version stored in the header
+        columns: Fixed-width columns, all little-endian NumPy arrays
+        strings: String columns, stored as offsets + heap (None stored as empty)
+        categories: Category dictionary indexed by the ``category_codes`` column
+
+    Returns:
+        The published path
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    sections: List[Tuple[str, bytes]] = []
+    header = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "count": len(columns["ids"]),
+        "categories": categories,
+        "columns": {},
+        "strings": {},
+    }
+
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        header["columns"][name] = {"dtype": array.dtype.str, "length": len(array)}
+        sections.append((f"column:{name}", array.tobytes()))
+
+    for name, values in strings.items():
+        offsets, heap = _encode_strings(values)
+        header["strings"][name] = {
+            "length": len(values),
+            "nullable": any(value is None for value in values)
+        }
+        sections.append((f"offsets:{name}", offsets.tobytes()))
+        sections.append((f"heap:{name}", heap))
+
+    # Section offsets are relative to the first aligned byte after the header
+    offset = 0
+    layout = {}
+    for key, data in sections:
+        layout[key] = offset
+        offset = _align(offset + len(data))
+    header["layout"] = layout
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for key, data in sections:
+                f.write(b"\0" * (data_start + layout[key] - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; readers may run as another user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def open_snapshot_file(path: Path) -> Tuple[dict, Dict[str, np.ndarray], Dict[str, MappedStrings]]:
+    """
+    Map a snapshot file read-only
+
+    Returns:
+        (header, columns, strings) where columns are zero-copy NumPy views and
+        strings are lazily decoded sequences over the same mapping
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        raise ValueError(f"Not a catalog snapshot file: {path}")
+
+    (header_length,) = struct.unpack_from("<I", buffer, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(buffer[header_start:header_start + header_length])
+
+    if header.get("format") != FORMAT_VERSION:
+        buffer.close()
+        raise ValueError(f"Unsupported snapshot format {header.get('format')} in {path}")
+
+    data_start = _align(header_start + header_length)
+    layout = {key: data_start + offset for key, offset in header["layout"].items()}
+    columns = {
+        name: np.frombuffer(buffer, dtype=np.dtype(spec["dtype"]), count=spec["length"],
+                            offset=layout[f"column:{name}"])
+        for name, spec in header["columns"].items()
+    }
+    strings = {
+        name: MappedStrings(
+            buffer,
+            layout[f"heap:{name}"],
+            np.frombuffer(buffer, dtype="<u8", count=spec["length"] + 1, offset=layout[f"offsets:{name}"]),
+            nullable=spec["nullable"]
+        )
+        for name, spec in header["strings"].items()
+    }
+
+    return header, columns, strings
@@ -0,0 +1,178 @@
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+from app.core.catalog_version import catalog_version
+from app.models.book import Book
+import hashlib
+import time
+
+# Columns that make up a book's content (everything except the id)
+CONTENT_COLUMNS = ("title", "price", "rating", "availability", "category", "image_url")
+
+# Rows per statement when applying a changeset (stays below SQLite's variable limit)
+APPLY_BATCH_SIZE = 500
+
+
+def content_hash(title: str, price: float, rating: int, availability: int,
+                 category: str, image_url: Optional[str]) -> bytes:
+    """Stable 128-bit hash of a book's content columns"""
+    key = repr((str(title), float(price), int(rating), int(availability), str(category), image_url or None))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+def book_hash(book: Dict) -> bytes:
+    return content_hash(*(book[column] for column in CONTENT_COLUMNS))
+
+
+@dataclass
+class Changeset:
+    """
+    Difference between the current ``books`` table and a new catalogue
+
+    Emitted with the catalogue version bump so caches, rollups and search
+    indexes can apply it incrementally instead of rebuilding from scratch.
+    """
+    inserted: List[Dict] = field(default_factory=list)
+    updated: List[Dict] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+    unchanged: int = 0
+    diff_ms: float = 0.0
+    apply_ms: float = 0.0
+
+    @property
+    def size(self) -> int:
+        """Number of rows written by the changeset"""
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.size == 0
+
+    def summary(self) -> str:
+        return (
+            f"+{len(self.inserted)} ~{len(self.updated)} -{len(self.deleted)} "
+            f"({self.unchanged} unchanged), diff {self.diff_ms:.0f} ms, apply {self.apply_ms:.0f} ms"
+        )
+
+
+def compute_changeset(db: Session, books: Iterable[Dict]) -> Changeset:
+    """
+    Compare new books against the current table by id and content hash
+
+    Args:
+        db: Database session
+        books: Row dictionaries with the Book column names (including id);
+            an iterator is consumed before the table is read
+
+    Returns:
+        Changeset with the rows to insert, update and delete
+    """
+    # A streamed source (the crawl) must not keep the read transaction, and its
+    # WAL snapshot, open while it produces rows
+    books = list(books)
+    start = time.perf_counter()
+
+    current: Dict[int, bytes] = {
+        row[0]: content_hash(*row[1:])
+        for row in db.query(
+            Book.id, Book.title, Book.price, Book.rating,
+            Book.availability, Book.category, Book.image_url
+        )
+    }
+
+    changeset = Changeset()
+    for book in books:
+        existing = current.pop(book["id"], None)
+        if existing is None:
+            changeset.inserted.append(book)
+        elif existing != book_hash(book):
+            changeset.updated.append(book)
+        else:
+            changeset.unchanged += 1
+
+    changeset.deleted = sorted(current)
+    changeset.diff_ms = (time.perf_counter() - start) * 1000
+    return changeset
+
+
+def apply_changeset(
+    db: Session,
+    changeset: Changeset,
+    on_progress: Optional[Callable[[int], None]] = None,
+    record_reload: bool = True
+) -> None:
+    """
+    Apply a changeset in a single transaction
+
+    Args:
+        db: Database session (should own its connection, see LoaderSessionLocal)
+        changeset: Changes computed by compute_changeset
+        on_progress: Callback called after each batch with the rows written so far
+        record_reload: Increment the shared version in the same transaction
+            (False when a snapshot publish records it afterwards)
+    """
+    start = time.perf_counter()
+    written = 0
+
+    def batches(rows):
+        for i in range(0, len(rows), APPLY_BATCH_SIZE):
+            yield rows[i:i + APPLY_BATCH_SIZE]
+
+    try:
+        for batch in batches(changeset.deleted):
+            db.query(Book).filter(Book.id.in_(batch)).delete(synchronize_session=False)
+            written += len(batch)
+            if on_progress:
+                on_progress(written)
+
+        for batch in batches(changeset.updated):
+            db.execute(update(Book), batch)
+            written += len(batch)
+            if on_progress:
+                on_progress(written)
+
+        for batch in batches(changeset.inserted):
+            db.execute(insert(Book), batch)
+            written += len(batch)
+            if on_progress:
+                on_progress(written)
+
+        if record_reload:
+            catalog_version.record_reload(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    changeset.apply_ms = (time.perf_counter() - start) * 1000
+
+
+def sync_books(
+    db: Session,
+    books: Iterable[Dict],
+    on_progress: Optional[Callable[[int], None]] = None,
+    record_reload: bool = True
+) -> Changeset:
+    """
+    Bring the ``books`` table in line with ``books`` writing only the differences
+
+    ``books`` is consumed first; the diff and the writes then run in one
+    transaction that takes the write lock up front (BEGIN IMMEDIATE on
+    LoaderSessionLocal), so a commit from another connection between reading
+    the table and writing it (job progress, request logs) cannot make the
+    write fail with "database is locked". Other writers wait for the diff and
+    the apply, not for the source. ``record_reload`` as in apply_changeset.
+
+    Returns:
+        The applied changeset (empty if the catalogue did not change)
+    """
+    books = list(books)
+    db.connection(execution_options={"sqlite_begin_immediate": True})
+
+    changeset = compute_changeset(db, books)
+    if changeset.is_empty:
+        db.rollback()
+    else:
+        apply_changeset(db, changeset, on_progress, record_reload)
+    return changeset
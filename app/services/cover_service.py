@@ -0,0 +1,282 @@
+from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from app.config import settings
+from app.models.book import Book
+from app.models.cover import Cover
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - thumbnails are skipped without Pillow
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+# Magic bytes -> extension, used instead of trusting the origin's Content-Type
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+def detect_extension(data: bytes) -> Optional[str]:
+    """Image format from the file signature (None if not a supported image)"""
+    for signature, extension in SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+@dataclass
+class StoredCover:
+    """Result of storing one image in the cover store"""
+    content_hash: str
+    extension: str
+    size_bytes: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    has_thumbnail: bool = False
+    deduplicated: bool = False
+
+
+@dataclass
+class CoverSyncResult:
+    """Counters of a cover sync run"""
+    fetched: int = 0
+    deduplicated: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.fetched} covers fetched ({self.deduplicated} duplicates), "
+            f"{self.failed} failed, {self.skipped} already cached"
+        )
+
+
+class CoverStore:
+    """
+    Content-addressed store for cover images
+
+    Originals live at ``full/<h[:2]>/<sha256>.<ext>`` and thumbnails at
+    ``thumb/<h[:2]>/<sha256>.jpg``. Identical images downloaded from
+    different URLs are stored once; files are written to a temporary name and
+    renamed, so readers never see a partial file.
+    """
+
+    def __init__(self, root: str, thumbnail_size: int = 200):
+        self.root = Path(root)
+        self.thumbnail_size = thumbnail_size
+
+    def full_path(self, content_hash: str, extension: str) -> Path:
+        return self.root / "full" / content_hash[:2] / f"{content_hash}.{extension}"
+
+    def thumbnail_path(self, content_hash: str) -> Path:
+        return self.root / "thumb" / content_hash[:2] / f"{content_hash}.jpg"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, data: bytes) -> Optional[StoredCover]:
+        """
+        Store an image and its thumbnail
+
+        Returns:
+            The stored cover, or None if the data is not a supported image
+        """
+        extension = detect_extension(data)
+        if extension is None:
+            return None
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        stored = StoredCover(content_hash=content_hash, extension=extension, size_bytes=len(data))
+
+        path = self.full_path(content_hash, extension)
+        if path.exists():
+            stored.deduplicated = True
+        else:
+            self._write_atomic(path, data)
+
+        if Image is None:
+            return stored
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                stored.width, stored.height = image.size
+                thumbnail_path = self.thumbnail_path(content_hash)
+                if not thumbnail_path.exists():
+                    image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                    output = io.BytesIO()
+                    image.convert("RGB").save(output, "JPEG", quality=85, optimize=True)
+                    self._write_atomic(thumbnail_path, output.getvalue())
+                stored.has_thumbnail = True
+        except Exception as e:
+            logger.warning(f"Could not create thumbnail for {content_hash}: {e}")
+
+        return stored
+
+
+class CoverService:
+    """Downloads book covers into the local store and resolves them for serving"""
+
+    def __init__(self):
+        self._store: Optional[CoverStore] = None
+
+    @property
+    def store(self) -> CoverStore:
+        if self._store is None:
+            self._store = CoverStore(settings.COVERS_DIR, settings.COVER_THUMBNAIL_SIZE)
+        return self._store
+
+    async def fetch_covers(
+        self,
+        urls: List[str],
+        concurrency: int = 16,
+        on_progress: Optional[Callable[[int], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> Tuple[Dict[str, StoredCover], List[str]]:
+        """
+        Download and store covers concurrently
+
+        Downloads run on one HTTP/1.1 connection pool with at most
+        ``concurrency`` requests in flight; hashing and thumbnailing run in
+        worker threads so they do not stall the downloads.
+
+        Returns:
+            (stored covers by URL, URLs that failed)
+        """
+        import httpx
+
+        stored: Dict[str, StoredCover] = {}
+        failed: List[str] = []
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(limits=limits, timeout=30.0, follow_redirects=True) as client:
+            async def fetch(url: str) -> None:
+                if should_stop and should_stop():
+                    return
+                async with semaphore:
+                    try:
+                        response = await client.get(url)
+                        response.raise_for_status()
+                    except httpx.HTTPError as e:
+                        logger.warning(f"Could not download cover {url}: {e}")
+                        failed.append(url)
+                        return
+                cover = await asyncio.to_thread(self.store.put, response.content)
+                if cover is None:
+                    logger.warning(f"Cover {url} is not a supported image")
+                    failed.append(url)
+                    return
+                stored[url] = cover
+                if on_progress:
+                    on_progress(len(stored))
+
+            await asyncio.gather(*(fetch(url) for url in urls))
+
+        return stored, failed
+
+    def sync_covers(
+        self,
+        db: Session,
+        on_progress: Optional[Callable[[int], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> CoverSyncResult:
+        """
+        Download the covers of books whose image_url is not cached yet
+
+        Blocking: runs its own event loop, so call it from a worker thread
+        (the scrape job) or a script, never from a request handler.
+        """
+        cached = {url for (url,) in db.query(Cover.image_url)}
+        urls = sorted({
+            url for (url,) in db.query(Book.image_url).filter(Book.image_url.isnot(None)).distinct()
+        })
+        pending = [url for url in urls if url not in cached]
+
+        result = CoverSyncResult(skipped=len(urls) - len(pending))
+        if not pending:
+            return result
+
+        stored, failed = asyncio.run(self.fetch_covers(
+            pending, settings.COVER_FETCH_CONCURRENCY, on_progress, should_stop
+        ))
+
+        now = datetime.utcnow()
+        for url, cover in stored.items():
+            db.merge(Cover(
+                image_url=url,
+                content_hash=cover.content_hash,
+                extension=cover.extension,
+                content_type=CONTENT_TYPES[cover.extension],
+                size_bytes=cover.size_bytes,
+                width=cover.width,
+                height=cover.height,
+                has_thumbnail=cover.has_thumbnail,
+                fetched_at=now
+            ))
+        db.commit()
+
+        result.fetched = len(stored)
+        result.deduplicated = sum(1 for cover in stored.values() if cover.deduplicated)
+        result.failed = len(failed)
+        return result
+
+    def get_cover_file(self, db: Session, book_id: int, thumbnail: bool = False) -> Optional[Tuple[Path, Cover]]:
+        """
+        Resolve a book's cover to a file in the store
+
+        Returns:
+            (file path, cover row), or None if the book or its cover is unknown
+        """
+        row = (
+            db.query(Cover)
+            .join(Book, Book.image_url == Cover.image_url)
+            .filter(Book.id == book_id)
+            .first()
+        )
+        if row is None:
+            return None
+
+        if thumbnail and row.has_thumbnail:
+            path = self.store.thumbnail_path(row.content_hash)
+        else:
+            path = self.store.full_path(row.content_hash, row.extension)
+
+        if not path.exists():
+            return None
+        return path, row
+
+
+# Create singleton instance
+cover_service = CoverService()
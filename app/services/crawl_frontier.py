@@ -0,0 +1,183 @@
+"""
+Persistent crawl frontier for the scraper
+
+Listing pages and product (detail) URLs are queued in a small SQLite file, and
+parsed records are checkpointed there as they arrive. A crawl interrupted by a
+crash, a timeout or a cancellation resumes from the checkpoint: only the
+listing pages and product pages still pending are fetched again.
+
+The frontier is a scratch file owned by the scraper (``data/crawl_state.db``
+by default), not a table in the application database, so the CLI scraper
+works without the API configuration.
+"""
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import os
+import sqlite3
+
+# Attempts before a product page is given up on
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_run (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    base_url TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS listing_pages (
+    page INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS details (
+    url TEXT PRIMARY KEY,
+    page INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    image_url TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    price REAL,
+    availability INTEGER,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_details_order ON details (page, position);
+CREATE INDEX IF NOT EXISTS ix_details_status ON details (status, page, position);
+"""
+
+
+class CrawlFrontier:
+    """
+    Queue of pending listing/product pages plus the checkpointed records
+
+    Every ``complete_*``/``fail_*`` call commits, so the file always reflects
+    the work done so far. Records are read back in catalogue order (listing
+    page, position on the page), which keeps the sequential book ids stable
+    across resumed crawls.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def start(self, base_url: str, fresh: bool = False) -> bool:
+        """
+        Begin a crawl of base_url, resuming the stored one when possible
+
+        A stored crawl is resumed if it targets the same site and did not
+        finish; otherwise (or with fresh=True) the frontier is cleared.
+
+        Returns:
+            True if an interrupted crawl is being resumed
+        """
+        run = self._conn.execute("SELECT base_url, finished_at FROM crawl_run").fetchone()
+        if not fresh and run is not None and run[0] == base_url and run[1] is None:
+            return True
+
+        with self._conn:
+            self._conn.execute("DELETE FROM crawl_run")
+            self._conn.execute("DELETE FROM listing_pages")
+            self._conn.execute("DELETE FROM details")
+            self._conn.execute(
+                "INSERT INTO crawl_run (id, base_url, started_at) VALUES (1, ?, ?)",
+                (base_url, datetime.utcnow().isoformat())
+            )
+        return False
+
+    def finish(self) -> None:
+        """Mark the crawl as complete, so the next start() begins a new one"""
+        with self._conn:
+            self._conn.execute("UPDATE crawl_run SET finished_at = ?", (datetime.utcnow().isoformat(),))
+
+    def add_listing_pages(self, pages: List[Tuple[int, str]]) -> None:
+        """Queue listing pages as (page number, url); known pages are ignored"""
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO listing_pages (page, url) VALUES (?, ?)", pages)
+
+    def pending_listing_pages(self) -> List[Tuple[int, str]]:
+        return self._conn.execute("SELECT page, url FROM listing_pages WHERE done = 0 ORDER BY page").fetchall()
+
+    def complete_listing_page(self, page: int, items: List[Dict]) -> None:
+        """Queue the page's product URLs and mark the listing page as done"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO details (url, page, position, title, rating, image_url) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (item["detail_url"], page, position, item["title"], item["rating"], item["image_url"])
+                    for position, item in enumerate(items)
+                ]
+            )
+            self._conn.execute("UPDATE listing_pages SET done = 1 WHERE page = ?", (page,))
+
+    def pending_details(self, limit: int) -> List[str]:
+        """Next product URLs to fetch, in catalogue order"""
+        return [
+            row[0] for row in self._conn.execute(
+                "SELECT url FROM details WHERE status = 'pending' ORDER BY page, position LIMIT ?", (limit,)
+            )
+        ]
+
+    def complete_details(self, results: List[Tuple[str, float, int, str]]) -> None:
+        """Checkpoint parsed product pages as (url, price, availability, category)"""
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE details SET status = 'done', price = ?, availability = ?, category = ? WHERE url = ?",
+                [(price, availability, category, url) for url, price, availability, category in results]
+            )
+
+    def fail_details(self, urls: List[str]) -> None:
+        """Count a failed attempt; product pages failing MAX_ATTEMPTS times are skipped"""
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE details SET attempts = attempts + 1, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE url = ?",
+                [(MAX_ATTEMPTS, url) for url in urls]
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Listing pages done and product pages per status"""
+        counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM details GROUP BY status").fetchall())
+        counts["listing_done"] = self._conn.execute("SELECT COUNT(*) FROM listing_pages WHERE done = 1").fetchone()[0]
+        counts["listing_total"] = self._conn.execute("SELECT COUNT(*) FROM listing_pages").fetchone()[0]
+        return counts
+
+    def iter_done(self, after: Tuple[int, int] = (0, -1)) -> Iterator[Tuple[Tuple[int, int], Optional[Dict]]]:
+        """
+        Records after the (page, position) cursor, in catalogue order
+
+        Stops at the first product page still pending, so the caller only ever
+        sees a contiguous prefix of the catalogue. Failed product pages are
+        yielded as None so the cursor can move past them.
+        """
+        rows = self._conn.execute(
+            "SELECT page, position, status, title, price, rating, availability, category, image_url "
+            "FROM details WHERE (page, position) > (?, ?) ORDER BY page, position",
+            after
+        )
+        for page, position, status, title, price, rating, availability, category, image_url in rows:
+            if status == "pending":
+                return
+            record = None
+            if status == "done":
+                record = {
+                    "title": title,
+                    "price": price,
+                    "rating": rating,
+                    "availability": availability,
+                    "category": category,
+                    "image_url": image_url,
+                }
+            yield (page, position), record
@@ -0,0 +1,134 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.core.startup import startup_state
+from app.database import engine, log_engine
+from app.services.api_log_store import api_log_store
+import anyio.to_thread
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def pool_usage(pool_engine: Engine) -> Dict[str, Any]:
+    """Connections in use of an engine's pool (StaticPool shares one connection)"""
+    pool = pool_engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+    return {
+        "pool": "QueuePool",
+        "checked_out": pool.checkedout(),
+        "capacity": capacity,
+        "saturation": round(pool.checkedout() / capacity, 3) if capacity else None,
+    }
+
+
+class HealthChecker:
+    """
+    Background readiness checks, refreshed every HEALTH_CHECK_INTERVAL_SECONDS
+
+    Probes read the last report instead of touching the database, so the
+    database sees one ``SELECT 1`` per interval per worker however often the
+    orchestrator probes. The worker is ready when startup (including the cache
+    warm-up) finished, the database answered, the event loop is not lagging
+    beyond HEALTH_MAX_EVENT_LOOP_LAG_MS, the log buffer is below
+    HEALTH_MAX_LOG_BUFFER_RATIO of its capacity, and the report is fresh.
+    Pool usage and the warm state after reloads are reported but do not gate
+    readiness: every worker re-warms at once after a reload, and failing them
+    all together would take the service out of rotation.
+    """
+
+    def __init__(self):
+        self.report: Optional[Dict[str, Any]] = None
+        self.checked_at: Optional[float] = None
+
+    @staticmethod
+    def check_database() -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    async def check(self, event_loop_lag: float = 0.0) -> Dict[str, Any]:
+        """Run the checks once and store the report"""
+        database = await asyncio.to_thread(self.check_database)
+
+        buffered = api_log_store.buffered
+        buffer_limit = settings.HEALTH_MAX_LOG_BUFFER_RATIO * api_log_store.max_buffer
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        checks = {
+            "startup": startup_state.check(),
+            "database": database,
+            "event_loop": {
+                "ok": event_loop_lag * 1000 <= settings.HEALTH_MAX_EVENT_LOOP_LAG_MS,
+                "lag_ms": round(event_loop_lag * 1000, 3),
+            },
+            "log_buffer": {"ok": buffered < buffer_limit, "buffered": buffered, "dropped": api_log_store.dropped},
+        }
+        report = {
+            "ready": all(check["ok"] for check in checks.values()),
+            "checks": checks,
+            "pools": {
+                "api": pool_usage(engine),
+                "log": pool_usage(log_engine),
+                "threadpool": {
+                    "in_use": limiter.borrowed_tokens,
+                    "capacity": limiter.total_tokens,
+                    "saturation": round(limiter.borrowed_tokens / limiter.total_tokens, 3),
+                },
+            },
+        }
+        if settings.WARMUP_ENABLED:
+            from app.services.warmup_service import warmup_service
+
+            report["warm_up"] = warmup_service.status()
+
+        self.report = report
+        self.checked_at = time.monotonic()
+        return report
+
+    async def run(self, interval: float) -> None:
+        """Refresh the report every ``interval`` seconds (lag measured from this loop's own wake-ups)"""
+        loop = asyncio.get_running_loop()
+        lag = 0.0
+        while True:
+            try:
+                await self.check(lag)
+            except Exception as e:
+                logger.error(f"Health check failed: {type(e).__name__}: {e}")
+            due = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - due)
+
+    def readiness(self) -> Dict[str, Any]:
+        """Last report, not ready when missing or older than three intervals"""
+        report = self.report
+        if report is None:
+            return {"ready": False, "reason": "no health check yet", "startup": startup_state.snapshot()}
+
+        # Startup is read live, so the worker turns ready as soon as warm-up ends
+        checks = {**report["checks"], "startup": startup_state.check()}
+        age = time.monotonic() - self.checked_at
+        report = {
+            **report,
+            "ready": all(check["ok"] for check in checks.values()),
+            "checks": checks,
+            "age_seconds": round(age, 3),
+            "startup": startup_state.snapshot(),
+        }
+        if age > 3 * settings.HEALTH_CHECK_INTERVAL_SECONDS:
+            report["ready"] = False
+            report["reason"] = "health check is stale"
+        return report
+
+
+# Create singleton instance
+health_checker = HealthChecker()
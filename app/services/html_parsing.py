@@ -0,0 +1,143 @@
+"""
+HTML parsing for the books.toscrape.com pages
+
+Kept free of application imports so it can be loaded cheaply by the parser
+process pool. lxml is used when installed (imported on the first parse, not
+when the API imports this module); otherwise BeautifulSoup parses only the
+needed elements through a SoupStrainer.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import re
+
+RATING_MAP = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+
+_PRICE_CHARS = re.compile(r'[^\d.]')
+_DIGITS = re.compile(r'\d+')
+_PAGE_OF = re.compile(r'Page\s+\d+\s+of\s+(\d+)')
+
+
+@lru_cache(maxsize=1)
+def _lxml_html():
+    """lxml.html, or None when lxml is not installed"""
+    try:
+        from lxml import html
+    except ImportError:  # pragma: no cover - lxml is in requirements.txt
+        return None
+    return html
+
+
+def clean_price(price_str):
+    """Limpa a string de preço, removendo caracteres indesejados (como símbolos de moeda ou codificação errada) e a converte para float."""
+    cleaned_str = _PRICE_CHARS.sub('', price_str)
+
+    try:
+        return float(cleaned_str)
+    except ValueError:
+        print(f"Aviso: Não foi possível converter o preço original '{price_str}' após limpeza para '{cleaned_str}'. Usando 0.0.")
+        return 0.0
+
+
+def _availability(text: str) -> int:
+    match = _DIGITS.search(text)
+    return int(match.group(0)) if match else 0
+
+
+def _listing_item(title: str, href: str, image_src: str, star_classes: List[str], base_url: str) -> Dict:
+    star_rating = star_classes[1] if len(star_classes) > 1 else ''
+    return {
+        'title': title,
+        'detail_path': 'catalogue/' + href.replace('../', '') if 'catalogue' not in href else href,
+        'image_url': base_url + image_src.replace('../..', ''),
+        'rating': RATING_MAP.get(star_rating, 0),
+    }
+
+
+def _page_count(text: Optional[str]) -> Optional[int]:
+    match = _PAGE_OF.search(text or '')
+    return int(match.group(1)) if match else None
+
+
+def parse_listing(page_html: str, base_url: str) -> Tuple[List[Dict], Optional[str], Optional[int]]:
+    """
+    Parse a catalogue listing page
+
+    Returns:
+        (items, next page path relative to base_url or None, total listing
+        pages from the "Page 1 of N" pager or None). Each item has title,
+        detail_path, image_url and rating.
+    """
+    lxml_html = _lxml_html()
+    if lxml_html is not None:
+        root = lxml_html.fromstring(page_html)
+        items = []
+        for article in root.xpath('//article[contains(concat(" ", @class, " "), " product_pod ")]'):
+            link = article.find('.//h3/a')
+            img = article.find('.//img')
+            star = article.find('.//p')
+            items.append(_listing_item(
+                link.get('title'), link.get('href'), img.get('src'),
+                (star.get('class') or '').split(), base_url
+            ))
+        next_href = root.xpath('//li[contains(concat(" ", @class, " "), " next ")]/a/@href')
+        current = root.xpath('//li[contains(concat(" ", @class, " "), " current ")]')
+        return (
+            items,
+            ('catalogue/' + next_href[0]) if next_href else None,
+            _page_count(current[0].text_content()) if current else None,
+        )
+
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    only = SoupStrainer(lambda name, attrs: (
+        (name == 'article' and 'product_pod' in (attrs.get('class') or ''))
+        or (name == 'li' and any(c in (attrs.get('class') or '') for c in ('next', 'current')))
+    ))
+    soup = BeautifulSoup(page_html, 'html.parser', parse_only=only)
+    items = [
+        _listing_item(article.h3.a['title'], article.h3.a['href'], article.find('img')['src'],
+                      article.p['class'], base_url)
+        for article in soup.find_all('article', class_='product_pod')
+    ]
+    next_page_tag = soup.find('li', class_='next')
+    current_tag = soup.find('li', class_='current')
+    return (
+        items,
+        ('catalogue/' + next_page_tag.a['href']) if next_page_tag else None,
+        _page_count(current_tag.text) if current_tag else None,
+    )
+
+
+def parse_product(page_html: str) -> Tuple[float, int, str]:
+    """
+    Parse a product page
+
+    Returns:
+        (price incl. tax, units available, category)
+    """
+    lxml_html = _lxml_html()
+    if lxml_html is not None:
+        root = lxml_html.fromstring(page_html)
+        cells = root.xpath('//table[contains(concat(" ", @class, " "), " table-striped ")]//td')
+        crumbs = root.xpath('//ul[contains(concat(" ", @class, " "), " breadcrumb ")]/li')
+        return (
+            clean_price(cells[3].text_content()),
+            _availability(cells[5].text_content()),
+            crumbs[-2].text_content().strip(),
+        )
+
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    only = SoupStrainer(lambda name, attrs: (
+        (name == 'table' and 'table-striped' in (attrs.get('class') or ''))
+        or (name == 'ul' and 'breadcrumb' in (attrs.get('class') or ''))
+    ))
+    soup = BeautifulSoup(page_html, 'html.parser', parse_only=only)
+    cells = soup.find('table', class_='table-striped').find_all('td')
+    breadcrumb = soup.find('ul', class_='breadcrumb').find_all('li')
+    return clean_price(cells[3].text), _availability(cells[5].text), breadcrumb[-2].text.strip()
+
+
+def parse_products(pages: List[str]) -> List[Tuple[float, int, str]]:
+    """Parse several product pages (one process pool task per listing page)"""
+    return [parse_product(page_html) for page_html in pages]
@@ -0,0 +1,417 @@
+from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.config import settings
+from app.core.catalog_version import catalog_version
+from app.database import SessionLocal, LoaderSessionLocal
+from app.models.job import Job
+from app.services.catalog_loader import load_books
+from app.services.catalog_sync import sync_books
+from app.services.catalog_snapshot import catalog_snapshot_service
+from app.services.cover_service import cover_service
+from app.services.scraper_service import ScrapeCancelled, iter_books, stream_books_csv
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_JOB = "scrape"
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def worker_id() -> str:
+    """Owner tag of the jobs started by this process (host:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobAlreadyRunning(Exception):
+    """Raised when a job of the same type is already pending or running"""
+
+    def __init__(self, job_id: int):
+        super().__init__(f"Job {job_id} is already running")
+        self.job_id = job_id
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class JobTimedOut(Exception):
+    """Raised when a job runs past its time limit"""
+
+
+@dataclass
+class JobProgress:
+    """Progress counters shared between the worker thread and the flush loop"""
+    stage: str = "pending"
+    pages_fetched: int = 0
+    rows_scraped: int = 0
+    rows_upserted: int = 0
+    rows_per_second: Optional[float] = None
+
+
+class JobRunner:
+    """
+    In-process runner for the scrape-and-load pipeline
+
+    Jobs run as asyncio tasks; the blocking scraper and loader run in a worker
+    thread via ``asyncio.to_thread`` so they never hold a request threadpool
+    slot, with HTML parsing offloaded to the scraper's process pool. Progress
+    is kept in memory by the worker thread and flushed to the ``jobs`` table
+    every JOB_PROGRESS_FLUSH_SECONDS by the task, in a thread so the commit
+    never blocks the event loop. Each flush is also the job's heartbeat.
+
+    The scraper checkpoints to its crawl frontier, so a scrape that failed,
+    timed out or was cancelled is resumed by the next job.
+
+    Only one scrape job may be pending or running at a time: the in-process
+    lock serializes triggers and the ``jobs`` table is checked for an active
+    job in the same write transaction that creates the new one, so triggers
+    in different worker processes cannot both get through. Cancellation is cooperative: the scraper
+    checks before each download and between books, and the loader between
+    batches (rolling back). SCRAPER_JOB_TIMEOUT_SECONDS is a hard limit: the
+    job is cancelled, given SCRAPER_JOB_STOP_GRACE_SECONDS to stop, and
+    marked as failed whether or not the thread has returned.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._cancel_events: Dict[int, threading.Event] = {}
+
+    @staticmethod
+    def _update_job(job_id: int, **fields) -> Optional[Job]:
+        """Update a job and its heartbeat (blocking, run it via ``asyncio.to_thread``)"""
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return None
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+            db.refresh(job)
+            return job
+        finally:
+            db.close()
+
+    async def _save_job(self, job_id: int, **fields) -> Optional[Job]:
+        """``_update_job`` in a thread, off the event loop"""
+        return await asyncio.to_thread(self._update_job, job_id, **fields)
+
+    @staticmethod
+    def get_job(db: Session, job_id: int) -> Optional[Job]:
+        """Get a job by its ID"""
+        return db.query(Job).filter(Job.id == job_id).first()
+
+    @staticmethod
+    def get_active_job(db: Session, job_type: str = SCRAPE_JOB) -> Optional[Job]:
+        """Get the pending or running job of the given type, if any"""
+        return (
+            db.query(Job)
+            .filter(Job.job_type == job_type, Job.status.in_(ACTIVE_STATUSES))
+            .order_by(Job.id.desc())
+            .first()
+        )
+
+    @staticmethod
+    def get_recent_jobs(db: Session, job_type: str = SCRAPE_JOB, limit: int = 10) -> List[Job]:
+        """Get the most recent jobs of the given type"""
+        return (
+            db.query(Job)
+            .filter(Job.job_type == job_type)
+            .order_by(Job.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def _is_interrupted(job: Job, now: datetime) -> bool:
+        """Whether an active job's owner is gone (called at startup, before this process runs any job)"""
+        heartbeat = job.heartbeat_at or job.created_at
+        if heartbeat is None or now - heartbeat > timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS):
+            return True
+
+        # Recent heartbeat: only a dead owner on this host is known to be gone
+        host, _, pid = (job.owner or "").rpartition(":")
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        return int(pid) == os.getpid() or not _pid_alive(int(pid))
+
+    @classmethod
+    def recover_interrupted_jobs(cls) -> int:
+        """
+        Mark jobs left pending/running by a dead process as failed
+
+        Called at startup of every worker, so the jobs of live sibling workers
+        (same host, or another host with a recent heartbeat) are left alone;
+        a job is interrupted when its heartbeat is older than
+        JOB_HEARTBEAT_TIMEOUT_SECONDS or its owner process on this host exited.
+
+        Returns:
+            Number of jobs marked as failed
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            jobs = [
+                job for job in db.query(Job).filter(Job.status.in_(ACTIVE_STATUSES)).all()
+                if cls._is_interrupted(job, now)
+            ]
+            for job in jobs:
+                job.status = "failed"
+                job.error_message = "Interrupted by API restart"
+                job.finished_at = datetime.utcnow()
+            db.commit()
+            return len(jobs)
+        finally:
+            db.close()
+
+    @classmethod
+    def _create_job(cls, job_type: str, triggered_by: Optional[str]) -> Job:
+        """
+        Insert a pending job unless one of the same type is active (blocking)
+
+        The check and the insert share one BEGIN IMMEDIATE transaction: a
+        trigger in another worker process waits for the write lock and then
+        sees this job, instead of both reading "no active job" first.
+        """
+        db = LoaderSessionLocal()
+        try:
+            db.connection(execution_options={"sqlite_begin_immediate": True})
+            active = cls.get_active_job(db, job_type)
+            if active is not None:
+                raise JobAlreadyRunning(active.id)
+
+            job = Job(
+                job_type=job_type, status="pending", triggered_by=triggered_by,
+                owner=worker_id(), heartbeat_at=datetime.utcnow()
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job
+        finally:
+            db.close()
+
+    async def start_scrape(self, triggered_by: Optional[str] = None) -> Job:
+        """
+        Create a scrape job and start it in the background
+
+        Raises:
+            JobAlreadyRunning: If another scrape job is pending or running
+        """
+        async with self._lock:
+            job = await asyncio.to_thread(self._create_job, SCRAPE_JOB, triggered_by)
+
+            cancel_event = threading.Event()
+            self._cancel_events[job.id] = cancel_event
+            self._tasks[job.id] = asyncio.create_task(self._run_scrape(job.id, cancel_event))
+
+        return job
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        """
+        Request cancellation of a pending or running job
+
+        The flag is persisted, so a job running in another worker process is
+        cancelled at its next progress flush.
+
+        Returns:
+            The updated job, or None if it does not exist
+        """
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+
+        db = SessionLocal()
+        try:
+            job = self.get_job(db, job_id)
+            if job is None:
+                return None
+            if job.status in ACTIVE_STATUSES:
+                job.cancel_requested = True
+                db.commit()
+                db.refresh(job)
+            return job
+        finally:
+            db.close()
+
+    @staticmethod
+    def _scrape_and_load(progress: JobProgress, cancel_event: threading.Event) -> str:
+        """Blocking pipeline body, executed in a worker thread"""
+        progress.stage = "scraping"
+
+        def on_page(pages_fetched: int, rows_scraped: int):
+            progress.pages_fetched = pages_fetched
+            progress.rows_scraped = rows_scraped
+
+        def scraped_books():
+            # Parsed books stream straight into the loader while the CSV is written
+            yield from stream_books_csv(iter_books(
+                on_page=on_page,
+                should_stop=cancel_event.is_set,
+                base_url=settings.SCRAPER_BASE_URL,
+                fetch_concurrency=settings.SCRAPER_FETCH_CONCURRENCY,
+                parse_workers=settings.SCRAPER_PARSE_WORKERS,
+                state_path=settings.SCRAPER_STATE_PATH,
+                checkpoint_every=settings.SCRAPER_CHECKPOINT_EVERY,
+                fetch_timeout=(settings.SCRAPER_CONNECT_TIMEOUT_SECONDS, settings.SCRAPER_READ_TIMEOUT_SECONDS)
+            ))
+            progress.stage = "loading"
+
+        books = scraped_books()
+        load_start = time.perf_counter()
+
+        def on_batch(rows_upserted: int):
+            if cancel_event.is_set():
+                raise JobCancelled()
+            progress.rows_upserted = rows_upserted
+            progress.rows_per_second = rows_upserted / max(time.perf_counter() - load_start, 1e-9)
+
+        # With the snapshot enabled the publish records the reload once the
+        # file is in place; without it the loader records it with the rows
+        publish = settings.CATALOG_SNAPSHOT_ENABLED
+        db = LoaderSessionLocal()
+        try:
+            if settings.CATALOG_LOAD_MODE == "swap":
+                changeset = None
+                inserted = load_books(
+                    db, books, on_progress=on_batch, yield_ratio=settings.CATALOG_LOAD_YIELD_RATIO,
+                    record_reload=not publish
+                )
+            else:
+                changeset = sync_books(db, books, on_progress=on_batch, record_reload=not publish)
+
+            if publish and (changeset is None or not changeset.is_empty):
+                progress.stage = "publishing"
+                catalog_snapshot_service.publish(db)
+        finally:
+            db.close()
+
+        if changeset is not None and changeset.is_empty:
+            message = f"Catalogue unchanged ({changeset.unchanged} books from {progress.pages_fetched} pages)"
+        else:
+            # Invalidates caches, leaderboards and reloads the snapshot (unless the poller already did)
+            catalog_version.bump_recorded(changeset)
+
+            if changeset is None:
+                message = f"Catalogue swapped: {inserted} books loaded from {progress.pages_fetched} pages"
+            else:
+                message = f"Catalogue synced from {progress.pages_fetched} pages: {changeset.summary()}"
+
+        if settings.COVERS_ENABLED:
+            progress.stage = "covers"
+            message += f"; {JobRunner._sync_covers(cancel_event)}"
+
+        return message
+
+    @staticmethod
+    def _sync_covers(cancel_event: threading.Event) -> str:
+        """Download new covers; failures are reported, not raised (the catalogue is already loaded)"""
+        db = LoaderSessionLocal()
+        try:
+            return cover_service.sync_covers(db, should_stop=cancel_event.is_set).summary()
+        except Exception as e:
+            logger.error(f"Cover sync failed: {type(e).__name__}: {e}", exc_info=True)
+            db.rollback()
+            return f"cover sync failed: {type(e).__name__}: {e}"
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _stop_timed_out(work: asyncio.Future, cancel_event: threading.Event) -> None:
+        """
+        Cancel a job past SCRAPER_JOB_TIMEOUT_SECONDS and raise JobTimedOut
+
+        The worker thread gets SCRAPER_JOB_STOP_GRACE_SECONDS to notice the
+        flag; a thread still running after that is left to finish on its own
+        (every download has a timeout, so it stops at the next check).
+        """
+        cancel_event.set()
+        await asyncio.wait({work}, timeout=settings.SCRAPER_JOB_STOP_GRACE_SECONDS)
+        if work.done() and work.exception() is None:
+            return
+        if not work.done():
+            # The outcome of the abandoned thread is only logged by asyncio if nobody retrieves it
+            work.add_done_callback(lambda future: future.cancelled() or future.exception())
+        raise JobTimedOut(f"Timed out after {settings.SCRAPER_JOB_TIMEOUT_SECONDS}s")
+
+    async def _run_scrape(self, job_id: int, cancel_event: threading.Event) -> None:
+        progress = JobProgress()
+        started = time.monotonic()
+        await self._save_job(job_id, status="running", stage=progress.stage, started_at=datetime.utcnow())
+
+        work = asyncio.ensure_future(asyncio.to_thread(self._scrape_and_load, progress, cancel_event))
+        deadline = started + settings.SCRAPER_JOB_TIMEOUT_SECONDS
+        try:
+            while not work.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    await self._stop_timed_out(work, cancel_event)
+                    break
+                await asyncio.wait({work}, timeout=min(settings.JOB_PROGRESS_FLUSH_SECONDS, remaining))
+
+                job = await self._save_job(
+                    job_id,
+                    stage=progress.stage,
+                    pages_fetched=progress.pages_fetched,
+                    rows_scraped=progress.rows_scraped,
+                    rows_upserted=progress.rows_upserted,
+                    rows_per_second=progress.rows_per_second
+                )
+                if job is not None and job.cancel_requested:
+                    cancel_event.set()
+
+            message = work.result()
+            await self._save_job(job_id, status="succeeded", message=message, finished_at=datetime.utcnow())
+            logger.info(f"Scrape job {job_id} succeeded: {message}")
+
+        except JobTimedOut as e:
+            logger.warning(f"Scrape job {job_id} timed out: {e}")
+            await self._save_job(job_id, status="failed", error_message=str(e), finished_at=datetime.utcnow())
+
+        except (JobCancelled, ScrapeCancelled):
+            await self._save_job(job_id, status="cancelled", message="Cancelled on request", finished_at=datetime.utcnow())
+            logger.info(f"Scrape job {job_id} cancelled")
+
+        except Exception as e:
+            logger.error(f"Scrape job {job_id} failed: {type(e).__name__}: {e}", exc_info=True)
+            await self._save_job(
+                job_id,
+                status="failed",
+                error_message=f"{type(e).__name__}: {e}",
+                finished_at=datetime.utcnow()
+            )
+
+        finally:
+            await self._save_job(
+                job_id,
+                stage=progress.stage,
+                pages_fetched=progress.pages_fetched,
+                rows_scraped=progress.rows_scraped,
+                rows_upserted=progress.rows_upserted,
+                rows_per_second=progress.rows_per_second
+            )
+            self._tasks.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+
+# Create singleton instance
+job_runner = JobRunner()
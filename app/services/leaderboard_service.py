@@ -0,0 +1,117 @@
+from sqlalchemy.orm import Session
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from app.models.book import Book
+from app.core.catalog_version import catalog_version
+from app.utils.metrics import cache_requests
+import threading
+
+
+# Ratings that make a book "top rated", best tier first
+TOP_RATED_TIERS = (5, 4)
+
+
+@dataclass
+class Leaderboard:
+    """
+    Materialized top-rated ranking for one catalogue version
+
+    Each rating tier holds book ids already sorted by price ASC (id ASC on ties),
+    so walking the tiers in TOP_RATED_TIERS order yields the same ranking as
+    ``ORDER BY rating DESC, price ASC``.
+    """
+    version: int
+    tiers: Dict[int, array] = field(default_factory=dict)
+    category_tiers: Dict[str, Dict[int, array]] = field(default_factory=dict)
+
+    @staticmethod
+    def _slice(tiers: Dict[int, array], limit: int) -> List[int]:
+        ids: List[int] = []
+        for rating in TOP_RATED_TIERS:
+            remaining = limit - len(ids)
+            if remaining <= 0:
+                break
+            ids.extend(tiers.get(rating, ())[:remaining])
+        return ids
+
+    def top_ids(self, limit: int, category: Optional[str] = None) -> List[int]:
+        """Return the first ``limit`` book ids, optionally within one category"""
+        if category is None:
+            return self._slice(self.tiers, limit)
+        return self._slice(self.category_tiers.get(category, {}), limit)
+
+
+class LeaderboardService:
+    """Service class for the precomputed top-rated leaderboard"""
+
+    def __init__(self):
+        self._board: Optional[Leaderboard] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build(db: Session, version: int) -> Leaderboard:
+        """
+        Build the leaderboard with a single ordered scan of the top-rated books
+        """
+        rows = (
+            db.query(Book.id, Book.rating, Book.category)
+            .filter(Book.rating >= min(TOP_RATED_TIERS))
+            .order_by(Book.rating.desc(), Book.price.asc(), Book.id.asc())
+            .all()
+        )
+
+        board = Leaderboard(version=version)
+        for book_id, rating, category in rows:
+            board.tiers.setdefault(rating, array('q')).append(book_id)
+            board.category_tiers.setdefault(category, {}).setdefault(rating, array('q')).append(book_id)
+
+        return board
+
+    def get_leaderboard(self, db: Session) -> Leaderboard:
+        """Return the leaderboard, rebuilding it if the catalogue version changed"""
+        version = catalog_version.current
+        board = self._board
+
+        if board is None or board.version != version:
+            with self._lock:
+                board = self._board
+                if board is None or board.version != version:
+                    cache_requests.inc(("leaderboard", "miss"))
+                    board = self.build(db, version)
+                    self._board = board
+                    return board
+
+        cache_requests.inc(("leaderboard", "hit"))
+        return board
+
+    def invalidate(self) -> None:
+        """Drop the current leaderboard so the next call rebuilds it"""
+        self._board = None
+
+    @staticmethod
+    def fetch_books(db: Session, book_ids: List[int]) -> List[Book]:
+        """Load books by id with one primary-key IN query, preserving the given order"""
+        if not book_ids:
+            return []
+
+        books = db.query(Book).filter(Book.id.in_(book_ids)).all()
+        by_id = {book.id: book for book in books}
+        return [by_id[book_id] for book_id in book_ids if book_id in by_id]
+
+    def get_top_rated_books(
+        self,
+        db: Session,
+        limit: int = 10,
+        category: Optional[str] = None
+    ) -> List[Book]:
+        """
+        Get top rated books (rating >= 4) as an O(limit) slice of the leaderboard
+        Ordered by rating DESC, then by price ASC
+        """
+        ids = self.get_leaderboard(db).top_ids(limit, category)
+        return self.fetch_books(db, ids)
+
+
+# Create singleton instance
+leaderboard_service = LeaderboardService()
@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from app.models.book import Book
-import pandas as pd
+from app.services.response_cache import response_cache
 
 
 class MLService:
@@ -19,8 +19,13 @@ class MLService:
         - Availability buckets
 
         Returns:
-            Dictionary with features array and feature names
+            Dictionary with features array and feature names (cached per
+            catalogue version)
         """
+        return response_cache.get("ml_features", lambda: MLService._build_ml_features(db, limit), limit)
+
+    @staticmethod
+    def _build_ml_features(db: Session, limit: int) -> Dict[str, Any]:
         books = db.query(Book).limit(limit).all()
 
         if not books:
@@ -30,7 +35,9 @@ class MLService:
                 "total_samples": 0
             }
 
-        # Convert to pandas for easier processing
+        # Convert to pandas for easier processing (imported here: only /ml/* needs it)
+        import pandas as pd
+
         data = []
         for book in books:
             data.append({
@@ -93,6 +100,8 @@ class MLService:
         Returns:
             Dictionary with training data and metadata
         """
+        import pandas as pd
+
         books = db.query(Book).all()
 
         data = []
@@ -0,0 +1,65 @@
+from typing import Any, Callable, Dict, Hashable, Tuple
+from app.core.catalog_version import catalog_version
+from app.utils.metrics import cache_requests
+import threading
+
+
+class ResponseCache:
+    """
+    Results of catalogue-wide queries, kept per catalogue version
+
+    Entries remember the catalogue version they were computed from and are
+    recomputed on the first read after a reload, like the leaderboard. The
+    version is read before computing, so a result computed while a reload
+    lands is recomputed on the next read instead of being served as current.
+
+    Concurrent misses on the same key compute once; other keys are not
+    blocked meanwhile.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, compute: Callable[[], Any], *params: Hashable) -> Any:
+        """
+        Return the cached result of ``compute`` for ``name`` and ``params``
+
+        Args:
+            name: Cached query (also the cache label in cache_requests_total)
+            compute: Computes the result for the current catalogue
+            params: Query parameters that are part of the key (e.g. a limit)
+        """
+        key = (name,) + params
+        version = catalog_version.current
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            cache_requests.inc((name, "hit"))
+            return entry[1]
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                cache_requests.inc((name, "hit"))
+                return entry[1]
+
+            cache_requests.inc((name, "miss"))
+            value = compute()
+            self._entries[key] = (version, value)
+            return value
+
+    def is_current(self, name: str, *params: Hashable) -> bool:
+        """Whether ``name`` is cached for the current catalogue version"""
+        entry = self._entries.get((name,) + params)
+        return entry is not None and entry[0] == catalog_version.current
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Create singleton instance
+response_cache = ResponseCache()
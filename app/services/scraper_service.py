@@ -0,0 +1,269 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.services.crawl_frontier import CrawlFrontier
+from app.services.html_parsing import parse_listing, parse_products
+import multiprocessing
+import threading
+import csv
+import os
+
+
+# --- Configuração ---
+BASE_URL = 'https://books.toscrape.com/'
+DATA_FILE = 'data/books.csv'
+CSV_COLUMNS = ['id', 'title', 'price', 'rating', 'availability', 'category', 'image_url']
+FETCH_CONCURRENCY = 8  # Downloads simultâneos de páginas de produto
+PARSE_WORKERS = 2  # Processos dedicados ao parsing do HTML
+PARSE_TASK_SIZE = 20  # Páginas de produto por tarefa do pool de parsing
+CHECKPOINT_EVERY = 200  # Páginas de produto por lote gravado na fronteira
+STATE_FILE = 'data/crawl_state.db'
+FETCH_TIMEOUT = (5.0, 30.0)  # Segundos para conectar e entre bytes lidos de cada página
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside the scraper when the caller asks it to stop"""
+
+
+def fetch_text(http, url: str, timeout: Tuple[float, float] = FETCH_TIMEOUT) -> Optional[str]:
+    """Baixa uma página e retorna o HTML (None se a resposta não for 200 ou a conexão falhar)"""
+    import requests
+
+    try:
+        response = http.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"Erro ao acessar {url}: {type(e).__name__}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"Erro ao acessar {url}")
+        return None
+    return response.text
+
+
+class _InlineExecutor(Executor):
+    """Executor que roda as tarefas na própria thread (parse_workers=0)"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _parse_pool(parse_workers: int) -> Executor:
+    """Pool de processos para o parsing (spawn: a API roda o scraper em uma thread)"""
+    if parse_workers <= 0:
+        return _InlineExecutor()
+    return ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _chunks(rows: List, size: int) -> Iterator[List]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def iter_books(
+    on_page: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    base_url: str = BASE_URL,
+    fetch_concurrency: int = FETCH_CONCURRENCY,
+    parse_workers: int = PARSE_WORKERS,
+    state_path: Optional[str] = None,
+    fresh: bool = False,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    fetch_timeout: Tuple[float, float] = FETCH_TIMEOUT
+) -> Iterator[Dict]:
+    """
+    Scrapeia o catálogo a partir de uma fronteira de crawl persistida.
+
+    1. A paginação é descoberta na primeira listagem ("Page 1 of N") e todas
+       as listagens são baixadas em paralelo, enfileirando as páginas de produto
+    2. As páginas de produto pendentes são baixadas em lotes de
+       `checkpoint_every` (threads), analisadas no pool de processos e
+       gravadas como checkpoint na fronteira a cada lote
+    3. Os livros são produzidos em ordem do catálogo assim que o prefixo
+       contíguo fica completo
+
+    Com `state_path`, um crawl interrompido (falha, timeout, cancelamento) é
+    retomado: só as páginas ainda pendentes são baixadas novamente.
+
+    Args:
+        on_page: Callback chamado após cada lote com (listagens processadas, livros extraídos)
+        should_stop: Callback consultado antes de cada download e entre livros; se
+            retornar True o scraping é interrompido com ScrapeCancelled (o
+            checkpoint é mantido)
+        base_url: Raiz do site
+        fetch_concurrency: Downloads simultâneos
+        parse_workers: Processos de parsing (0 analisa na thread do scraper)
+        state_path: Arquivo SQLite da fronteira (None mantém a fronteira em memória)
+        fresh: Ignora o checkpoint existente e começa um novo crawl
+        checkpoint_every: Páginas de produto por lote/checkpoint
+        fetch_timeout: Timeouts (conexão, leitura) de cada download; páginas que
+            estouram contam como falha, como uma resposta de erro
+
+    Yields:
+        Livros com ids sequenciais na ordem do catálogo (necessário para o
+        endpoint /books/{id}); uma página de produto que falhou MAX_ATTEMPTS
+        vezes não é produzida, mas o seu id não é reaproveitado
+    """
+    import requests
+
+    local = threading.local()
+    sessions = []
+
+    def check_stop():
+        if should_stop and should_stop():
+            raise ScrapeCancelled()
+
+    def fetch(url):
+        # Cancelamento (ou timeout do job) atendido antes de cada download, não só entre lotes
+        check_stop()
+        if not hasattr(local, 'http'):
+            local.http = requests.Session()
+            sessions.append(local.http)
+        return fetch_text(local.http, url, fetch_timeout)
+
+    frontier = CrawlFrontier(state_path or ':memory:')
+    cursor = (0, -1)
+    book_id = 0
+
+    def report():
+        if on_page:
+            counts = frontier.counts()
+            on_page(counts['listing_done'], counts.get('done', 0))
+
+    def emit():
+        # Livros do prefixo contíguo já completo, em ordem do catálogo
+        nonlocal cursor, book_id
+        for position, record in frontier.iter_done(cursor):
+            cursor = position
+            # A página que falhou mantém o seu id (fica um buraco): os livros
+            # seguintes não mudam de id por causa de uma falha
+            book_id += 1
+            if record is None:
+                continue
+            check_stop()
+            yield {'id': book_id, **record}
+
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_concurrency) as fetch_pool, \
+                _parse_pool(parse_workers) as parse_pool:
+            if frontier.start(base_url, fresh):
+                counts = frontier.counts()
+                print(f"Retomando crawl: {counts['listing_done']}/{counts['listing_total']} listagens, "
+                      f"{counts.get('done', 0)} livros já extraídos")
+            if not frontier.counts()['listing_total']:
+                frontier.add_listing_pages([(1, base_url + 'catalogue/page-1.html')])
+
+            # 1. Listagens: paginação descoberta na primeira página
+            while True:
+                pending = frontier.pending_listing_pages()
+                if not pending:
+                    break
+                for batch in _chunks(pending, fetch_concurrency * 4):
+                    check_stop()
+                    for page, url in batch:
+                        print(f"Scraping página: {url}")
+                    fetched = list(zip(batch, fetch_pool.map(fetch, [url for _, url in batch])))
+                    ok = [(page, listing_html) for (page, _), listing_html in fetched if listing_html is not None]
+                    failed = [url for (_, url), listing_html in fetched if listing_html is None]
+
+                    parsed = parse_pool.map(parse_listing, [listing_html for _, listing_html in ok],
+                                            [base_url] * len(ok))
+                    for (page, _), (items, next_page_path, page_count) in zip(ok, parsed):
+                        for item in items:
+                            item['detail_url'] = base_url + item['detail_path']
+                        frontier.complete_listing_page(page, items)
+                        if page_count:
+                            frontier.add_listing_pages([
+                                (n, f"{base_url}catalogue/page-{n}.html") for n in range(page + 1, page_count + 1)
+                            ])
+                        elif next_page_path:
+                            frontier.add_listing_pages([(page + 1, base_url + next_page_path)])
+                    report()
+                    if failed:
+                        # As listagens baixadas ficam no checkpoint: o próximo crawl retoma só das que falharam
+                        raise RuntimeError(f"Falha ao baixar {len(failed)} listagens (ex.: {failed[0]})")
+
+            # 2. Páginas de produto, com checkpoint a cada lote
+            while True:
+                check_stop()
+                urls = frontier.pending_details(checkpoint_every)
+                if not urls:
+                    break
+
+                fetched = list(zip(urls, fetch_pool.map(fetch, urls)))
+                ok = [(url, page_html) for url, page_html in fetched if page_html is not None]
+                tasks = list(_chunks(ok, PARSE_TASK_SIZE))
+                parsed = parse_pool.map(parse_products, [[page_html for _, page_html in task] for task in tasks])
+
+                results = []
+                for task, details in zip(tasks, parsed):
+                    results.extend((url, *detail) for (url, _), detail in zip(task, details))
+                frontier.complete_details(results)
+                frontier.fail_details([url for url, page_html in fetched if page_html is None])
+                report()
+
+                yield from emit()
+
+            yield from emit()
+            frontier.finish()
+    finally:
+        frontier.close()
+        for http in sessions:
+            http.close()
+
+
+def run_scraper(
+    on_page: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    **options
+) -> List[Dict]:
+    """
+    Função principal para coordenar o scraping de todas as páginas.
+
+    Returns:
+        Lista de livros com ids sequenciais (veja iter_books)
+    """
+    return list(iter_books(on_page=on_page, should_stop=should_stop, **options))
+
+
+def stream_books_csv(books: Iterable[Dict], data_file: str = DATA_FILE) -> Iterator[Dict]:
+    """
+    Repassa os livros adiante gravando cada um no CSV
+
+    O arquivo é escrito em um temporário e só substitui o CSV anterior quando
+    todos os livros foram consumidos; se o consumo for interrompido o CSV
+    anterior é mantido.
+    """
+    data_dir = os.path.dirname(data_file)
+    if data_dir and not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    tmp_file = f"{data_file}.tmp"
+    completed = False
+    try:
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            for book in books:
+                writer.writerow(book)
+                yield book
+        os.replace(tmp_file, data_file)
+        completed = True
+    finally:
+        if not completed and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def save_books_csv(books_list: List[Dict], data_file: str = DATA_FILE) -> None:
+    """Salva os livros extraídos no CSV (entregável do scraping)"""
+    data_dir = os.path.dirname(data_file)
+    if data_dir and not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    import pandas as pd
+
+    df = pd.DataFrame(books_list, columns=CSV_COLUMNS)
+    df.to_csv(data_file, index=False)  # Dados armazenados localmente em um arquivo CSV
@@ -2,6 +2,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Dict, List
 from app.models.book import Book
+from app.core.catalog_version import catalog_version
+from app.services.catalog_snapshot import catalog_snapshot_service
+from app.services.response_cache import response_cache
 from functools import lru_cache
 from datetime import datetime, timedelta
 
@@ -23,6 +26,14 @@ class StatsService:
         Get overview statistics for the book collection
         Includes: total books, average price, rating distribution
         """
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            return snapshot.get_overview_stats()
+
+        return response_cache.get("stats_overview", lambda: StatsService._query_overview_stats(db))
+
+    @staticmethod
+    def _query_overview_stats(db: Session) -> Dict:
         # Total books
         total_books = db.query(Book).count()
 
@@ -54,6 +65,14 @@ class StatsService:
         Get detailed statistics for each category
         Returns: List of category statistics
         """
+        snapshot = catalog_snapshot_service.get()
+        if snapshot is not None:
+            return snapshot.get_category_stats()
+
+        return response_cache.get("category_stats", lambda: StatsService._query_category_stats(db))
+
+    @staticmethod
+    def _query_category_stats(db: Session) -> List[Dict]:
         results = db.query(
             Book.category,
             func.count(Book.id).label('book_count'),
@@ -74,3 +93,6 @@ class StatsService:
 
 # Create singleton instance
 stats_service = StatsService()
+
+# Invalidate statistics whenever the catalogue is reloaded
+catalog_version.subscribe(lambda version: StatsService.invalidate_cache())
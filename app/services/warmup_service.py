@@ -0,0 +1,146 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+from app.core.catalog_version import catalog_version
+from app.database import SessionLocal
+from app.services.autocomplete_service import autocomplete_service
+from app.services.book_service import book_service
+from app.services.ml_service import ml_service
+from app.services.stats_service import stats_service
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def pretouch_sqlite_pages(db: Session) -> int:
+    """
+    Read the books table and each of its indexes end to end
+
+    Loads their pages into the OS page cache (and the connection's page cache,
+    shared by all sessions of the StaticPool engine), so the first queries
+    after a deploy or reload do not wait on disk reads.
+
+    Returns:
+        Number of b-trees read
+    """
+    indexes = db.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'books'"
+    )).scalars().all()
+    db.execute(text("SELECT SUM(LENGTH(title)) + SUM(price) FROM books NOT INDEXED")).scalar()
+    for name in indexes:
+        db.execute(text(f'SELECT COUNT(*) FROM books INDEXED BY "{name}"')).scalar()
+    return len(indexes) + 1
+
+
+# Warm-up steps: each computes one hot response the way its endpoint does,
+# filling the response cache / leaderboard for the current catalogue version
+WARMUP_STEPS: Dict[str, Callable[[Session], Any]] = {
+    "stats_overview": stats_service.get_overview_stats,
+    "category_stats": stats_service.get_category_stats,
+    "categories": book_service.get_categories,
+    "top_rated": lambda db: book_service.get_top_rated_books(db, 10),
+    "ml_features": lambda db: ml_service.prepare_ml_features(db, 1000),
+    "autocomplete": autocomplete_service.get_index,
+}
+
+
+class WarmupService:
+    """
+    Precomputes the hot responses after startup and after catalogue reloads
+
+    Runs the steps listed in WARMUP_STEPS (optionally after pre-touching the
+    SQLite pages) so the first request to each endpoint is served from the
+    cache instead of paying the cold cost. After a reload the steps run in a
+    background thread; reloads that land while it runs trigger one more run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+        self._rerun = False
+        self.warmed_version: Optional[int] = None
+        self.last_run: Dict[str, Any] = {}
+
+    def run(self, steps: Optional[List[str]] = None, pretouch: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Run the warm-up now, in the calling thread
+
+        Failed steps are logged and skipped; the rest still run.
+
+        Returns:
+            Catalogue version, per-step seconds and errors
+        """
+        steps = settings.WARMUP_STEPS if steps is None else steps
+        pretouch = settings.WARMUP_PRETOUCH_SQLITE if pretouch is None else pretouch
+        version = catalog_version.current
+        timings: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        start = time.monotonic()
+
+        db = SessionLocal()
+        try:
+            planned = (["sqlite_pages"] if pretouch else []) + list(steps)
+            for name in planned:
+                step = pretouch_sqlite_pages if name == "sqlite_pages" else WARMUP_STEPS.get(name)
+                if step is None:
+                    errors[name] = "unknown warm-up step"
+                    continue
+                step_start = time.monotonic()
+                try:
+                    step(db)
+                except Exception as e:
+                    errors[name] = f"{type(e).__name__}: {e}"
+                    logger.error(f"Warm-up step {name} failed: {errors[name]}")
+                    db.rollback()
+                timings[name] = round(time.monotonic() - step_start, 4)
+        finally:
+            db.close()
+
+        self.warmed_version = version
+        self.last_run = {
+            "version": version,
+            "seconds": round(time.monotonic() - start, 4),
+            "steps": timings,
+            "errors": errors,
+        }
+        logger.info(f"Warm-up of catalogue version {version} took {self.last_run['seconds']:.2f}s")
+        return self.last_run
+
+    def schedule(self) -> None:
+        """Run the warm-up in a background thread (coalescing runs requested meanwhile)"""
+        with self._lock:
+            if self._running:
+                self._rerun = True
+                return
+            self._running = True
+        threading.Thread(target=self._run_pending, name="catalog-warm-up", daemon=True).start()
+
+    def _run_pending(self) -> None:
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                logger.error(f"Warm-up failed: {type(e).__name__}: {e}")
+            with self._lock:
+                if not self._rerun:
+                    self._running = False
+                    return
+                self._rerun = False
+
+    @property
+    def is_warm(self) -> bool:
+        """Whether the last warm-up covered the current catalogue version"""
+        return self.warmed_version == catalog_version.current
+
+    def status(self) -> Dict[str, Any]:
+        return {"warm": self.is_warm, "running": self._running, **self.last_run}
+
+
+# Create singleton instance
+warmup_service = WarmupService()
+
+# Warm the caches again whenever the catalogue is reloaded
+catalog_version.subscribe(lambda version: settings.WARMUP_ENABLED and warmup_service.schedule())
@@ -0,0 +1,90 @@
+"""
+Mergeable latency sketch (DDSketch)
+
+Values are counted in logarithmic bins: bin ``i`` holds values in
+``(gamma^(i-1), gamma^i]`` with ``gamma = (1 + alpha) / (1 - alpha)``, so any
+quantile is returned within a relative error of ``alpha`` (1% by default).
+Two sketches with the same ``alpha`` merge by adding bin counts, which is what
+lets minute rollups be summed into hours and any time range be answered
+from the rollups alone.
+
+See Masson, Rim and Lee, "DDSketch: A Fast and Fully-Mergeable Quantile
+Sketch with Relative-Error Guarantees" (VLDB 2019).
+"""
+from typing import Dict, Iterator, Optional, Tuple
+import json
+import math
+
+DEFAULT_ALPHA = 0.01
+
+# Values at or below this (in ms) are counted in the zero bin
+MIN_VALUE = 1e-3
+
+
+class LatencySketch:
+    """DDSketch over positive values (latencies in milliseconds)"""
+
+    __slots__ = ("alpha", "gamma", "_log_gamma", "bins", "zero_count", "count")
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA, bins: Optional[Dict[int, int]] = None, zero_count: int = 0):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = bins if bins is not None else {}
+        self.zero_count = zero_count
+        self.count = zero_count + sum(self.bins.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= MIN_VALUE:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        """Add another sketch's counts into this one (in place)"""
+        if other.alpha != self.alpha:
+            raise ValueError(f"Cannot merge sketches with alpha {self.alpha} and {other.alpha}")
+        bins = self.bins
+        for index, count in other.bins.items():
+            bins[index] = bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _value(self, index: int) -> float:
+        # Midpoint (in relative terms) of bin ``index``
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile ``q`` (0..1), or None for an empty sketch"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return self._value(index)
+        return self._value(max(self.bins))
+
+    def buckets(self) -> Iterator[Tuple[float, float, int]]:
+        """``(lower, upper, count)`` per non-empty bin, in ascending order"""
+        if self.zero_count:
+            yield 0.0, MIN_VALUE, self.zero_count
+        for index in sorted(self.bins):
+            yield self.gamma ** (index - 1), self.gamma ** index, self.bins[index]
+
+    def to_json(self) -> str:
+        return json.dumps({"a": self.alpha, "z": self.zero_count, "b": self.bins}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> "LatencySketch":
+        """Parse a serialized sketch (an empty sketch for None or '')"""
+        if not data:
+            return cls()
+        raw = json.loads(data)
+        return cls(raw["a"], {int(index): count for index, count in raw["b"].items()}, raw["z"])
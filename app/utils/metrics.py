@@ -0,0 +1,426 @@
+"""
+In-process metrics exposed in the Prometheus text format
+
+Counters and histograms are recorded into per-thread shards: each thread
+(the event loop, every threadpool worker) updates only its own dicts, so the
+hot path takes no lock and costs a few dict/list operations. Shards are
+summed when /metrics is scraped.
+
+Histograms use fixed log-spaced buckets, so series from different threads
+and worker processes merge by adding bucket counts.
+
+With METRICS_MULTIPROC_DIR set (several uvicorn/gunicorn workers), every
+worker periodically writes its totals to ``<dir>/metrics-<pid>.json`` and the
+worker answering the scrape merges all files with its own live values.
+"""
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def log_buckets(start: float, end: float, factor: float = 2.0) -> Tuple[float, ...]:
+    """Bucket upper bounds from ``start`` growing by ``factor`` until ``end`` is covered"""
+    bounds = [start]
+    while bounds[-1] < end:
+        bounds.append(float(f"{bounds[-1] * factor:.6g}"))
+    return tuple(bounds)
+
+
+# 100µs .. ~52s, doubling
+LATENCY_BUCKETS = log_buckets(0.0001, 50.0)
+
+
+class _Metric:
+    """Base class: per-thread shards of ``labels -> value``"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, object]] = []
+        self._shards_lock = threading.Lock()
+
+    def _new_shard(self) -> Dict[Labels, object]:
+        # Only taken once per thread; recording never locks
+        shard: Dict[Labels, object] = {}
+        with self._shards_lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def _shard_copies(self) -> List[Dict[Labels, object]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def samples(self) -> Dict[Labels, object]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._shard_copies():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+
+class Histogram(_Metric):
+    """
+    Histogram with fixed bucket bounds
+
+    Each series is a list of per-bucket counts (the last one is +Inf)
+    followed by the sum of observed values.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._size = len(self.buckets) + 2
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = [0] * self._size
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._shard_copies():
+            for labels, series in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(series)
+                else:
+                    for i, value in enumerate(series):
+                        total[i] += value
+        return totals
+
+
+class MetricsRegistry:
+    """Holds the metrics of this process and renders them for Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collect(self) -> Dict[str, dict]:
+        """Current totals of this process, as a JSON-serializable dict"""
+        collected = {}
+        for metric in self._metrics.values():
+            collected[metric.name] = {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(labels), value] for labels, value in metric.samples().items()],
+            }
+        return collected
+
+    @staticmethod
+    def merge(collections: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+        """Add up collections from several processes (counters and bucket counts are summed)"""
+        merged: Dict[str, dict] = {}
+        totals: Dict[str, Dict[Labels, object]] = {}
+        for collection in collections:
+            for name, data in collection.items():
+                if name not in merged:
+                    merged[name] = dict(data, samples=[])
+                    totals[name] = {}
+                elif data["buckets"] != merged[name]["buckets"]:
+                    logger.warning(f"Skipping {name}: bucket bounds differ between workers")
+                    continue
+                series = totals[name]
+                for labels, value in data["samples"]:
+                    key = tuple(labels)
+                    current = series.get(key)
+                    if current is None:
+                        series[key] = list(value) if isinstance(value, list) else value
+                    elif isinstance(current, list):
+                        for i, v in enumerate(value):
+                            current[i] += v
+                    else:
+                        series[key] = current + value
+        for name, series in totals.items():
+            merged[name]["samples"] = [[list(labels), value] for labels, value in series.items()]
+        return merged
+
+    @staticmethod
+    def render(collection: Dict[str, dict]) -> str:
+        """Render collected metrics in the Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        for name, data in sorted(collection.items()):
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            labelnames = data["labelnames"]
+            for labels, value in sorted(data["samples"], key=lambda sample: sample[0]):
+                pairs = [f'{key}="{_escape(str(label))}"' for key, label in zip(labelnames, labels)]
+                if data["type"] != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(data["buckets"], value):
+                    cumulative += count
+                    le = f'le="{bound:g}"'
+                    lines.append(f"{name}_bucket{_labels(pairs + [le])} {cumulative}")
+                cumulative += value[-2]
+                lines.append(f"{name}_bucket{_labels(pairs + [_INF])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+        lines.append("")
+        return "\n".join(lines)
+
+    # Multiprocess support
+
+    @staticmethod
+    def _snapshot_path(directory: str, pid: int) -> Path:
+        return Path(directory) / f"metrics-{pid}.json"
+
+    def write_snapshot(self, directory: str) -> None:
+        """Write this process's totals to the shared directory (atomic rename)"""
+        path = self._snapshot_path(directory, os.getpid())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.collect(), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def collect_all(self, directory: Optional[str] = None) -> Dict[str, dict]:
+        """
+        Totals of this process, merged with the snapshots of the other workers
+
+        Snapshots of workers that exited are kept, so counters never go
+        backwards when a worker is replaced; clear the directory on deploy.
+        """
+        collections = [self.collect()]
+        if directory:
+            own = self._snapshot_path(directory, os.getpid())
+            for path in sorted(Path(directory).glob("metrics-*.json")):
+                if path == own:
+                    continue
+                try:
+                    collections.append(json.loads(path.read_text()))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read metrics snapshot {path}: {e}")
+        return self.merge(collections)
+
+
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Create singleton instance
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status (_count is the request counter)",
+    ("method", "route", "status"),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Database query latency by statement type",
+    ("engine", "operation"),
+)
+cache_requests = registry.counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ("cache", "result"),
+)
+singleflight_requests = registry.counter(
+    "singleflight_requests_total",
+    "Coalesced reads by route and result (leader ran the query, shared joined one in flight, timeout, error)",
+    ("route", "result"),
+)
+rejected_requests = registry.counter(
+    "rejected_requests_total",
+    "Requests rejected before reaching a route (client/route rate limits, overload)",
+    ("reason",),
+)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a periodic event-loop callback was due and when it ran",
+    buckets=log_buckets(0.0005, 10.0),
+)
+
+
+def histogram_quantile(bounds: Sequence[float], counts: Sequence[float], q: float) -> Optional[float]:
+    """
+    Estimate quantile ``q`` from per-bucket counts (last one is +Inf)
+
+    Interpolates linearly inside the bucket, as Prometheus' histogram_quantile.
+    """
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0.0
+    for i, count in enumerate(counts):
+        if seen + count >= rank and count:
+            if i == len(bounds):
+                return bounds[-1]
+            lower = bounds[i - 1] if i > 0 else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / count
+        seen += count
+    return bounds[-1]
+
+
+def summarize_interval(
+    previous: Dict[Labels, List[float]],
+    current: Dict[Labels, List[float]],
+    buckets: Sequence[float],
+    seconds: float
+) -> dict:
+    """
+    Requests between two ``http_request_duration.samples()`` snapshots
+
+    Returns request and error (status >= 400) counts, the rate and latency
+    quantiles in milliseconds, across all routes.
+    """
+    counts = [0.0] * (len(buckets) + 1)
+    requests = errors = 0
+    latency_sum = 0.0
+    for labels, series in current.items():
+        before = previous.get(labels)
+        delta = series if before is None else [a - b for a, b in zip(series, before)]
+        n = sum(delta[:-1])
+        if not n:
+            continue
+        requests += n
+        latency_sum += delta[-1]
+        if int(labels[2]) >= 400:
+            errors += n
+        for i, count in enumerate(delta[:-1]):
+            counts[i] += count
+
+    def quantile_ms(q: float) -> Optional[float]:
+        value = histogram_quantile(buckets, counts, q)
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "requests": int(requests),
+        "errors": int(errors),
+        "rps": round(requests / seconds, 2) if seconds > 0 else 0.0,
+        "mean_ms": round(latency_sum / requests * 1000, 3) if requests else None,
+        "p50_ms": quantile_ms(0.5),
+        "p95_ms": quantile_ms(0.95),
+        "p99_ms": quantile_ms(0.99),
+    }
+
+
+_SQL_OPERATIONS = {"select", "insert", "update", "delete", "create", "drop", "pragma", "begin", "commit", "rollback"}
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Record the count and duration of every statement executed by a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        operation = statement[:12].split(None, 1)[0].lower() if statement else "other"
+        if operation not in _SQL_OPERATIONS:
+            operation = "other"
+        db_query_duration.observe(time.perf_counter() - start, (name, operation))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Sleep ``interval`` seconds in a loop and record how late each wake-up is"""
+    loop = asyncio.get_running_loop()
+    while True:
+        due = loop.time() + interval
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, loop.time() - due))
+
+
+async def flush_snapshots(directory: str, interval: float) -> None:
+    """Periodically write this worker's totals for the other workers' scrapes"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(registry.write_snapshot, directory)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot to {directory}: {e}")
@@ -1,13 +1,20 @@
+import ipaddress
+import math
 import time
-import asyncio
 import logging
 from fastapi import Request, Response
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from app.database import SessionLocal
-from app.models.api_log import APILog
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.services.api_log_rollup_service import api_log_rollup_service
+from app.services.api_log_store import api_log_store
 from datetime import datetime
-from sqlalchemy.exc import OperationalError
+from app.utils.metrics import http_request_duration, rejected_requests
+from app.utils.rate_limit import AdmissionController, TokenBucketLimiter
+from app.utils.sql_profiler import sql_profiler
+from app.utils.sampling_profiler import sampling_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +31,22 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     - Query parameters
     - Timestamp
 
-    Important: Logging is done asynchronously after response is sent
-    to avoid blocking the request/response cycle and prevent database locks.
+    Health probes (API_LOG_EXCLUDED_PATHS) are not logged: orchestrators
+    probe every second per instance and would drown the real traffic.
+
+    Important: requests are only buffered here. The rows are written in
+    batches by a background task, on the telemetry database (LOG_DATABASE_URL),
+    so logging never blocks a response or takes the catalogue's write lock.
     """
 
     def __init__(self, app: ASGIApp):
         super().__init__(app)
+        self.excluded_paths = frozenset(settings.API_LOG_EXCLUDED_PATHS)
 
     async def dispatch(self, request: Request, call_next):
+        if request.url.path in self.excluded_paths:
+            return await call_next(request)
+
         # Start timer
         start_time = time.time()
 
@@ -44,58 +59,273 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # Add response time header
         response.headers["X-Response-Time"] = f"{response_time:.2f}ms"
 
-        # Log to database asynchronously (doesn't block response)
-        # Run in background task to completely isolate from request handling
-        asyncio.create_task(
-            self._log_request_async(
-                endpoint=str(request.url.path),
-                method=request.method,
-                status_code=response.status_code,
-                response_time=response_time,
-                query_params=str(dict(request.query_params)) if request.query_params else None
+        # Count the request in the minute/hour rollups (written in batches)
+        route = route_template(request.scope)
+        if settings.API_LOG_ROLLUPS_ENABLED:
+            api_log_rollup_service.record(route, request.method, response.status_code, response_time)
+
+        # Queue the log row; a background task writes the buffer in batches
+        # to the telemetry database (see APILogStore), off the request path
+        api_log_store.record({
+            "endpoint": str(request.url.path),
+            "route": route,
+            "method": request.method,
+            "status_code": response.status_code,
+            "response_time": response_time,
+            "query_params": str(dict(request.query_params)) if request.query_params else None,
+            "timestamp": datetime.utcnow()
+        })
+
+        return response
+
+
+_route_paths = {}
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Route template of a handled request (``/api/v1/books/{book_id}``)
+
+    Read after the router ran; requests that matched no route are ``unmatched``.
+    Used instead of the raw path so metrics and rollups have bounded cardinality.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    path = _route_paths.get(endpoint)
+    if path is None:
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                path = route.path
+                break
+        else:
+            path = "unmatched"
+        _route_paths[endpoint] = path
+    return path
+
+
+_static_route_paths = {}
+
+
+def match_route_template(scope: Scope) -> str:
+    """
+    Route template a request will be routed to, resolved before the router runs
+
+    Static paths are cached (bounded by the number of routes); paths with
+    parameters are matched against the routes in order, as the router does.
+    """
+    path = scope["path"]
+    template = _static_route_paths.get(path)
+    if template is not None:
+        return template
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            if "{" not in route.path:
+                _static_route_paths[path] = route.path
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency histograms
+
+    Requests are labelled with their route template (see ``route_template``).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                (scope["method"], route_template(scope), status_code)
             )
+
+
+class SQLProfilerMiddleware:
+    """
+    Pure ASGI middleware adding a ``Server-Timing`` header with the request's queries
+
+    Example: ``Server-Timing: db;dur=4.21;desc="3 queries", app;dur=6.80``.
+    The header goes out with the response start, so queries run while a
+    streaming body is being sent are not included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        with sql_profiler.track_request() as stats:
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    app_ms = (time.perf_counter() - start) * 1000
+                    timing = (
+                        f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries", '
+                        f"app;dur={app_ms:.2f}"
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+class ProfilerMiddleware:
+    """
+    Pure ASGI middleware tracking requests for a request-scoped profiling session
+
+    Without such a session (the normal case) it only reads one attribute.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        session = sampling_profiler.request_session
+        if session is None or scope["type"] != "http" or not session.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        sampling_profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampling_profiler.request_finished(session)
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware applying rate limits and admission control
+
+    Each request takes its route's cost (RATE_LIMIT_ROUTE_COSTS, 1 by default)
+    from two token buckets: the client's and the client's for that route.
+    An empty bucket answers 429 with Retry-After. Admitted requests then need
+    one of ADMISSION_MAX_CONCURRENT slots; when ADMISSION_MAX_QUEUE requests
+    already wait for one, or the wait passes ADMISSION_MAX_WAIT_SECONDS, the
+    answer is 503 with Retry-After. Health probes and /metrics
+    (RATE_LIMIT_EXEMPT_PATHS) skip both, so they answer under overload.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.exempt_paths = frozenset(settings.RATE_LIMIT_EXEMPT_PATHS)
+        self.costs = dict(settings.RATE_LIMIT_ROUTE_COSTS)
+        self.trusted_proxies = [
+            ipaddress.ip_network(proxy, strict=False) for proxy in settings.RATE_LIMIT_TRUSTED_PROXIES
+        ]
+        self.client_limiter = TokenBucketLimiter(
+            settings.RATE_LIMIT_CLIENT_RATE, settings.RATE_LIMIT_CLIENT_BURST, settings.RATE_LIMIT_MAX_KEYS
         )
+        self.route_limiter = TokenBucketLimiter(
+            settings.RATE_LIMIT_ROUTE_RATE, settings.RATE_LIMIT_ROUTE_BURST, settings.RATE_LIMIT_MAX_KEYS
+        )
+        self.admission = None
+        if settings.ADMISSION_MAX_CONCURRENT > 0:
+            self.admission = AdmissionController(
+                settings.ADMISSION_MAX_CONCURRENT, settings.ADMISSION_MAX_QUEUE, settings.ADMISSION_MAX_WAIT_SECONDS
+            )
 
-        return response
+    def is_trusted_proxy(self, host: str) -> bool:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
 
-    async def _log_request_async(self, endpoint: str, method: str, status_code: int,
-                                  response_time: float, query_params: str = None):
+    def client_key(self, scope: Scope) -> str:
         """
-        Log request to database asynchronously in background.
+        Address the buckets are keyed by.
 
-        This method runs completely separately from the request/response cycle,
-        preventing any database locks from affecting API responses.
+        With RATE_LIMIT_TRUST_FORWARDED_FOR, X-Forwarded-For is read from the
+        right: each trusted proxy (RATE_LIMIT_TRUSTED_PROXIES) appends the
+        address it saw, so the first hop that is not one of them is the
+        client. Entries to the left of it are whatever the client sent and
+        are ignored.
         """
-        # Small delay to ensure response is fully sent before we touch the database
-        await asyncio.sleep(0.01)
+        client = scope.get("client")
+        host = client[0] if client else "unknown"
+        if not settings.RATE_LIMIT_TRUST_FORWARDED_FOR or not self.is_trusted_proxy(host):
+            return host
+        hops = []
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                hops.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+        for hop in reversed(hops):
+            if not hop:
+                continue
+            host = hop
+            if not self.is_trusted_proxy(hop):
+                break
+        return host
 
-        db = None
-        try:
-            # Create isolated database session
-            db = SessionLocal()
-
-            log_entry = APILog(
-                endpoint=endpoint,
-                method=method,
-                status_code=status_code,
-                response_time=response_time,
-                query_params=query_params,
-                timestamp=datetime.utcnow()
-            )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if settings.RATE_LIMIT_ENABLED:
+            route = match_route_template(scope)
+            cost = self.costs.get(route, 1.0)
+            client = self.client_key(scope)
+            now = time.monotonic()
+            wait = self.client_limiter.acquire(client, cost, now)
+            reason = "client"
+            if not wait:
+                wait = self.route_limiter.acquire((client, route), cost, now)
+                reason = "route"
+                if wait:
+                    self.client_limiter.refund(client, cost)
+            if wait:
+                rejected_requests.inc((reason,))
+                await self.reject(scope, receive, send, 429,
+                                  "Limite de requisições excedido; tente novamente mais tarde", wait)
+                return
 
-            db.add(log_entry)
-            db.commit()
-
-        except OperationalError as e:
-            # Database lock or connection error
-            logger.warning(f"Database locked while logging request to {endpoint}: {e}")
-            if db:
-                db.rollback()
-        except Exception as e:
-            # Other unexpected errors - log but don't crash
-            logger.error(f"Error saving API log for {endpoint}: {type(e).__name__}: {e}")
-            if db:
-                db.rollback()
+        if self.admission is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.admission.enter():
+            rejected_requests.inc(("overload",))
+            await self.reject(scope, receive, send, 503, "Servidor sobrecarregado; tente novamente em instantes",
+                              settings.ADMISSION_RETRY_AFTER_SECONDS)
+            return
+        try:
+            await self.app(scope, receive, send)
         finally:
-            if db:
-                db.close()
+            self.admission.leave()
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str,
+                     retry_after: float) -> None:
+        response = JSONResponse(
+            status_code=status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,123 @@
+"""
+Rate limiting and admission control
+
+Token buckets keep two floats per active key in an insertion-ordered dict
+moved to the end on every hit, so the least recently used keys sit at the
+front. A key idle long enough for its bucket to refill completely is
+indistinguishable from a new one and is dropped lazily, a few entries per
+call, from the front: memory follows the active keys and no timer is needed.
+
+The admission controller caps the requests in flight in the worker and
+sheds the excess with 503 once the queue in front of it is full.
+"""
+from collections import OrderedDict
+from typing import Hashable, Optional
+import asyncio
+import time
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key: ``rate`` tokens per second, at most ``burst``
+
+    ``acquire`` is O(1) amortized: it refills the key's bucket from the time
+    elapsed since its last hit and expires at most ``sweep`` idle keys. When
+    more than ``max_keys`` keys are active the least recently used is dropped
+    (that key starts again with a full bucket). Costs above ``burst`` are
+    capped at it, so a heavy request is slowed down but never unservable.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000, sweep: int = 2):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.sweep = sweep
+        self.idle_seconds = burst / rate
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Take ``cost`` tokens from the key's bucket
+
+        Returns:
+            0.0 when allowed, otherwise the seconds until enough tokens refill
+            (nothing is taken from a rejected request)
+        """
+        now = time.monotonic() if now is None else now
+        cost = min(cost, self.burst)
+        buckets = self._buckets
+
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [self.burst, now]
+            if len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            buckets.move_to_end(key)
+
+        self._expire(now)
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / self.rate
+
+    def refund(self, key: Hashable, cost: float = 1.0) -> None:
+        """Give back tokens taken for a request rejected by another limiter"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst, bucket[0] + min(cost, self.burst))
+
+    def _expire(self, now: float) -> None:
+        buckets = self._buckets
+        deadline = now - self.idle_seconds
+        for _ in range(self.sweep):
+            if not buckets:
+                return
+            key, (_, updated) = next(iter(buckets.items()))
+            if updated > deadline:
+                return
+            del buckets[key]
+
+
+class AdmissionController:
+    """
+    Caps requests in flight; sheds load when too many are already waiting
+
+    Up to ``max_concurrent`` requests run at once and up to ``max_queue``
+    wait for a slot, each for at most ``max_wait`` seconds. ``enter`` returns
+    False when the request should be rejected (queue full or wait timed out).
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def enter(self) -> bool:
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        return True
+
+    def leave(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
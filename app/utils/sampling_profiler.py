@@ -0,0 +1,219 @@
+"""
+Sampling profiler that can be switched on at runtime
+
+An admin starts a session for N seconds, or for the next N requests whose
+path matches a route template. A daemon thread then reads every thread's
+Python stack with ``sys._current_frames()`` at a fixed interval and counts
+identical stacks. The result is in the collapsed-stack format read by
+flamegraph.pl, speedscope and inferno (``frame;frame;leaf count``).
+
+Threads parked in the event loop selector or waiting on a lock/queue are
+skipped, so the profile shows where CPU goes. In request mode samples are
+only taken while a matching request is in flight. Requests are not
+attributed to threads, so concurrent non-matching requests can appear too.
+
+When no session is running there is no sampling thread; the middleware
+only reads one attribute per request.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Pattern
+from collections import Counter
+import os
+import sys
+import threading
+import time
+
+# (file name, function) pairs where a thread is idle rather than running code
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("_thread.py", "run"),
+}
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profiling session is already running"""
+
+
+@dataclass
+class ProfileSession:
+    """One profiling run and its aggregated stacks"""
+    id: int
+    interval: float
+    deadline: float
+    seconds: Optional[float] = None
+    route: Optional[str] = None
+    route_regex: Optional[Pattern] = None
+    requests_limit: Optional[int] = None
+    requests_seen: int = 0
+    samples: int = 0
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    def matches(self, path: str) -> bool:
+        return self.route_regex is not None and self.route_regex.match(path) is not None
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "running": self.running,
+            "mode": "requests" if self.requests_limit else "duration",
+            "seconds": self.seconds,
+            "route": self.route,
+            "requests_limit": self.requests_limit,
+            "requests_seen": self.requests_seen,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+@lru_cache(maxsize=8192)
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class SamplingProfiler:
+    """Runs at most one sampling session at a time"""
+
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+        # Set only in request mode, read by the middleware on every request
+        self.request_session: Optional[ProfileSession] = None
+        self._active_requests = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_id = 1
+
+    def start(
+        self,
+        seconds: Optional[float] = None,
+        requests: Optional[int] = None,
+        route: Optional[str] = None,
+        interval_ms: float = 5.0,
+        max_seconds: float = 300.0
+    ) -> ProfileSession:
+        """
+        Start sampling for ``seconds``, or for the next ``requests`` requests matching ``route``
+
+        Either way the session ends after ``max_seconds``.
+
+        Raises:
+            ProfilerBusy: A session is already running
+            ValueError: Invalid combination of arguments
+        """
+        if (seconds is None) == (requests is None):
+            raise ValueError("Pass either seconds or requests")
+        if requests is not None and not route:
+            raise ValueError("A route is required to profile requests")
+
+        from starlette.routing import compile_path
+
+        with self._lock:
+            if self.session is not None and self.session.running:
+                raise ProfilerBusy(f"Profiling session {self.session.id} is already running")
+
+            duration = min(seconds if seconds is not None else max_seconds, max_seconds)
+            session = ProfileSession(
+                id=self._next_id,
+                interval=interval_ms / 1000,
+                deadline=time.monotonic() + duration,
+                seconds=seconds,
+                route=route,
+                route_regex=compile_path(route)[0] if route else None,
+                requests_limit=requests,
+            )
+            self._next_id += 1
+            self.session = session
+            self._active_requests = 0
+            self._stop.clear()
+            if requests is not None:
+                self.request_session = session
+
+            self._thread = threading.Thread(
+                target=self._run, args=(session,), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        return session
+
+    def stop(self) -> Optional[ProfileSession]:
+        """Stop the running session (if any) and return the last session"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.session
+
+    def _finish(self, session: ProfileSession) -> None:
+        with self._lock:
+            if self.request_session is session:
+                self.request_session = None
+            if session.finished_at is None:
+                session.finished_at = datetime.utcnow()
+
+    def _run(self, session: ProfileSession) -> None:
+        own_id = threading.get_ident()
+        try:
+            while not self._stop.wait(session.interval):
+                if time.monotonic() >= session.deadline:
+                    break
+                if session.requests_limit is not None and self._active_requests == 0:
+                    continue
+                self._sample(session, own_id)
+        finally:
+            self._finish(session)
+
+    @staticmethod
+    def _sample(session: ProfileSession, own_id: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            session.stacks[";".join(reversed(labels))] += 1
+        session.samples += 1
+
+    # Request mode (called by ProfilerMiddleware)
+
+    def request_started(self) -> None:
+        self._active_requests += 1
+
+    def request_finished(self, session: ProfileSession) -> None:
+        self._active_requests -= 1
+        session.requests_seen += 1
+        if session.requests_seen >= session.requests_limit:
+            self._finish(session)
+            self._stop.set()
+
+    def collapsed(self, session: Optional[ProfileSession] = None) -> str:
+        """Aggregated stacks in collapsed-stack format, most frequent first"""
+        session = session or self.session
+        if session is None:
+            return ""
+        stacks = session.stacks.copy()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# Create singleton instance
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,126 @@
+"""
+Request coalescing (single-flight) for identical concurrent reads
+
+The first request for a key runs the computation in a worker thread, with a
+database session of its own; requests for the same key that arrive while it
+runs wait for that result instead of running the same query again. Nothing is kept after the computation finishes:
+this only removes duplicate work that is in flight at the same time, so there
+is no staleness to manage.
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from app.config import settings
+from app.database import WorkerSessionLocal
+from app.utils.metrics import singleflight_requests
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(Exception):
+    """The shared computation did not finish within the caller's timeout"""
+
+
+def flight_key(route: str, **params: Any) -> Tuple[Hashable, ...]:
+    """
+    Normalized key of a read: route template plus its parameters
+
+    Parameters arrive already parsed (defaults filled in, numbers converted),
+    so ``?min=0`` and ``?min=0.0`` give the same key. ``None`` values are left
+    out and the order of the query string does not matter.
+    """
+    return (route,) + tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in params.items()
+        if value is not None
+    ))
+
+
+def _run_in_session(func: Callable[[Session], T]) -> T:
+    """
+    Call ``func`` with a session from the worker engine and close it afterwards
+
+    The request's own session (get_db) lives on the StaticPool engine, whose
+    single connection is shared by every session; using it from a worker thread
+    would interleave transactions, and get_db may close it while a computation
+    that outlived a timed-out caller is still running.
+    """
+    db = WorkerSessionLocal()
+    try:
+        return func(db)
+    finally:
+        db.close()
+
+
+class SingleFlight:
+    """
+    Shares one in-flight computation among concurrent callers with the same key
+
+    Errors raised by the computation reach every caller waiting for it. Each
+    caller waits at most ``timeout`` seconds; a caller that gives up (timeout
+    or disconnect) does not cancel the computation for the others, but a
+    timeout detaches it so the next request for the key starts a fresh one.
+    Outcomes are counted per route in singleflight_requests_total.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self, key: Tuple[Hashable, ...], func: Callable[[Session], T], timeout: Optional[float] = None
+    ) -> T:
+        """
+        Return ``func(db)``, computed once for all concurrent callers with ``key``
+
+        Args:
+            key: flight_key(...) of the request; key[0] labels the metrics
+            func: Blocking computation, run in a worker thread with its own session
+            timeout: Seconds this caller waits (None waits indefinitely)
+        """
+        route = key[0]
+        if not self.enabled:
+            return await asyncio.to_thread(_run_in_session, func)
+
+        future = self._flights.get(key)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(_run_in_session, func))
+            self._flights[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+            role = "leader"
+        else:
+            role = "shared"
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._detach(key, future)
+            singleflight_requests.inc((route, "timeout"))
+            raise SingleFlightTimeout(f"{route} did not finish within {timeout}s") from None
+        except Exception:
+            singleflight_requests.inc((route, "error"))
+            raise
+
+        singleflight_requests.inc((route, role))
+        return result
+
+    def _detach(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._flights.get(key) is future:
+            del self._flights[key]
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        self._detach(key, future)
+        # Retrieve the exception even when every caller gave up on it
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Single-flight computation for {key[0]} failed: {future.exception()!r}")
+
+
+# Create singleton instance
+single_flight = SingleFlight(enabled=settings.SINGLEFLIGHT_ENABLED)
@@ -0,0 +1,183 @@
+"""
+Per-request SQL profiling and slow-query log
+
+When SQL_PROFILING_ENABLED is on, cursor events on the API engine:
+
+- count and time the queries of the current request (read by
+  SQLProfilerMiddleware and sent as a ``Server-Timing`` header)
+- log queries slower than SQL_SLOW_QUERY_MS with their ``EXPLAIN QUERY PLAN``
+- aggregate normalized statements (literals and IN lists collapsed) into a
+  top-N table served at /api/v1/admin/sql/top
+
+When it is off nothing is registered, so queries pay no cost at all.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bucket for new statement shapes once SQL_TOP_STATEMENTS distinct ones are tracked
+OTHER_STATEMENT = "<other>"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """Collapse literals and IN lists so the same query shape aggregates together"""
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("IN (...)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+@dataclass
+class RequestQueryStats:
+    """Queries executed while handling one request"""
+    count: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class StatementStats:
+    """Aggregate of one normalized statement"""
+    statement: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+class SQLProfiler:
+    """Collects per-request and per-statement query timings from engine events"""
+
+    def __init__(self):
+        self.slow_query_seconds = 0.1
+        self.explain_slow_queries = True
+        self.max_statements = 1000
+        self._statements: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, slow_query_ms: float, explain_slow_queries: bool, max_statements: int) -> None:
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.explain_slow_queries = explain_slow_queries
+        self.max_statements = max_statements
+
+    def instrument(self, engine) -> None:
+        """Register the cursor event listeners on an engine"""
+        from sqlalchemy import event
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiler_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_profiler_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+        self._record(statement, elapsed)
+
+        if elapsed >= self.slow_query_seconds:
+            plan = None
+            if self.explain_slow_queries and not executemany and conn.dialect.name == "sqlite":
+                plan = self._explain(cursor, statement, parameters)
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms): {_SPACE.sub(' ', statement).strip()}"
+                + (f"\n  plan: {plan}" if plan else "")
+            )
+
+    def _record(self, statement: str, elapsed: float) -> None:
+        key = normalize_statement(statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= self.max_statements:
+                    key = OTHER_STATEMENT
+                stats = self._statements.setdefault(key, StatementStats(key))
+            stats.count += 1
+            stats.total_seconds += elapsed
+            if elapsed > stats.max_seconds:
+                stats.max_seconds = elapsed
+
+    @staticmethod
+    def _explain(cursor, statement: str, parameters) -> Optional[str]:
+        """EXPLAIN QUERY PLAN on the raw DBAPI connection (does not re-fire engine events)"""
+        if statement.lstrip()[:6].upper() not in ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+            return None
+        try:
+            plan_cursor = cursor.connection.cursor()
+            try:
+                plan_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                return " | ".join(row[-1] for row in plan_cursor.fetchall())
+            finally:
+                plan_cursor.close()
+        except Exception as e:
+            return f"unavailable ({type(e).__name__}: {e})"
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[Dict]:
+        """Statements with the highest total time (or ``count``, ``mean``, ``max``)"""
+        keys = {
+            "total": lambda s: s.total_seconds,
+            "count": lambda s: s.count,
+            "mean": lambda s: s.total_seconds / s.count,
+            "max": lambda s: s.max_seconds,
+        }
+        if order_by not in keys:
+            raise ValueError(f"order_by must be one of {', '.join(keys)}")
+
+        with self._lock:
+            statements = [StatementStats(**vars(s)) for s in self._statements.values()]
+        statements.sort(key=keys[order_by], reverse=True)
+        return [s.to_dict() for s in statements[:limit]]
+
+    def reset(self) -> None:
+        """Clear the top-N table"""
+        with self._lock:
+            self._statements.clear()
+
+    @staticmethod
+    @contextmanager
+    def track_request() -> Iterator[RequestQueryStats]:
+        """Count the queries run in this context (and the threads it hands work to)"""
+        stats = RequestQueryStats()
+        token = _request_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            _request_stats.reset(token)
+
+
+# Create singleton instance
+sql_profiler = SQLProfiler()
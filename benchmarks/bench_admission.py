@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos limites de taxa e do controle de admissão
+
+Sobe o uvicorn sobre um catálogo sintético e o sobrecarrega por --seconds:
+
+- clientes normais (--clients, um IP cada via X-Forwarded-For) navegando em
+  /books, /books/{id} e /books/top-rated
+- um "scraper" (um IP, --scraper-connections conexões) paginando /books
+  sem parar
+- um ataque de senha (um IP, --login-connections conexões) em /auth/login
+  (bcrypt)
+
+Ninguém respeita o Retry-After (pior caso). Enquanto isso, /health/live e
+/health/ready são consultados a --probe-rate por segundo. Compara sem limites
+(RATE_LIMIT_ENABLED=False, ADMISSION_MAX_CONCURRENT=0) e com limites
+(--client-rate, --max-concurrent, --max-queue), e falha (exit 1) se com limites o p99 dos probes passar de
+--probe-budget-ms ou algum probe falhar.
+
+Uso:
+    python benchmarks/bench_admission.py --seconds 20 --probe-budget-ms 250
+"""
+import argparse
+import asyncio
+import http.client
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog, latency_summary
+
+MODES = {
+    "sem limites": {"RATE_LIMIT_ENABLED": "False", "ADMISSION_MAX_CONCURRENT": "0"},
+    "com limites": {"RATE_LIMIT_ENABLED": "True", "RATE_LIMIT_TRUST_FORWARDED_FOR": "True"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def probe_worker(port: int, rate: float, seconds: float, results) -> None:
+    """Alterna /health/ready e /health/live a ``rate`` por segundo (uma conexão keep-alive)"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    latencies, failures = [], []
+    begin = time.monotonic()
+    sent = 0
+    while time.monotonic() - begin < seconds:
+        path = "/api/v1/health/live" if sent % 2 else "/api/v1/health/ready"
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                failures.append(response.status)
+        except OSError as e:
+            failures.append(type(e).__name__)
+            conn.close()
+        latencies.append((time.perf_counter() - start) * 1000)
+        sent += 1
+        time.sleep(max(0.0, begin + sent / rate - time.monotonic()))
+    conn.close()
+    results.put((latencies, failures))
+
+
+async def measure(env: dict, args) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "600"],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    connections = args.clients + args.scraper_connections + args.login_connections + 8
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    if (await client.get("/api/v1/health/ready")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn não ficou pronto a tempo")
+                await asyncio.sleep(0.1)
+
+            rng = random.Random(42)
+            stop = time.monotonic() + args.seconds
+            statuses = {"normais": Counter(), "scraper": Counter(), "login": Counter()}
+            normal_ok = []
+
+            async def normal(index: int):
+                headers = {"X-Forwarded-For": f"10.0.{index // 250}.{index % 250 + 1}"}
+                while time.monotonic() < stop:
+                    choice = rng.random()
+                    if choice < 0.4:
+                        request = client.get("/api/v1/books", params={"page": rng.randint(1, args.books // 20)},
+                                             headers=headers)
+                    elif choice < 0.8:
+                        request = client.get(f"/api/v1/books/{rng.randint(1, args.books)}", headers=headers)
+                    else:
+                        request = client.get("/api/v1/books/top-rated", params={"limit": 20}, headers=headers)
+                    start = time.perf_counter()
+                    response = await request
+                    statuses["normais"][response.status_code] += 1
+                    if response.status_code == 200:
+                        normal_ok.append((time.perf_counter() - start) * 1000)
+
+            pages = iter(range(1, 10**9))
+
+            async def scraper():
+                headers = {"X-Forwarded-For": "192.0.2.10"}
+                while time.monotonic() < stop:
+                    page = next(pages) % (args.books // 100) + 1
+                    response = await client.get("/api/v1/books", params={"page": page, "page_size": 100},
+                                                headers=headers)
+                    statuses["scraper"][response.status_code] += 1
+
+            async def login():
+                headers = {"X-Forwarded-For": "192.0.2.20"}
+                while time.monotonic() < stop:
+                    response = await client.post("/api/v1/auth/login", headers=headers,
+                                                 data={"username": "admin", "password": "errada"})
+                    statuses["login"][response.status_code] += 1
+
+            # Os probes saem de outro processo: o event loop deste, ocupado com a
+            # carga, atrasaria as medições
+            probe_results = multiprocessing.Queue()
+            prober = multiprocessing.Process(target=probe_worker, args=(port, args.probe_rate, args.seconds, probe_results))
+            prober.start()
+            await asyncio.gather(
+                *(normal(index) for index in range(args.clients)),
+                *(scraper() for _ in range(args.scraper_connections)),
+                *(login() for _ in range(args.login_connections)),
+            )
+            probes, probe_failures = probe_results.get()
+            prober.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "statuses": statuses,
+        "normal_ok": latency_summary(normal_ok),
+        "normal_rps": len(normal_ok) / args.seconds,
+        "probes": latency_summary(probes),
+        "probe_max": max(probes, default=0.0),
+        "probe_failures": probe_failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos limites de taxa e do controle de admissão")
+    parser.add_argument("--books", type=int, default=50_000, help="Livros no catálogo sintético")
+    parser.add_argument("--clients", type=int, default=32, help="Clientes normais (uma conexão cada)")
+    parser.add_argument("--scraper-connections", type=int, default=64, help="Conexões do scraper")
+    parser.add_argument("--login-connections", type=int, default=16, help="Conexões do ataque de senha")
+    parser.add_argument("--probe-rate", type=float, default=20.0, help="Probes por segundo")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duração da sobrecarga")
+    # O gerador de carga divide a CPU com o servidor: os limites padrão (100/s
+    # por cliente) ficariam acima do que o scraper consegue enviar aqui
+    parser.add_argument("--client-rate", type=float, default=20.0,
+                        help="RATE_LIMIT_CLIENT_RATE com limites (rota: metade; rajadas: o dobro)")
+    parser.add_argument("--max-concurrent", type=int, default=16, help="ADMISSION_MAX_CONCURRENT com limites")
+    parser.add_argument("--max-queue", type=int, default=64, help="ADMISSION_MAX_QUEUE com limites")
+    parser.add_argument("--probe-budget-ms", type=float, default=250.0, help="p99 máximo dos probes com limites")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "books.db"
+    configure_environment(db_path)
+    create_synthetic_catalog(db_path, args.books)
+
+    limited = {
+        "ADMISSION_MAX_CONCURRENT": str(args.max_concurrent), "ADMISSION_MAX_QUEUE": str(args.max_queue),
+        "RATE_LIMIT_CLIENT_RATE": str(args.client_rate), "RATE_LIMIT_CLIENT_BURST": str(2 * args.client_rate),
+        "RATE_LIMIT_ROUTE_RATE": str(args.client_rate / 2), "RATE_LIMIT_ROUTE_BURST": str(args.client_rate),
+    }
+    results = {}
+    for label, overrides in MODES.items():
+        if label == "com limites":
+            overrides = {**overrides, **limited}
+        env = {**os.environ, **overrides, "LOG_DATABASE_URL": f"sqlite:///{tmp_dir / 'logs.db'}",
+               "API_LOG_ARCHIVE_DIR": str(tmp_dir / "archive")}
+        env.pop("PYTHONPATH", None)
+        results[label] = asyncio.run(measure(env, args))
+
+    print("\n" + "=" * 100)
+    print(f"Sobrecarga por {args.seconds:.0f}s: {args.clients} clientes normais, scraper com "
+          f"{args.scraper_connections} conexões, ataque de senha com {args.login_connections} conexões")
+    print(f"{'':<14}{'probe p50':>10}{'p99':>9}{'máx (ms)':>10}{'falhas':>8}"
+          f"{'normais ok/s':>14}{'p50 ok (ms)':>13}  respostas (status: quantidade)")
+    for label, row in results.items():
+        print(f"{label:<14}{row['probes']['p50_ms']:>10.1f}{row['probes']['p99_ms']:>9.1f}{row['probe_max']:>10.1f}"
+              f"{len(row['probe_failures']):>8}{row['normal_rps']:>14.1f}{row['normal_ok']['p50_ms']:>13.1f}")
+        for group, counts in row["statuses"].items():
+            print(f"{'':<14}{group:>12}: " + ", ".join(f"{code}: {count}" for code, count in sorted(counts.items())))
+    print("=" * 100)
+
+    limited = results["com limites"]
+    if limited["probe_failures"] or limited["probes"]["p99_ms"] > args.probe_budget_ms:
+        print(f"FALHOU: p99 dos probes {limited['probes']['p99_ms']:.1f} ms (orçamento {args.probe_budget_ms:.0f} ms), "
+              f"{len(limited['probe_failures'])} falhas")
+        sys.exit(1)
+    print(f"OK: health respondeu sob sobrecarga (p99 {limited['probes']['p99_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmark da API
+
+Para cada tamanho de catálogo sintético (padrão: 1k, 100k e 1M livros) sobe a
+aplicação em um processo separado e dispara requisições concorrentes contra os
+principais endpoints, de duas formas:
+
+- asgi: no próprio processo, via httpx.ASGITransport (sem rede nem servidor)
+- http: uvicorn real em uma porta local, com clientes httpx concorrentes
+
+Registra throughput e p50/p95/p99 por endpoint em um JSON. Com --compare, o
+resultado é comparado a um baseline e o script falha (exit 1) se alguma
+latência piorou além do limite.
+
+Uso:
+    # Gera o baseline
+    python benchmarks/bench_api.py --sizes 1k,100k,1m --output benchmarks/results/baseline.json
+
+    # Compara uma execução nova com o baseline (falha se o p95 piorar mais de 25%)
+    python benchmarks/bench_api.py --sizes 1k,100k --compare benchmarks/results/baseline.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common import ROOT_DIR, TITLE_WORDS, CATEGORIES, configure_environment, create_synthetic_catalog, latency_summary
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+
+# (nome, método, caminho, parâmetros, peso): o peso multiplica --requests
+# (endpoints pesados como a exportação completa rodam menos vezes)
+ENDPOINTS = [
+    ("GET /books", "GET", "/api/v1/books",
+     lambda rng, n: {"page": rng.randint(1, max(1, n // 20)), "page_size": 20}, 1.0),
+    ("GET /books/{id}", "GET", None, lambda rng, n: {}, 1.0),
+    ("GET /books/search", "GET", "/api/v1/books/search",
+     lambda rng, n: {"title": rng.choice(TITLE_WORDS[10:])}, 0.25),
+    ("GET /books/top-rated", "GET", "/api/v1/books/top-rated", lambda rng, n: {"limit": 10}, 1.0),
+    ("GET /categories", "GET", "/api/v1/categories", lambda rng, n: {}, 1.0),
+    ("GET /stats/overview", "GET", "/api/v1/stats/overview", lambda rng, n: {}, 1.0),
+    ("GET /stats/categories", "GET", "/api/v1/stats/categories", lambda rng, n: {}, 1.0),
+    ("GET /ml/features", "GET", "/api/v1/ml/features", lambda rng, n: {"limit": 100}, 0.5),
+    ("GET /ml/training-data", "GET", "/api/v1/ml/training-data", lambda rng, n: {}, 0.02),
+    ("POST /auth/login", "POST", "/api/v1/auth/login", lambda rng, n: {}, 0.1),
+]
+
+SIZE_ALIASES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower().replace("_", "")
+    if value[-1] in SIZE_ALIASES:
+        return int(float(value[:-1]) * SIZE_ALIASES[value[-1]])
+    return int(value)
+
+
+def size_label(books: int) -> str:
+    if books >= 1_000_000 and books % 1_000_000 == 0:
+        return f"{books // 1_000_000}m"
+    if books >= 1_000 and books % 1_000 == 0:
+        return f"{books // 1_000}k"
+    return str(books)
+
+
+# --- Execução de um tamanho (processo filho) ---
+
+async def drive_endpoint(client, spec, books: int, total: int, concurrency: int, seed: int) -> dict:
+    """Dispara `total` requisições com `concurrency` clientes e mede as latências"""
+    name, method, path, make_params, _ = spec
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    remaining = total
+
+    async def one_client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            params = make_params(rng, books)
+            url = path or f"/api/v1/books/{rng.randint(1, books)}"
+            start = time.perf_counter()
+            try:
+                if method == "POST":
+                    response = await client.post(url, data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+                else:
+                    response = await client.get(url, params=params)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_client() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        **latency_summary(latencies),
+    }
+
+
+async def run_suite(client, books: int, requests: int, concurrency: int, seed: int) -> dict:
+    results = {}
+    for i, spec in enumerate(ENDPOINTS):
+        name, _, _, _, weight = spec
+        total = max(3, int(requests * weight))
+        # Aquecimento: caches, leaderboards e planos de consulta
+        await drive_endpoint(client, spec, books, min(total, 3), 1, seed + i)
+        results[name] = await drive_endpoint(client, spec, books, total, concurrency, seed + i)
+        stats = results[name]
+        print(f"   {name:<24}{stats['throughput_rps']:>9.1f} req/s  p50 {stats['p50_ms']:>8.1f}  "
+              f"p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms  erros {stats['errors']}",
+              file=sys.stderr)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_http(books: int, requests: int, concurrency: int, seed: int) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    if (await client.get("/api/v1/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn não respondeu a tempo")
+                await asyncio.sleep(0.2)
+            return await run_suite(client, books, requests, concurrency, seed)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run_asgi(books: int, requests: int, concurrency: int, seed: int) -> dict:
+    import httpx
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+            return await run_suite(client, books, requests, concurrency, seed)
+    finally:
+        await app.router.shutdown()
+
+
+def prepare_database(db_path: Path, books: int, seed: int) -> None:
+    """Cria (ou reaproveita) o catálogo e o usuário usado no login"""
+    configure_environment(db_path)
+    if not db_path.exists():
+        print(f"📚 Gerando catálogo sintético com {books:,} livros...", file=sys.stderr)
+        create_synthetic_catalog(db_path, books, seed)
+
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.utils.security import get_password_hash
+
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.username == BENCH_USERNAME).first():
+            db.add(User(username=BENCH_USERNAME, email="bench@example.com",
+                        hashed_password=get_password_hash(BENCH_PASSWORD), is_admin=False, is_active=True))
+            db.commit()
+    finally:
+        db.close()
+
+
+def run_size(args) -> None:
+    """Processo filho: executa os modos pedidos para um tamanho e imprime o JSON"""
+    db_path = Path(args.data_dir) / f"catalog_{size_label(args.books)}_{args.seed}.db"
+    prepare_database(db_path, args.books, args.seed)
+
+    results = {}
+    for mode in args.modes.split(","):
+        print(f"⏱️  {size_label(args.books)} / {mode}", file=sys.stderr)
+        runner = run_asgi if mode == "asgi" else run_http
+        results[mode] = asyncio.run(runner(args.books, args.requests, args.concurrency, args.seed))
+    print(json.dumps(results))
+
+
+# --- Orquestração e comparação ---
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, metric: str, threshold: float, min_delta_ms: float) -> list:
+    """Lista as regressões de `metric` acima de `threshold` (fração) e de `min_delta_ms`"""
+    regressions = []
+    print(f"\n{'Tamanho/modo/endpoint':<44}{'baseline':>10}{'atual':>10}{'variação':>10}")
+    for size, modes in current["results"].items():
+        for mode, endpoints in modes.items():
+            for name, stats in endpoints.items():
+                base = baseline.get("results", {}).get(size, {}).get(mode, {}).get(name)
+                if base is None:
+                    continue
+                before, after = base[metric], stats[metric]
+                change = (after - before) / before if before else 0.0
+                regressed = change > threshold and after - before > min_delta_ms
+                marker = " ❌" if regressed else ""
+                print(f"{size + '/' + mode + ' ' + name:<44}{before:>10.1f}{after:>10.1f}{change:>+10.0%}{marker}")
+                if regressed:
+                    regressions.append(f"{size}/{mode} {name}: {metric} {before:.1f} -> {after:.1f} ms ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmark da API")
+    parser.add_argument("--sizes", default="1k,100k,1m", help="Tamanhos de catálogo (ex.: 1k,100k,1m)")
+    parser.add_argument("--modes", default="asgi,http", help="asgi, http ou ambos")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por endpoint (multiplicadas pelo peso)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultâneos")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do catálogo e das requisições")
+    parser.add_argument("--data-dir", default=None, help="Diretório dos catálogos gerados (reaproveitados entre execuções)")
+    parser.add_argument("--output", default=None, help="Grava o resultado em JSON (baseline)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON para comparar")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    parser.add_argument("--threshold", type=float, default=0.25, help="Piora relativa máxima aceita (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignora pioras menores que isso (ruído)")
+    parser.add_argument("--books", type=int, help=argparse.SUPPRESS)  # processo filho
+    args = parser.parse_args()
+
+    args.data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench_api_")
+    Path(args.data_dir).mkdir(parents=True, exist_ok=True)
+
+    if args.books:
+        run_size(args)
+        return
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "categories": len(CATEGORIES),
+        },
+        "results": {},
+    }
+
+    for size in args.sizes.split(","):
+        books = parse_size(size)
+        # Um processo por tamanho: as configurações da aplicação são lidas na importação
+        output = subprocess.run(
+            [sys.executable, __file__, "--books", str(books), "--modes", args.modes,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--seed", str(args.seed), "--data-dir", args.data_dir],
+            cwd=ROOT_DIR, stdout=subprocess.PIPE, text=True, check=True
+        ).stdout
+        report["results"][size_label(books)] = json.loads(output.strip().splitlines()[-1])
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Resultado gravado em {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.metric, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressões acima de {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"\n✅ Nenhuma regressão de {args.metric} acima de {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
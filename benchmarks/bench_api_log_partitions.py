@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark das partições diárias de api_logs
+
+Grava N logs sintéticos distribuídos em D dias de duas formas:
+
+- tabela única api_logs (modelo APILog, índices em endpoint e timestamp)
+- partições diárias api_logs_YYYYMMDD (APILogStore, só chave primária)
+
+e compara, vazio e com N logs:
+
+- latência de inserir um log e dar commit (o que o middleware faz por requisição)
+- consultas do dashboard: últimos 20 logs e resumo de 7 dias (rollups por
+  hora, contra um agregado por índice na tabela única)
+- retenção de um dia: DELETE na tabela única contra arquivar + DROP da partição
+- tamanho dos bancos
+
+Uso:
+    python benchmarks/bench_api_log_partitions.py --logs 50000000 --days 30
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from common import configure_environment, time_calls
+
+CHUNK = 1_000_000
+PATHS = (
+    [f"/api/v1/books/{i}" for i in range(1, 1001)]
+    + ["/api/v1/books", "/api/v1/books/search", "/api/v1/books/top-rated", "/api/v1/stats/overview"] * 250
+)
+TEMPLATES = ["/api/v1/books/{book_id}"] * 1000 + [
+    "/api/v1/books", "/api/v1/books/search", "/api/v1/books/top-rated", "/api/v1/stats/overview"
+] * 250
+
+
+def generate_chunks(total: int, days: int, now: datetime, seed: int = 42):
+    """Blocos de logs em ordem de timestamp: (caminhos, templates, status, latências, timestamps)"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(now - timedelta(days=days), "us")
+    span_us = days * 86_400 * 1_000_000
+    for first in range(0, total, CHUNK):
+        size = min(CHUNK, total - first)
+        offsets = (np.arange(first, first + size, dtype=np.int64) * (span_us // total))
+        offsets += rng.integers(0, span_us // total, size=size)
+        timestamps = start + offsets.astype("timedelta64[us]")
+        choices = rng.integers(0, len(PATHS), size=size)
+        statuses = np.where(rng.random(size) < 0.03, 404, 200)
+        latencies = rng.lognormal(mean=2.0, sigma=0.8, size=size)
+        yield choices, statuses, latencies, timestamps
+
+
+def fill(mono: sqlite3.Connection, part: sqlite3.Connection, store, rollups, total: int, days: int, now: datetime):
+    for choices, statuses, latencies, timestamps in generate_chunks(total, days, now):
+        texts = np.char.replace(np.datetime_as_string(timestamps, unit="us"), "T", " ").tolist()
+        paths = [PATHS[i] for i in choices.tolist()]
+        statuses = statuses.tolist()
+        latencies = latencies.tolist()
+
+        mono.executemany(
+            "INSERT INTO api_logs (endpoint, method, status_code, response_time, timestamp) VALUES (?, 'GET', ?, ?, ?)",
+            zip(paths, statuses, latencies, texts)
+        )
+        mono.commit()
+
+        # Partições criadas antes de abrir a transação de escrita em `part`
+        days_of_chunk = timestamps.astype("datetime64[D]")
+        tables = {day: store.table_for(day.astype(datetime)).name for day in np.unique(days_of_chunk)}
+        for day, table in tables.items():
+            mask = np.flatnonzero(days_of_chunk == day)
+            part.executemany(
+                f"INSERT INTO {table} (endpoint, route, method, status_code, response_time, timestamp) "
+                "VALUES (?, ?, 'GET', ?, ?, ?)",
+                ((paths[i], TEMPLATES[choices[i]], statuses[i], latencies[i], texts[i]) for i in mask.tolist())
+            )
+        part.commit()
+
+        rollups.backfill(
+            (TEMPLATES[c], "GET", s, l, t)
+            for c, s, l, t in zip(choices.tolist(), statuses, latencies, timestamps.tolist())
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das partições diárias de api_logs")
+    parser.add_argument("--logs", type=int, default=50_000_000, help="Logs sintéticos")
+    parser.add_argument("--days", type=int, default=30, help="Dias cobertos pelos logs")
+    parser.add_argument("--inserts", type=int, default=2_000, help="Inserções medidas (uma por commit)")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    part_path = tmp_dir / "partitioned.db"
+    mono_path = tmp_dir / "monolithic.db"
+    configure_environment(part_path)
+    os.environ["API_LOG_ARCHIVE_DIR"] = str(tmp_dir / "archive")
+
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from app.database import LogBase, LogSessionLocal, log_engine, set_sqlite_pragma
+    from app.models import APILog
+    from app.services.api_log_rollup_service import APILogRollupService
+    from app.services.api_log_store import APILogStore, api_log_store
+    from app.utils.latency_sketch import LatencySketch
+
+    LogBase.metadata.create_all(bind=log_engine)
+    mono_engine = create_engine(f"sqlite:///{mono_path}", connect_args={"check_same_thread": False})
+    event.listen(mono_engine, "connect", set_sqlite_pragma)
+    APILog.__table__.create(mono_engine)
+    MonoSession = sessionmaker(bind=mono_engine)
+
+    def insert_mono():
+        db = MonoSession()
+        db.add(APILog(endpoint="/api/v1/books/42", method="GET", status_code=200,
+                      response_time=3.2, timestamp=datetime.utcnow()))
+        db.commit()
+        db.close()
+
+    def insert_partition():
+        db = LogSessionLocal()
+        api_log_store.insert(db, [{"endpoint": "/api/v1/books/42", "route": "/api/v1/books/{book_id}",
+                                   "method": "GET", "status_code": 200, "response_time": 3.2,
+                                   "timestamp": datetime.utcnow()}])
+        db.commit()
+        db.close()
+
+    def measure_inserts():
+        return {
+            label: time_calls(func, args.inserts)
+            for label, func in (("Tabela única", insert_mono), ("Partição diária", insert_partition))
+        }
+
+    empty = measure_inserts()
+
+    # Carga: índices da tabela única criados depois (como se tivessem crescido com ela)
+    now = datetime.utcnow()
+    print(f"📝 Gravando {args.logs:,} logs em {args.days} dias nas duas formas...")
+    start = time.perf_counter()
+    mono = sqlite3.connect(mono_path)
+    part = sqlite3.connect(part_path)
+    for conn in (mono, part):
+        conn.execute("PRAGMA synchronous=OFF")
+    indexes = list(APILog.__table__.indexes)
+    with mono_engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+    fill(mono, part, api_log_store, APILogRollupService(), args.logs, args.days, now)
+    mono.close()
+    part.close()
+    with mono_engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+    print(f"   carga em {time.perf_counter() - start:.0f}s")
+
+    full = measure_inserts()
+
+    def merge_rollups(rows):
+        sketch, total = LatencySketch(), 0
+        for count, data in rows:
+            total += count
+            sketch.merge(LatencySketch.from_json(data))
+        return total, sketch.quantile(0.95)
+
+    # Consultas do dashboard
+    cutoff = (datetime.utcnow() - timedelta(hours=168)).strftime("%Y-%m-%d %H:00:00")
+    with mono_engine.connect() as mono_conn, log_engine.connect() as part_conn:
+        queries = {
+            "Últimos 20 (tabela única)": lambda: mono_conn.execute(text(
+                "SELECT timestamp, method, endpoint, status_code, response_time FROM api_logs "
+                "ORDER BY timestamp DESC LIMIT 20")).all(),
+            "Últimos 20 (partições)": lambda: APILogStore.recent(part_conn, 20),
+            "7 dias, agregado (tabela única)": lambda: mono_conn.execute(text(
+                "SELECT COUNT(*), AVG(response_time) FROM api_logs WHERE timestamp >= :cutoff"),
+                {"cutoff": cutoff}).all(),
+            "7 dias, rollups + sketch": lambda: merge_rollups(part_conn.execute(text(
+                "SELECT count, latency_sketch FROM api_log_rollups_hour WHERE bucket_start >= :cutoff"),
+                {"cutoff": cutoff})),
+        }
+        query_times = {label: time_calls(func, 5) for label, func in queries.items()}
+
+    # Retenção do dia mais antigo
+    with log_engine.connect() as conn:
+        oldest = APILogStore.partitions(conn)[0]
+    oldest_end = datetime.combine(oldest + timedelta(days=1), datetime.min.time())
+    start = time.perf_counter()
+    with mono_engine.begin() as conn:
+        deleted = conn.execute(text("DELETE FROM api_logs WHERE timestamp < :end"),
+                               {"end": oldest_end.isoformat(sep=" ")}).rowcount
+    delete_s = time.perf_counter() - start
+
+    with log_engine.connect() as conn:
+        start = time.perf_counter()
+        archived = APILogStore.archive_partition(conn, oldest, os.environ["API_LOG_ARCHIVE_DIR"])
+        archive_s = time.perf_counter() - start
+    start = time.perf_counter()
+    result = api_log_store.compact((now.date() - oldest).days - 1, None, None, today=now.date())
+    drop_s = time.perf_counter() - start
+    archive_mb = sum(f.stat().st_size for f in (tmp_dir / "archive").iterdir()) / 1e6
+
+    print("\n" + "=" * 76)
+    print(f"{'Inserção + commit (ms)':<26}{'vazio p50':>12}{'p99':>9}{f'{args.logs:,} p50':>16}{'p99':>9}")
+    for label in empty:
+        print(f"{label:<26}{empty[label]['p50_ms']:>12.3f}{empty[label]['p99_ms']:>9.3f}"
+              f"{full[label]['p50_ms']:>16.3f}{full[label]['p99_ms']:>9.3f}")
+    print(f"\n{'Dashboard':<36}{'p50 (ms)':>12}")
+    for label, summary in query_times.items():
+        print(f"{label:<36}{summary['p50_ms']:>12.2f}")
+    print(f"\nRetenção de 1 dia ({deleted:,} logs):")
+    print(f"  DELETE na tabela única           {delete_s:8.2f}s")
+    print(f"  arquivo NDJSON.gz da partição    {archive_s:8.2f}s ({archived:,} linhas, {archive_mb:.1f} MB)")
+    print(f"  compactação (rollups ok) + DROP  {drop_s:8.2f}s ({result.summary()})")
+    print(f"\nTamanho: tabela única {mono_path.stat().st_size / 1e9:.2f} GB, "
+          f"partições + rollups {part_path.stat().st_size / 1e9:.2f} GB")
+    print("=" * 76)
+
+    assert result.partitions_dropped == 1 and result.rows_rolled_up == 0
+    assert archived == deleted
+
+
+if __name__ == "__main__":
+    main()
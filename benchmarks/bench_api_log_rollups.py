@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos rollups de api_logs
+
+Gera N logs sintéticos distribuídos em 7 dias, constrói os rollups por
+minuto/hora (backfill) e compara, para a visão "Last 7 Days" do dashboard:
+
+- consulta anterior: últimos 1.000 logs + pandas (rápida, mas errada)
+- varredura completa de api_logs + pandas (correta, O(requisições))
+- rollups por hora + sketches mesclados (O(buckets))
+
+Verifica o erro do p95/p99 do sketch contra o valor exato, o custo de
+`record` por requisição e que flushes concorrentes não perdem contagens.
+
+Uso:
+    python benchmarks/bench_api_log_rollups.py --logs 1000000
+"""
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common import configure_environment
+
+ENDPOINTS = [
+    ("/api/v1/books/{book_id}", lambda rng: f"/api/v1/books/{rng.integers(1, 1000)}", 0.45),
+    ("/api/v1/books", lambda rng: "/api/v1/books", 0.2),
+    ("/api/v1/books/search", lambda rng: "/api/v1/books/search", 0.15),
+    ("/api/v1/books/top-rated", lambda rng: "/api/v1/books/top-rated", 0.1),
+    ("/api/v1/stats/overview", lambda rng: "/api/v1/stats/overview", 0.1),
+]
+
+
+def generate_logs(db_path: Path, total: int, seed: int = 42):
+    """Grava `total` logs com latência log-normal nos últimos 7 dias; retorna as latências"""
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    # Uma hora de folga para a janela de 7 dias do dashboard conter todos os logs
+    offsets = np.sort(rng.uniform(0, (7 * 24 - 1) * 3600, size=total))[::-1]
+    latencies = rng.lognormal(mean=2.0, sigma=0.8, size=total)
+    choices = rng.choice(len(ENDPOINTS), size=total, p=[weight for _, _, weight in ENDPOINTS])
+    statuses = np.where(rng.random(total) < 0.03, 404, 200)
+
+    rows = []
+    templates = []
+    for i in range(total):
+        template, raw_path, _ = ENDPOINTS[choices[i]]
+        timestamp = now - timedelta(seconds=float(offsets[i]))
+        rows.append((raw_path(rng), "GET", int(statuses[i]), float(latencies[i]), timestamp.isoformat(sep=" ")))
+        templates.append((template, "GET", int(statuses[i]), float(latencies[i]), timestamp))
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO api_logs (endpoint, method, status_code, response_time, timestamp) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+    return latencies, templates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos rollups de api_logs")
+    parser.add_argument("--logs", type=int, default=1_000_000, help="Logs sintéticos")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_rollups.db"
+    configure_environment(db_path)
+
+    from sqlalchemy import create_engine, text
+    from app.database import LogBase, log_engine
+    from app.services.api_log_rollup_service import APILogRollupService
+    from app.utils.latency_sketch import LatencySketch
+
+    LogBase.metadata.create_all(bind=log_engine)
+    print(f"📝 Gerando {args.logs:,} logs em 7 dias...")
+    latencies, rows = generate_logs(db_path, args.logs)
+
+    service = APILogRollupService()
+    start = time.perf_counter()
+    service.backfill(iter(rows))
+    backfill_s = time.perf_counter() - start
+
+    dashboard_engine = create_engine(f"sqlite:///{db_path}")
+    cutoff = (datetime.utcnow() - timedelta(hours=168)).strftime("%Y-%m-%d %H:%M:%S")
+
+    def old_query():
+        df = pd.read_sql("SELECT * FROM api_logs ORDER BY timestamp DESC LIMIT 1000", dashboard_engine)
+        return len(df), df["response_time"].quantile(0.95)
+
+    def full_scan():
+        df = pd.read_sql(text("SELECT endpoint, status_code, response_time, timestamp FROM api_logs "
+                              "WHERE timestamp >= :cutoff"), dashboard_engine, params={"cutoff": cutoff})
+        return len(df), df["response_time"].quantile(0.95)
+
+    def rollups():
+        df = pd.read_sql(text("SELECT count, error_count, latency_sum_ms, latency_sketch FROM api_log_rollups_hour "
+                              "WHERE bucket_start >= :cutoff"), dashboard_engine, params={"cutoff": cutoff[:13] + ":00:00"})
+        sketch = LatencySketch()
+        for data in df["latency_sketch"]:
+            sketch.merge(LatencySketch.from_json(data))
+        return int(df["count"].sum()), sketch.quantile(0.95), len(df), sketch
+
+    timings = {}
+    for label, func in (("Últimos 1.000 logs (anterior)", old_query), ("Varredura de api_logs", full_scan),
+                        ("Rollups por hora", rollups)):
+        start = time.perf_counter()
+        result = func()
+        timings[label] = (time.perf_counter() - start, result)
+
+    rollup_rows, sketch = timings["Rollups por hora"][1][2], timings["Rollups por hora"][1][3]
+    exact = {q: float(np.quantile(latencies, q)) for q in (0.5, 0.95, 0.99)}
+
+    # Custo de record por requisição
+    recorder = APILogRollupService()
+    calls = 200_000
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    for i in range(calls):
+        recorder.record("/api/v1/books/{book_id}", "GET", 200, 3.2 + (i % 50), now)
+    record_us = (time.perf_counter() - start) / calls * 1e6
+
+    # Flushes concorrentes (como vários workers) no mesmo minuto
+    minute_before = log_engine.connect().execute(text(
+        "SELECT COALESCE(SUM(count), 0) FROM api_log_rollups_minute")).scalar()
+
+    def flush_worker():
+        worker = APILogRollupService()
+        for _ in range(5_000):
+            worker.record("/api/v1/health", "GET", 200, 1.0, now)
+        worker.write(worker.take_pending())
+
+    threads = [threading.Thread(target=flush_worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    minute_after = log_engine.connect().execute(text(
+        "SELECT COALESCE(SUM(count), 0) FROM api_log_rollups_minute")).scalar()
+
+    print("\n" + "=" * 72)
+    print(f"Backfill de {args.logs:,} logs: {backfill_s:.1f}s ({rollup_rows:,} linhas de rollup por hora em 7 dias)")
+    print(f"\n{'Visão Last 7 Days':<32}{'Tempo (ms)':>12}{'Requisições':>14}{'P95 (ms)':>10}")
+    for label, (seconds, result) in timings.items():
+        print(f"{label:<32}{seconds * 1000:>12.1f}{result[0]:>14,}{result[1]:>10.2f}")
+    print("\nPrecisão do sketch (α = 1%):")
+    for q, value in exact.items():
+        estimate = sketch.quantile(q)
+        print(f"  p{int(q * 100):<3} exato {value:8.3f} ms  sketch {estimate:8.3f} ms  erro {abs(estimate / value - 1):.2%}")
+    print(f"\nrecord(): {record_us:.2f} µs/requisição")
+    print(f"4 flushes concorrentes de 5.000: +{minute_after - minute_before:,} requisições nos rollups")
+    print("=" * 72)
+
+    assert timings["Rollups por hora"][1][0] == timings["Varredura de api_logs"][1][0]
+    assert sketch.count == timings["Rollups por hora"][1][0], "sketches perderam contagens na mesclagem"
+    assert minute_after - minute_before == 20_000, "contagens perdidas entre flushes concorrentes"
+    assert all(abs(sketch.quantile(q) / value - 1) <= 0.011 for q, value in exact.items())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark do autocomplete (/books/autocomplete)
+
+Constrói o índice de prefixos sobre um catálogo sintético e mede:
+
+1. Construção: tempo, memória estimada do índice (nbytes) e crescimento do RSS
+2. Consultas como digitadas: para títulos sorteados, cada prefixo das duas
+   primeiras palavras ("l", "lo", ..., "love", "love ", "love g", ...);
+   latência por consulta e QPS em uma thread
+3. A busca atual a cada tecla (/books/search, ILIKE) com alguns dos mesmos
+   prefixos, para comparação
+
+Os títulos sintéticos usam um vocabulário pequeno (146 palavras), então há
+poucos tokens distintos e listas de livros longas por token: o caso difícil
+para prefixos curtos e para consultas de duas palavras.
+
+Uso:
+    python benchmarks/bench_autocomplete.py --books 1000000 --titles 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog, latency_summary
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def typed_queries(title: str) -> list:
+    """Prefixos como digitados das duas primeiras palavras do título"""
+    text = " ".join(title.lower().split()[:2])
+    return [text[:length] for length in range(1, len(text) + 1) if not text[:length].isspace()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do autocomplete")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Livros no catálogo sintético")
+    parser.add_argument("--titles", type=int, default=2_000, help="Títulos sorteados para gerar as consultas")
+    parser.add_argument("--k", type=int, default=10, help="Sugestões por consulta")
+    parser.add_argument("--ilike", type=int, default=10, help="Consultas ILIKE de comparação")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_autocomplete.db"
+    configure_environment(db_path)
+    os.environ["LOG_DATABASE_URL"] = f"sqlite:///{tmp_dir / 'logs.db'}"
+    os.environ["API_LOG_ARCHIVE_DIR"] = str(tmp_dir / "archive")
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    from app.database import SessionLocal
+    from app.models.book import Book
+    from app.services.autocomplete_service import autocomplete_service
+    from app.services.book_service import book_service
+
+    db = SessionLocal()
+    try:
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        index = autocomplete_service.get_index(db)
+        build_s = time.perf_counter() - start
+        rss_growth = rss_bytes() - rss_before
+        index_bytes = index.nbytes()
+
+        rng = random.Random(42)
+        total = db.query(Book).count()
+        sampled = [db.get(Book, rng.randint(1, total)).title for _ in range(args.titles)]
+        db.expunge_all()
+        queries = [query for title in sampled for query in typed_queries(title)]
+
+        # Primeira passada preenche o memo dos prefixos curtos; mede a segunda
+        for query in queries:
+            autocomplete_service.autocomplete(db, query, args.k)
+        first_hits = sum(1 for query in queries if autocomplete_service.autocomplete(db, query, args.k)["books"])
+
+        samples = []
+        start = time.perf_counter()
+        for query in queries:
+            query_start = time.perf_counter()
+            autocomplete_service.autocomplete(db, query, args.k)
+            samples.append((time.perf_counter() - query_start) * 1000)
+        elapsed = time.perf_counter() - start
+
+        single_words = [query for query in queries if " " not in query.strip()]
+        ilike = []
+        for query in rng.sample(single_words, min(args.ilike, len(single_words))):
+            query_start = time.perf_counter()
+            book_service.search_books(db, title=query)
+            ilike.append((time.perf_counter() - query_start) * 1000)
+            db.expunge_all()
+    finally:
+        db.close()
+
+    summary = latency_summary(samples)
+    ilike_summary = latency_summary(ilike)
+    print("\n" + "=" * 72)
+    print(f"Autocomplete, {args.books:,} livros")
+    print(f"  construção do índice:     {build_s:.2f} s")
+    print(f"  tokens distintos:         {len(index.tokens):,}")
+    print(f"  postings:                 {len(index.postings):,}")
+    print(f"  memória (nbytes):         {index_bytes / 2**20:.1f} MiB (títulos incluídos)")
+    print(f"  crescimento do RSS:       {rss_growth / 2**20:.1f} MiB")
+    print(f"  consultas:                {len(queries):,} ({first_hits:,} com livros)")
+    print(f"  latência p50/p95/p99:     {summary['p50_ms']:.3f} / {summary['p95_ms']:.3f} / "
+          f"{summary['p99_ms']:.3f} ms")
+    print(f"  QPS (uma thread):         {len(queries) / elapsed:,.0f}")
+    print(f"  ILIKE /books/search p50:  {ilike_summary['p50_ms']:.1f} ms ({len(ilike)} consultas)")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca em lote (/books/batch) contra N chamadas a /books/{id}
+
+Sobe o uvicorn sobre um catálogo sintético e resolve "páginas" de N ids
+aleatórios (alguns inexistentes) de quatro formas:
+
+- N chamadas a /books/{id}, uma depois da outra
+- N chamadas a /books/{id}, --connections em paralelo (como um front end)
+- GET /books/batch?ids=...
+- POST /books/batch
+
+com e sem o snapshot do catálogo (CATALOG_SNAPSHOT_ENABLED). Mede a latência
+da página (mediana e p95 de --rounds) e os statements no banco do catálogo por
+página (db_query_duration_seconds_count do /metrics). Os limites de taxa ficam
+desligados: N chamadas seguidas de um cliente passariam do limite por rota.
+
+Uso:
+    python benchmarks/bench_batch.py --books 100000 --sizes 50,200 --rounds 30
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog, latency_summary
+
+QUERY_COUNT = re.compile(r'^db_query_duration_seconds_count\{[^}]*engine="api"[^}]*\} (\S+)$', re.M)
+
+MODES = {
+    "SQLite": {"CATALOG_SNAPSHOT_ENABLED": "False"},
+    "snapshot": {"CATALOG_SNAPSHOT_ENABLED": "True"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def statements(client) -> float:
+    return sum(float(value) for value in QUERY_COUNT.findall((await client.get("/metrics")).text))
+
+
+async def measure(env: dict, args, sizes) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=args.connections)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    if (await client.get("/api/v1/health/ready")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn não ficou pronto a tempo")
+                await asyncio.sleep(0.1)
+
+            async def single(book_id):
+                response = await client.get(f"/api/v1/books/{book_id}")
+                assert response.status_code in (200, 404), response.text
+                return response
+
+            async def sequential(ids):
+                for book_id in ids:
+                    await single(book_id)
+
+            async def parallel(ids):
+                await asyncio.gather(*(single(book_id) for book_id in ids))
+
+            async def batch_get(ids):
+                response = await client.get("/api/v1/books/batch", params={"ids": ",".join(map(str, ids))})
+                assert response.status_code == 200, response.text
+                response.json()
+
+            async def batch_post(ids):
+                response = await client.post("/api/v1/books/batch", json={"ids": ids})
+                assert response.status_code == 200, response.text
+                response.json()
+
+            methods = {
+                "N chamadas seguidas": sequential,
+                f"N chamadas, {args.connections} conexões": parallel,
+                "GET /books/batch": batch_get,
+                "POST /books/batch": batch_post,
+            }
+            rng = random.Random(42)
+            for size in sizes:
+                for name, method in methods.items():
+                    samples = []
+                    before = await statements(client)
+                    for _ in range(args.rounds):
+                        # ~5% dos ids não existem
+                        ids = [rng.randint(1, int(args.books * 1.05)) for _ in range(size)]
+                        start = time.perf_counter()
+                        await method(ids)
+                        samples.append((time.perf_counter() - start) * 1000)
+                    queries = (await statements(client) - before) / args.rounds
+                    results[(size, name)] = {"latency": latency_summary(samples), "queries": queries}
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca em lote de livros")
+    parser.add_argument("--books", type=int, default=100_000, help="Livros no catálogo sintético")
+    parser.add_argument("--sizes", default="50,200", help="Ids por página, separados por vírgula")
+    parser.add_argument("--rounds", type=int, default=30, help="Páginas por método")
+    parser.add_argument("--connections", type=int, default=16, help="Conexões das chamadas em paralelo")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "books.db"
+    configure_environment(db_path)
+    create_synthetic_catalog(db_path, args.books)
+
+    results = {}
+    for label, overrides in MODES.items():
+        env = {**os.environ, **overrides, "RATE_LIMIT_ENABLED": "False", "METRICS_ENABLED": "True",
+               "CATALOG_SNAPSHOT_PATH": str(tmp_dir / "catalog.snap"),
+               "LOG_DATABASE_URL": f"sqlite:///{tmp_dir / 'logs.db'}", "API_LOG_ARCHIVE_DIR": str(tmp_dir / "archive")}
+        env.pop("PYTHONPATH", None)
+        results[label] = asyncio.run(measure(env, args, sizes))
+
+    print("\n" + "=" * 92)
+    print(f"Página de N livros por id, {args.books:,} livros, mediana/p95 de {args.rounds} páginas")
+    print(f"{'':<10}{'N':>5}  {'método':<28}{'p50 (ms)':>10}{'p95 (ms)':>10}{'queries/página':>16}")
+    for label, rows in results.items():
+        for (size, name), row in rows.items():
+            print(f"{label:<10}{size:>5}  {name:<28}{row['latency']['p50_ms']:>10.1f}"
+                  f"{row['latency']['p95_ms']:>10.1f}{row['queries']:>16.1f}")
+    print("=" * 92)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark da sincronização do catálogo por diff
+
+Compara a recarga completa (apagar e reinserir) com a sincronização que
+aplica somente o diff, para uma nova versão do catálogo com uma fração dos
+livros alterada, inserida e removida.
+
+Uso:
+    python benchmarks/bench_catalog_sync.py --books 1000000 --changed 0.01
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da sincronização por diff")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Tamanho do catálogo sintético")
+    parser.add_argument("--changed", type=float, default=0.01, help="Fração de livros com preço/estoque alterado")
+    parser.add_argument("--churn", type=float, default=0.001, help="Fração de livros inseridos e removidos")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_sync.db"
+    configure_environment(db_path)
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+    shutil.copy(db_path, tmp_dir / "pristine.db")
+
+    from app.database import LoaderSessionLocal, loader_engine
+    from app.models.book import Book
+    from app.services.catalog_loader import load_books
+    from app.services.catalog_sync import sync_books
+
+    db = LoaderSessionLocal()
+    try:
+        books = [
+            {"id": b.id, "title": b.title, "price": b.price, "rating": b.rating,
+             "availability": b.availability, "category": b.category, "image_url": b.image_url}
+            for b in db.query(Book).order_by(Book.id)
+        ]
+    finally:
+        db.close()
+
+    # Nova versão do catálogo: alterações, inserções e remoções
+    rng = random.Random(7)
+    for book in rng.sample(books, int(len(books) * args.changed)):
+        book["price"] = round(book["price"] + 1, 2)
+        book["availability"] = max(0, book["availability"] - 1)
+    churn = int(len(books) * args.churn)
+    deleted = set(rng.sample(range(len(books)), churn))
+    books = [book for i, book in enumerate(books) if i not in deleted]
+    next_id = args.books + 1
+    for i in range(churn):
+        books.append({"id": next_id + i, "title": f"New Book {i}", "price": 20.0, "rating": 4,
+                      "availability": 3, "category": "Fiction", "image_url": None})
+
+    db = LoaderSessionLocal()
+    try:
+        start = time.perf_counter()
+        changeset = sync_books(db, books)
+        sync_ms = (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+
+    loader_engine.dispose()
+    shutil.copy(tmp_dir / "pristine.db", db_path)
+
+    db = LoaderSessionLocal()
+    try:
+        start = time.perf_counter()
+        load_books(db, books)
+        full_ms = (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+
+    print("\n" + "=" * 60)
+    print(f"Diff aplicado: {changeset.summary()}")
+    print(f"Linhas escritas: {changeset.size:,} de {len(books):,}")
+    print("=" * 60)
+    print(f"{'Recarga completa':<28}{full_ms:>10.0f} ms  ({len(books) + args.books:,} linhas escritas)")
+    print(f"{'Sincronização por diff':<28}{sync_ms:>10.0f} ms  ({changeset.size:,} linhas escritas)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cache de capas
+
+Serve capas JPEG de um site local (com latência simulada da origem), cria um
+catálogo cujos image_url apontam para ele e mede:
+
+- download sequencial vs concorrente (COVER_FETCH_CONCURRENCY)
+- deduplicação por conteúdo (capas repetidas são armazenadas uma vez)
+- segunda sincronização (nenhum download)
+- GET /api/v1/books/{id}/cover: 200 com ETag/Cache-Control e 304 com If-None-Match
+
+Uso:
+    python benchmarks/bench_covers.py --books 1000 --distinct 200 --latency-ms 20
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from common import configure_environment
+from fixture_site import generate_covers, serve_site
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cache de capas")
+    parser.add_argument("--books", type=int, default=1000, help="Livros com capa")
+    parser.add_argument("--distinct", type=int, default=200, help="Capas com conteúdo diferente")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latência simulada da origem")
+    parser.add_argument("--concurrency", type=int, default=16, help="Downloads simultâneos")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_covers.db"
+    configure_environment(db_path)
+
+    import os
+    os.environ["COVERS_DIR"] = str(tmp_dir / "covers")
+
+    generate_covers(tmp_dir / "site", args.books, args.distinct)
+    server, base_url = serve_site(tmp_dir / "site", latency=args.latency_ms / 1000)
+
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.models import Book, Cover
+    from app.services.cover_service import cover_service
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add_all(
+            Book(id=n, title=f"Book {n}", price=10.0, rating=n % 5 + 1, availability=1,
+                 category="Fiction", image_url=f"{base_url}media/cache/{n:06d}.jpg")
+            for n in range(1, args.books + 1)
+        )
+        db.commit()
+
+        timings = {}
+        for label, concurrency in (("sequencial", 1), (f"concorrente ({args.concurrency})", args.concurrency)):
+            db.query(Cover).delete()
+            db.commit()
+            shutil.rmtree(settings.COVERS_DIR, ignore_errors=True)
+            settings.COVER_FETCH_CONCURRENCY = concurrency
+
+            start = time.perf_counter()
+            result = cover_service.sync_covers(db)
+            timings[label] = (time.perf_counter() - start, result)
+
+        start = time.perf_counter()
+        second = cover_service.sync_covers(db)
+        second_s = time.perf_counter() - start
+    finally:
+        db.close()
+        server.shutdown()
+
+    stored = len(list(Path(settings.COVERS_DIR, "full").rglob("*.jpg")))
+    thumbs = len(list(Path(settings.COVERS_DIR, "thumb").rglob("*.jpg")))
+
+    client = TestClient(app)
+    response = client.get("/api/v1/books/1/cover")
+    thumb = client.get("/api/v1/books/1/cover", params={"size": "thumb"})
+    not_modified = client.get("/api/v1/books/1/cover", headers={"If-None-Match": response.headers["etag"]})
+
+    print("\n" + "=" * 64)
+    for label, (seconds, result) in timings.items():
+        print(f"{label:<20}{seconds:>8.2f} s  {args.books / seconds:>8.0f} capas/s  {result.summary()}")
+    print(f"{'2ª sincronização':<20}{second_s:>8.2f} s  {second.summary()}")
+    print(f"Arquivos no store: {stored} originais, {thumbs} miniaturas (de {args.books} capas)")
+    print(f"GET cover: {response.status_code} {len(response.content)} bytes, "
+          f"Cache-Control={response.headers['cache-control']!r}, ETag={response.headers['etag'][:16]}...")
+    print(f"GET cover?size=thumb: {thumb.status_code} {len(thumb.content)} bytes")
+    print(f"GET cover com If-None-Match: {not_modified.status_code}")
+    print("=" * 64)
+
+    assert stored == args.distinct and thumbs == args.distinct
+    assert second.fetched == 0 and second.skipped == args.books
+    assert response.status_code == 200 and thumb.status_code == 200 and not_modified.status_code == 304
+
+
+if __name__ == "__main__":
+    main()
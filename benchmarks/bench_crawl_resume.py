@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark do crawl com fronteira persistida e retomada
+
+Gera um site local no formato de books.toscrape.com com milhares de páginas,
+e compara:
+
+- um crawl completo, sem interrupção
+- um crawl interrompido após uma fração dos livros (como um cancelamento,
+  timeout ou falha) seguido da retomada a partir do checkpoint
+
+Verifica que a retomada produz exatamente os mesmos livros (e ids) do crawl
+completo e mostra quantas requisições e quanto tempo cada etapa custou.
+
+Uso:
+    python benchmarks/bench_crawl_resume.py --pages 250 --interrupt-at 0.8
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fixture_site import generate_site, serve_site
+
+from app.services.scraper_service import ScrapeCancelled, iter_books
+
+
+def crawl(server, base_url: str, state_path: Path, parse_workers: int, fresh: bool, stop_after=None):
+    """Executa um crawl e retorna (livros, segundos, requisições, interrompido)"""
+    scraped = {"rows": 0}
+
+    def on_page(pages_fetched, rows_scraped):
+        scraped["rows"] = rows_scraped
+
+    def should_stop():
+        return stop_after is not None and scraped["rows"] >= stop_after
+
+    served_before = server.requests_served
+    start = time.perf_counter()
+    books = []
+    interrupted = False
+    try:
+        for book in iter_books(on_page=on_page, should_stop=should_stop, base_url=base_url,
+                               parse_workers=parse_workers, state_path=str(state_path), fresh=fresh):
+            books.append(book)
+    except ScrapeCancelled:
+        interrupted = True
+    return books, time.perf_counter() - start, server.requests_served - served_before, interrupted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do crawl com checkpoint e retomada")
+    parser.add_argument("--pages", type=int, default=250, help="Listagens do site local (20 livros cada)")
+    parser.add_argument("--interrupt-at", type=float, default=0.8, help="Fração dos livros antes da interrupção")
+    parser.add_argument("--parse-workers", type=int, default=2, help="Processos de parsing")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    print(f"🌐 Gerando site local com {args.pages:,} listagens...")
+    total_books = generate_site(tmp_dir / "site", args.pages)
+    server, base_url = serve_site(tmp_dir / "site")
+
+    try:
+        full, full_s, full_requests, _ = crawl(server, base_url, tmp_dir / "full.db", args.parse_workers, fresh=True)
+
+        state = tmp_dir / "resume.db"
+        _, partial_s, partial_requests, interrupted = crawl(
+            server, base_url, state, args.parse_workers, fresh=True,
+            stop_after=int(total_books * args.interrupt_at)
+        )
+        assert interrupted, "o crawl deveria ter sido interrompido"
+        resumed, resume_s, resume_requests, _ = crawl(server, base_url, state, args.parse_workers, fresh=False)
+    finally:
+        server.shutdown()
+
+    print("\n" + "=" * 64)
+    print(f"{'Etapa':<34}{'Livros':>8}{'Requisições':>13}{'Tempo (s)':>11}")
+    print(f"{'Crawl completo':<34}{len(full):>8,}{full_requests:>13,}{full_s:>11.1f}")
+    print(f"{'Interrompido em ' + format(args.interrupt_at, '.0%'):<34}{'-':>8}{partial_requests:>13,}{partial_s:>11.1f}")
+    print(f"{'Retomada do checkpoint':<34}{len(resumed):>8,}{resume_requests:>13,}{resume_s:>11.1f}")
+    print("=" * 64)
+
+    assert len(full) == total_books, f"{len(full)} livros extraídos, esperado {total_books}"
+    assert resumed == full, "a retomada produziu livros diferentes do crawl completo"
+    print("✅ Retomada produziu os mesmos livros e ids do crawl completo")
+
+
+if __name__ == "__main__":
+    main()
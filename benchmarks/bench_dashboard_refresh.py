@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark da atualização do dashboard de monitoramento
+
+Executa o dashboard (streamlit.testing AppTest) uma vez por segundo enquanto
+outro processo grava logs e rollups como a API sob carga, e mede por
+atualização:
+
+- CPU do processo do dashboard (process_time)
+- carga no banco: número de statements e tempo gasto neles
+
+Compara o dashboard anterior (releitura completa; os caches de 30 s são
+limpos a cada execução para simular a cadência de 1 s) com o atual
+(incremental: só buckets novos e logs após o cursor).
+
+Uso:
+    python benchmarks/bench_dashboard_refresh.py --refreshes 30 --range "Last 6 Hours"
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog, latency_summary
+
+ENDPOINTS = [f"/api/v1/route-{i}" for i in range(200)]
+
+
+def seed_history(hours: int):
+    """Rollups e logs das últimas `hours` horas (200 rotas, 20 req/s)"""
+    from app.services.api_log_rollup_service import APILogRollupService
+    from app.services.api_log_store import api_log_store
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    start = now - timedelta(hours=hours)
+    total = hours * 3600 * 20
+    step = (now - start) / total
+    rows = [(rng.choice(ENDPOINTS), "GET", 404 if rng.random() < 0.03 else 200,
+             rng.lognormvariate(2.0, 0.8), start + step * i) for i in range(total)]
+    APILogRollupService().backfill(rows)
+    # Logs brutos só da última hora: o dashboard lê apenas os mais recentes
+    recent = [row for row in rows if row[4] >= now - timedelta(hours=1)]
+    api_log_store.write([
+        {"endpoint": endpoint, "route": endpoint, "method": method, "status_code": status,
+         "response_time": latency, "timestamp": timestamp}
+        for endpoint, method, status, latency, timestamp in recent
+    ])
+
+
+def log_writer(db_path: str, rate: int, seconds: float):
+    """Grava logs e rollups como o middleware + flushers da API, a `rate` req/s"""
+    configure_environment(Path(db_path))
+    from app.services.api_log_rollup_service import api_log_rollup_service
+    from app.services.api_log_store import api_log_store
+
+    async def run():
+        rng = random.Random(7)
+        flushers = [asyncio.create_task(api_log_store.run_flusher(1.0)),
+                    asyncio.create_task(api_log_rollup_service.run_flusher(1.0))]
+        start = time.perf_counter()
+        produced = 0
+        while time.perf_counter() - start < seconds:
+            for _ in range(rate // 100):
+                endpoint = rng.choice(ENDPOINTS)
+                status = 500 if rng.random() < 0.01 else 200
+                latency = rng.lognormvariate(2.0, 0.8)
+                now = datetime.utcnow()
+                api_log_store.record({"endpoint": endpoint, "route": endpoint, "method": "GET",
+                                      "status_code": status, "response_time": latency,
+                                      "query_params": None, "timestamp": now})
+                api_log_rollup_service.record(endpoint, "GET", status, latency, now)
+                produced += 1
+            await asyncio.sleep(max(0.0, start + produced / rate - time.perf_counter()))
+        for task in flushers:
+            task.cancel()
+        await api_log_store.flush()
+        await api_log_rollup_service.flush()
+
+    asyncio.run(run())
+
+
+def measure(script: Path, time_range: str, refreshes: int, clear_cache: bool, stats: dict) -> dict:
+    """Executa o dashboard `refreshes` vezes, uma por segundo, e mede cada execução"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_data.clear()
+    app = AppTest.from_file(str(script), default_timeout=60)
+    app.run()
+    app.sidebar.selectbox[0].set_value(time_range)
+    first_cpu = time.process_time()
+    app.run()
+    first = {"cpu_ms": (time.process_time() - first_cpu) * 1000}
+    assert not app.exception, app.exception
+
+    cpu, statements, db_ms = [], [], []
+    for _ in range(refreshes):
+        time.sleep(1.0)
+        if clear_cache:
+            st.cache_data.clear()
+        stats["count"], stats["seconds"] = 0, 0.0
+        start = time.process_time()
+        app.run()
+        cpu.append((time.process_time() - start) * 1000)
+        statements.append(stats["count"])
+        db_ms.append(stats["seconds"] * 1000)
+        assert not app.exception, app.exception
+    return {"first": first, "cpu": latency_summary(cpu),
+            "statements": sum(statements) / len(statements), "db_ms": latency_summary(db_ms)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da atualização do dashboard")
+    parser.add_argument("--refreshes", type=int, default=30, help="Atualizações medidas por versão")
+    parser.add_argument("--rate", type=int, default=1_000, help="Requisições/s simuladas durante a medição")
+    parser.add_argument("--history-hours", type=int, default=6, help="Horas de rollups pré-existentes")
+    parser.add_argument("--range", default="Last 6 Hours", help="Período selecionado no dashboard")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "books.db"
+    configure_environment(db_path)
+    os.environ["LOG_DATABASE_URL"] = f"sqlite:///{tmp_dir / 'logs.db'}"
+    create_synthetic_catalog(db_path, 1_000)
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.database import LogBase, log_engine
+
+    LogBase.metadata.create_all(bind=log_engine)
+    print(f"📝 Gerando {args.history_hours}h de histórico...")
+    seed_history(args.history_hours)
+
+    # O dashboard anterior, sem o sleep(30) + rerun do final
+    previous = subprocess.run(["git", "show", "20b5cf1:monitoring/dashboard.py"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout
+    previous = previous.replace("time.sleep(30)", "pass").replace("st.rerun()", "pass")
+    previous_path = ROOT_DIR / "monitoring" / "_bench_previous_dashboard.py"
+    previous_path.write_text(previous)
+
+    stats = {"count": 0, "seconds": 0.0}
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["bench_start"] = time.perf_counter()
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats["count"] += 1
+        stats["seconds"] += time.perf_counter() - conn.info.pop("bench_start")
+
+    versions = {
+        "anterior (completo)": (previous_path, True),
+        "incremental": (ROOT_DIR / "monitoring" / "dashboard.py", False),
+    }
+    # Um único escritor para as duas versões, iniciado antes do AppTest (que substitui __main__)
+    writer = multiprocessing.get_context("spawn").Process(
+        target=log_writer, args=(str(db_path), args.rate, len(versions) * (args.refreshes * 2 + 60))
+    )
+    writer.start()
+    results = {}
+    try:
+        for label, (script, clear_cache) in versions.items():
+            results[label] = measure(script, args.range, args.refreshes, clear_cache, stats)
+    finally:
+        writer.terminate()
+        writer.join()
+        previous_path.unlink()
+
+    print("\n" + "=" * 84)
+    print(f"Período: {args.range}, {args.rate:,} req/s gravadas durante a medição, {args.refreshes} atualizações")
+    print(f"{'Dashboard':<22}{'1ª carga CPU':>14}{'CPU p50':>10}{'p95 (ms)':>10}"
+          f"{'statements':>12}{'banco p50':>11}{'p95 (ms)':>10}")
+    for label, row in results.items():
+        print(f"{label:<22}{row['first']['cpu_ms']:>14.0f}{row['cpu']['p50_ms']:>10.1f}{row['cpu']['p95_ms']:>10.1f}"
+              f"{row['statements']:>12.1f}{row['db_ms']['p50_ms']:>11.2f}{row['db_ms']['p95_ms']:>10.2f}")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos health probes
+
+Sobe o uvicorn (versão de referência, extraída com git archive, e atual) sobre
+um catálogo sintético e mede:
+
+1. Custo por probe, sem carga: latência, statements no banco do catálogo
+   (db_query_duration_seconds_count do /metrics) e linhas gravadas em api_logs
+   - referência: GET /api/v1/health (sessão + SELECT 1 por probe)
+   - atual: /api/v1/health/live e /api/v1/health/ready
+2. Sob carga: clientes concorrentes em /api/v1/books enquanto os probes chegam
+   a --probe-rate por segundo; latência dos probes e das requisições de livros
+
+Uso:
+    python benchmarks/bench_health_probes.py --probes 2000 --probe-rate 50 --seconds 15
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog, latency_summary
+
+QUERY_COUNT = re.compile(r'^db_query_duration_seconds_count\{[^}]*engine="api"[^}]*\} (\S+)$', re.M)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def count_api_logs(log_db: Path) -> int:
+    if not log_db.exists():
+        return 0
+    conn = sqlite3.connect(log_db)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'api_logs%'")]
+        return sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables)
+    finally:
+        conn.close()
+
+
+async def statements(client) -> float:
+    return sum(float(value) for value in QUERY_COUNT.findall((await client.get("/metrics")).text))
+
+
+async def measure(tree: Path, env: dict, log_db: Path, probe_paths, args) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=args.clients + 8)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    if (await client.get(probe_paths[-1])).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn não ficou pronto a tempo")
+                await asyncio.sleep(0.1)
+
+            # 1. Custo por probe
+            for path in probe_paths:
+                await asyncio.sleep(1.5)  # deixa o flush dos logs anteriores acontecer
+                logs_before = count_api_logs(log_db)
+                before = await statements(client)
+                samples = []
+                for _ in range(args.probes):
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    samples.append((time.perf_counter() - start) * 1000)
+                    assert response.status_code == 200, response.text
+                after = await statements(client)
+                await asyncio.sleep(2.5)
+                results[path] = {
+                    "latency": latency_summary(samples),
+                    # /metrics consultado duas vezes não faz queries no banco do catálogo
+                    "statements": (after - before) / args.probes,
+                    "logs": (count_api_logs(log_db) - logs_before) / args.probes,
+                }
+
+            # 2. Sob carga
+            rng = random.Random(42)
+            stop = time.monotonic() + args.seconds
+            books, probes = [], []
+
+            async def load():
+                while time.monotonic() < stop:
+                    start = time.perf_counter()
+                    await client.get("/api/v1/books", params={"page": rng.randint(1, args.books // 20)})
+                    books.append((time.perf_counter() - start) * 1000)
+
+            async def probe():
+                sent = 0
+                begin = time.monotonic()
+                while time.monotonic() < stop:
+                    start = time.perf_counter()
+                    await client.get(probe_paths[-1])
+                    probes.append((time.perf_counter() - start) * 1000)
+                    sent += 1
+                    await asyncio.sleep(max(0.0, begin + sent / args.probe_rate - time.monotonic()))
+
+            await asyncio.gather(probe(), *(load() for _ in range(args.clients)))
+            results["load"] = {"books": latency_summary(books), "rps": len(books) / args.seconds,
+                               "probes": latency_summary(probes)}
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos health probes")
+    parser.add_argument("--books", type=int, default=20_000, help="Livros no catálogo sintético")
+    parser.add_argument("--probes", type=int, default=2_000, help="Probes sequenciais medidos por rota")
+    parser.add_argument("--probe-rate", type=float, default=50.0, help="Probes por segundo durante a carga")
+    parser.add_argument("--clients", type=int, default=16, help="Clientes concorrentes em /books")
+    parser.add_argument("--seconds", type=float, default=15.0, help="Duração da carga")
+    parser.add_argument("--baseline-ref", default="80efc82", help="Revisão de referência (git)")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "books.db"
+    configure_environment(db_path)
+    create_synthetic_catalog(db_path, args.books)
+
+    baseline = tmp_dir / "baseline"
+    baseline.mkdir()
+    archive = subprocess.run(["git", "archive", args.baseline_ref], cwd=ROOT_DIR, capture_output=True, check=True)
+    tarfile.open(fileobj=io.BytesIO(archive.stdout)).extractall(baseline)
+
+    runs = {
+        "referência": (baseline, ["/api/v1/health"]),
+        "atual": (ROOT_DIR, ["/api/v1/health/live", "/api/v1/health/ready"]),
+    }
+    results = {}
+    for label, (tree, paths) in runs.items():
+        log_db = tmp_dir / f"logs_{label}.db"
+        env = {**os.environ, "LOG_DATABASE_URL": f"sqlite:///{log_db}",
+               "API_LOG_ARCHIVE_DIR": str(tmp_dir / "archive"), "METRICS_ENABLED": "True"}
+        env.pop("PYTHONPATH", None)
+        results[label] = asyncio.run(measure(tree, env, log_db, paths, args))
+
+    print("\n" + "=" * 86)
+    print(f"Custo por probe ({args.probes:,} sequenciais, sem carga)")
+    print(f"{'':<12}{'rota':<24}{'p50 (ms)':>10}{'p99 (ms)':>10}{'queries/probe':>15}{'logs/probe':>12}")
+    for label, (_, paths) in runs.items():
+        for path in paths:
+            row = results[label][path]
+            print(f"{label:<12}{path:<24}{row['latency']['p50_ms']:>10.2f}{row['latency']['p99_ms']:>10.2f}"
+                  f"{row['statements']:>15.2f}{row['logs']:>12.2f}")
+    print(f"\nSob carga: {args.clients} clientes em /books + {args.probe_rate:.0f} probes/s por {args.seconds:.0f}s")
+    print(f"{'':<12}{'books req/s':>12}{'books p50':>11}{'p99':>8}{'probe p50':>11}{'p99 (ms)':>10}")
+    for label, (_, paths) in runs.items():
+        row = results[label]["load"]
+        print(f"{label:<12}{row['rps']:>12.0f}{row['books']['p50_ms']:>11.1f}{row['books']['p99_ms']:>8.1f}"
+              f"{row['probes']['p50_ms']:>11.1f}{row['probes']['p99_ms']:>10.1f}")
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
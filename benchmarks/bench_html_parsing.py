@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parsing de HTML do scraper
+
+Gera um corpus local de páginas de produto no formato de books.toscrape.com
+(cabeçalho, menu de categorias, descrição e tabela do produto) e mede
+páginas/segundo para:
+
+- BeautifulSoup com html.parser no documento inteiro (implementação anterior)
+- BeautifulSoup com SoupStrainer (fallback sem lxml)
+- lxml em um processo
+- lxml no pool de processos, em tarefas de uma listagem (20 páginas)
+
+Uso:
+    python benchmarks/bench_html_parsing.py --pages 2000 --workers 4
+"""
+import argparse
+import multiprocessing
+import random
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from fixture_site import product_page
+
+from app.services import html_parsing
+
+PAGES_PER_TASK = 20
+
+
+def legacy_parse_product(page_html: str):
+    """Parsing anterior: html.parser no documento inteiro"""
+    soup = BeautifulSoup(page_html, "html.parser")
+    product_table = soup.find("table", class_="table table-striped").find_all("td")
+    price = html_parsing.clean_price(product_table[3].text)
+    match = re.search(r"\d+", product_table[5].text)
+    availability = int(match.group(0)) if match else 0
+    breadcrumb = soup.find("ul", class_="breadcrumb").find_all("li")
+    return price, availability, breadcrumb[-2].text.strip()
+
+
+def strainer_parse_product(page_html: str):
+    """Fallback do html_parsing sem lxml"""
+    lxml_html, html_parsing._lxml_html = html_parsing._lxml_html, lambda: None
+    try:
+        return html_parsing.parse_product(page_html)
+    finally:
+        html_parsing._lxml_html = lxml_html
+
+
+def measure(label: str, func, pages, baseline=None) -> list:
+    start = time.perf_counter()
+    results = func(pages)
+    elapsed = time.perf_counter() - start
+    if baseline is not None:
+        assert results == baseline, f"{label}: resultado diferente da implementação anterior"
+    rate = len(pages) / elapsed
+    print(f"{label:<42}{rate:>12,.0f} páginas/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parsing de HTML")
+    parser.add_argument("--pages", type=int, default=2000, help="Páginas de produto no corpus")
+    parser.add_argument("--workers", type=int, default=4, help="Processos do pool de parsing")
+    args = parser.parse_args()
+
+    corpus_dir = Path(tempfile.mkdtemp()) / "corpus"
+    corpus_dir.mkdir()
+    rng = random.Random(42)
+    for n in range(args.pages):
+        (corpus_dir / f"book-{n}.html").write_text(product_page(n, rng), encoding="utf-8")
+
+    pages = [path.read_text(encoding="utf-8") for path in sorted(corpus_dir.glob("*.html"))]
+    size_kb = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"📄 Corpus: {len(pages):,} páginas em {corpus_dir} ({size_kb:.0f} KB/página)\n")
+
+    baseline = measure("html.parser, documento inteiro", lambda ps: [legacy_parse_product(p) for p in ps], pages)
+    measure("html.parser + SoupStrainer", lambda ps: [strainer_parse_product(p) for p in ps], pages, baseline)
+    measure("lxml", html_parsing.parse_products, pages, baseline)
+
+    tasks = [pages[i:i + PAGES_PER_TASK] for i in range(0, len(pages), PAGES_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(html_parsing.parse_products, tasks[:args.workers]))  # aquece os processos
+
+        def pooled(_):
+            return [row for rows in pool.map(html_parsing.parse_products, tasks) for row in rows]
+
+        measure(f"lxml, pool com {args.workers} processos", pooled, pages, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark do banco de telemetria separado
+
+Gera 5.000 logs/s (como o middleware a 5k req/s) enquanto threads escrevem no
+banco do catálogo (transações curtas de atualização de livros, como uma
+recarga aplicando um diff) com um busy timeout curto, e conta os erros
+"database is locked" no banco principal. Três modos, cada um em um processo:
+
+- por requisição: um INSERT + commit por log no banco do catálogo (anterior)
+- lote, mesmo banco: APILogStore com LOG_DATABASE_URL vazio
+- lote, banco separado: APILogStore com LOG_DATABASE_URL próprio
+
+Uso:
+    python benchmarks/bench_log_database.py --rate 5000 --seconds 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog, latency_summary
+
+MODES = ("por requisição", "lote, mesmo banco", "lote, banco separado")
+
+
+def catalog_writer(db_path: str, busy_timeout: float, stop: threading.Event, stats: dict, seed: int):
+    """Transações de escrita no catálogo até `stop`; conta locks e mede a duração"""
+    conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None)
+    first_id = 1 + seed * 500
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE books SET availability = availability + 1 WHERE id BETWEEN ? AND ?",
+                         (first_id, first_id + 499))
+            conn.execute("COMMIT")
+            stats["latencies"].append((time.perf_counter() - start) * 1000)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            stats["locked"] += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        time.sleep(0.005)
+    conn.close()
+
+
+def run_mode(mode: str, db_path: str, log_db_path: str, args, results):
+    configure_environment(Path(db_path))
+    if mode == "lote, banco separado":
+        os.environ["LOG_DATABASE_URL"] = f"sqlite:///{log_db_path}"
+
+    from app.database import LogBase, engine, log_engine
+    from app.models import APILog
+    from app.services.api_log_store import APILogStore, api_log_store, partition_table
+    from sqlalchemy import func, select, text
+
+    LogBase.metadata.create_all(bind=log_engine)
+    # Tabela de logs no banco do catálogo, como antes
+    APILog.__table__.create(engine, checkfirst=True)
+
+    stop = threading.Event()
+    writer_stats = [{"latencies": [], "locked": 0} for _ in range(args.writers)]
+    writers = [
+        threading.Thread(target=catalog_writer, args=(db_path, args.busy_timeout, stop, stats, i))
+        for i, stats in enumerate(writer_stats)
+    ]
+
+    logging_errors = 0
+    legacy = sqlite3.connect(db_path, timeout=30) if mode == "por requisição" else None
+
+    def log_row():
+        return {"endpoint": "/api/v1/books/42", "route": "/api/v1/books/{book_id}", "method": "GET",
+                "status_code": 200, "response_time": 3.2, "query_params": None, "timestamp": datetime.utcnow()}
+
+    async def produce() -> int:
+        nonlocal logging_errors
+        produced = 0
+        tick = 0.01
+        per_tick = int(args.rate * tick)
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.seconds:
+            for _ in range(per_tick):
+                row = log_row()
+                if legacy is not None:
+                    # Como o middleware anterior: um INSERT + commit por requisição no banco do catálogo
+                    try:
+                        legacy.execute(
+                            "INSERT INTO api_logs (endpoint, method, status_code, response_time, timestamp) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (row["endpoint"], row["method"], row["status_code"], row["response_time"],
+                             row["timestamp"].isoformat(sep=" "))
+                        )
+                        legacy.commit()
+                    except sqlite3.OperationalError:
+                        logging_errors += 1
+                else:
+                    api_log_store.record(row)
+                produced += 1
+            await asyncio.sleep(max(0.0, start + produced / args.rate - time.perf_counter()))
+        return produced
+
+    async def main_loop():
+        flusher = asyncio.create_task(api_log_store.run_flusher(args.flush_seconds))
+        for thread in writers:
+            thread.start()
+        start = time.perf_counter()
+        produced = await produce()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        flusher.cancel()
+        await api_log_store.flush()
+        return produced, elapsed
+
+    produced, elapsed = asyncio.run(main_loop())
+    for thread in writers:
+        thread.join()
+
+    with (engine if legacy is not None else log_engine).connect() as conn:
+        if legacy is not None:
+            written = conn.execute(text("SELECT COUNT(*) FROM api_logs")).scalar()
+        else:
+            written = sum(conn.execute(select(func.count()).select_from(partition_table(day))).scalar()
+                          for day in APILogStore.partitions(conn))
+
+    latencies = [value for stats in writer_stats for value in stats["latencies"]]
+    results.put({
+        "produced": produced,
+        "written": written,
+        "mode": mode,
+        "rate": produced / elapsed,
+        "locked": sum(stats["locked"] for stats in writer_stats),
+        "transactions": len(latencies),
+        "writer": latency_summary(latencies),
+        "logging_errors": logging_errors,
+        "dropped": api_log_store.dropped,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do banco de telemetria separado")
+    parser.add_argument("--books", type=int, default=20_000, help="Livros no catálogo sintético")
+    parser.add_argument("--rate", type=int, default=5_000, help="Logs por segundo")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duração de cada modo")
+    parser.add_argument("--writers", type=int, default=2, help="Threads escrevendo no catálogo")
+    parser.add_argument("--busy-timeout", type=float, default=0.05, help="Timeout de lock dos escritores (s)")
+    parser.add_argument("--flush-seconds", type=float, default=1.0, help="API_LOG_FLUSH_SECONDS")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for mode in MODES:
+        tmp_dir = Path(tempfile.mkdtemp())
+        db_path = tmp_dir / "books.db"
+        configure_environment(db_path)
+        create_synthetic_catalog(db_path, args.books)
+        results = ctx.Queue()
+        process = ctx.Process(target=run_mode, args=(mode, str(db_path), str(tmp_dir / "logs.db"), args, results))
+        process.start()
+        rows.append(results.get())
+        process.join()
+
+    print("\n" + "=" * 96)
+    print(f"{'Modo':<24}{'logs/s':>9}{'locks no catálogo':>19}{'transações':>12}"
+          f"{'escrita p50':>13}{'p99 (ms)':>10}{'erros log':>10}")
+    for row in rows:
+        print(f"{row['mode']:<24}{row['rate']:>9,.0f}{row['locked']:>19,}{row['transactions']:>12,}"
+              f"{row['writer']['p50_ms']:>13.2f}{row['writer']['p99_ms']:>10.2f}{row['logging_errors'] + row['dropped']:>10,}")
+    print("=" * 96)
+
+    assert all(row["written"] == row["produced"] for row in rows), "logs perdidos"
+    assert rows[-1]["locked"] == 0, "locks no banco do catálogo com o banco de telemetria separado"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark do registro de métricas
+
+Mede o custo por registro no caminho quente:
+
+- Histogram.observe e Counter.inc isolados
+- MetricsMiddleware em volta de um app ASGI vazio (custo total por requisição:
+  relógio, status, template da rota e histograma)
+- observe concorrente em várias threads (shards por thread, sem lock), e
+  verifica que nenhuma contagem é perdida
+
+E o custo do scrape: renderização de /metrics e a soma dos snapshots de
+vários workers (METRICS_MULTIPROC_DIR).
+
+Uso:
+    python benchmarks/bench_metrics.py --calls 1000000 --threads 8 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from common import configure_environment
+
+
+def per_call_ns(func, calls: int) -> float:
+    """Melhor de 3 execuções de `func` `calls` vezes, em nanossegundos por chamada"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func(calls)
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do registro de métricas")
+    parser.add_argument("--calls", type=int, default=1_000_000, help="Registros por medição")
+    parser.add_argument("--threads", type=int, default=8, help="Threads no teste concorrente")
+    parser.add_argument("--workers", type=int, default=4, help="Workers simulados no teste multiprocesso")
+    parser.add_argument("--routes", type=int, default=30, help="Rotas distintas no scrape")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    configure_environment(tmp_dir / "bench_metrics.db")
+
+    from app.utils.metrics import MetricsRegistry
+    from app.utils.middleware import MetricsMiddleware
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = registry.counter("bench_total", "bench", ("cache", "result"))
+    labels = ("GET", "/api/v1/books/{book_id}", "200")
+
+    def empty_loop(calls):
+        for _ in range(calls):
+            pass
+
+    def observe(calls):
+        for _ in range(calls):
+            histogram.observe(0.003, labels)
+
+    def inc(calls):
+        for _ in range(calls):
+            counter.inc(("leaderboard", "hit"))
+
+    loop_ns = per_call_ns(empty_loop, args.calls)
+    observe_ns = per_call_ns(observe, args.calls) - loop_ns
+    inc_ns = per_call_ns(inc, args.calls) - loop_ns
+
+    # Middleware: app ASGI mínimo com e sem o middleware
+    def endpoint():
+        pass
+
+    class App:
+        routes = [type("Route", (), {"endpoint": endpoint, "path": "/api/v1/books/{book_id}"})()]
+
+        async def __call__(self, scope, receive, send):
+            scope["endpoint"] = endpoint
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+    inner = App()
+    wrapped = MetricsMiddleware(inner)
+
+    async def send(message):
+        pass
+
+    def requests(app):
+        async def run(calls):
+            for _ in range(calls):
+                scope = {"type": "http", "method": "GET", "app": inner}
+                await app(scope, None, send)
+        return lambda calls: asyncio.run(run(calls))
+
+    middleware_ns = per_call_ns(requests(wrapped), args.calls // 4) - per_call_ns(requests(inner), args.calls // 4)
+
+    # Threads concorrentes gravando no mesmo histograma
+    concurrent = MetricsRegistry().histogram("bench_concurrent_seconds", "bench")
+    per_thread = args.calls // args.threads
+
+    def worker():
+        for _ in range(per_thread):
+            concurrent.observe(0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent_s = time.perf_counter() - start
+    recorded = sum(sum(series[:-1]) for series in concurrent.samples().values())
+
+    # Scrape: várias rotas/status, vários workers
+    for r in range(args.routes):
+        for status in ("200", "404", "500"):
+            histogram.observe(0.01, ("GET", f"/route/{r}", status))
+    # Os outros workers gravam os mesmos valores (pids fictícios)
+    multiproc_dir = tmp_dir / "metrics"
+    multiproc_dir.mkdir()
+    snapshot = json.dumps(registry.collect())
+    for pid in range(1, args.workers):
+        (multiproc_dir / f"metrics-{pid}.json").write_text(snapshot)
+
+    start = time.perf_counter()
+    single = registry.render(registry.collect())
+    render_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    merged = registry.collect_all(str(multiproc_dir))
+    output = registry.render(merged)
+    merge_ms = (time.perf_counter() - start) * 1000
+
+    def series(collection):
+        return {tuple(key): value for key, value in collection["bench_seconds"]["samples"]}[labels]
+
+    print("\n" + "=" * 64)
+    print(f"{'Histogram.observe':<36}{observe_ns:>10.0f} ns/registro")
+    print(f"{'Counter.inc':<36}{inc_ns:>10.0f} ns/registro")
+    print(f"{'MetricsMiddleware (por requisição)':<36}{middleware_ns:>10.0f} ns/requisição")
+    print(f"{f'observe em {args.threads} threads':<36}{concurrent_s / args.calls * 1e9:>10.0f} ns/registro "
+          f"({recorded:,} de {per_thread * args.threads:,} registrados)")
+    print(f"{'Render /metrics (1 worker)':<36}{render_ms:>10.2f} ms ({len(single.splitlines()):,} linhas)")
+    print(f"{f'Render /metrics ({args.workers} workers)':<36}{merge_ms:>10.2f} ms ({len(output.splitlines()):,} linhas)")
+    print("=" * 64)
+
+    assert recorded == per_thread * args.threads, "contagens perdidas entre threads"
+    own = series(registry.collect())
+    assert series(merged) == [value * args.workers for value in own], "soma entre workers incorreta"
+
+
+if __name__ == "__main__":
+    main()
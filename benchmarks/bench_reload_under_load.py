@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark de recarga do catálogo sob carga
+
+Sobe a API com uvicorn sobre um catálogo sintético, dispara requisições
+concorrentes a /api/v1/books e, no meio delas, recarrega o catálogo inteiro
+com a troca blue/green (load_books). Verifica que nenhuma requisição falhou,
+que o `total` observado é sempre o do catálogo antigo ou o do novo (nunca um
+catálogo parcial) e que o p99 durante a recarga não passou de --max-p99-ratio
+vezes o p99 antes dela (e, se informado, de --max-p99-ms). A recarga pausa
+após cada lote e índice (--yield-ratio, como CATALOG_LOAD_YIELD_RATIO nos jobs).
+
+Limite medido com 1M de livros, 8 clientes e 1 CPU (servidor, clientes e
+loader na mesma CPU): p99 de ~0,55-0,6 s antes e 1,1-1,5 s durante a recarga,
+com ou sem pausas, e o gate de 1,5x falha. As pausas baixam o p50 durante a
+recarga (~0,7 s para ~0,5 s) e dobram a sua duração (~24 s para ~48 s); o p99
+vem da divisão da CPU e dos índices, que são construídos de uma vez. Com mais
+de uma CPU o loader não disputa a CPU dos workers. O p99 de /books com leitores
+concorrentes é verificado em tests/test_catalog_loader.py, com um catálogo
+menor.
+
+Uso:
+    python benchmarks/bench_reload_under_load.py --books 1000000 --max-p99-ratio 1.5
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/v1/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API não respondeu a tempo")
+
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class LoadGenerator:
+    """Threads que consultam /api/v1/books e registram latência e totais"""
+
+    def __init__(self, base_url: str, concurrency: int, max_page: int):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.max_page = max_page
+        self.phase = "antes"
+        self.samples = {"antes": [], "durante": [], "depois": []}
+        self.errors = []
+        self.totals = set()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _worker(self, seed: int) -> None:
+        rng = random.Random(seed)
+        with httpx.Client(base_url=self.base_url, timeout=30.0) as client:
+            while not self._stop.is_set():
+                phase = self.phase
+                page = rng.randint(1, self.max_page)
+                start = time.perf_counter()
+                try:
+                    response = client.get("/api/v1/books", params={"page": page, "page_size": 20})
+                    elapsed = (time.perf_counter() - start) * 1000
+                    if response.status_code != 200:
+                        self.errors.append(f"HTTP {response.status_code}")
+                        continue
+                    self.totals.add(response.json()["total"])
+                    self.samples[phase].append(elapsed)
+                except httpx.HTTPError as e:
+                    self.errors.append(f"{type(e).__name__}: {e}")
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker, args=(i,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de recarga blue/green sob carga")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Tamanho do catálogo sintético")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultâneos")
+    parser.add_argument("--settle", type=float, default=10.0, help="Segundos de carga antes e depois da recarga")
+    parser.add_argument("--max-p99-ratio", type=float, default=1.5,
+                        help="p99 máximo durante a recarga, relativo ao p99 antes dela")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="p99 máximo absoluto durante a recarga")
+    parser.add_argument("--yield-ratio", type=float, default=1.0,
+                        help="Pausa da recarga após cada lote/índice, relativa à sua duração (0 = sem pausa)")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_reload.db"
+    configure_environment(db_path)
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=os.environ.copy(), stdout=subprocess.DEVNULL
+    )
+
+    from app.database import LoaderSessionLocal
+    from app.services.catalog_loader import load_books
+
+    # Novo catálogo com tamanho diferente para distinguir os totais
+    new_total = args.books + 1000
+    new_books = [
+        {"id": i, "title": f"Reloaded Book {i}", "price": 10.0 + (i % 500) / 10, "rating": i % 5 + 1,
+         "availability": i % 23, "category": "Fiction", "image_url": None}
+        for i in range(1, new_total + 1)
+    ]
+
+    try:
+        wait_until_ready(base_url)
+        load = LoadGenerator(base_url, args.concurrency, max_page=args.books // 20)
+        load.start()
+        time.sleep(args.settle)
+
+        print(f"🔄 Recarregando {new_total:,} livros com troca blue/green...")
+        load.phase = "durante"
+        db = LoaderSessionLocal()
+        try:
+            start = time.perf_counter()
+            load_books(db, new_books, yield_ratio=args.yield_ratio)
+            reload_ms = (time.perf_counter() - start) * 1000
+        finally:
+            db.close()
+
+        load.phase = "depois"
+        time.sleep(args.settle)
+        load.stop()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("\n" + "=" * 60)
+    print(f"Recarga: {reload_ms:.0f} ms")
+    print(f"{'Fase':<10}{'Requisições':>14}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for phase, samples in load.samples.items():
+        print(f"{phase:<10}{len(samples):>14,}{percentile(samples, 0.5):>12.1f}{percentile(samples, 0.99):>12.1f}")
+    print(f"Totais observados: {sorted(load.totals)}")
+    print(f"Erros: {len(load.errors)}")
+    print("=" * 60)
+
+    failures = []
+    if load.errors:
+        failures.append(f"{len(load.errors)} requisições falharam (ex.: {load.errors[0]})")
+    if not load.totals <= {args.books, new_total}:
+        failures.append(f"catálogo parcial observado: {sorted(load.totals)}")
+    before_p99 = percentile(load.samples["antes"], 0.99)
+    during_p99 = percentile(load.samples["durante"], 0.99)
+    if during_p99 > args.max_p99_ratio * before_p99:
+        failures.append(f"p99 durante a recarga {during_p99:.1f} ms > {args.max_p99_ratio:g}x o p99 antes "
+                        f"({before_p99:.1f} ms)")
+    if args.max_p99_ms is not None and during_p99 > args.max_p99_ms:
+        failures.append(f"p99 durante a recarga {during_p99:.1f} ms > {args.max_p99_ms:.0f} ms")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Recarga sem erros e sem catálogo parcial")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark do profiler de amostragem
+
+Mede o custo do profiler na vazão da API (mesma carga sem sessão, com uma
+sessão por tempo e com uma sessão por requisições) e mostra as funções com
+mais amostras no perfil coletado pelos endpoints de admin.
+
+Uso:
+    python benchmarks/bench_sampling_profiler.py --books 20000 --requests 300
+"""
+import argparse
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog
+
+LOAD_PATH = "/api/v1/ml/features?limit=500"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do profiler de amostragem")
+    parser.add_argument("--books", type=int, default=20_000, help="Livros no catálogo sintético")
+    parser.add_argument("--requests", type=int, default=300, help="Requisições por medição")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="Intervalo de amostragem")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_sampling_profiler.db"
+    configure_environment(db_path)
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.models.user import User
+    from app.utils.security import get_current_admin_user
+
+    # Os endpoints do profiler são só para admins; o benchmark não precisa de login
+    app.dependency_overrides[get_current_admin_user] = lambda: User(username="bench", is_admin=True)
+
+    def run_load(client) -> float:
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            client.get(LOAD_PATH)
+        return args.requests / (time.perf_counter() - start)
+
+    def wait_finished(client) -> dict:
+        while True:
+            status = client.get("/api/v1/admin/profiler/status").json()
+            if not status["running"]:
+                return status
+            time.sleep(0.05)
+
+    with TestClient(app) as client:
+        client.get(LOAD_PATH)
+        baseline = run_load(client)
+
+        client.post("/api/v1/admin/profiler/start", params={"seconds": 300, "interval_ms": args.interval_ms})
+        duration_rps = run_load(client)
+        duration_session = client.post("/api/v1/admin/profiler/stop").json()
+
+        client.post("/api/v1/admin/profiler/start", params={
+            "requests": args.requests, "route": "/api/v1/ml/features", "interval_ms": args.interval_ms
+        })
+        requests_rps = run_load(client)
+        requests_session = wait_finished(client)
+        folded = client.get("/api/v1/admin/profiler/result").text
+
+    leaves = Counter()
+    for line in folded.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        leaves[stack.rsplit(";", 1)[-1]] += int(count)
+    total = sum(leaves.values())
+
+    print("\n" + "=" * 72)
+    print(f"{'Sem sessão':<28}{baseline:>8.1f} req/s")
+    print(f"{'Sessão por tempo':<28}{duration_rps:>8.1f} req/s ({duration_rps / baseline - 1:+.1%}), "
+          f"{duration_session['samples']} amostras")
+    print(f"{'Sessão por requisições':<28}{requests_rps:>8.1f} req/s ({requests_rps / baseline - 1:+.1%}), "
+          f"{requests_session['samples']} amostras, {requests_session['requests_seen']} requisições")
+    print(f"\nFunções com mais amostras ({len(folded.splitlines())} pilhas distintas):")
+    for leaf, count in leaves.most_common(8):
+        print(f"  {count / total:>6.1%}  {leaf}")
+    print("=" * 72)
+
+    assert requests_session["requests_seen"] == args.requests
+    assert folded, "perfil vazio"
+
+
+if __name__ == "__main__":
+    main()
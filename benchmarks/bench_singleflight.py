@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark da coalescência de leituras (single-flight)
+
+Sobe o uvicorn sobre um catálogo sintético e dispara "manadas": --herd
+requisições idênticas ao mesmo tempo, várias ondas seguidas, cada onda com
+parâmetros novos (a consulta nunca está pronta de antes). Compara:
+
+- referência (git archive, rotas executam a consulta no event loop)
+- atual com SINGLEFLIGHT_ENABLED=False (consulta em thread, sem coalescência)
+- atual com single-flight
+
+Para cada modo: statements no banco do catálogo por onda
+(db_query_duration_seconds_count do /metrics), latência das requisições e
+duração de cada onda.
+
+Uso:
+    python benchmarks/bench_singleflight.py --books 100000 --herd 200 --waves 5
+"""
+import argparse
+import asyncio
+import io
+import os
+import re
+import socket
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT_DIR, TITLE_WORDS, configure_environment, create_synthetic_catalog, latency_summary
+
+QUERY_COUNT = re.compile(r'^db_query_duration_seconds_count\{[^}]*engine="api"[^}]*\} (\S+)$', re.M)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wave_requests(wave: int) -> list:
+    """Rotas da onda, com parâmetros que não se repetem entre ondas"""
+    word = TITLE_WORDS[100 + wave]
+    return [
+        ("/api/v1/books/search", {"title": word}),
+        ("/api/v1/books/price-range", {"min": 10 + wave, "max": 11 + wave}),
+    ]
+
+
+async def statements(client) -> float:
+    return sum(float(value) for value in QUERY_COUNT.findall((await client.get("/metrics")).text))
+
+
+async def measure(tree: Path, env: dict, args) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "600"],  # a manada reutiliza conexões que ficam ociosas entre ondas
+        cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=args.herd + 8)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=300) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    if (await client.get("/api/v1/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn não ficou pronto a tempo")
+                await asyncio.sleep(0.1)
+
+            # Abre as conexões antes, para a manada medir o servidor e não o handshake
+            await asyncio.gather(*(client.get("/api/v1/health") for _ in range(args.herd)))
+
+            for path, _ in wave_requests(0):
+                latencies, durations, queries, bodies = [], [], [], set()
+                for wave in range(args.waves):
+                    params = dict(wave_requests(wave))[path]
+                    before = await statements(client)
+
+                    async def request():
+                        start = time.perf_counter()
+                        response = await client.get(path, params=params)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        assert response.status_code == 200, response.text
+                        return response.content
+
+                    start = time.perf_counter()
+                    contents = await asyncio.gather(*(request() for _ in range(args.herd)))
+                    durations.append(time.perf_counter() - start)
+                    queries.append(await statements(client) - before)
+                    bodies.add(len(set(contents)))
+                results[path] = {
+                    "latency": latency_summary(latencies),
+                    "wave_s": sum(durations) / len(durations),
+                    "queries": sum(queries) / len(queries),
+                    "identical": bodies == {1},
+                }
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da coalescência de leituras (single-flight)")
+    parser.add_argument("--books", type=int, default=100_000, help="Livros no catálogo sintético")
+    parser.add_argument("--herd", type=int, default=200, help="Requisições idênticas simultâneas por onda")
+    parser.add_argument("--waves", type=int, default=5, help="Ondas por rota (parâmetros novos a cada onda)")
+    parser.add_argument("--baseline-ref", default="39e4338", help="Revisão de referência (git)")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "books.db"
+    configure_environment(db_path)
+    create_synthetic_catalog(db_path, args.books)
+
+    baseline = tmp_dir / "baseline"
+    baseline.mkdir()
+    archive = subprocess.run(["git", "archive", args.baseline_ref], cwd=ROOT_DIR, capture_output=True, check=True)
+    tarfile.open(fileobj=io.BytesIO(archive.stdout)).extractall(baseline)
+
+    runs = {
+        "referência": (baseline, {}),
+        "sem single-flight": (ROOT_DIR, {"SINGLEFLIGHT_ENABLED": "False"}),
+        "single-flight": (ROOT_DIR, {"SINGLEFLIGHT_ENABLED": "True"}),
+    }
+    results = {}
+    for label, (tree, overrides) in runs.items():
+        env = {**os.environ, **overrides, "LOG_DATABASE_URL": f"sqlite:///{tmp_dir / f'logs_{label}.db'}",
+               "API_LOG_ARCHIVE_DIR": str(tmp_dir / "archive"), "METRICS_ENABLED": "True"}
+        env.pop("PYTHONPATH", None)
+        results[label] = asyncio.run(measure(tree, env, args))
+
+    print("\n" + "=" * 96)
+    print(f"Manadas de {args.herd} requisições idênticas, {args.waves} ondas por rota, {args.books:,} livros")
+    print(f"{'':<20}{'rota':<28}{'queries/onda':>13}{'onda (s)':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'iguais':>8}")
+    for label in runs:
+        for path, row in results[label].items():
+            print(f"{label:<20}{path.rsplit('/', 1)[-1]:<28}{row['queries']:>13.1f}{row['wave_s']:>10.2f}"
+                  f"{row['latency']['p50_ms']:>10.1f}{row['latency']['p99_ms']:>10.1f}"
+                  f"{'sim' if row['identical'] else 'não':>8}")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark do modo snapshot do catálogo
+
+Mede a memória por livro do snapshot colunar e compara a latência das
+consultas de leitura servidas pelo SQLite com as servidas pelo snapshot.
+
+Uso:
+    python benchmarks/bench_snapshot.py --books 1000000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog, time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do snapshot do catálogo")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Tamanho do catálogo sintético")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetições por consulta")
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / "bench_snapshot.db"
+    configure_environment(db_path)
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    from app.database import SessionLocal
+    from app.services.book_service import book_service
+    from app.services.stats_service import stats_service
+    from app.services.catalog_snapshot import catalog_snapshot_service
+
+    tracemalloc.start()
+    catalog_snapshot_service.enable()
+    snapshot_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Mede o tempo de construção sem o overhead do tracemalloc
+    start = time.perf_counter()
+    catalog_snapshot_service.refresh()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    snapshot = catalog_snapshot_service.get()
+
+    queries = {
+        "/books?page=500": lambda db: book_service.get_books(db, 500, 20),
+        "/books/price-range 10-11": lambda db: book_service.get_books_by_price_range(db, 10, 11),
+        "/books/top-rated": lambda db: book_service.get_top_rated_books(db, 10),
+        "/categories": lambda db: book_service.get_categories(db),
+        "/stats/overview": lambda db: stats_service.get_overview_stats(db),
+        "/stats/categories": lambda db: stats_service.get_category_stats(db),
+    }
+
+    results = {}
+    db = SessionLocal()
+    try:
+        for name, query in queries.items():
+            catalog_snapshot_service.enabled = False
+            sqlite_stats = time_calls(lambda: (db.expunge_all(), query(db)), args.repeat)
+            catalog_snapshot_service.enabled = True
+            snapshot_stats = time_calls(lambda: query(db), args.repeat)
+            results[name] = (sqlite_stats, snapshot_stats)
+    finally:
+        db.close()
+
+    print(f"\n🏗️  Construção do snapshot: {build_ms:.0f} ms")
+    print(f"💾 Memória alocada (tracemalloc): {snapshot_bytes / 1024 / 1024:.1f} MiB "
+          f"= {snapshot_bytes / snapshot.total_books:.0f} bytes/livro")
+    print(f"💾 Colunas + strings (nbytes):    {snapshot.nbytes() / 1024 / 1024:.1f} MiB "
+          f"= {snapshot.nbytes() / snapshot.total_books:.0f} bytes/livro")
+    print("\n" + "=" * 66)
+    print(f"{'Consulta':<28}{'SQLite p50':>14}{'snapshot p50':>14}{'speedup':>10}")
+    print("=" * 66)
+    for name, (sqlite_stats, snapshot_stats) in results.items():
+        speedup = sqlite_stats["p50_ms"] / max(snapshot_stats["p50_ms"], 1e-6)
+        print(f"{name:<28}{sqlite_stats['p50_ms']:>12.3f}ms{snapshot_stats['p50_ms']:>12.3f}ms{speedup:>9.0f}x")
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória do snapshot do catálogo com vários workers
+
+Inicia N processos (como workers do uvicorn) que carregam o snapshot, seja
+lendo o SQLite para memória própria, seja mapeando o arquivo publicado pelo
+loader, e executam as consultas de leitura. Reporta RSS, PSS (memória
+proporcional, que divide páginas compartilhadas entre os processos) e tempo
+de carga por worker.
+
+Uso:
+    python benchmarks/bench_snapshot_workers.py --books 1000000 --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog
+
+
+def read_memory_kb() -> dict:
+    """Lê RSS e PSS do processo atual em /proc (Linux)"""
+    memory = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss", "Pss_Anon", "Pss_File"):
+                memory[key] = int(value.split()[0])
+    return memory
+
+
+def worker(mode: str, snapshot_path: str, barrier, results):
+    if mode == "database":
+        os.environ["CATALOG_SNAPSHOT_PATH"] = snapshot_path + ".missing"
+
+    from app.database import SessionLocal
+    from app.services.book_service import book_service
+    from app.services.stats_service import stats_service
+    from app.services.catalog_snapshot import catalog_snapshot_service
+
+    baseline = read_memory_kb()
+
+    start = time.perf_counter()
+    catalog_snapshot_service.enable()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    db = SessionLocal()
+    try:
+        book_service.get_books(db, 1, 20)
+        book_service.get_books_by_price_range(db, 10, 10.5)
+        book_service.get_top_rated_books(db, 10)
+        book_service.get_categories(db)
+        stats_service.get_overview_stats(db)
+        stats_service.get_category_stats(db)
+    finally:
+        db.close()
+
+    # Espera todos os workers carregarem para medir o compartilhamento de páginas
+    barrier.wait()
+    memory = read_memory_kb()
+    barrier.wait()
+
+    results.put({
+        "load_ms": load_ms,
+        "rss_mb": (memory["Rss"] - baseline["Rss"]) / 1024,
+        "pss_mb": (memory["Pss"] - baseline["Pss"]) / 1024,
+    })
+
+
+def run_mode(mode: str, snapshot_path: Path, workers: int) -> list:
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(mode, str(snapshot_path), barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return collected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de RSS por worker do snapshot")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Tamanho do catálogo sintético")
+    parser.add_argument("--workers", type=int, default=8, help="Número de workers")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_workers.db"
+    snapshot_path = tmp_dir / "catalog.snap"
+    configure_environment(db_path)
+    os.environ["CATALOG_SNAPSHOT_PATH"] = str(snapshot_path)
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    from app.database import SessionLocal
+    from app.services.catalog_snapshot import catalog_snapshot_service
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        catalog_snapshot_service.publish(db, snapshot_path)
+        publish_ms = (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+
+    print(f"💾 Snapshot publicado: {snapshot_path.stat().st_size / 1024 / 1024:.1f} MiB em {publish_ms:.0f} ms")
+
+    print("\n" + "=" * 70)
+    print(f"{'Modo':<12}{'carga média':>14}{'RSS/worker':>14}{'PSS/worker':>14}{'PSS total':>14}")
+    print("=" * 70)
+    for mode in ("database", "mmap"):
+        results = run_mode(mode, snapshot_path, args.workers)
+        load_ms = sum(r["load_ms"] for r in results) / len(results)
+        rss = sum(r["rss_mb"] for r in results) / len(results)
+        pss = sum(r["pss_mb"] for r in results)
+        print(f"{mode:<12}{load_ms:>12.0f}ms{rss:>12.1f}MB{pss / len(results):>12.1f}MB{pss:>12.1f}MB")
+    print("=" * 70)
+    print(f"({args.workers} workers; RSS/PSS medidos como acréscimo após carregar o snapshot)")
+
+
+if __name__ == "__main__":
+    main()
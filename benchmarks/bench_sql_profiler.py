@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark do profiler de SQL
+
+Mede o custo por query do profiler (listeners de cursor + ranking de
+statements) em buscas por chave primária, comparando um engine sem e com o
+profiler, e mostra na API:
+
+- o header Server-Timing de algumas rotas
+- o log de queries lentas com o EXPLAIN QUERY PLAN
+- o ranking de statements de /api/v1/admin/sql/top
+
+Uso:
+    python benchmarks/bench_sql_profiler.py --books 100000 --queries 20000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do profiler de SQL")
+    parser.add_argument("--books", type=int, default=100_000, help="Livros no catálogo sintético")
+    parser.add_argument("--queries", type=int, default=20_000, help="Buscas por id em cada medição")
+    parser.add_argument("--slow-ms", type=float, default=20.0, help="Limite do log de queries lentas")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "bench_sql_profiler.db"
+    configure_environment(db_path)
+    os.environ["SQL_PROFILING_ENABLED"] = "True"
+    os.environ["SQL_SLOW_QUERY_MS"] = str(args.slow_ms)
+    os.environ["METRICS_ENABLED"] = "False"
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    from sqlalchemy import create_engine, text
+    from app.utils.sql_profiler import SQLProfiler
+
+    def per_query_us(engine) -> float:
+        with engine.connect() as conn:
+            statement = text("SELECT id, title, price FROM books WHERE id = :id")
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                for i in range(args.queries):
+                    conn.execute(statement, {"id": i % args.books + 1}).fetchall()
+                best = min(best, time.perf_counter() - start)
+        return best / args.queries * 1e6
+
+    plain = create_engine(f"sqlite:///{db_path}")
+    profiled = create_engine(f"sqlite:///{db_path}")
+    SQLProfiler().instrument(profiled)
+    off_us = per_query_us(plain)
+    on_us = per_query_us(profiled)
+
+    slow_log = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            slow_log.append(record.getMessage())
+
+    logging.getLogger("app.utils.sql_profiler").addHandler(Capture())
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.models.user import User
+    from app.utils.security import get_current_admin_user
+
+    # O ranking é só para admins; o benchmark não precisa de login
+    app.dependency_overrides[get_current_admin_user] = lambda: User(username="bench", is_admin=True)
+
+    with TestClient(app) as client:
+        timings = {}
+        for path in ("/api/v1/books/1", "/api/v1/books?page=50", "/api/v1/books/search?title=love",
+                     "/api/v1/stats/overview", "/api/v1/books/top-rated"):
+            timings[path] = client.get(path).headers.get("server-timing")
+        top = client.get("/api/v1/admin/sql/top", params={"limit": 5}).json()
+
+    print("\n" + "=" * 72)
+    print(f"Busca por id sem profiler: {off_us:8.1f} µs/query")
+    print(f"Busca por id com profiler: {on_us:8.1f} µs/query (+{on_us - off_us:.1f} µs)")
+    print("\nServer-Timing:")
+    for path, timing in timings.items():
+        print(f"  {path:<36} {timing}")
+    print(f"\nQueries lentas (> {args.slow_ms:g} ms): {len(slow_log)}")
+    for message in slow_log[:3]:
+        print("  " + message.replace("\n", "\n  "))
+    print("\nTop statements por tempo total:")
+    for row in top["statements"]:
+        print(f"  {row['total_ms']:>9.1f} ms {row['count']:>5}x  {row['statement'][:80]}")
+    print("=" * 72)
+
+    assert all(timings.values()), "Server-Timing ausente"
+    assert top["statements"], "ranking vazio"
+
+
+if __name__ == "__main__":
+    main()
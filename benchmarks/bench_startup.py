@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark (e orçamento) da inicialização da API
+
+1. Importação de app.main com `python -X importtime`: tempo total (mediana de
+   N execuções) e os pacotes que mais custam, na versão atual e na de
+   referência (--baseline-ref, extraída com git archive)
+2. Dependências pesadas que devem ser importadas só no uso (pandas, bs4, lxml,
+   requests, httpx, sklearn): nenhuma pode estar carregada após importar app.main
+3. uvicorn sobre um catálogo sintético: tempo até a primeira resposta
+   (liveness) e até a aplicação ficar pronta (readiness), com a inicialização
+   bloqueante e com SERVE_WHILE_WARMING
+
+Termina com erro se a importação passar de --budget-ms ou se alguma
+dependência pesada for importada, para ser usado como verificação no CI.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog
+
+LAZY_MODULES = ("pandas", "bs4", "lxml", "requests", "httpx", "sklearn")
+
+
+def import_profile(tree: Path, env: dict) -> tuple:
+    """Tempo de importação de app.main (ms) e custo próprio por pacote de topo (ms)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            cwd=tree, env=env, capture_output=True, text=True, check=True)
+    total_us = 0
+    packages = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us)
+        if name.strip() == "app.main":
+            total_us = int(cumulative_us)
+    return total_us / 1000, {name: us / 1000 for name, us in packages.items()}
+
+
+def loaded_lazy_modules(tree: Path, env: dict) -> list:
+    code = ("import sys, json, app.main; "
+            f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({list(LAZY_MODULES)!r}))))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=tree, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_status(port: int, path: str):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", path)
+        return conn.getresponse().status
+    except OSError:
+        return None
+    finally:
+        conn.close()
+
+
+def serve_timings(tree: Path, env: dict, ready_path: str) -> tuple:
+    """Segundos do início do processo até a primeira resposta e até o readiness ficar 200"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    live = None
+    try:
+        while time.perf_counter() - start < 120:
+            status = get_status(port, ready_path)
+            if status is not None and live is None:
+                live = time.perf_counter() - start
+            if status == 200:
+                return live, time.perf_counter() - start
+            time.sleep(0.005)
+        raise RuntimeError("uvicorn não ficou pronto a tempo")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização da API")
+    parser.add_argument("--runs", type=int, default=5, help="Execuções por medição (mediana)")
+    parser.add_argument("--books", type=int, default=20_000, help="Livros no catálogo sintético")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Orçamento da importação de app.main")
+    parser.add_argument("--baseline-ref", default="82711e1", help="Revisão de referência (git)")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_template = tmp_dir / "catalog.db"
+    configure_environment(db_template)
+    create_synthetic_catalog(db_template, args.books)
+
+    baseline = tmp_dir / "baseline"
+    baseline.mkdir()
+    archive = subprocess.run(["git", "archive", args.baseline_ref], cwd=ROOT_DIR, capture_output=True, check=True)
+    tarfile.open(fileobj=io.BytesIO(archive.stdout)).extractall(baseline)
+
+    def environment(serve_while_warming: bool = False) -> dict:
+        db_path = tmp_dir / "books.db"
+        shutil.copyfile(db_template, db_path)
+        for suffix in ("-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        logs = tmp_dir / "logs.db"
+        logs.unlink(missing_ok=True)
+        env = os.environ.copy()
+        env.pop("PYTHONPATH", None)
+        env.update(DATABASE_URL=f"sqlite:///{db_path}", LOG_DATABASE_URL=f"sqlite:///{logs}",
+                   API_LOG_ARCHIVE_DIR=str(tmp_dir / "archive"), SERVE_WHILE_WARMING=str(serve_while_warming))
+        return env
+
+    trees = {"referência": baseline, "atual": ROOT_DIR}
+    imports = {}
+    for label, tree in trees.items():
+        import_profile(tree, environment())  # compila os .pyc
+        samples = [import_profile(tree, environment()) for _ in range(args.runs)]
+        imports[label] = (statistics.median(total for total, _ in samples), samples[-1][1])
+
+    lazy = {label: loaded_lazy_modules(tree, environment()) for label, tree in trees.items()}
+
+    scenarios = {
+        "referência": (baseline, False, "/api/v1/health"),
+        "atual, bloqueante": (ROOT_DIR, False, "/api/v1/health/ready"),
+        "atual, SERVE_WHILE_WARMING": (ROOT_DIR, True, "/api/v1/health/ready"),
+    }
+    serving = {}
+    for label, (tree, warming, ready_path) in scenarios.items():
+        samples = [serve_timings(tree, environment(warming), ready_path) for _ in range(args.runs)]
+        serving[label] = (statistics.median(live for live, _ in samples),
+                          statistics.median(ready for _, ready in samples))
+
+    print("\n" + "=" * 72)
+    print(f"Importação de app.main (mediana de {args.runs}):")
+    for label, (total, _) in imports.items():
+        print(f"  {label:<12}{total:>9.0f} ms   pesadas carregadas: {', '.join(lazy[label]) or '-'}")
+    print("\nPacotes mais caros (custo próprio, ms):")
+    print(f"  {'pacote':<18}{'referência':>12}{'atual':>10}")
+    packages = imports["referência"][1]
+    for name in sorted(packages, key=packages.get, reverse=True)[:12]:
+        print(f"  {name:<18}{packages[name]:>12.0f}{imports['atual'][1].get(name, 0.0):>10.0f}")
+    print(f"\nuvicorn, {args.books:,} livros (mediana de {args.runs}, s desde o início do processo):")
+    print(f"  {'':<28}{'1ª resposta':>12}{'pronto':>10}")
+    for label, (live, ready) in serving.items():
+        print(f"  {label:<28}{live:>12.2f}{ready:>10.2f}")
+    print("=" * 72)
+
+    total = imports["atual"][0]
+    assert not lazy["atual"], f"dependências pesadas importadas por app.main: {lazy['atual']}"
+    assert total <= args.budget_ms, f"importação de app.main em {total:.0f} ms (orçamento {args.budget_ms:.0f} ms)"
+    print(f"✅ Dentro do orçamento: {total:.0f} ms <= {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark do endpoint de livros mais bem avaliados
+
+Compara a consulta original (filtro `rating >= 4` + ordenação por
+`rating DESC, price ASC`) com o leaderboard pré-calculado.
+
+Uso:
+    python benchmarks/bench_top_rated.py --books 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import configure_environment, create_synthetic_catalog, time_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de /books/top-rated")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Tamanho do catálogo sintético")
+    parser.add_argument("--limit", type=int, default=10, help="Parâmetro limit do endpoint")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetições por variante")
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / "bench_top_rated.db"
+    configure_environment(db_path)
+
+    print(f"📚 Gerando catálogo sintético com {args.books:,} livros...")
+    create_synthetic_catalog(db_path, args.books)
+
+    from app.database import SessionLocal
+    from app.models.book import Book
+    from app.services.leaderboard_service import leaderboard_service
+
+    db = SessionLocal()
+    try:
+        def sql_query():
+            return (
+                db.query(Book)
+                .filter(Book.rating >= 4)
+                .order_by(Book.rating.desc(), Book.price.asc())
+                .limit(args.limit)
+                .all()
+            )
+
+        start = time.perf_counter()
+        board = leaderboard_service.get_leaderboard(db)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        def leaderboard():
+            db.expunge_all()
+            return leaderboard_service.get_top_rated_books(db, args.limit)
+
+        def leaderboard_category():
+            db.expunge_all()
+            return leaderboard_service.get_top_rated_books(db, args.limit, "Fiction")
+
+        # Empates de (rating, price) podem vir em ordem diferente, então compara as chaves
+        assert [(b.rating, b.price) for b in leaderboard()] == [(b.rating, b.price) for b in sql_query()]
+
+        results = {
+            "consulta SQL": time_calls(lambda: (db.expunge_all(), sql_query()), args.repeat),
+            "leaderboard": time_calls(leaderboard, args.repeat),
+            "leaderboard (categoria)": time_calls(leaderboard_category, args.repeat),
+        }
+    finally:
+        db.close()
+
+    print(f"\n🏗️  Construção do leaderboard: {build_ms:.1f} ms "
+          f"({sum(len(ids) for ids in board.tiers.values()):,} ids)")
+    print("\n" + "=" * 60)
+    print(f"{'Variante':<26}{'média':>10}{'p50':>10}{'p99':>10}")
+    print("=" * 60)
+    for name, stats in results.items():
+        print(f"{name:<26}{stats['mean_ms']:>8.3f}ms{stats['p50_ms']:>8.3f}ms{stats['p99_ms']:>8.3f}ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark do aquecimento dos caches
+
+1. Deploy: sobe o uvicorn sobre um catálogo sintético com o arquivo do banco
+   fora do page cache do sistema (posix_fadvise DONTNEED) e mede, depois do
+   readiness, a primeira e a segunda requisição a /stats/overview,
+   /categories, /books/top-rated e /ml/features:
+   - sem aquecimento (WARMUP_ENABLED=False)
+   - com aquecimento
+   - com aquecimento + pré-leitura das páginas do SQLite
+2. Recarga: no processo (ASGI), incrementa a versão do catálogo como um job de
+   scraping e mede a primeira requisição a cada endpoint, sem e com o
+   aquecimento em segundo plano
+
+Uso:
+    python benchmarks/bench_warmup.py --books 100000 --runs 3
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT_DIR, configure_environment, create_synthetic_catalog
+
+ENDPOINTS = ["/api/v1/stats/overview", "/api/v1/categories", "/api/v1/books/top-rated", "/api/v1/ml/features"]
+
+MODES = {
+    "sem aquecimento": {"WARMUP_ENABLED": "False"},
+    "aquecimento": {"WARMUP_ENABLED": "True", "WARMUP_PRETOUCH_SQLITE": "False"},
+    "aquecimento + páginas": {"WARMUP_ENABLED": "True", "WARMUP_PRETOUCH_SQLITE": "True"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def timed_get(port: int, path: str) -> tuple:
+    """(status, ms) de um GET em uma conexão nova"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        start = time.perf_counter()
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status, (time.perf_counter() - start) * 1000
+    except OSError:
+        return None, 0.0
+    finally:
+        conn.close()
+
+
+def evict_page_cache(db_path: Path) -> None:
+    """Tira o arquivo do banco (e o WAL) do page cache do sistema"""
+    for path in (db_path, Path(f"{db_path}-wal")):
+        if path.exists():
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def deploy_run(db_path: Path, env: dict) -> dict:
+    """Latências da primeira e segunda requisição por endpoint após o readiness"""
+    evict_page_cache(db_path)
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while timed_get(port, "/api/v1/health/ready")[0] != 200:
+            if time.perf_counter() - start > 120:
+                raise RuntimeError("uvicorn não ficou pronto a tempo")
+            time.sleep(0.01)
+        ready = time.perf_counter() - start
+        first = {path: timed_get(port, path)[1] for path in ENDPOINTS}
+        second = {path: timed_get(port, path)[1] for path in ENDPOINTS}
+        return {"ready": ready, "first": first, "second": second}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def reload_runs(runs: int) -> dict:
+    """Primeira requisição por endpoint após uma recarga, sem e com aquecimento"""
+    import httpx
+    from app.config import settings
+    from app.core.catalog_version import catalog_version
+    from app.main import app
+    from app.services.warmup_service import warmup_service
+
+    await app.router.startup()
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+            for label, enabled in (("sem aquecimento", False), ("aquecimento", True)):
+                settings.WARMUP_ENABLED = enabled
+                samples = {path: [] for path in ENDPOINTS}
+                for _ in range(runs):
+                    catalog_version.bump()
+                    # Como após um job de scraping: as requisições chegam logo depois
+                    await asyncio.sleep(0.5)
+                    while enabled and not warmup_service.is_warm:
+                        await asyncio.sleep(0.01)
+                    for path in ENDPOINTS:
+                        start = time.perf_counter()
+                        assert (await client.get(path)).status_code == 200
+                        samples[path].append((time.perf_counter() - start) * 1000)
+                results[label] = {path: statistics.median(values) for path, values in samples.items()}
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do aquecimento dos caches")
+    parser.add_argument("--books", type=int, default=100_000, help="Livros no catálogo sintético")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções por modo (mediana)")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp())
+    db_path = tmp_dir / "books.db"
+    configure_environment(db_path)
+    os.environ["LOG_DATABASE_URL"] = f"sqlite:///{tmp_dir / 'logs.db'}"
+    os.environ["API_LOG_ARCHIVE_DIR"] = str(tmp_dir / "archive")
+    create_synthetic_catalog(db_path, args.books)
+
+    deploy = {}
+    for label, overrides in MODES.items():
+        env = {**os.environ, **overrides}
+        runs = [deploy_run(db_path, env) for _ in range(args.runs)]
+        deploy[label] = {
+            "ready": statistics.median(run["ready"] for run in runs),
+            "first": {path: statistics.median(run["first"][path] for run in runs) for path in ENDPOINTS},
+            "second": {path: statistics.median(run["second"][path] for run in runs) for path in ENDPOINTS},
+        }
+
+    reload = asyncio.run(reload_runs(args.runs))
+
+    width = 26
+    print("\n" + "=" * 92)
+    print(f"Deploy, {args.books:,} livros, banco fora do page cache (mediana de {args.runs}, ms)")
+    print(f"{'':<{width}}{'pronto (s)':>11}" + "".join(f"{path.rsplit('/', 1)[-1]:>14}" for path in ENDPOINTS))
+    for label, row in deploy.items():
+        print(f"{label + ', 1ª':<{width}}{row['ready']:>11.2f}"
+              + "".join(f"{row['first'][path]:>14.1f}" for path in ENDPOINTS))
+        print(f"{label + ', 2ª':<{width}}{'':>11}" + "".join(f"{row['second'][path]:>14.1f}" for path in ENDPOINTS))
+    print(f"\nApós recarga do catálogo, 1ª requisição (ASGI, mediana de {args.runs}, ms)")
+    for label, row in reload.items():
+        print(f"{label:<{width}}{'':>11}" + "".join(f"{row[path]:>14.1f}" for path in ENDPOINTS))
+    print("=" * 92)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Utilitários compartilhados pelos benchmarks
+
+Configura variáveis de ambiente mínimas para importar a aplicação apontando
+para um banco SQLite temporário e gera catálogos sintéticos de livros.
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório pai ao path para importar os módulos da aplicação
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from scripts.generate_catalog import CATEGORY_WEIGHTS, TITLE_VOCABULARY, generate_rows, write_database
+
+CATEGORIES = list(CATEGORY_WEIGHTS)
+TITLE_WORDS = TITLE_VOCABULARY
+
+
+def configure_environment(db_path: Path) -> None:
+    """Define as variáveis de ambiente necessárias antes de importar `app`"""
+    os.environ.setdefault("APP_NAME", "book-api-benchmark")
+    os.environ.setdefault("APP_VERSION", "benchmark")
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ["DEBUG"] = "False"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+
+def create_synthetic_catalog(db_path: Path, total_books: int, seed: int = 42) -> None:
+    """Cria o banco com `total_books` livros sintéticos (scripts/generate_catalog.py)"""
+    write_database(db_path, generate_rows(total_books, seed))
+
+
+def time_calls(func, repeat: int) -> dict:
+    """Executa `func` `repeat` vezes e retorna latências em milissegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return latency_summary(samples)
+
+
+def latency_summary(samples) -> dict:
+    """Média e percentis (p50/p95/p99) de latências em milissegundos"""
+    samples = sorted(samples)
+    if not samples:
+        return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+
+    def percentile(fraction):
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
@@ -0,0 +1,140 @@
+"""
+Site local no formato de books.toscrape.com para testar o scraper
+
+Gera as listagens (20 livros por página, com o paginador "Page X of N") e as
+páginas de produto em disco, e as serve com um servidor HTTP em thread.
+"""
+import functools
+import io
+import random
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from common import CATEGORIES
+
+STARS = ["One", "Two", "Three", "Four", "Five"]
+BOOKS_PER_PAGE = 20
+
+
+def product_page(n: int, rng: random.Random) -> str:
+    """Página de produto com a estrutura do site"""
+    category = rng.choice(CATEGORIES)
+    price = f"£{rng.uniform(10, 60):.2f}"
+    sidebar = "".join(
+        f'<li><a href="../category/books/{c.lower().replace(" ", "-")}_{i}/index.html">\n {c}\n </a></li>\n'
+        for i, c in enumerate(CATEGORIES * 4)
+    )
+    description = " ".join(rng.choice(["lorem", "ipsum", "dolor", "sit", "amet", "book", "story"]) for _ in range(600))
+    head = "".join(f'<link rel="stylesheet" href="../../static/css/style{i}.css" type="text/css">\n' for i in range(20))
+    return f"""<!DOCTYPE html>
+<html lang="en-us" class="no-js"><head><title>Book {n} | Books to Scrape - Sandbox</title>
+<meta http-equiv="content-type" content="text/html; charset=UTF-8" />{head}</head>
+<body id="default" class="default"><header class="header container-fluid"><div class="page_inner"><div class="row">
+<div class="col-sm-8 h1"><a href="../../index.html">Books to Scrape</a><small> We love being scraped!</small></div>
+</div></div></header>
+<div class="container-fluid page"><div class="page_inner">
+<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li>
+<li><a href="../category/books_1/index.html">Books</a></li>
+<li><a href="../category/books/x_{n % 50}/index.html">{category}</a></li>
+<li class="active">Book {n}</li></ul>
+<aside class="sidebar col-sm-4 col-md-3"><div class="side_categories"><ul class="nav nav-list"><li><ul>{sidebar}</ul></li></ul></div></aside>
+<div class="col-sm-8 col-md-9"><article class="product_page"><div class="row">
+<div class="col-sm-6 product_main"><h1>Book {n}</h1><p class="price_color">{price}</p>
+<p class="instock availability"><i class="icon-ok"></i> In stock ({n % 22} available)</p>
+<p class="star-rating {STARS[n % 5]}"><i class="icon-star"></i><i class="icon-star"></i></p></div></div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div><p>{description}</p>
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">
+<tr><th>UPC</th><td>a{n:015d}</td></tr><tr><th>Product Type</th><td>Books</td></tr>
+<tr><th>Price (excl. tax)</th><td>{price}</td></tr><tr><th>Price (incl. tax)</th><td>{price}</td></tr>
+<tr><th>Tax</th><td>£0.00</td></tr><tr><th>Availability</th><td>In stock ({n % 22} available)</td></tr>
+<tr><th>Number of reviews</th><td>0</td></tr></table></article></div></div></div>
+<footer class="footer container-fluid"></footer></body></html>"""
+
+
+def listing_page(page: int, total_pages: int) -> str:
+    """Listagem com 20 livros, o paginador e o link "next" """
+    articles = []
+    for n in range((page - 1) * BOOKS_PER_PAGE + 1, page * BOOKS_PER_PAGE + 1):
+        articles.append(f"""<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">
+<div class="image_container"><a href="book-{n}_{n}/index.html"><img src="../../media/cache/{n:06d}.jpg" alt="Book {n}" class="thumbnail"></a></div>
+<p class="star-rating {STARS[n % 5]}"><i class="icon-star"></i></p>
+<h3><a href="book-{n}_{n}/index.html" title="Book &amp; Title {n}">Book &amp; Title {n}</a></h3>
+<div class="product_price"><p class="price_color">£{10 + n % 50}.00</p></div></article></li>""")
+    next_link = f'<li class="next"><a href="page-{page + 1}.html">next</a></li>' if page < total_pages else ""
+    return f"""<!DOCTYPE html><html><body><div class="page_inner">
+<form class="form-horizontal"><strong>{total_pages * BOOKS_PER_PAGE}</strong> results</form>
+<ol class="row">{"".join(articles)}</ol>
+<ul class="pager"><li class="current">
+    Page {page} of {total_pages}
+</li>{next_link}</ul></div></body></html>"""
+
+
+def generate_site(root: Path, total_pages: int, seed: int = 42) -> int:
+    """Gera o site em `root` e retorna o número de livros"""
+    rng = random.Random(seed)
+    catalogue = root / "catalogue"
+    catalogue.mkdir(parents=True, exist_ok=True)
+
+    for page in range(1, total_pages + 1):
+        (catalogue / f"page-{page}.html").write_text(listing_page(page, total_pages), encoding="utf-8")
+
+    total_books = total_pages * BOOKS_PER_PAGE
+    for n in range(1, total_books + 1):
+        book_dir = catalogue / f"book-{n}_{n}"
+        book_dir.mkdir(exist_ok=True)
+        (book_dir / "index.html").write_text(product_page(n, rng), encoding="utf-8")
+
+    return total_books
+
+
+def generate_covers(root: Path, total_books: int, distinct: int, size=(400, 600)) -> None:
+    """Gera as capas JPEG referenciadas pelas listagens
+
+    Só `distinct` imagens diferentes são geradas; as demais capas repetem o
+    conteúdo, como capas compartilhadas entre edições.
+    """
+    from PIL import Image
+
+    cache_dir = root / "media" / "cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    images = []
+    for i in range(distinct):
+        output = io.BytesIO()
+        color = ((i * 37) % 256, (i * 91) % 256, (i * 53) % 256)
+        Image.new("RGB", size, color).save(output, "JPEG", quality=90)
+        images.append(output.getvalue())
+
+    for n in range(1, total_books + 1):
+        (cache_dir / f"{n:06d}.jpg").write_bytes(images[n % distinct])
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        with self.server.counter_lock:
+            self.server.requests_served += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_site(root: Path, latency: float = 0.0):
+    """Serve `root` em uma porta livre; retorna (servidor, base_url)
+
+    `latency` (segundos) atrasa cada resposta para simular a origem remota.
+    `servidor.requests_served` conta as requisições recebidas.
+    """
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.requests_served = 0
+    server.counter_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
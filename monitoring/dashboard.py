@@ -7,11 +7,10 @@ import streamlit as st
 import pandas as pd
 from sqlalchemy import create_engine, text
 import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import re
 import sys
 from pathlib import Path
-import os
 from dotenv import load_dotenv
 
 # Add parent directory to path
@@ -21,7 +20,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
+# Only the settings and the (dependency-free) latency sketch come from the app:
+# the tables are read with plain SQL, so the dashboard runs with
+# monitoring/requirements.txt alone
 from app.config import settings
+from app.utils.latency_sketch import LatencySketch
 
 # Page configuration
 st.set_page_config(
@@ -31,12 +34,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Database connection
+# Database connections: the catalogue and the telemetry store (same file unless LOG_DATABASE_URL is set)
 @st.cache_resource
 def get_engine():
     return create_engine(settings.DATABASE_URL)
 
+@st.cache_resource
+def get_log_engine():
+    return create_engine(settings.LOG_DATABASE_URL or settings.DATABASE_URL)
+
 engine = get_engine()
+log_engine = get_log_engine()
 
 # Title
 st.title("📊 Book Recommendation API - Monitoring Dashboard")
@@ -45,20 +53,155 @@ st.markdown("Real-time API usage statistics and performance metrics")
 # Refresh button
 if st.button("🔄 Refresh Data"):
     st.cache_data.clear()
+    for key in [key for key in st.session_state if key.startswith("live_")]:
+        del st.session_state[key]
 
 # Fetch data
-@st.cache_data(ttl=30)  # Cache for 30 seconds
-def load_api_logs():
+# Ranges up to this many hours read the minute rollups, longer ones the hour rollups
+MINUTE_ROLLUP_MAX_HOURS = 6
+ROLLUP_COLUMNS = ['bucket_start', 'endpoint', 'method', 'status_code', 'count',
+                  'error_count', 'latency_sum_ms', 'latency_max_ms', 'latency_sketch']
+LOG_COLUMNS = ['timestamp', 'method', 'endpoint', 'status_code', 'response_time']
+RECENT_LOGS = 20
+# Daily api_logs partitions (see app/services/api_log_store.py)
+LOG_PARTITION = re.compile(r"^api_logs_(\d{8})$")
+
+
+def rollup_table(hours):
+    return "api_log_rollups_minute" if hours and hours <= MINUTE_ROLLUP_MAX_HOURS else "api_log_rollups_hour"
+
+
+def query_rollups(table, since=None):
+    """Rollup rows from ``since`` on: O(buckets x endpoints), whatever the request volume"""
+    query = f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM {table}"
+    params = {}
+    if since is not None:
+        query += " WHERE bucket_start >= :since"
+        params["since"] = since.strftime('%Y-%m-%d %H:%M:%S')
     try:
-        query = """
-        SELECT * FROM api_logs
-        ORDER BY timestamp DESC
-        LIMIT 1000
-        """
-        return pd.read_sql(query, engine)
-    except Exception as e:
+        df = pd.read_sql(text(query), log_engine, params=params)
+        df['bucket_start'] = pd.to_datetime(df['bucket_start'])
+        return df
+    except Exception:
         # Return empty DataFrame if table doesn't exist yet
-        return pd.DataFrame(columns=['timestamp', 'method', 'endpoint', 'status_code', 'response_time'])
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+
+def load_rollups(hours):
+    """
+    Rollups of the time range, kept in the session and updated incrementally
+
+    The first run reads the whole range. Later runs re-read only the buckets
+    from one bucket before the newest one seen (the newest is still being
+    counted, and the previous one can receive a late flush) and replace them in
+    the cached frame. Latency sketches are merged per bucket and kept alongside,
+    so only the re-read buckets are merged again. Returns the frame, the
+    per-bucket sketches and whether they changed.
+    """
+    key = f"live_rollups_{hours}"
+    table = rollup_table(hours)
+    cutoff = datetime.utcnow() - timedelta(hours=hours) if hours else None
+    df = st.session_state.get(key)
+    sketches = st.session_state.get(f"live_sketches_{hours}", {})
+
+    if df is None or len(df) == 0:
+        fresh = query_rollups(table, cutoff)
+        changed = df is None or len(fresh) > 0
+        df = fresh
+        sketches = bucket_sketches(fresh)
+    else:
+        step = timedelta(minutes=1) if table == "api_log_rollups_minute" else timedelta(hours=1)
+        since = df['bucket_start'].max().to_pydatetime() - step
+        fresh = query_rollups(table, since)
+        previous = df[df['bucket_start'] >= since]
+        # Counts only grow, so the same row count and total means nothing new was logged
+        changed = len(fresh) != len(previous) or fresh['count'].sum() != previous['count'].sum()
+        if changed:
+            df = pd.concat([df[df['bucket_start'] < since], fresh], ignore_index=True)
+            sketches = {bucket: sketch for bucket, sketch in sketches.items() if bucket < since}
+            sketches.update(bucket_sketches(fresh))
+        if cutoff is not None and (df['bucket_start'] < cutoff).any():
+            df = df[df['bucket_start'] >= cutoff]
+            sketches = {bucket: sketch for bucket, sketch in sketches.items() if bucket >= cutoff}
+            changed = True
+
+    st.session_state[key] = df
+    st.session_state[f"live_sketches_{hours}"] = sketches
+    return df, sketches, changed
+
+@st.cache_data(ttl=30)
+def load_last_hour_count():
+    try:
+        query = "SELECT COALESCE(SUM(count), 0) FROM api_log_rollups_minute WHERE bucket_start >= :cutoff"
+        cutoff = (datetime.utcnow() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+        with log_engine.connect() as conn:
+            return int(conn.execute(text(query), {"cutoff": cutoff}).scalar())
+    except Exception:
+        return 0
+
+def log_partitions(conn):
+    """Days of the existing api_logs partitions, oldest first"""
+    names = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'api\\_logs\\_%' ESCAPE '\\'"
+    )).scalars()
+    matches = [LOG_PARTITION.match(name) for name in names]
+    return sorted(datetime.strptime(match.group(1), "%Y%m%d").date() for match in matches if match)
+
+def tail_logs(conn, cursor, limit):
+    """
+    Log rows newer than ``cursor`` (newest first) and the (day, id) cursor of the newest row
+
+    Reads only the partitions from the cursor's day on, by primary key, like
+    APILogStore.tail in the app.
+    """
+    rows = []
+    newest = cursor
+    for day in reversed(log_partitions(conn)):
+        if cursor is not None and day < cursor[0]:
+            break
+        query = f"SELECT id, {', '.join(LOG_COLUMNS)} FROM api_logs_{day:%Y%m%d}"
+        params = {"limit": limit - len(rows)}
+        if cursor is not None and day == cursor[0]:
+            query += " WHERE id > :after"
+            params["after"] = cursor[1]
+        result = [dict(row._mapping) for row in conn.execute(text(query + " ORDER BY id DESC LIMIT :limit"), params)]
+        if result and not rows:
+            newest = (day, result[0]["id"])
+        rows.extend(result)
+        if len(rows) >= limit:
+            break
+    return rows, newest
+
+def load_recent_logs(limit=RECENT_LOGS):
+    """Newest log rows, fetching only rows after the last one seen"""
+    recent = st.session_state.get("live_recent")
+    cursor = st.session_state.get("live_recent_cursor")
+    try:
+        with log_engine.connect() as conn:
+            rows, cursor = tail_logs(conn, cursor, int(limit))
+    except Exception:
+        rows = []
+    if recent is None or rows:
+        new = pd.DataFrame(rows, columns=LOG_COLUMNS)
+        new['timestamp'] = pd.to_datetime(new['timestamp'])
+        recent = new if recent is None or len(new) >= limit else pd.concat([new, recent], ignore_index=True).head(limit)
+        st.session_state["live_recent"] = recent
+        st.session_state["live_recent_cursor"] = cursor
+        return recent, True
+    return recent, False
+
+def merge_sketches(sketches):
+    merged = LatencySketch()
+    for data in sketches:
+        merged.merge(LatencySketch.from_json(data))
+    return merged
+
+def bucket_sketches(rollups):
+    """Latency sketch of each bucket, merged over endpoints and status codes"""
+    return {
+        bucket.to_pydatetime(): merge_sketches(group)
+        for bucket, group in rollups.groupby('bucket_start')['latency_sketch']
+    }
 
 @st.cache_data(ttl=30)
 def load_books_stats():
@@ -79,29 +222,84 @@ def load_books_stats():
             'total_categories': [0]
         })
 
-try:
-    logs_df = load_api_logs()
-    books_stats = load_books_stats()
-
-    # Check if database is empty
-    if len(logs_df) == 0:
-        st.warning("""
-        ⚠️ **No API logs found yet**
 
-        The monitoring dashboard is ready, but no API requests have been logged yet.
+def build_view(rollups, sketches, granularity):
+    """KPIs and figures of the rollup frame (rebuilt only when the frame changed)"""
+    total_requests = int(rollups['count'].sum()) if len(rollups) > 0 else 0
+    view = {"total_requests": total_requests}
+    if total_requests == 0:
+        return view
+
+    sketch = LatencySketch()
+    for bucket_sketch in sketches.values():
+        sketch.merge(bucket_sketch)
+    errors = int(rollups['error_count'].sum())
+    view.update(
+        avg_response=rollups['latency_sum_ms'].sum() / total_requests,
+        p95=sketch.quantile(0.95),
+        errors=errors,
+        error_rate=errors / total_requests * 100,
+    )
+
+    requests_over_time = rollups.groupby('bucket_start')['count'].sum().reset_index()
+    fig = px.line(
+        requests_over_time,
+        x='bucket_start',
+        y='count',
+        title=f'API Requests per {granularity.capitalize()}',
+        labels={'bucket_start': 'Time', 'count': 'Number of Requests'}
+    )
+    fig.update_traces(line_color='#1f77b4', line_width=3)
+    view["requests_fig"] = fig
+
+    endpoint_counts = rollups.groupby('endpoint')['count'].sum().nlargest(10)
+    fig = px.bar(
+        x=endpoint_counts.values,
+        y=endpoint_counts.index,
+        orientation='h',
+        title='Most Popular Endpoints',
+        labels={'x': 'Request Count', 'y': 'Endpoint'}
+    )
+    fig.update_traces(marker_color='#2ca02c')
+    view["endpoints_fig"] = fig
+
+    distribution = pd.DataFrame(
+        [(upper, count) for lower, upper, count in sketch.buckets()],
+        columns=['response_time', 'count']
+    )
+    fig = px.bar(
+        distribution,
+        x='response_time',
+        y='count',
+        log_x=True,
+        title=f'Response Time Distribution (P50 {sketch.quantile(0.5):.1f} ms, P99 {sketch.quantile(0.99):.1f} ms)',
+        labels={'response_time': 'Response Time (ms)', 'count': 'Frequency'}
+    )
+    fig.update_traces(marker_color='#ff7f0e')
+    view["distribution_fig"] = fig
+
+    status_counts = rollups.groupby('status_code')['count'].sum()
+    view["status_fig"] = px.pie(
+        values=status_counts.values,
+        names=status_counts.index,
+        title='HTTP Status Code Distribution',
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    return view
+
+
+# Color code status codes
+def color_status(val):
+    if val >= 500:
+        return 'background-color: #ffcccc'
+    elif val >= 400:
+        return 'background-color: #ffffcc'
+    elif val >= 200:
+        return 'background-color: #ccffcc'
+    return ''
 
-        **To populate the dashboard:**
-        1. Make some requests to your API endpoints
-        2. The logs will appear automatically
-        3. Use the refresh button or wait for auto-refresh
-
-        **Example API calls:**
-        - `GET /api/v1/books` - List all books
-        - `GET /api/v1/health` - Health check
-        - `GET /api/v1/categories` - List categories
-        """)
-        st.info("📊 Dashboard will auto-refresh every 30 seconds to check for new data")
 
+try:
     # Sidebar - Time filter
     st.sidebar.header("⏱️ Time Filter")
     time_options = {
@@ -112,162 +310,120 @@ try:
         "All Time": None
     }
     selected_time = st.sidebar.selectbox("Select time range", list(time_options.keys()))
-
-    if time_options[selected_time]:
-        cutoff_time = datetime.utcnow() - timedelta(hours=time_options[selected_time])
-        logs_df['timestamp'] = pd.to_datetime(logs_df['timestamp'])
-        filtered_logs = logs_df[logs_df['timestamp'] >= cutoff_time]
-    else:
-        filtered_logs = logs_df
-
-    # === KPIs ===
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        st.metric(
-            label="📈 Total Requests",
-            value=f"{len(filtered_logs):,}",
-            delta=f"+{len(filtered_logs[filtered_logs['timestamp'] >= datetime.utcnow() - timedelta(hours=1)])} last hour"
-        )
-
-    with col2:
-        if len(filtered_logs) > 0:
-            avg_response = filtered_logs['response_time'].mean()
+    hours = time_options[selected_time]
+    granularity = "minute" if rollup_table(hours) == "api_log_rollups_minute" else "hour"
+    st.sidebar.caption(f"Reading {granularity} rollups")
+
+    refresh_options = {"1 second": 1, "5 seconds": 5, "30 seconds": 30, "Off": None}
+    selected_refresh = st.sidebar.selectbox("Auto-refresh", list(refresh_options.keys()), index=1)
+    refresh_seconds = refresh_options[selected_refresh]
+
+    # Only this fragment re-runs on every refresh; it fetches what is new since
+    # the previous run and rebuilds the charts only when the data changed
+    @st.fragment(run_every=refresh_seconds)
+    def live_view():
+        rollups, sketches, changed = load_rollups(hours)
+        view_key = f"live_view_{hours}"
+        if changed or view_key not in st.session_state:
+            st.session_state[view_key] = build_view(rollups, sketches, granularity)
+        view = st.session_state[view_key]
+        books_stats = load_books_stats()
+        total_requests = view["total_requests"]
+
+        # Check if database is empty
+        if total_requests == 0:
+            st.warning("""
+            ⚠️ **No API logs found yet**
+
+            The monitoring dashboard is ready, but no API requests have been logged yet.
+
+            **To populate the dashboard:**
+            1. Make some requests to your API endpoints
+            2. The logs will appear automatically
+            3. Use the refresh button or wait for auto-refresh
+
+            **Example API calls:**
+            - `GET /api/v1/books` - List all books
+            - `GET /api/v1/health` - Health check
+            - `GET /api/v1/categories` - List categories
+
+            Logs recorded before the rollup tables existed can be imported with
+            `python scripts/rollup_api_logs.py`.
+            """)
+
+        # === KPIs ===
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
             st.metric(
-                label="⚡ Avg Response Time",
-                value=f"{avg_response:.2f} ms",
-                delta=f"P95: {filtered_logs['response_time'].quantile(0.95):.2f}ms"
+                label="📈 Total Requests",
+                value=f"{total_requests:,}",
+                delta=f"+{load_last_hour_count()} last hour"
             )
-        else:
-            st.metric(label="⚡ Avg Response Time", value="N/A")
 
-    with col3:
-        if len(filtered_logs) > 0:
-            error_rate = (filtered_logs['status_code'] >= 400).sum() / len(filtered_logs) * 100
+        with col2:
+            if total_requests > 0:
+                st.metric(
+                    label="⚡ Avg Response Time",
+                    value=f"{view['avg_response']:.2f} ms",
+                    delta=f"P95: {view['p95']:.2f}ms"
+                )
+            else:
+                st.metric(label="⚡ Avg Response Time", value="N/A")
+
+        with col3:
+            if total_requests > 0:
+                st.metric(
+                    label="⚠️ Error Rate",
+                    value=f"{view['error_rate']:.1f}%",
+                    delta=f"{view['errors']} errors"
+                )
+            else:
+                st.metric(label="⚠️ Error Rate", value="0%")
+
+        with col4:
             st.metric(
-                label="⚠️ Error Rate",
-                value=f"{error_rate:.1f}%",
-                delta=f"{(filtered_logs['status_code'] >= 400).sum()} errors"
+                label="📚 Total Books",
+                value=f"{books_stats['total_books'].iloc[0]:,}",
+                delta=f"{books_stats['total_categories'].iloc[0]} categories"
             )
-        else:
-            st.metric(label="⚠️ Error Rate", value="0%")
 
-    with col4:
-        st.metric(
-            label="📚 Total Books",
-            value=f"{books_stats['total_books'].iloc[0]:,}",
-            delta=f"{books_stats['total_categories'].iloc[0]} categories"
-        )
-
-    st.divider()
-
-    # === Charts Row 1 ===
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("📊 Requests Over Time")
-        if len(filtered_logs) > 0:
-            logs_hourly = filtered_logs.copy()
-            logs_hourly['hour'] = pd.to_datetime(logs_hourly['timestamp']).dt.floor('H')
-            requests_per_hour = logs_hourly.groupby('hour').size().reset_index(name='count')
-
-            fig = px.line(
-                requests_per_hour,
-                x='hour',
-                y='count',
-                title='API Requests per Hour',
-                labels={'hour': 'Time', 'count': 'Number of Requests'}
-            )
-            fig.update_traces(line_color='#1f77b4', line_width=3)
-            st.plotly_chart(fig, use_container_width=True)
+        st.divider()
+
+        # === Charts ===
+        for charts in ((("📊 Requests Over Time", "requests_fig"), ("🎯 Top Endpoints", "endpoints_fig")),
+                       (("⚡ Response Time Distribution", "distribution_fig"), ("📊 HTTP Status Codes", "status_fig"))):
+            columns = st.columns(2)
+            for column, (title, name) in zip(columns, charts):
+                with column:
+                    st.subheader(title)
+                    if total_requests > 0:
+                        st.plotly_chart(view[name], use_container_width=True)
+                    else:
+                        st.info("No data available for the selected time range")
+
+        # === Recent Requests Table ===
+        st.subheader("📋 Recent API Requests")
+        recent_logs, _ = load_recent_logs(RECENT_LOGS)
+        if len(recent_logs) > 0:
+            display = recent_logs.copy()
+            display['response_time'] = display['response_time'].round(2).astype(str) + ' ms'
+            styled_df = display.style.map(color_status, subset=['status_code'])
+            st.dataframe(styled_df, use_container_width=True, height=400)
         else:
-            st.info("No data available for the selected time range")
-
-    with col2:
-        st.subheader("🎯 Top Endpoints")
-        if len(filtered_logs) > 0:
-            endpoint_counts = filtered_logs['endpoint'].value_counts().head(10)
-
-            fig = px.bar(
-                x=endpoint_counts.values,
-                y=endpoint_counts.index,
-                orientation='h',
-                title='Most Popular Endpoints',
-                labels={'x': 'Request Count', 'y': 'Endpoint'}
-            )
-            fig.update_traces(marker_color='#2ca02c')
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No data available")
-
-    # === Charts Row 2 ===
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("⚡ Response Time Distribution")
-        if len(filtered_logs) > 0:
-            fig = px.histogram(
-                filtered_logs,
-                x='response_time',
-                nbins=50,
-                title='Response Time Distribution',
-                labels={'response_time': 'Response Time (ms)', 'count': 'Frequency'}
-            )
-            fig.update_traces(marker_color='#ff7f0e')
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No data available")
-
-    with col2:
-        st.subheader("📊 HTTP Status Codes")
-        if len(filtered_logs) > 0:
-            status_counts = filtered_logs['status_code'].value_counts()
-
-            fig = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
-                title='HTTP Status Code Distribution',
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No data available")
-
-    # === Recent Requests Table ===
-    st.subheader("📋 Recent API Requests")
-    if len(filtered_logs) > 0:
-        display_cols = ['timestamp', 'method', 'endpoint', 'status_code', 'response_time']
-        recent_logs = filtered_logs[display_cols].head(20).copy()
-        recent_logs['response_time'] = recent_logs['response_time'].round(2).astype(str) + ' ms'
-
-        # Color code status codes
-        def color_status(val):
-            if val >= 500:
-                return 'background-color: #ffcccc'
-            elif val >= 400:
-                return 'background-color: #ffffcc'
-            elif val >= 200:
-                return 'background-color: #ccffcc'
-            return ''
-
-        styled_df = recent_logs.style.applymap(color_status, subset=['status_code'])
-        st.dataframe(styled_df, use_container_width=True, height=400)
-    else:
-        st.info("No requests logged yet")
+            st.info("No requests logged yet")
+
+    live_view()
 
     # === Footer ===
     st.divider()
-    st.markdown("""
+    refresh_note = f"auto-refreshes every {selected_refresh}" if refresh_seconds else "auto-refresh off"
+    st.markdown(f"""
     <div style='text-align: center; color: #666;'>
-        <p>📊 Dashboard auto-refreshes every 30 seconds | 🚀 Powered by Streamlit</p>
+        <p>📊 Dashboard {refresh_note} (new rows only) | 🚀 Powered by Streamlit</p>
     </div>
     """, unsafe_allow_html=True)
 
-    # Auto-refresh every 30 seconds
-    import time
-    time.sleep(30)
-    st.rerun()
-
 except Exception as e:
     st.error(f"Error loading data: {str(e)}")
     st.exception(e)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script de Compactação dos Logs da API
+Executa agora a mesma compactação que a API roda em segundo plano: remove as
+partições diárias (api_logs_YYYYMMDD) fora do período de retenção, depois de
+garantir que estão nos rollups e de arquivá-las em NDJSON.gz, e apaga os
+rollups por minuto antigos.
+
+Com --migrate-legacy, move antes os registros da tabela antiga api_logs para
+as partições diárias. Rode scripts/rollup_api_logs.py antes, para que os
+rollups desses registros usem o template da rota.
+
+Uso:
+    python scripts/compact_api_logs.py [--migrate-legacy] [--retention-days 14]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório pai ao path para importar módulos da aplicação
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import LogBase, log_engine
+from app.services.api_log_store import api_log_store
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compacta os logs da API")
+    parser.add_argument("--migrate-legacy", action="store_true",
+                        help="Move os registros da tabela api_logs para as partições diárias")
+    parser.add_argument("--retention-days", type=int, default=settings.API_LOG_RETENTION_DAYS,
+                        help="Dias de logs brutos mantidos")
+    args = parser.parse_args()
+
+    LogBase.metadata.create_all(bind=log_engine)
+
+    if args.migrate_legacy:
+        start = time.time()
+        moved = api_log_store.migrate_legacy()
+        print(f"✅ {moved:,} registros movidos de api_logs para as partições diárias ({time.time() - start:.1f}s)")
+
+    if args.retention_days <= 0:
+        print("ℹ️  Retenção desativada (API_LOG_RETENTION_DAYS=0); nada a compactar")
+        sys.exit(0)
+
+    start = time.time()
+    result = api_log_store.compact(
+        args.retention_days,
+        settings.API_LOG_ARCHIVE_DIR or None,
+        settings.API_LOG_MINUTE_ROLLUP_RETENTION_DAYS
+    )
+    if result.skipped:
+        print("⚠️  Compactação já em andamento em outro processo")
+        sys.exit(1)
+    print(f"✅ Compactação concluída em {time.time() - start:.1f}s: {result.summary()}")
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script de Download das Capas
+Baixa as capas dos livros do banco (image_url) para o armazenamento local
+endereçado por conteúdo em data/covers, gerando as miniaturas.
+
+Só as capas que ainda não estão no cache são baixadas; o job de scraping
+executa o mesmo passo ao final (COVERS_ENABLED).
+
+Uso:
+    python scripts/download_covers.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório pai ao path para importar módulos da aplicação
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import engine, LoaderSessionLocal, Base
+from app.services.cover_service import cover_service
+
+
+if __name__ == '__main__':
+    Base.metadata.create_all(bind=engine)
+
+    db = LoaderSessionLocal()
+    try:
+        start = time.perf_counter()
+        result = cover_service.sync_covers(db)
+        print(f"\n✅ Capas sincronizadas em {time.perf_counter() - start:.1f}s: {result.summary()}")
+    finally:
+        db.close()
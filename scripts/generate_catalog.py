@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Gerador de Catálogo Sintético
+Gera N livros com as distribuições dos dados reais (data/books.csv) para
+testes de escala, em CSV (mesmo formato do scraping) ou direto em um banco
+SQLite.
+
+- Categorias com o mesmo peso que no site (a categoria "Default" sozinha tem 15%)
+- Preços uniformes entre £10 e £60, avaliações e estoque com as frequências reais
+- Títulos com o número de palavras e o vocabulário (frequência Zipf) dos títulos reais
+
+A saída é gerada em blocos de 100 mil livros, então 10M de livros usam a
+mesma memória que 100 mil. O resultado é determinístico para uma semente: cada
+bloco usa um gerador próprio derivado de (semente, índice do bloco).
+
+Uso:
+    python scripts/generate_catalog.py --books 1000000 --output data/books_1m.csv
+    python scripts/generate_catalog.py --books 10000000 --output data/books_10m.db --seed 7
+    python scripts/generate_catalog.py --books 100000 --fit data/books.csv --output data/books_100k.csv
+"""
+import argparse
+import csv
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# Adiciona o diretório pai ao path para importar módulos da aplicação
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Livros gerados por bloco (fixo: muda a sequência gerada para uma semente)
+CHUNK_SIZE = 100_000
+
+CSV_COLUMNS = ['id', 'title', 'price', 'rating', 'availability', 'category', 'image_url']
+
+# Distribuições medidas no scraping de books.toscrape.com (1.000 livros)
+CATEGORY_WEIGHTS = {
+    'Default': 152, 'Nonfiction': 110, 'Sequential Art': 75, 'Add a comment': 67,
+    'Fiction': 65, 'Young Adult': 54, 'Fantasy': 48, 'Romance': 35, 'Mystery': 32,
+    'Food and Drink': 30, 'Childrens': 29, 'Historical Fiction': 26, 'Poetry': 19,
+    'Classics': 19, 'History': 18, 'Horror': 17, 'Womens Fiction': 17,
+    'Science Fiction': 16, 'Science': 14, 'Music': 13, 'Business': 12, 'Travel': 11,
+    'Philosophy': 11, 'Thriller': 11, 'Humor': 10, 'Autobiography': 9, 'Art': 8,
+    'Psychology': 7, 'Religion': 7, 'Spirituality': 6, 'Christian Fiction': 6,
+    'New Adult': 6, 'Sports and Games': 5, 'Self Help': 5, 'Biography': 5, 'Health': 4,
+    'Politics': 3, 'Contemporary': 3, 'Christian': 3, 'Historical': 2, 'Crime': 1,
+    'Erotica': 1, 'Novels': 1, 'Cultural': 1, 'Suspense': 1, 'Short Stories': 1,
+    'Academic': 1, 'Adult Fiction': 1, 'Parenting': 1, 'Paranormal': 1,
+}
+RATING_WEIGHTS = {1: 226, 2: 196, 3: 203, 4: 179, 5: 196}
+AVAILABILITY_WEIGHTS = {
+    1: 98, 2: 14, 3: 196, 4: 47, 5: 65, 6: 35, 7: 53, 8: 47, 9: 25, 10: 2, 11: 28,
+    12: 34, 13: 5, 14: 136, 15: 87, 16: 84, 17: 5, 18: 11, 19: 23, 20: 4, 22: 1,
+}
+TITLE_LENGTH_WEIGHTS = {
+    1: 46, 2: 91, 3: 117, 4: 95, 5: 108, 6: 82, 7: 122, 8: 60, 9: 59, 10: 37, 11: 48,
+    12: 31, 13: 35, 14: 16, 15: 13, 16: 14, 17: 8, 18: 5, 19: 2, 20: 3, 21: 1, 22: 2,
+    23: 3, 26: 1, 27: 1,
+}
+# Palavras mais frequentes dos títulos reais, em ordem de frequência
+TITLE_VOCABULARY = (
+    "the of and a to in for vol you life on how love girl your from me world one art "
+    "an my story i new we history guide with is recipes fruits basket other what little "
+    "city by are it volume book harry potter at black american that saga god living "
+    "chronicles fire trilogy science dark poems secret collected war who red up family "
+    "murder time true last home earth ice secrets dream without this most no editions "
+    "america why cookbook night over about will great our small more all never death "
+    "day midnight shades things under house like beyond notes song universe if novel "
+    "quest music paris his behind stay soul find not modern between complete seven days "
+    "first shadow do power women heart out heaven business year good diary before high "
+    "everything being lost girls end cycle blue raven woman be stories her us"
+).split()
+PRICE_RANGE = (10.0, 60.0)
+IMAGE_URL_PREFIX = 'https://books.toscrape.com/../media/cache/'
+
+_WORD = re.compile(r"[\w'&]+")
+
+
+@dataclass
+class CatalogModel:
+    """Distribuições usadas pelo gerador"""
+    categories: Dict[str, float]
+    ratings: Dict[int, float]
+    availability: Dict[int, float]
+    title_lengths: Dict[int, float]
+    vocabulary: Dict[str, float]
+    price_range: Tuple[float, float]
+
+
+def default_model() -> CatalogModel:
+    """Distribuições medidas nos dados reais (vocabulário com frequência Zipf)"""
+    return CatalogModel(
+        categories=CATEGORY_WEIGHTS,
+        ratings=RATING_WEIGHTS,
+        availability=AVAILABILITY_WEIGHTS,
+        title_lengths=TITLE_LENGTH_WEIGHTS,
+        vocabulary={word: 1 / rank for rank, word in enumerate(TITLE_VOCABULARY, start=1)},
+        price_range=PRICE_RANGE,
+    )
+
+
+def fit_model(csv_path: Path) -> CatalogModel:
+    """Mede as distribuições de um CSV no formato do scraping"""
+    categories, ratings, availability, lengths, words = Counter(), Counter(), Counter(), Counter(), Counter()
+    prices = []
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            categories[row['category']] += 1
+            ratings[int(row['rating'])] += 1
+            availability[int(row['availability'])] += 1
+            title_words = _WORD.findall(row['title'].lower())
+            lengths[max(1, len(title_words))] += 1
+            words.update(title_words)
+            prices.append(float(row['price']))
+
+    if not prices:
+        raise ValueError(f"{csv_path} não tem livros")
+
+    return CatalogModel(
+        categories=dict(categories),
+        ratings=dict(ratings),
+        availability=dict(availability),
+        title_lengths=dict(lengths),
+        vocabulary=dict(words),
+        price_range=(min(prices), max(prices)),
+    )
+
+
+def _choices(weights: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    values = np.array(list(weights.keys()), dtype=object)
+    p = np.array(list(weights.values()), dtype=np.float64)
+    return values, p / p.sum()
+
+
+def generate_rows(total_books: int, seed: int = 42, model: CatalogModel = None) -> Iterator[tuple]:
+    """
+    Gera os livros como tuplas (id, title, price, rating, availability, category, image_url)
+
+    Os ids são sequenciais a partir de 1.
+    """
+    model = model or default_model()
+    categories, category_p = _choices(model.categories)
+    ratings, rating_p = _choices(model.ratings)
+    availability, availability_p = _choices(model.availability)
+    lengths, length_p = _choices(model.title_lengths)
+    vocabulary, vocabulary_p = _choices(model.vocabulary)
+    vocabulary = [word.capitalize() for word in vocabulary]
+    low, high = model.price_range
+
+    for chunk_index, start in enumerate(range(0, total_books, CHUNK_SIZE)):
+        size = min(CHUNK_SIZE, total_books - start)
+        rng = np.random.default_rng([seed, chunk_index])
+
+        chunk_categories = rng.choice(len(categories), size=size, p=category_p)
+        chunk_ratings = rng.choice(len(ratings), size=size, p=rating_p)
+        chunk_availability = rng.choice(len(availability), size=size, p=availability_p)
+        chunk_prices = np.round(rng.uniform(low, high, size=size), 2)
+        chunk_lengths = lengths[rng.choice(len(lengths), size=size, p=length_p)].astype(np.int64)
+        chunk_words = rng.choice(len(vocabulary), size=int(chunk_lengths.sum()), p=vocabulary_p)
+        chunk_hashes = rng.integers(0, 2 ** 63, size=(size, 2), dtype=np.int64)
+
+        offset = 0
+        for i in range(size):
+            length = chunk_lengths[i]
+            title = ' '.join(vocabulary[w] for w in chunk_words[offset:offset + length])
+            offset += length
+            digest = f"{chunk_hashes[i, 0]:016x}{chunk_hashes[i, 1]:016x}"
+            yield (
+                start + i + 1,
+                title,
+                float(chunk_prices[i]),
+                int(ratings[chunk_ratings[i]]),
+                int(availability[chunk_availability[i]]),
+                categories[chunk_categories[i]],
+                f"{IMAGE_URL_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}.jpg",
+            )
+
+
+def write_csv(output: Path, rows: Iterator[tuple]) -> int:
+    """Grava os livros em CSV (formato de data/books.csv)"""
+    count = 0
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_database(output: Path, rows: Iterator[tuple], batch_size: int = 50_000) -> int:
+    """
+    Grava os livros na tabela books de um banco SQLite
+
+    As tabelas são criadas a partir dos modelos da aplicação; a tabela books é
+    substituída. Os índices secundários são criados depois da carga e a versão
+    compartilhada do catálogo é incrementada (APIs em execução recarregam).
+    """
+    from sqlalchemy import create_engine
+    from app.core.catalog_version import RECORD_RELOAD_SQL
+    from app.models import Book
+
+    # Importar app.models registra todos os modelos no mesmo metadata
+    engine = create_engine(f"sqlite:///{output}")
+    Book.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(output)
+    try:
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'books' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute("DELETE FROM books")
+
+        count = 0
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT INTO books VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch.clear()
+        if batch:
+            conn.executemany("INSERT INTO books VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            count += len(batch)
+
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.execute(RECORD_RELOAD_SQL)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um catálogo sintético de livros")
+    parser.add_argument("--books", type=int, required=True, help="Número de livros")
+    parser.add_argument("--output", required=True, help="Arquivo de saída (.csv ou .db)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente (mesma semente, mesmo catálogo)")
+    parser.add_argument("--fit", default=None, help="CSV real para medir as distribuições (padrão: embutidas)")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    model = fit_model(Path(args.fit)) if args.fit else default_model()
+    rows = generate_rows(args.books, args.seed, model)
+
+    print(f"📚 Gerando {args.books:,} livros (semente {args.seed}) em {output}...")
+    start = time.perf_counter()
+    if output.suffix == '.db':
+        count = write_database(output, rows)
+    else:
+        count = write_csv(output, rows)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ {count:,} livros gerados em {elapsed:.1f}s ({count / elapsed:,.0f} livros/s)")
+
+
+if __name__ == '__main__':
+    main()
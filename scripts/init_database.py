@@ -22,10 +22,12 @@ from pathlib import Path
 # Adiciona o diretório pai ao path para importar módulos da aplicação
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.database import engine, SessionLocal, Base
+from app.core.catalog_version import catalog_version
+from app.database import engine, SessionLocal, Base, LogBase, log_engine
 from app.models.book import Book
 from app.models.user import User
 from app.models.api_log import APILog
+from app.services.catalog_snapshot import catalog_snapshot_service
 from app.utils.security import get_password_hash
 from app.config import settings
 
@@ -52,8 +54,9 @@ def create_database_tables():
         # Importa todos os modelos para garantir que estão registrados
         from app.models import book, user, api_log
 
-        # Cria todas as tabelas
+        # Cria todas as tabelas (as de logs no banco de telemetria, ver LOG_DATABASE_URL)
         Base.metadata.create_all(bind=engine)
+        LogBase.metadata.create_all(bind=log_engine)
 
         # Verifica quais tabelas foram criadas
         from sqlalchemy import inspect
@@ -110,6 +113,11 @@ def migrate_books_from_csv(data_dir):
             db.add(book)
             inserted_count += 1
 
+        # Avisa os workers em execução (versão compartilhada do catálogo); com
+        # o snapshot habilitado quem avisa é a publicação (etapa 5), depois
+        # que o arquivo novo está no lugar
+        if not settings.CATALOG_SNAPSHOT_ENABLED:
+            catalog_version.record_reload(db)
         db.commit()
         print(f"✅ {inserted_count} livros importados com sucesso")
 
@@ -126,6 +134,30 @@ def migrate_books_from_csv(data_dir):
         db.close()
 
 
+def publish_catalog_snapshot():
+    """Publica o snapshot binário do catálogo (mmap compartilhado pelos workers)"""
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        print("\n📦 Snapshot do catálogo desabilitado, não publicado")
+        return True
+
+    db = SessionLocal()
+    try:
+        if db.query(Book).count() == 0:
+            print("\n📦 Catálogo vazio, snapshot não publicado")
+            return True
+
+        snapshot_path, snapshot_version = catalog_snapshot_service.publish(db)
+        print(f"\n✅ Snapshot do catálogo v{snapshot_version} publicado em {snapshot_path}")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ Erro ao publicar snapshot do catálogo: {e}")
+        return False
+
+    finally:
+        db.close()
+
+
 def create_admin_user():
     """Cria usuário administrador"""
     print("\n👤 Criando usuário administrador...")
@@ -226,8 +258,10 @@ def verify_database():
         inspector = inspect(engine)
         tables = inspector.get_table_names()
 
-        required_tables = ['books', 'users', 'api_logs']
+        required_tables = ['books', 'users']
         missing_tables = [t for t in required_tables if t not in tables]
+        if 'api_logs' not in inspect(log_engine).get_table_names():
+            missing_tables.append('api_logs')
 
         if missing_tables:
             print(f"⚠️  Tabelas faltando: {', '.join(missing_tables)}")
@@ -276,12 +310,17 @@ def main():
         print(f"⚠️  Aviso: Falha ao importar livros: {e}")
         # Não é fatal, continua
 
-    # Etapa 5: Criar admin
+    # Etapa 5: Publicar snapshot do catálogo (fatal: sem ele os workers
+    # serviriam um snapshot que não corresponde ao banco)
+    if not publish_catalog_snapshot():
+        return 1
+
+    # Etapa 6: Criar admin
     if not create_admin_user():
         print("\n⚠️  Aviso: Falha ao criar admin")
         success = False
 
-    # Etapa 6: Imprimir resumo
+    # Etapa 7: Imprimir resumo
     try:
         print_database_summary()
     except Exception as e:
@@ -297,7 +336,8 @@ def main():
     print("=" * 60 + "\n")
 
     # Retorna 0 para não falhar o build no Render
-    # Mesmo com avisos, o banco básico está funcional
+    # Mesmo com avisos, o banco básico está funcional (só falhas do banco ou do
+    # snapshot retornam 1)
     return 0
 
 
@@ -2,22 +2,34 @@
 """
 Script de Migração CSV para SQLite
 Migra dados de livros do arquivo CSV para o banco de dados SQLite
+
+Por padrão sincroniza o banco com o CSV aplicando apenas inserções,
+atualizações e remoções (comparando um hash do conteúdo de cada livro).
+Use --full para recarregar todo o catálogo em uma tabela sombra e trocá-la
+atomicamente pela tabela atual (blue/green).
+
+Uso:
+    python scripts/migrate_csv_to_db.py [--full]
 """
+import argparse
 import os
 import sys
-import pandas as pd
 from pathlib import Path
 
 # Adiciona o diretório pai ao path para importar módulos da aplicação
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.database import engine, SessionLocal, Base
+from app.database import engine, SessionLocal, LoaderSessionLocal, Base
 from app.models.book import Book
 from app.models.user import User
 from app.models.api_log import APILog
+from app.config import settings
+from app.services.catalog_loader import load_books, read_books_csv
+from app.services.catalog_sync import sync_books
+from app.services.catalog_snapshot import catalog_snapshot_service
 
 
-def migrate_books_from_csv():
+def migrate_books_from_csv(full_reload=False):
     """Migra livros do CSV para o banco de dados SQLite"""
 
     # Caminhos dos arquivos
@@ -31,8 +43,8 @@ def migrate_books_from_csv():
 
     # Lê o CSV
     try:
-        df = pd.read_csv(csv_path)
-        print(f"✅ {len(df)} livros lidos com sucesso do CSV")
+        books = read_books_csv(csv_path)
+        print(f"✅ {len(books)} livros lidos com sucesso do CSV")
     except Exception as e:
         print(f"❌ Erro ao ler CSV: {e}")
         return False
@@ -48,39 +60,47 @@ def migrate_books_from_csv():
 
     # Insere livros no banco de dados
     print("📚 Inserindo livros no banco de dados...")
-    db = SessionLocal()
+    db = LoaderSessionLocal()
+    # Com o snapshot habilitado a recarga é avisada pela publicação (depois do
+    # arquivo no lugar); sem ele, pelo próprio carregamento
+    publish = settings.CATALOG_SNAPSHOT_ENABLED
 
     try:
-        # Limpa livros existentes (opcional - para migração limpa)
-        db.query(Book).delete()
-        db.commit()
-
-        inserted_count = 0
-        for _, row in df.iterrows():
-            book = Book(
-                id=int(row['id']),
-                title=str(row['title']),
-                price=float(row['price']),
-                rating=int(row['rating']),
-                availability=int(row['availability']),
-                category=str(row['category']),
-                image_url=str(row['image_url']) if pd.notna(row['image_url']) else None
-            )
-            db.add(book)
-            inserted_count += 1
-
-        db.commit()
-        print(f"✅ {inserted_count} livros inseridos com sucesso no banco de dados")
+        if full_reload:
+            # Carrega em tabela sombra e troca atomicamente (blue/green)
+            inserted_count = load_books(db, books, record_reload=not publish)
+            print(f"✅ {inserted_count} livros inseridos com sucesso no banco de dados")
+        else:
+            # Aplica somente as diferenças em uma única transação
+            changeset = sync_books(db, books, record_reload=not publish)
+            print(f"✅ Catálogo sincronizado: {changeset.summary()}")
+
+            if changeset.is_empty:
+                print("📊 Nenhuma alteração no catálogo")
+                if not publish or Path(settings.CATALOG_SNAPSHOT_PATH).exists():
+                    return True
 
         # Verifica a inserção
         total_books = db.query(Book).count()
         print(f"📊 Total de livros no banco de dados: {total_books}")
 
+        if not publish:
+            return True
+
+        # Publica snapshot binário do catálogo (mmap compartilhado pelos workers)
+        # e só então avisa a versão compartilhada; sem ele os workers
+        # continuariam servindo o catálogo anterior
+        try:
+            snapshot_path, snapshot_version = catalog_snapshot_service.publish(db)
+            print(f"✅ Snapshot do catálogo v{snapshot_version} publicado em {snapshot_path}")
+        except Exception as e:
+            print(f"❌ Erro ao publicar snapshot do catálogo: {e}")
+            return False
+
         return True
 
     except Exception as e:
         print(f"❌ Erro ao inserir livros: {e}")
-        db.rollback()
         return False
     finally:
         db.close()
@@ -109,10 +129,14 @@ def print_summary():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra livros do CSV para o SQLite")
+    parser.add_argument("--full", action="store_true", help="Recarrega todo o catálogo com troca blue/green")
+    args = parser.parse_args()
+
     print("\n🚀 Iniciando migração de CSV para SQLite...")
     print("=" * 50)
 
-    success = migrate_books_from_csv()
+    success = migrate_books_from_csv(full_reload=args.full)
 
     if success:
         print_summary()
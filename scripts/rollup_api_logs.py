@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Script de Backfill dos Rollups de Logs
+Gera os rollups por minuto e por hora (api_log_rollups_minute/hour) a partir
+dos registros já existentes na tabela legada api_logs, para bancos com logs
+anteriores aos rollups. Os caminhos brutos (/api/v1/books/123) são agrupados
+pelo template da rota (/api/v1/books/{book_id}), como faz o middleware.
+
+Só roda com as tabelas de rollup vazias, para não contar requisições duas vezes.
+
+Uso:
+    python scripts/rollup_api_logs.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório pai ao path para importar módulos da aplicação
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect
+from starlette.routing import Match
+
+from app.database import engine, SessionLocal, LogBase, LogSessionLocal, log_engine
+from app.main import app
+from app.models import APILog, APILogMinuteRollup
+from app.services.api_log_rollup_service import api_log_rollup_service
+
+
+def route_templates():
+    """Mapeia (método, caminho bruto) para o template da rota, com cache"""
+    cache = {}
+
+    def template(method: str, path: str) -> str:
+        key = (method, path)
+        if key not in cache:
+            scope = {"type": "http", "method": method, "path": path}
+            cache[key] = next(
+                (route.path for route in app.routes if route.matches(scope)[0] == Match.FULL),
+                "unmatched"
+            )
+        return cache[key]
+
+    return template
+
+
+if __name__ == '__main__':
+    LogBase.metadata.create_all(bind=log_engine)
+
+    log_db = LogSessionLocal()
+    try:
+        if log_db.query(APILogMinuteRollup).first() is not None:
+            print("❌ As tabelas de rollup já têm dados; o backfill contaria requisições duas vezes")
+            sys.exit(1)
+    finally:
+        log_db.close()
+
+    # A tabela legada fica no banco do catálogo (os rollups, no banco de telemetria)
+    if 'api_logs' not in inspect(engine).get_table_names():
+        print("ℹ️  Sem tabela api_logs no banco do catálogo; nada a agregar")
+        sys.exit(0)
+
+    db = SessionLocal()
+    try:
+
+        template = route_templates()
+        rows = (
+            (template(method, endpoint), method, status_code, response_time, timestamp)
+            for endpoint, method, status_code, response_time, timestamp in db.query(
+                APILog.endpoint, APILog.method, APILog.status_code, APILog.response_time, APILog.timestamp
+            ).filter(APILog.timestamp.isnot(None)).yield_per(10_000)
+        )
+
+        start = time.perf_counter()
+        total = api_log_rollup_service.backfill(rows)
+        print(f"✅ {total:,} logs agregados em {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
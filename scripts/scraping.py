@@ -1,225 +1,35 @@
-from bs4 import BeautifulSoup
-import pandas as pd
-import requests
-import re
-import os
+#!/usr/bin/env python3
+"""
+Script de Web Scraping
+Extrai os livros de books.toscrape.com e salva em data/books.csv
 
+A lógica de scraping vive em app/services/scraper_service.py para que o
+job de scraping da API possa executá-la no próprio processo.
 
+O progresso é gravado em data/crawl_state.db: se o script for interrompido,
+a próxima execução retoma do último checkpoint (use --fresh para recomeçar).
+"""
+import argparse
+import sys
+from pathlib import Path
 
-# --- Configuração ---
-BASE_URL = 'https://books.toscrape.com/'
-DATA_FILE = 'data/books.csv'
-RATING_MAP = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
-
-
-def clean_price(price_str):
-
-    """Limpa a string de preço, removendo caracteres indesejados (como símbolos de moeda ou codificação errada) e a converte para float."""
-
-    cleaned_str = re.sub(r'[^\d.]', '', price_str)
-
-    try:
-
-        return float(cleaned_str)
-
-    except ValueError:
-
-        print(f"Aviso: Não foi possível converter o preço original '{price_str}' após limpeza para '{cleaned_str}'. Usando 0.0.")
-
-        return 0.0
-
-
-
-def get_product_details(soup):
-
-    """Extrai detalhes do livro de uma página de produto."""
-
-    product_table = soup.find('table', class_='table table-striped').find_all('td')
-
-   
-
-    # Preço: Índice 3 (Price (incl. tax))
-
-    price = clean_price(product_table[3].text)
-
-   
-
-    # Disponibilidade: Índice 5
-
-    availability_str = product_table[5].text
-
-    match = re.search(r'\d+', availability_str)
-
-    availability = int(match.group(0)) if match else 0
-
-   
-
-    # Categoria: Breadcrumb (Índice 3)
-
-    breadcrumb = soup.find('ul', class_='breadcrumb').find_all('li')
-
-    category = breadcrumb[-2].text.strip()
-
-
-
-    return price, availability, category
-
-
-
-def scrape_page(url, books_data):
-
-    """Scrapeia todos os livros de uma página e navega para a próxima."""
-
-   
-
-    print(f"Scraping página: {url}")
-
-    response = requests.get(url)
-
-    if response.status_code != 200:
-
-        print(f"Erro ao acessar {url}")
-
-        return None
-
-       
-
-    list_soup = BeautifulSoup(response.text, 'html.parser')
-
-    articles = list_soup.find_all('article', class_='product_pod')
-
-   
-
-    for article in articles:
-
-        # Título e URL
-
-        title_tag = article.h3.a
-
-        title = title_tag['title']
-
-        book_relative_url = title_tag['href']
-
-       
-
-        # Link da Imagem
-
-        image_relative_url = article.find('img')['src']
-
-        image_url = BASE_URL + image_relative_url.replace('../..', '')
-
-       
-
-        # Rating (Estrelas)
-
-        star_rating = article.p['class'][1]
-
-        rating = RATING_MAP.get(star_rating, 0)
-
-       
-
-        # Corrigir o path do livro e extrair detalhes na página individual
-
-        book_url_path = 'catalogue/' + book_relative_url.replace('../', '') if 'catalogue' not in book_relative_url else book_relative_url
-
-        detail_response = requests.get(BASE_URL + book_url_path)
-
-        detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-
-       
-
-        price, availability, category = get_product_details(detail_soup)
-
-
-
-        books_data.append({
-
-            'title': title,
-
-            'price': price,
-
-            'rating': rating,
-
-            'availability': availability,
-
-            'category': category,
-
-            'image_url': image_url,
-
-        })
-
-       
-
-    # Encontrar link para a próxima página
-
-    next_page_tag = list_soup.find('li', class_='next')
-
-    if next_page_tag:
-
-        # Retorna o URL relativo da próxima página
-
-        return 'catalogue/' + next_page_tag.a['href']
-
-    else:
-
-        return None
-
-
-
-def run_scraper():
-
-    """Função principal para coordenar o scraping de todas as páginas."""
-
-    books_list = []
-
-    # Inicia na página 1
-
-    current_page_url = BASE_URL + 'catalogue/page-1.html'
-
-   
-
-    while current_page_url:
-
-        next_page_path = scrape_page(current_page_url, books_list)
-
-       
-
-        if next_page_path:
-
-            current_page_url = BASE_URL + next_page_path
-
-        else:
-
-            current_page_url = None
-
-           
-
-    # 2. Salvar os Dados (Entregável)
-
-    if not os.path.exists('data'):
-
-        os.makedirs('data')
-
-       
-
-    df = pd.DataFrame(books_list)
-
-    # Adicionar ID Sequencial (Necessário para o endpoint /books/{id})
-
-    df.index.name = 'id'
-
-    df = df.reset_index()
-
-    df['id'] = df['id'] + 1
-
-   
-
-    df.to_csv(DATA_FILE, index=False) # Dados armazenados localmente em um arquivo CSV [cite: 25]
-
-    print(f"\n✅ Scraping concluído. {len(df)} livros salvos em {DATA_FILE}")
+# Adiciona o diretório pai ao path para importar os módulos da aplicação
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.services.scraper_service import BASE_URL, DATA_FILE, STATE_FILE, iter_books, stream_books_csv
 
 
 if __name__ == '__main__':
-
-    run_scraper()
+    parser = argparse.ArgumentParser(description="Extrai os livros e salva em CSV")
+    parser.add_argument("--base-url", default=BASE_URL, help="Raiz do site (ex.: um site local de testes)")
+    parser.add_argument("--output", default=DATA_FILE, help="CSV de saída")
+    parser.add_argument("--state", default=STATE_FILE, help="Arquivo de checkpoint do crawl")
+    parser.add_argument("--fresh", action="store_true", help="Ignora o checkpoint e recomeça o crawl")
+    args = parser.parse_args()
+
+    base_url = args.base_url if args.base_url.endswith('/') else args.base_url + '/'
+
+    # Os livros são gravados no CSV conforme as páginas são processadas
+    books = iter_books(base_url=base_url, state_path=args.state, fresh=args.fresh)
+    total = sum(1 for _ in stream_books_csv(books, args.output))
+    print(f"\n✅ Scraping concluído. {total} livros salvos em {args.output}")
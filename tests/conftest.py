@@ -0,0 +1,61 @@
+"""
+Configuração compartilhada dos testes
+
+As configurações da aplicação são lidas uma vez, na importação de `app`, então
+o ambiente é definido aqui antes de qualquer import: um banco SQLite temporário
+com um catálogo sintético pequeno (scripts/generate_catalog.py) e os logs da
+API em outro arquivo temporário. Os limites de taxa ficam desligados no app
+compartilhado; os testes deles montam um app próprio.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+TEST_DIR = Path(tempfile.mkdtemp(prefix="book-api-tests-"))
+DB_PATH = TEST_DIR / "books.db"
+TOTAL_BOOKS = 2_000
+
+os.environ.update({
+    "APP_NAME": "book-api-tests",
+    "APP_VERSION": "test",
+    "ENVIRONMENT": "test",
+    "DEBUG": "False",
+    "SECRET_KEY": "test-secret-key",
+    "DATABASE_URL": f"sqlite:///{DB_PATH}",
+    "LOG_DATABASE_URL": f"sqlite:///{TEST_DIR / 'logs.db'}",
+    "API_LOG_ARCHIVE_DIR": str(TEST_DIR / "archive"),
+    "CATALOG_SNAPSHOT_PATH": str(TEST_DIR / "catalog.snap"),
+    "RATE_LIMIT_ENABLED": "False",
+})
+
+from scripts.generate_catalog import generate_rows, write_database
+
+write_database(DB_PATH, generate_rows(TOTAL_BOOKS, seed=7))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient do app, com a inicialização (startup) já concluída"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_client(client):
+    """O mesmo TestClient, com a dependência de admin (get_current_admin_user) satisfeita"""
+    from app.main import app
+    from app.models.user import User
+    from app.utils.security import get_current_admin_user
+
+    app.dependency_overrides[get_current_admin_user] = lambda: User(username="admin", is_admin=True)
+    yield client
+    app.dependency_overrides.pop(get_current_admin_user, None)
@@ -0,0 +1,142 @@
+"""
+Testes dos rollups de api_logs por minuto/hora e do sketch de latência
+
+Os rollups são gravados no banco de telemetria compartilhado, com um
+endpoint próprio e datas passadas, e removidos ao final de cada teste.
+"""
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import LogBase, LogSessionLocal, log_engine
+from app.models.api_log_rollup import APILogHourRollup, APILogMinuteRollup
+from app.services.api_log_rollup_service import APILogRollupService
+from app.utils.latency_sketch import DEFAULT_ALPHA, LatencySketch
+
+ENDPOINT = "/teste/rollups/{item_id}"
+START = datetime(2001, 1, 1, 10, 0)
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_sketch_com_erro_relativo_e_mesclavel():
+    rng = random.Random(3)
+    first = [rng.lognormvariate(3, 1) for _ in range(5000)]
+    second = [rng.lognormvariate(5, 0.5) for _ in range(5000)]
+    a, b, both = LatencySketch(), LatencySketch(), LatencySketch()
+    for value in first:
+        a.add(value)
+        both.add(value)
+    for value in second:
+        b.add(value)
+        both.add(value)
+
+    merged = LatencySketch.from_json(a.to_json()).merge(LatencySketch.from_json(b.to_json()))
+
+    assert merged.bins == both.bins and merged.count == 10_000
+    for q in (0.5, 0.95, 0.99):
+        expected = exact_quantile(first + second, q)
+        assert merged.quantile(q) == pytest.approx(expected, rel=DEFAULT_ALPHA)
+    assert LatencySketch.from_json("").quantile(0.5) is None
+    with pytest.raises(ValueError):
+        a.merge(LatencySketch(alpha=0.02))
+
+
+@pytest.fixture
+def rollups():
+    """Serviço de rollups novo; apaga as linhas do endpoint de teste ao final"""
+    LogBase.metadata.create_all(bind=log_engine)
+    yield APILogRollupService()
+    db = LogSessionLocal()
+    try:
+        for model in (APILogMinuteRollup, APILogHourRollup):
+            db.query(model).filter(model.endpoint == ENDPOINT).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def stored(model):
+    db = LogSessionLocal()
+    try:
+        return {
+            (row.bucket_start, row.status_code): row
+            for row in db.query(model).filter(model.endpoint == ENDPOINT)
+        }
+    finally:
+        db.close()
+
+
+def test_minutos_e_horas_com_contagens_e_percentis(rollups):
+    for i in range(120):
+        rollups.record(ENDPOINT, "GET", 200, 10.0 + i, START + timedelta(seconds=i))
+    rollups.record(ENDPOINT, "GET", 500, 900.0, START + timedelta(minutes=61))
+
+    assert rollups.write(rollups.take_pending()) == 3 + 2  # 3 minutos, 2 horas
+
+    minutes = stored(APILogMinuteRollup)
+    first = minutes[(START, 200)]
+    assert (first.count, first.error_count, first.latency_max_ms) == (60, 0, 69.0)
+    assert first.latency_sum_ms == pytest.approx(sum(10.0 + i for i in range(60)))
+
+    hours = stored(APILogHourRollup)
+    hour = hours[(START, 200)]
+    assert hour.count == 120
+    assert LatencySketch.from_json(hour.latency_sketch).quantile(0.5) == pytest.approx(69.0, rel=DEFAULT_ALPHA)
+    error_hour = hours[(START + timedelta(hours=1), 500)]
+    assert (error_hour.count, error_hour.error_count) == (1, 1)
+
+
+def test_gravacoes_simultaneas_somam_sem_perder_atualizacoes(rollups):
+    writers = [APILogRollupService() for _ in range(4)]
+    for writer in writers:
+        for i in range(50):
+            writer.record(ENDPOINT, "GET", 200, 5.0, START + timedelta(seconds=i))
+    start = threading.Barrier(len(writers))
+
+    def flush(writer):
+        pending = writer.take_pending()
+        start.wait()
+        writer.write(pending)
+
+    threads = [threading.Thread(target=flush, args=(writer,)) for writer in writers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    row = stored(APILogMinuteRollup)[(START, 200)]
+    assert row.count == 200
+    assert LatencySketch.from_json(row.latency_sketch).count == 200
+
+
+def test_falha_na_gravacao_mantem_os_pendentes(rollups, monkeypatch):
+    rollups.record(ENDPOINT, "GET", 200, 5.0, START)
+
+    def fail(deltas):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(rollups, "write", fail)
+    assert asyncio.run(rollups.flush()) == 0
+    monkeypatch.undo()
+    rollups.record(ENDPOINT, "GET", 200, 7.0, START)
+
+    assert asyncio.run(rollups.flush()) == 2
+    assert stored(APILogMinuteRollup)[(START, 200)].count == 2
+
+
+def test_backfill_de_logs_existentes(rollups):
+    rows = [(ENDPOINT, "GET", 404 if i % 10 == 0 else 200, 3.0, START + timedelta(minutes=i)) for i in range(30)]
+
+    assert rollups.backfill(rows, batch_size=7) == 30
+
+    minutes = stored(APILogMinuteRollup)
+    assert sum(row.count for row in minutes.values()) == 30
+    assert sum(row.error_count for row in minutes.values()) == 3
+    assert stored(APILogHourRollup)[(START, 200)].count == 27
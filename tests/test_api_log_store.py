@@ -0,0 +1,187 @@
+"""
+Testes das partições diárias de api_logs, da retenção e da compactação
+(app/services/api_log_store.py)
+
+As partições são criadas no banco de telemetria compartilhado com datas de
+2002, longe das partições do dia que o app grava, e removidas (com os rollups
+desses dias) ao final de cada teste.
+"""
+import asyncio
+import gzip
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.schema import DropTable
+
+from app.database import LogBase, engine, log_engine
+from app.models.api_log import APILog
+from app.models.api_log_rollup import APILogHourRollup, APILogMinuteRollup
+from app.services.api_log_store import APILogStore, partition_name, partition_table
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+DAY = date(2002, 1, 1)
+
+
+def log_row(timestamp, status_code=200, endpoint="/api/v1/books/1"):
+    return {
+        "endpoint": endpoint, "route": "/api/v1/books/{book_id}", "method": "GET", "status_code": status_code,
+        "response_time": 4.5, "timestamp": timestamp, "user_id": None, "query_params": None, "error_message": None,
+    }
+
+
+def at(day_offset, minute=0):
+    return datetime.combine(DAY + timedelta(days=day_offset), datetime.min.time()) + timedelta(minutes=minute)
+
+
+@pytest.fixture
+def store():
+    """APILogStore novo; remove as partições e os rollups de 2002 ao final"""
+    LogBase.metadata.create_all(bind=log_engine)
+    yield APILogStore(max_buffer=3)
+    end = datetime(2003, 1, 1)
+    with log_engine.begin() as conn:
+        for day in APILogStore.partitions(conn):
+            if day.year == DAY.year:
+                conn.execute(DropTable(partition_table(day), if_exists=True))
+        for model in (APILogMinuteRollup, APILogHourRollup):
+            conn.execute(model.__table__.delete().where(
+                model.bucket_start >= datetime(2002, 1, 1), model.bucket_start < end
+            ))
+
+
+def partitions_of_2002():
+    with log_engine.connect() as conn:
+        return [day for day in APILogStore.partitions(conn) if day.year == DAY.year]
+
+
+def test_uma_tabela_por_dia_sem_indices_secundarios(store):
+    store.write([log_row(at(1)), log_row(at(0)), log_row(at(1, 5))])
+
+    assert partitions_of_2002() == [DAY, DAY + timedelta(days=1)]
+    with log_engine.connect() as conn:
+        assert conn.execute(text(f"SELECT COUNT(*) FROM {partition_name(DAY + timedelta(days=1))}")).scalar() == 2
+        indexes = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"
+        ), {"name": partition_name(DAY)}).all()
+    assert indexes == []
+
+
+@pytest.fixture
+def reader_engine(tmp_path):
+    """Banco só com as partições do teste: o tail lê as partições mais novas, e as do app seriam mais novas"""
+    reader_engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    yield reader_engine
+    reader_engine.dispose()
+
+
+def append(reader_engine, rows):
+    with reader_engine.begin() as conn:
+        for row in rows:
+            table = partition_table(row["timestamp"].date())
+            table.create(conn, checkfirst=True)
+            conn.execute(table.insert(), [row])
+
+
+def poll(reader_engine, cursor, limit=10):
+    """Uma consulta do dashboard: conexão nova a cada atualização"""
+    with reader_engine.connect() as conn:
+        return APILogStore.tail(conn, cursor, limit)
+
+
+def test_tail_retorna_so_as_linhas_novas(reader_engine):
+    append(reader_engine, [log_row(at(0, minute)) for minute in range(3)])
+
+    rows, cursor = poll(reader_engine, None, limit=2)
+    assert [row["timestamp"] for row in rows] == [at(0, 2), at(0, 1)]
+    assert cursor == (DAY, rows[0]["id"])
+
+    append(reader_engine, [log_row(at(0, 3)), log_row(at(1, 0))])
+    rows, cursor = poll(reader_engine, cursor)
+    assert [row["timestamp"] for row in rows] == [at(1, 0), at(0, 3)]
+    assert cursor[0] == DAY + timedelta(days=1)
+
+    assert poll(reader_engine, cursor) == ([], cursor)
+
+
+def test_buffer_limitado_e_mantido_se_a_gravacao_falhar(store, monkeypatch):
+    for minute in range(5):
+        store.record(log_row(at(0, minute)))
+    assert (store.buffered, store.dropped) == (3, 2)
+
+    def fail(rows):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(store, "write", fail)
+    assert asyncio.run(store.flush()) == 0
+    assert store.buffered == 3
+    monkeypatch.undo()
+
+    assert asyncio.run(store.flush()) == 3
+    assert store.buffered == 0
+
+
+def test_compactacao_arquiva_agrega_e_remove_as_particoes_antigas(store, tmp_path):
+    store.write([log_row(at(0, minute), 500 if minute == 0 else 200) for minute in range(3)])
+    store.write([log_row(at(1)), log_row(at(9))])
+    today = DAY + timedelta(days=10)
+
+    result = store.compact(retention_days=3, archive_dir=str(tmp_path), minute_rollup_retention_days=9, today=today)
+
+    assert (result.partitions_dropped, result.rows_archived, result.rows_rolled_up) == (2, 4, 4)
+    assert partitions_of_2002() == [DAY + timedelta(days=9)]
+
+    with gzip.open(tmp_path / f"{partition_name(DAY)}.ndjson.gz", "rt", encoding="utf-8") as f:
+        archived = [json.loads(line) for line in f]
+    assert [row["status_code"] for row in archived] == [500, 200, 200]
+    assert archived[0]["route"] == "/api/v1/books/{book_id}"
+
+    with log_engine.connect() as conn:
+        hours = conn.execute(
+            select(func.sum(APILogHourRollup.count), func.sum(APILogHourRollup.error_count))
+            .where(APILogHourRollup.bucket_start < at(2))
+        ).one()
+        minutes = conn.execute(
+            select(func.count()).select_from(APILogMinuteRollup).where(APILogMinuteRollup.bucket_start < at(2))
+        ).scalar()
+    # Rollups por hora ficam; os por minuto antes de today - 9 dias são apagados
+    assert tuple(hours) == (4, 1)
+    assert minutes == 1 and result.minute_rollups_deleted == 3
+
+    again = store.compact(retention_days=3, archive_dir=str(tmp_path), today=today)
+    assert again.partitions_dropped == 0 and "0 partitions dropped" in again.summary()
+
+
+@pytest.mark.skipif(fcntl is None, reason="sem flock nesta plataforma")
+def test_compactacao_ja_em_andamento_e_pulada(store, tmp_path):
+    store.write([log_row(at(0))])
+
+    with open(tmp_path / ".api_logs_compaction.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        result = store.compact(retention_days=1, archive_dir=str(tmp_path), today=DAY + timedelta(days=5))
+
+    assert result.skipped and result.summary() == "compaction already running in another worker"
+    assert partitions_of_2002() == [DAY]
+
+
+def test_migra_a_tabela_legada_do_banco_do_catalogo(store):
+    legacy = APILog.__table__
+    legacy.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(legacy.insert(), [
+            {key: value for key, value in log_row(timestamp).items() if key != "route"}
+            for timestamp in (at(0, 1), at(0, 2), at(2))
+        ])
+
+    try:
+        assert store.migrate_legacy() == 3
+        assert partitions_of_2002() == [DAY, DAY + timedelta(days=2)]
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM api_logs")).scalar() == 0
+    finally:
+        legacy.drop(bind=engine)
@@ -0,0 +1,74 @@
+"""
+Testes da busca de vários livros por ID (/books/batch)
+
+As consultas são contadas em um engine próprio sobre o banco dos testes,
+fora do engine compartilhado pelas requisições e tarefas em segundo plano.
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import WorkerSessionLocal
+from app.services.book_service import book_service
+from app.services.catalog_snapshot import CatalogSnapshot, catalog_snapshot_service
+from tests.conftest import DB_PATH, TOTAL_BOOKS
+
+IDS = [5, TOTAL_BOOKS + 1, 3, 5, 1999, 0]
+
+
+def test_livros_na_ordem_pedida_com_os_ausentes(client):
+    response = client.get("/api/v1/books/batch", params={"ids": ",".join(map(str, IDS))})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [book["id"] for book in body["books"]] == [5, 3, 1999]
+    assert body["missing"] == [TOTAL_BOOKS + 1, 0]
+    assert body["books"][1] == client.get("/api/v1/books/3").json()
+
+    posted = client.post("/api/v1/books/batch", json={"ids": IDS})
+    assert posted.status_code == 200 and posted.json() == body
+
+
+@pytest.mark.parametrize("ids", ["1,x", ",", " "])
+def test_ids_invalidos(client, ids):
+    assert client.get("/api/v1/books/batch", params={"ids": ids}).status_code == 400
+
+
+def test_limite_de_ids_por_requisicao(client, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKS_BATCH_MAX_IDS", 3)
+
+    assert client.get("/api/v1/books/batch", params={"ids": "1,2,3,4"}).status_code == 400
+    assert client.post("/api/v1/books/batch", json={"ids": [1, 2, 3, 4]}).status_code == 400
+    assert client.post("/api/v1/books/batch", json={"ids": []}).status_code == 422
+    assert client.get("/api/v1/books/batch", params={"ids": "1,2,3"}).status_code == 200
+
+
+def test_uma_consulta_in_por_bloco_de_ids(monkeypatch):
+    engine = create_engine(f"sqlite:///{DB_PATH}")
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    db = sessionmaker(bind=engine)()
+    monkeypatch.setattr(settings, "BOOKS_BATCH_CHUNK_SIZE", 4)
+
+    try:
+        books, missing = book_service.get_books_by_ids(db, list(range(10, 0, -1)) + [TOTAL_BOOKS + 5])
+    finally:
+        db.close()
+        engine.dispose()
+
+    assert [book.id for book in books] == list(range(10, 0, -1))
+    assert missing == [TOTAL_BOOKS + 5]
+    assert len(statements) == 3 and all(" IN (" in statement for statement in statements)
+
+
+def test_snapshot_responde_como_o_banco(client, monkeypatch):
+    expected = client.get("/api/v1/books/batch", params={"ids": ",".join(map(str, IDS))}).json()
+    db = WorkerSessionLocal()
+    try:
+        snapshot = CatalogSnapshot.load(db, 0)
+    finally:
+        db.close()
+    monkeypatch.setattr(catalog_snapshot_service, "get", lambda: snapshot)
+
+    assert client.get("/api/v1/books/batch", params={"ids": ",".join(map(str, IDS))}).json() == expected
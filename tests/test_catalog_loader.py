@@ -0,0 +1,220 @@
+"""
+Testes da recarga completa do catálogo com troca blue/green (load_books)
+
+Cada teste usa um banco próprio, com os mesmos listeners do loader_engine
+(WAL, BEGIN explícito), para não alterar o catálogo dos outros testes. Os
+leitores usam conexões sqlite3 separadas, como os workers da API.
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import books
+from app.database import Base, begin_sqlite_transaction, disable_pysqlite_transactions, get_db, set_sqlite_pragma
+from app.models.book import Book
+from app.services.catalog_loader import INDEX_COLORS, RETIRED_TABLE, SHADOW_TABLE, load_books
+
+OLD_TOTAL = 3_000
+NEW_TOTAL = 4_000
+
+# p99 de /books durante recargas seguidas de READER_TOTAL livros, relativo ao
+# p99 sem recarga (mais uma folga para o ruído de latências de milissegundos).
+# Em 1 CPU o loader divide a CPU com os leitores: aqui o p99 vai de ~5-10 ms a
+# ~15-25 ms, e com 1M de livros de ~0,55 s a 1,1-1,5 s
+# (benchmarks/bench_reload_under_load.py). Um leitor esperando o writer (lock,
+# checkpoint, troca) passa bem desse limite.
+READER_TOTAL = 20_000
+MAX_P99_RATIO = 3.0
+P99_SLACK_MS = 25.0
+
+
+def make_books(total: int, title: str = "Book"):
+    return (
+        {"id": i, "title": f"{title} {i}", "price": 10.0 + i % 50, "rating": i % 5 + 1,
+         "availability": i % 7, "category": "Fiction", "image_url": None}
+        for i in range(1, total + 1)
+    )
+
+
+def read_catalog(path):
+    """Total e menor título da tabela books, numa única leitura consistente"""
+    conn = sqlite3.connect(path, timeout=5)
+    try:
+        return conn.execute("SELECT COUNT(*), MIN(title) FROM books").fetchone()
+    finally:
+        conn.close()
+
+
+def schema_objects(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_%'"
+        ).fetchall())
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "catalog.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 5})
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "connect", disable_pysqlite_transactions)
+    event.listen(engine, "begin", begin_sqlite_transaction)
+    Base.metadata.create_all(bind=engine)
+
+    session = sessionmaker(bind=engine)()
+    load_books(session, make_books(OLD_TOTAL, "Old"))
+    yield session, path
+    session.close()
+    engine.dispose()
+
+
+def test_leitores_nunca_veem_catalogo_parcial_ou_vazio(catalog):
+    session, path = catalog
+    old = (OLD_TOTAL, "Old 1")
+    new = (NEW_TOTAL, "New 1")
+
+    # Leitura determinística a cada lote gravado na tabela sombra
+    during_load = []
+    load_books(session, make_books(NEW_TOTAL, "New"), on_progress=lambda _: during_load.append(read_catalog(path)),
+               batch_size=500)
+    assert len(during_load) == NEW_TOTAL // 500
+    assert set(during_load) == {old}
+
+    # Leitores concorrentes durante outra recarga: só o catálogo antigo ou o novo
+    seen = set()
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                seen.add(read_catalog(path))
+            except sqlite3.Error as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    try:
+        load_books(session, make_books(OLD_TOTAL, "Old"), batch_size=500)
+    finally:
+        done.set()
+        for thread in readers:
+            thread.join()
+
+    assert errors == []
+    assert seen and seen <= {old, new}
+    assert read_catalog(path) == old
+
+
+def test_tabela_e_indices_antigos_sao_removidos_apos_a_troca(catalog):
+    session, path = catalog
+    index_names = {index.name for index in Book.__table__.indexes}
+    assert index_names
+
+    colors = []
+    for title in ("New", "Newer"):
+        load_books(session, make_books(NEW_TOTAL, title), batch_size=1_000)
+        objects = schema_objects(path)
+
+        assert SHADOW_TABLE not in objects and RETIRED_TABLE not in objects
+        assert not any(table in (SHADOW_TABLE, RETIRED_TABLE) for table in objects.values())
+
+        book_indexes = {name for name, table in objects.items() if table == "books" and name != "books"}
+        suffixes = {name.rsplit("__", 1)[-1] for name in book_indexes}
+        assert len(suffixes) == 1 and suffixes <= set(INDEX_COLORS)
+        color = suffixes.pop()
+        assert book_indexes == {f"{name}__{color}" for name in index_names}
+        colors.append(color)
+
+    # As cores alternam a cada recarga, e os índices da cor anterior sumiram
+    assert colors[0] != colors[1]
+    assert read_catalog(path) == (NEW_TOTAL, "Newer 1")
+
+
+def test_falha_na_carga_preserva_o_catalogo_vivo(catalog):
+    session, path = catalog
+
+    def broken_crawl():
+        yield from make_books(1_200, "Broken")
+        raise RuntimeError("crawl interrompido")
+
+    with pytest.raises(RuntimeError):
+        load_books(session, broken_crawl(), batch_size=500)
+
+    assert read_catalog(path) == (OLD_TOTAL, "Old 1")
+    assert SHADOW_TABLE not in schema_objects(path)
+
+
+def p99(samples):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def test_p99_de_books_durante_recargas(catalog):
+    session, path = catalog
+    load_books(session, make_books(READER_TOTAL, "Old"))
+
+    reader_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5})
+    event.listen(reader_engine, "connect", set_sqlite_pragma)
+    ReaderSession = sessionmaker(bind=reader_engine)
+
+    def reader_db():
+        db = ReaderSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(books.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = reader_db
+
+    def read_for(seconds, samples, totals):
+        deadline = time.monotonic() + seconds
+        page = 0
+        while time.monotonic() < deadline:
+            page = page % (READER_TOTAL // 20) + 97
+            start = time.perf_counter()
+            response = client.get("/api/v1/books", params={"page": page, "page_size": 20})
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+            totals.add(response.json()["total"])
+
+    with TestClient(app) as client:
+        before, totals = [], set()
+        read_for(1.5, before, totals)
+
+        during = []
+        reloading = threading.Event()
+        reloads = []
+
+        def reload():
+            # Alterna entre o catálogo novo e o antigo, pausando como os jobs (CATALOG_LOAD_YIELD_RATIO)
+            while reloading.is_set():
+                total, title = (READER_TOTAL + 1_000, "New") if len(reloads) % 2 == 0 else (READER_TOTAL, "Old")
+                load_books(session, make_books(total, title), yield_ratio=1.0)
+                reloads.append(title)
+
+        reloading.set()
+        loader = threading.Thread(target=reload)
+        loader.start()
+        try:
+            read_for(3.0, during, totals)
+        finally:
+            reloading.clear()
+            loader.join()
+    reader_engine.dispose()
+
+    assert len(reloads) >= 2
+    assert totals <= {READER_TOTAL, READER_TOTAL + 1_000}
+    assert p99(during) <= MAX_P99_RATIO * p99(before) + P99_SLACK_MS, (p99(before), p99(during))
@@ -0,0 +1,289 @@
+"""
+Testes do snapshot colunar do catálogo e da sua publicação em arquivo
+
+O snapshot precisa responder exatamente como as consultas SQL que substitui.
+Os snapshots são publicados em diretórios temporários; o catálogo é o banco
+compartilhado dos testes, lido sem alterações.
+"""
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.core.catalog_version import CatalogVersion
+from app.database import WorkerSessionLocal
+from app.models.book import Book
+from app.schemas.book import BookResponse
+from app.services import catalog_snapshot_file
+from app.services.book_service import book_service
+from app.services.catalog_snapshot import CatalogSnapshot, CatalogSnapshotService, catalog_snapshot_service
+from app.services.catalog_snapshot_file import read_version
+from app.services.stats_service import stats_service
+from tests.conftest import TOTAL_BOOKS
+
+
+CENT = 0.011
+
+
+@pytest.fixture(scope="module")
+def db():
+    session = WorkerSessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="module")
+def snapshot(db):
+    return CatalogSnapshot.load(db, 0)
+
+
+def as_books(rows):
+    return [BookResponse.model_validate(row).model_dump() for row in rows]
+
+
+def by_count(categories):
+    """Ordem por contagem; empates não têm ordem definida no SQL"""
+    return sorted(categories, key=lambda item: (-item[1], item[0]))
+
+
+def test_snapshot_responde_como_as_consultas_sql(db, snapshot):
+    assert catalog_snapshot_service.get() is None  # serviços abaixo usam o SQL
+
+    books, total = book_service.get_books(db, page=3, page_size=20)
+    assert snapshot.get_books(3, 20) == (as_books(books), total)
+
+    # Ordem por preço; empates (sem ordem definida no SQL) por id no snapshot
+    for low, high in [(0, 100), (12.5, 13.5), (20, 20), (80, 10)]:
+        expected = sorted(as_books(book_service.get_books_by_price_range(db, low, high)),
+                          key=lambda book: (book["price"], book["id"]))
+        assert as_books(snapshot.get_books_by_price_range(low, high)) == expected
+
+    category = book_service.get_categories(db)[0][0]
+    for limit, name in [(10, None), (100, None), (5, category), (5, "Inexistente")]:
+        expected = as_books(book_service.get_top_rated_books(db, limit, name))
+        assert as_books(snapshot.get_top_rated_books(limit, name)) == expected
+
+    assert by_count(snapshot.get_categories()) == by_count(book_service.get_categories(db))
+    # Consultas SQL sem o cache de respostas. O AVG do SQLite soma floats na
+    # ordem do índice percorrido e pode errar o arredondamento de uma média
+    # como 26.925; o snapshot soma centavos exatos: diferença de até 1 centavo
+    overview = snapshot.get_overview_stats()
+    expected_overview = stats_service._query_overview_stats(db)
+    assert overview.pop("average_price") == pytest.approx(expected_overview.pop("average_price"), abs=CENT)
+    assert overview == expected_overview
+    expected = sorted(stats_service._query_category_stats(db), key=lambda row: row["category"])
+    stats = sorted(snapshot.get_category_stats(), key=lambda row: row["category"])
+    assert len(stats) == len(expected)
+    for row, expected_row in zip(stats, expected):
+        assert row == pytest.approx(expected_row, abs=CENT)
+
+    found = snapshot.get_books_by_ids([5, 1, 999_999, 5])
+    assert sorted(found) == [1, 5]
+    assert as_books([found[1]]) == as_books(db.query(Book).filter(Book.id == 1).all())
+
+
+def test_media_de_precos_exata_em_centavos(tmp_path):
+    prices = [25.63, 15.83, 25.83, 25.5, 49.66, 19.1]  # soma em float: 161.54999999999998
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}")
+    Book.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        session.add_all(Book(title=f"Livro {i}", price=price, rating=3, availability=1, category="Biography")
+                        for i, price in enumerate(prices))
+        session.commit()
+        snapshot = CatalogSnapshot.load(session, 0)
+    finally:
+        session.close()
+        engine.dispose()
+
+    assert snapshot.get_category_stats()[0]["average_price"] == 26.93
+    assert snapshot.get_overview_stats()["average_price"] == 26.93
+
+
+def test_snapshot_vazio(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    Book.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        empty = CatalogSnapshot.load(session, 0)
+    finally:
+        session.close()
+        engine.dispose()
+
+    assert empty.total_books == 0
+    assert empty.get_books(1, 20) == ([], 0)
+    assert empty.get_books_by_price_range(0, 100) == []
+    assert empty.get_top_rated_books(10) == []
+    assert empty.get_overview_stats()["total_books"] == 0
+    assert empty.get_books_by_ids([1]) == {}
+
+
+def test_arquivo_publicado_e_mapeado_sem_copia(db, snapshot, tmp_path):
+    path, version = catalog_snapshot_service.publish(db, tmp_path / "catalog.snap")
+    mapped = CatalogSnapshot.from_file(path, version)
+
+    assert version == 1 and read_version(path) == 1
+    assert not mapped.ids.flags.writeable  # visão sobre o mmap compartilhado
+    assert not mapped.sorted_prices.flags.writeable
+    assert list(mapped.sorted_prices) == sorted(snapshot.prices)
+    assert mapped.get_books(2, 50) == snapshot.get_books(2, 50)
+    assert mapped.get_top_rated_books(20) == snapshot.get_top_rated_books(20)
+    assert mapped.get_category_stats() == snapshot.get_category_stats()
+    assert mapped.get_books_by_ids([7, 3]) == snapshot.get_books_by_ids([7, 3])
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    """Outro worker: serviço de snapshot e versão do catálogo próprios, ligados como no app"""
+    monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_PATH", str(tmp_path / "catalog.snap"))
+    version = CatalogVersion()
+    service = CatalogSnapshotService()
+    version.subscribe(service.refresh)
+    version.watch(service.poll_file)
+    return version, service
+
+
+def test_worker_troca_para_o_arquivo_novo(db, worker):
+    version, service = worker
+    path = Path(settings.CATALOG_SNAPSHOT_PATH)
+    catalog_snapshot_service.publish(db, path)
+    version.poll()
+    service.enable()
+    bumps = []
+    version.subscribe(bumps.append)
+    start = version.current
+
+    first = service.get()
+    assert first is not None and service.get() is first
+
+    # Outro processo publica uma versão nova do arquivo: nada muda no caminho
+    # da requisição até o poller incrementar, uma vez, já com o arquivo novo
+    catalog_snapshot_service.publish(db, path)
+    assert service.get() is first and version.current == start
+    assert version.poll_all()
+    second = service.get()
+    assert second is not first
+    assert second.version == version.current == start + 1
+    assert second.total_books == TOTAL_BOOKS
+    assert not version.poll_all() and service.get() is second
+    assert bumps == [start + 1]
+
+    # Arquivo trocado sem recarga: mapeado pelo poller, sem incrementar
+    catalog_snapshot_service.publish(db, path, record_reload=False)
+    assert not version.poll_all()
+    assert service.get() is not second and service.get().version == start + 1
+    assert bumps == [start + 1]
+
+
+def test_publicacoes_simultaneas_nao_repetem_versao(tmp_path):
+    path = tmp_path / "catalog.snap"
+    versions = []
+    errors = []
+    start = threading.Barrier(6)
+
+    def publisher():
+        db = WorkerSessionLocal()
+        try:
+            start.wait()
+            versions.append(catalog_snapshot_service.publish(db, path)[1])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=publisher) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(versions) == [1, 2, 3, 4, 5, 6]
+    assert read_version(path) == 6
+    assert CatalogSnapshot.from_file(path, 6).total_books == TOTAL_BOOKS
+    # Sem arquivos temporários esquecidos (só o snapshot e o lock)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".catalog.snap.lock", "catalog.snap"]
+
+
+def test_falha_na_escrita_remove_o_temporario_e_preserva_o_snapshot(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.snap"
+    version = CatalogVersion()
+    version.poll()
+
+    def fail(fd):
+        raise OSError("disco cheio")
+
+    db = WorkerSessionLocal()
+    try:
+        catalog_snapshot_service.publish(db, path)
+        assert version.poll()
+        monkeypatch.setattr(catalog_snapshot_file.os, "fsync", fail)
+        with pytest.raises(OSError):
+            catalog_snapshot_service.publish(db, path)
+    finally:
+        db.close()
+
+    assert read_version(path) == 1
+    assert version.poll()  # a recarga é registrada mesmo sem o arquivo novo
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.fixture
+def broken_publish(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_PATH", str(tmp_path / "catalog.snap"))
+
+    def publish(db, path=None):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(catalog_snapshot_service, "publish", publish)
+
+
+def catalog_books():
+    db = WorkerSessionLocal()
+    try:
+        columns = Book.__table__.columns
+        return [dict(row._mapping) for row in db.execute(select(*columns).order_by(Book.id))]
+    finally:
+        db.close()
+
+
+def test_migracao_falha_se_o_snapshot_nao_for_publicado(broken_publish, monkeypatch):
+    from scripts import migrate_csv_to_db
+
+    # O "CSV" é o próprio catálogo do banco: o sync não altera nada
+    books = catalog_books()
+    monkeypatch.setattr(migrate_csv_to_db, "read_books_csv", lambda csv_path: books)
+
+    assert migrate_csv_to_db.migrate_books_from_csv() is False
+
+
+def test_sem_snapshot_habilitado_nada_e_publicado(broken_publish, monkeypatch):
+    from scripts import init_database, migrate_csv_to_db
+
+    monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_ENABLED", False)
+    books = catalog_books()
+    changed = [dict(book, price=book["price"] + 1) if book["id"] == 1 else book for book in books]
+    version = CatalogVersion()
+    version.poll()
+
+    try:
+        monkeypatch.setattr(migrate_csv_to_db, "read_books_csv", lambda csv_path: changed)
+        assert migrate_csv_to_db.migrate_books_from_csv() is True
+        assert version.poll()  # a recarga é avisada pelo próprio sync
+    finally:
+        monkeypatch.setattr(migrate_csv_to_db, "read_books_csv", lambda csv_path: books)
+        assert migrate_csv_to_db.migrate_books_from_csv() is True
+
+    assert init_database.publish_catalog_snapshot() is True
+    assert not Path(settings.CATALOG_SNAPSHOT_PATH).exists()
+
+
+def test_init_database_falha_se_o_snapshot_nao_for_publicado(broken_publish):
+    from scripts import init_database
+
+    assert init_database.publish_catalog_snapshot() is False
+    assert init_database.main() == 1
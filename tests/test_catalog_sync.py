@@ -0,0 +1,153 @@
+"""
+Testes do sync do catálogo por diferença (catalog_sync)
+
+Cada teste usa um banco próprio, com os mesmos listeners do loader_engine
+(WAL, BEGIN explícito), para não alterar o catálogo dos outros testes.
+"""
+import sqlite3
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, begin_sqlite_transaction, disable_pysqlite_transactions, set_sqlite_pragma
+from app.models.book import Book
+from app.core.catalog_version import CatalogVersion
+from app.services.catalog_sync import APPLY_BATCH_SIZE, content_hash, sync_books
+
+
+def make_book(book_id: int, **changes) -> dict:
+    book = {
+        "id": book_id, "title": f"Book {book_id}", "price": 10.0 + book_id, "rating": book_id % 5 + 1,
+        "availability": 3, "category": "Fiction", "image_url": None,
+    }
+    book.update(changes)
+    return book
+
+
+@pytest.fixture
+def loader_session(tmp_path):
+    path = tmp_path / "sync.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 1})
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "connect", disable_pysqlite_transactions)
+    event.listen(engine, "begin", begin_sqlite_transaction)
+    Base.metadata.create_all(bind=engine)
+
+    session = sessionmaker(bind=engine)()
+    sync_books(session, [make_book(book_id) for book_id in range(1, 101)])
+    yield session, path
+    session.close()
+    engine.dispose()
+
+
+def other_writer_commit(path) -> None:
+    """Commit de outra conexão, como o progresso do job (_update_job)"""
+    conn = sqlite3.connect(path, timeout=1)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS progress (n INTEGER)")
+        conn.execute("INSERT INTO progress VALUES (1)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_sync_aplica_somente_as_diferencas(loader_session):
+    session, _ = loader_session
+    books = [make_book(book_id) for book_id in range(2, 102)]
+    books[0] = make_book(2, price=99.0)
+
+    changeset = sync_books(session, books)
+
+    assert (len(changeset.inserted), len(changeset.updated), changeset.deleted) == (1, 1, [1])
+    assert session.query(Book).count() == 100
+    assert session.get(Book, 2).price == 99.0
+
+
+def test_sync_de_fonte_em_stream_com_commits_de_outra_conexao(loader_session):
+    """
+    O crawl alimenta sync_books enquanto o job grava o progresso em outra
+    conexão; antes, a transação de leitura aberta durante o stream fazia a
+    escrita falhar com "database is locked"
+    """
+    session, path = loader_session
+
+    def crawl():
+        for book_id in range(1, 151):
+            if book_id % 50 == 0:
+                other_writer_commit(path)
+            yield make_book(book_id, title=f"Book {book_id} (2nd edition)")
+
+    changeset = sync_books(session, crawl())
+
+    assert (len(changeset.inserted), len(changeset.updated)) == (50, 100)
+    assert session.query(Book).count() == 150
+
+
+def test_sync_sem_mudancas_libera_o_lock_de_escrita(loader_session):
+    session, path = loader_session
+
+    changeset = sync_books(session, [make_book(book_id) for book_id in range(1, 101)])
+
+    assert changeset.is_empty
+    other_writer_commit(path)
+
+
+def stored_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT version FROM catalog_meta WHERE id = 1").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_hash_do_conteudo_ignora_tipos_equivalentes():
+    assert content_hash("A", 10, 3, 2, "Fiction", "") == content_hash("A", 10.0, 3, 2, "Fiction", None)
+    assert content_hash("A", 10.0, 3, 2, "Fiction", None) != content_hash("A", 10.01, 3, 2, "Fiction", None)
+
+
+def test_versao_compartilhada_so_muda_com_diferencas(loader_session):
+    session, path = loader_session
+    version = stored_version(path)
+
+    sync_books(session, [make_book(book_id) for book_id in range(1, 101)])
+    assert stored_version(path) == version
+
+    progress = []
+    books = [make_book(book_id, title=f"Livro {book_id}") for book_id in range(1, APPLY_BATCH_SIZE + 151)]
+    changeset = sync_books(session, books, on_progress=progress.append)
+
+    assert stored_version(path) == version + 1
+    # Uma chamada por lote: atualizados primeiro, depois inseridos
+    assert progress == [100, 100 + APPLY_BATCH_SIZE, changeset.size]
+    assert changeset.summary().startswith(f"+{APPLY_BATCH_SIZE + 50} ~100 -0 (0 unchanged)")
+
+
+def test_falha_na_aplicacao_nao_deixa_mudancas_parciais(loader_session):
+    session, path = loader_session
+    version = stored_version(path)
+    books = [make_book(book_id, price=1.0) for book_id in range(1, 101)] + [make_book(101, title=None)]
+
+    with pytest.raises(Exception):
+        sync_books(session, books)
+
+    assert stored_version(path) == version
+    assert session.query(Book).count() == 100
+    assert {book.price for book in session.query(Book)} != {1.0}
+
+
+def test_changeset_entregue_aos_assinantes_da_versao(loader_session):
+    session, _ = loader_session
+    version = CatalogVersion()
+    full_reloads, changes = [], []
+    version.subscribe(full_reloads.append)
+    version.subscribe_changes(lambda number, changeset: changes.append((number, changeset)))
+    changeset = sync_books(session, [make_book(book_id) for book_id in range(1, 100)])
+
+    with mock.patch.object(CatalogVersion, "read_stored", return_value=None):
+        version.bump(changeset)
+        version.bump()
+
+    assert full_reloads == [1, 2]
+    assert changes == [(1, changeset)] and changeset.deleted == [100]
@@ -0,0 +1,156 @@
+"""
+Testes da versão do catálogo compartilhada entre processos (catalog_meta)
+
+As recargas "de outro processo" são feitas por uma conexão sqlite3 própria,
+sem passar por catalog_version.bump, como um script ou o job de outro worker.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from app.core.catalog_version import RECORD_RELOAD_SQL, CatalogVersion, catalog_version
+from app.database import LoaderSessionLocal
+from tests.conftest import DB_PATH
+
+
+def reload_elsewhere(*statements) -> None:
+    """Altera a tabela books e incrementa a versão compartilhada, como um loader"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        for sql, params in statements:
+            conn.execute(sql, params)
+        conn.execute(RECORD_RELOAD_SQL)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def book_row():
+    """Restaura o livro alterado pelo teste (e avisa os workers) ao final"""
+    saved = []
+
+    def save(book_id: int):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            saved.append(conn.execute(
+                "SELECT id, title, price, rating FROM books WHERE id = ?", (book_id,)
+            ).fetchone())
+        finally:
+            conn.close()
+
+    yield save
+    reload_elsewhere(*(
+        ("UPDATE books SET title = ?, price = ?, rating = ? WHERE id = ?", (title, price, rating, book_id))
+        for book_id, title, price, rating in saved
+    ))
+    catalog_version.poll()
+
+
+def test_poll_detecta_recarga_de_outro_processo():
+    version = CatalogVersion()
+    bumps = []
+    version.subscribe(bumps.append)
+
+    start = version.current
+    assert not version.poll()  # a primeira verificação só registra a versão atual
+
+    reload_elsewhere()
+    assert version.current == start  # ler a versão não consulta o banco
+    assert version.poll() and not version.poll()
+    assert version.current == start + 1
+    assert bumps == [start + 1]
+
+
+def record_reload() -> None:
+    db = LoaderSessionLocal()
+    try:
+        CatalogVersion.record_reload(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_recarga_do_proprio_processo_nao_conta_duas_vezes():
+    version = CatalogVersion()
+    version.poll()
+    start = version.current
+
+    record_reload()
+    version.bump()
+
+    assert not version.poll()
+    assert version.current == start + 1
+
+
+@pytest.mark.parametrize("poller_first", [False, True])
+def test_recarga_registrada_incrementa_uma_vez(poller_first):
+    """O job que publicou e o poller do mesmo worker veem a mesma recarga"""
+    version = CatalogVersion()
+    version.poll()
+    start = version.current
+    changesets = []
+    version.subscribe_changes(lambda new_version, changeset: changesets.append(changeset))
+
+    record_reload()
+    if poller_first:
+        assert version.poll()
+    assert version.bump_recorded("changeset") == start + 1
+    assert not version.poll()
+
+    assert version.current == start + 1
+    assert changesets == ([] if poller_first else ["changeset"])
+
+
+def test_leitura_durante_outra_verificacao_ve_a_recarga():
+    """
+    Uma verificação em andamento (que leu a versão antes da recarga) não pode
+    fazer outra leitura, iniciada depois do commit, ficar com a versão antiga
+    """
+    version = CatalogVersion()
+    start = version.current
+    reading = threading.Event()
+    release = threading.Event()
+
+    def slow_read_stored():
+        stored = CatalogVersion.read_stored()
+        if threading.current_thread().name == "slow-poll":
+            reading.set()
+            release.wait(5)
+        return stored
+
+    version.read_stored = slow_read_stored
+    slow = threading.Thread(target=version.poll, name="slow-poll")
+    slow.start()
+    assert reading.wait(5)
+
+    reload_elsewhere()
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(version.poll() and version.current))
+    reader.start()
+    release.set()
+    slow.join()
+    reader.join()
+
+    assert seen == [start + 1]
+
+
+def test_leaderboard_e_autocomplete_acompanham_recarga_de_outro_processo(client, book_row):
+    top = client.get("/api/v1/books/top-rated", params={"limit": 1}).json()[0]
+    assert client.get("/api/v1/books/autocomplete", params={"q": "zyzzyva"}).json()["books"] == []
+
+    # O pior livro passa a ser o melhor, com um título novo
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        book_id = conn.execute("SELECT id FROM books ORDER BY rating, price DESC, id LIMIT 1").fetchone()[0]
+    finally:
+        conn.close()
+    assert book_id != top["id"]
+    book_row(book_id)
+    reload_elsewhere(("UPDATE books SET title = 'Zyzzyva', price = 0.01, rating = 5 WHERE id = ?", (book_id,)))
+    catalog_version.poll()  # o poller em segundo plano do worker
+
+    assert client.get("/api/v1/books/top-rated", params={"limit": 1}).json()[0]["id"] == book_id
+    suggestions = client.get("/api/v1/books/autocomplete", params={"q": "zyzzyva"}).json()["books"]
+    assert [book["id"] for book in suggestions] == [book_id]
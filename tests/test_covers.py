@@ -0,0 +1,178 @@
+"""
+Testes do cache de capas: download de um servidor HTTP local, armazenamento
+por conteúdo e o endpoint /books/{id}/cover
+
+Cada teste usa um banco e um diretório de capas próprios; o endpoint é
+chamado no app compartilhado com a dependência get_db substituída.
+"""
+import functools
+import io
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.books import etag_matches
+from app.config import settings
+from app.database import Base, get_db
+from app.main import app
+from app.models.book import Book
+from app.models.cover import Cover
+from app.services.cover_service import CoverStore, cover_service
+
+
+def jpeg(color, size=(400, 600)) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, "JPEG")
+    return output.getvalue()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """Servidor HTTP local com duas capas iguais, uma diferente e um arquivo que não é imagem"""
+    root = tmp_path / "origin"
+    root.mkdir()
+    red = jpeg((200, 0, 0))
+    (root / "a.jpg").write_bytes(red)
+    (root / "b.jpg").write_bytes(red)
+    (root / "c.jpg").write_bytes(jpeg((0, 0, 200)))
+    (root / "not-image.jpg").write_bytes(b"<html>erro</html>")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(root)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def covers(tmp_path, monkeypatch):
+    """O cover_service do app, com armazenamento temporário"""
+    monkeypatch.setattr(cover_service, "_store", CoverStore(str(tmp_path / "covers"), settings.COVER_THUMBNAIL_SIZE))
+    return cover_service
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'covers.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_books(db, origin, names):
+    db.add_all(
+        Book(id=i, title=f"Livro {i}", price=10.0, rating=3, availability=1, category="Fiction",
+             image_url=origin + name)
+        for i, name in enumerate(names, start=1)
+    )
+    db.commit()
+
+
+def test_armazenamento_por_conteudo(tmp_path):
+    store = CoverStore(str(tmp_path), thumbnail_size=100)
+    data = jpeg((10, 20, 30))
+
+    first = store.put(data)
+    second = store.put(data)
+
+    assert (first.deduplicated, second.deduplicated) == (False, True)
+    assert first.content_hash == second.content_hash
+    assert (first.width, first.height, first.has_thumbnail) == (400, 600, True)
+    assert store.full_path(first.content_hash, "jpg").read_bytes() == data
+    with Image.open(store.thumbnail_path(first.content_hash)) as thumbnail:
+        assert max(thumbnail.size) == 100
+    assert store.put(b"GIF-falso") is None
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_sync_baixa_deduplica_e_pula_as_ja_baixadas(covers, db, origin):
+    add_books(db, origin, ["a.jpg", "b.jpg", "c.jpg", "not-image.jpg", "missing.jpg"])
+
+    result = covers.sync_covers(db)
+
+    assert (result.fetched, result.deduplicated, result.failed, result.skipped) == (3, 1, 2, 0)
+    rows = {row.image_url.rsplit("/", 1)[1]: row for row in db.query(Cover)}
+    assert sorted(rows) == ["a.jpg", "b.jpg", "c.jpg"]
+    assert rows["a.jpg"].content_hash == rows["b.jpg"].content_hash != rows["c.jpg"].content_hash
+    assert len(list(covers.store.root.glob("full/*/*.jpg"))) == 2
+
+    again = covers.sync_covers(db)
+    assert (again.fetched, again.skipped, again.failed) == (0, 3, 2)
+
+
+@pytest.fixture
+def cover_client(client, covers, db, origin):
+    """Cliente do app com o banco do teste e as capas já baixadas"""
+    add_books(db, origin, ["a.jpg", "missing.jpg"])
+    covers.sync_covers(db)
+    app.dependency_overrides[get_db] = lambda: db
+    yield client
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_endpoint_da_capa(cover_client, covers):
+    response = cover_client.get("/api/v1/books/1/cover")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["cache-control"] == f"public, max-age={settings.COVER_CACHE_MAX_AGE}"
+    assert response.content == jpeg((200, 0, 0))
+
+    etag = response.headers["etag"]
+    assert cover_client.get("/api/v1/books/1/cover", headers={"If-None-Match": etag}).status_code == 304
+
+    thumbnail = cover_client.get("/api/v1/books/1/cover", params={"size": "thumb"})
+    assert thumbnail.status_code == 200 and thumbnail.headers["etag"] != etag
+    with Image.open(io.BytesIO(thumbnail.content)) as image:
+        assert max(image.size) == settings.COVER_THUMBNAIL_SIZE
+
+    assert cover_client.get("/api/v1/books/2/cover").status_code == 404  # download falhou
+    assert cover_client.get("/api/v1/books/999/cover").status_code == 404
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc-full"', True),
+    ('W/"abc-full"', True),  # comparação fraca
+    ('"old-full", W/"abc-full"', True),
+    ('"old-full","abc-full"', True),
+    ('*', True),
+    (' * ', True),
+    ('"abc-thumb", "old-full"', False),
+    ('"abc-full, x"', False),  # vírgula dentro das aspas faz parte da tag
+    ('abc-full', False),  # sem aspas não é uma entity-tag
+    ('', False),
+    (None, False),
+])
+def test_if_none_match_segue_a_rfc_9110(header, matches):
+    assert etag_matches(header, '"abc-full"') is matches
+
+
+def test_endpoint_da_capa_com_if_none_match_fraco_e_lista(cover_client, covers):
+    etag = cover_client.get("/api/v1/books/1/cover").headers["etag"]
+
+    for header in (f"W/{etag}", f'"outra", {etag}', f'W/"outra", W/{etag}', "*"):
+        response = cover_client.get("/api/v1/books/1/cover", headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+        assert response.headers["etag"] == etag
+    assert cover_client.get("/api/v1/books/1/cover", headers={"If-None-Match": '"outra"'}).status_code == 200
+
+
+def test_endpoint_entrega_pelo_nginx(cover_client, covers, db, monkeypatch):
+    monkeypatch.setattr(settings, "COVER_ACCEL_REDIRECT_PREFIX", "/protected-covers/")
+
+    response = cover_client.get("/api/v1/books/1/cover")
+
+    path, row = covers.get_cover_file(db, 1)
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["x-accel-redirect"] == f"/protected-covers/full/{row.content_hash[:2]}/{path.name}"
@@ -0,0 +1,154 @@
+"""
+Testes da atualização incremental do dashboard (monitoring/dashboard.py) e do
+stream de métricas ao vivo (/metrics/stream)
+
+O dashboard roda pelo streamlit.testing (AppTest) sobre um banco de
+telemetria próprio: LOG_DATABASE_URL aponta para um arquivo temporário só
+durante o teste, sem os logs que o app compartilhado grava.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.api.v1.metrics import metrics_stream
+from app.config import settings
+from app.database import LogBase
+from app.models.api_log_rollup import APILogMinuteRollup
+from app.services.api_log_store import partition_table
+from app.utils.latency_sketch import LatencySketch
+from tests.conftest import ROOT_DIR
+
+st = pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+DASHBOARD = ROOT_DIR / "monitoring" / "dashboard.py"
+ENDPOINT = "/api/v1/books/{book_id}"
+
+
+@pytest.fixture
+def log_db(tmp_path, monkeypatch):
+    """Banco de telemetria vazio lido pelo dashboard"""
+    url = f"sqlite:///{tmp_path / 'dashboard-logs.db'}"
+    log_engine = create_engine(url)
+    LogBase.metadata.create_all(bind=log_engine)
+    monkeypatch.setattr(settings, "LOG_DATABASE_URL", url)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    yield log_engine
+    log_engine.dispose()
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+
+def add_rollup(log_engine, bucket_start, count, errors=0, status_code=200):
+    sketch = LatencySketch()
+    for _ in range(count):
+        sketch.add(12.0)
+    with log_engine.begin() as conn:
+        conn.execute(APILogMinuteRollup.__table__.insert(), [{
+            "bucket_start": bucket_start, "endpoint": ENDPOINT, "method": "GET", "status_code": status_code,
+            "count": count, "error_count": errors, "latency_sum_ms": 12.0 * count, "latency_max_ms": 12.0,
+            "latency_sketch": sketch.to_json(),
+        }])
+
+
+def add_log(log_engine, timestamp, path):
+    table = partition_table(timestamp.date())
+    with log_engine.begin() as conn:
+        table.create(conn, checkfirst=True)
+        conn.execute(table.insert(), [{
+            "endpoint": path, "route": ENDPOINT, "method": "GET", "status_code": 200,
+            "response_time": 12.0, "timestamp": timestamp,
+        }])
+
+
+# Roda o dashboard em um processo novo e lista os módulos do app importados
+IMPORT_PROBE = f"""
+import sys
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({str(DASHBOARD)!r}, default_timeout=60)
+app.run()
+assert not app.exception, app.exception
+print(sorted(name for name in sys.modules if name == "app" or name.startswith("app.")))
+"""
+
+
+def metric(app, label):
+    return next(element.value for element in app.metric if element.label == label)
+
+
+def test_dashboard_atualiza_so_com_o_que_e_novo(log_db):
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    add_rollup(log_db, now - timedelta(minutes=10), 30)
+    add_rollup(log_db, now - timedelta(minutes=9), 10, errors=10, status_code=404)
+    add_log(log_db, now - timedelta(minutes=10), "/api/v1/books/1")
+
+    app = AppTest.from_file(str(DASHBOARD), default_timeout=60)
+    app.run()
+
+    assert not app.exception
+    assert metric(app, "📈 Total Requests") == "40"
+    assert metric(app, "⚠️ Error Rate") == "25.0%"
+    assert list(app.dataframe[0].value["endpoint"]) == ["/api/v1/books/1"]
+    cursor = app.session_state["live_recent_cursor"]
+
+    # Novo bucket e novo log: a próxima atualização junta só o que veio depois
+    add_rollup(log_db, now - timedelta(minutes=1), 60)
+    add_log(log_db, now, "/api/v1/books/2")
+    app.run()
+
+    assert not app.exception
+    assert metric(app, "📈 Total Requests") == "100"
+    assert metric(app, "⚠️ Error Rate") == "10.0%"
+    assert list(app.dataframe[0].value["endpoint"]) == ["/api/v1/books/2", "/api/v1/books/1"]
+    assert app.session_state["live_recent_cursor"] > cursor
+
+
+def test_dashboard_nao_importa_os_servicos_do_app(log_db):
+    env = {**os.environ, "LOG_DATABASE_URL": str(log_db.url)}
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    # Só as configurações e o sketch: o resto do app (banco, serviços, numpy) fica de fora
+    assert result.stdout.split("\n")[-2] == "['app', 'app.config', 'app.utils', 'app.utils.latency_sketch']"
+
+
+class OneEventRequest:
+    """Cliente que desconecta depois do primeiro evento (o TestClient não sinaliza a desconexão)"""
+
+    def __init__(self):
+        self.polls = 0
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.polls > 1
+
+
+def test_stream_de_metricas_ao_vivo():
+    async def read_events():
+        response = await metrics_stream(OneEventRequest(), interval=0.2)
+        assert response.media_type == "text/event-stream"
+        return [chunk async for chunk in response.body_iterator]
+
+    [chunk] = asyncio.run(read_events())
+
+    assert chunk.startswith("data: ") and chunk.endswith("\n\n")
+    event = json.loads(chunk[len("data: "):])
+    assert {"requests", "errors", "rps", "p50_ms", "p99_ms", "event_loop_lag_p99_ms", "log_buffer"} <= set(event)
+    assert event["requests"] >= 0 and event["log_buffer"] >= 0
+
+
+def test_stream_so_para_admin(client):
+    assert client.get("/metrics/stream").status_code == 401
+    assert "/metrics/stream" not in settings.RATE_LIMIT_EXEMPT_PATHS
+
+
+def test_intervalo_do_stream_validado(admin_client):
+    assert admin_client.get("/metrics/stream", params={"interval": 0.01}).status_code == 422
@@ -0,0 +1,100 @@
+"""
+Testes do gerador de catálogo sintético (scripts/generate_catalog.py)
+"""
+import csv
+import itertools
+import sqlite3
+from collections import Counter
+
+import pytest
+
+from scripts.generate_catalog import (
+    CATEGORY_WEIGHTS, CHUNK_SIZE, CSV_COLUMNS, RATING_WEIGHTS, fit_model, generate_rows, main, write_csv,
+    write_database
+)
+from tests.conftest import ROOT_DIR
+
+
+def test_deterministico_pela_semente():
+    total = CHUNK_SIZE + 10  # dois blocos
+
+    first = list(itertools.islice(generate_rows(total, seed=3), CHUNK_SIZE - 5, CHUNK_SIZE + 5))
+    again = list(itertools.islice(generate_rows(total, seed=3), CHUNK_SIZE - 5, CHUNK_SIZE + 5))
+    other = list(itertools.islice(generate_rows(total, seed=4), CHUNK_SIZE - 5, CHUNK_SIZE + 5))
+
+    assert first == again
+    assert first != other
+    assert [row[0] for row in first] == list(range(CHUNK_SIZE - 4, CHUNK_SIZE + 6))
+
+
+def test_distribuicoes_dos_dados_reais():
+    rows = list(generate_rows(20_000, seed=11))
+
+    categories = Counter(row[5] for row in rows)
+    assert set(categories) <= set(CATEGORY_WEIGHTS)
+    share = categories["Default"] / len(rows)
+    assert share == pytest.approx(CATEGORY_WEIGHTS["Default"] / sum(CATEGORY_WEIGHTS.values()), abs=0.01)
+    assert categories.most_common(1)[0][0] == "Default"
+
+    ratings = Counter(row[3] for row in rows)
+    for rating, weight in RATING_WEIGHTS.items():
+        assert ratings[rating] / len(rows) == pytest.approx(weight / sum(RATING_WEIGHTS.values()), abs=0.015)
+
+    prices = [row[2] for row in rows]
+    assert 10.0 <= min(prices) and max(prices) <= 60.0
+    assert all(round(price, 2) == price for price in prices)
+    assert all(1 <= len(row[1].split()) <= 27 for row in rows)
+    assert len({row[6] for row in rows}) == len(rows)
+
+
+def test_gera_em_blocos_sem_materializar_o_catalogo():
+    rows = generate_rows(10_000_000, seed=1)
+
+    # Só o primeiro bloco é gerado para produzir o primeiro livro
+    assert next(rows)[0] == 1
+    assert sum(1 for _ in itertools.islice(rows, CHUNK_SIZE)) == CHUNK_SIZE
+
+
+def test_modelo_medido_do_csv_real():
+    model = fit_model(ROOT_DIR / "data" / "books.csv")
+
+    assert sum(model.categories.values()) == 1000
+    rows = list(generate_rows(2_000, seed=5, model=model))
+    assert {row[5] for row in rows} <= set(model.categories)
+    low, high = model.price_range
+    assert all(low <= row[2] <= high for row in rows)
+
+
+def test_saida_em_csv_e_em_banco(tmp_path):
+    csv_path = tmp_path / "books.csv"
+    db_path = tmp_path / "books.db"
+
+    assert write_csv(csv_path, generate_rows(500, seed=2)) == 500
+    assert write_database(db_path, generate_rows(500, seed=2)) == 500
+    assert write_database(db_path, generate_rows(300, seed=2)) == 300  # substitui os livros
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        assert next(reader) == CSV_COLUMNS
+        assert next(reader)[0] == "1"
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*), MAX(id) FROM books").fetchone() == (300, 300)
+        # Índices recriados depois da carga; versão do catálogo incrementada a cada carga
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_category_rating" in indexes
+        assert conn.execute("SELECT version FROM catalog_meta").fetchone() == (2,)
+    finally:
+        conn.close()
+
+
+def test_linha_de_comando(tmp_path, monkeypatch):
+    output = tmp_path / "out" / "books.csv"
+    monkeypatch.setattr("sys.argv", ["generate_catalog.py", "--books", "50", "--output", str(output), "--seed", "9"])
+
+    main()
+
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert [tuple(row) for row in rows] == [tuple(map(str, row)) for row in generate_rows(50, seed=9)]
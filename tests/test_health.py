@@ -0,0 +1,102 @@
+"""
+Testes das probes de liveness/readiness e do verificador em segundo plano
+(app/services/health_checker.py)
+
+Os relatórios são gerados por um HealthChecker próprio, com a inicialização
+já concluída; as probes do app compartilhado leem esse verificador.
+"""
+import asyncio
+import time
+
+import pytest
+
+import app.services.health_checker as health_checker_module
+from app.config import settings
+from app.core.startup import StartupState
+from app.services.api_log_store import APILogStore, api_log_store
+from app.services.health_checker import HealthChecker
+
+
+@pytest.fixture
+def started(monkeypatch):
+    state = StartupState()
+    state.mark_ready()
+    monkeypatch.setattr(health_checker_module, "startup_state", state)
+    monkeypatch.setattr("app.api.v1.health.startup_state", state)
+    return state
+
+
+@pytest.fixture
+def checker(started, monkeypatch):
+    checker = HealthChecker()
+    monkeypatch.setattr("app.api.v1.health.health_checker", checker)
+    return checker
+
+
+def test_probes_nao_consultam_o_banco(client, checker, monkeypatch):
+    calls = []
+    check_database = checker.check_database
+
+    def counted():
+        calls.append(1)
+        return check_database()
+
+    monkeypatch.setattr(checker, "check_database", counted)
+    asyncio.run(checker.check())
+
+    for _ in range(20):
+        assert client.get("/api/v1/health/live").json() == {"status": "vivo", "ready": True}
+        assert client.get("/api/v1/health/ready").status_code == 200
+        assert client.get("/api/v1/health").json()["database"] == "conectado"
+
+    # Um SELECT 1 por verificação em segundo plano, nenhum por probe
+    assert calls == [1]
+
+
+def test_relatorio_de_readiness(checker):
+    report = asyncio.run(checker.check(event_loop_lag=0.002))
+
+    assert report["ready"] is True
+    assert set(report["checks"]) == {"startup", "database", "event_loop", "log_buffer"}
+    assert report["checks"]["event_loop"] == {"ok": True, "lag_ms": 2.0}
+    assert report["pools"]["log"]["pool"] == "QueuePool"
+    assert 0 <= report["pools"]["threadpool"]["saturation"] <= 1
+    if settings.WARMUP_ENABLED:
+        assert "warm" in report["warm_up"]
+
+
+def test_nao_pronto_com_atraso_no_event_loop_ou_fila_de_logs_cheia(checker, monkeypatch):
+    lagging = asyncio.run(checker.check(event_loop_lag=settings.HEALTH_MAX_EVENT_LOOP_LAG_MS / 1000 + 0.1))
+    assert lagging["ready"] is False and not lagging["checks"]["event_loop"]["ok"]
+
+    store = APILogStore(max_buffer=10)
+    for _ in range(9):
+        store.record({})
+    monkeypatch.setattr(health_checker_module, "api_log_store", store)
+    full = asyncio.run(checker.check())
+    assert full["ready"] is False
+    assert full["checks"]["log_buffer"]["buffered"] == 9
+
+
+def test_relatorio_antigo_deixa_de_estar_pronto(client, checker, monkeypatch):
+    initial = checker.readiness()
+    assert (initial["ready"], initial["reason"]) == (False, "no health check yet")
+
+    asyncio.run(checker.check())
+    monkeypatch.setattr(checker, "checked_at", time.monotonic() - 4 * settings.HEALTH_CHECK_INTERVAL_SECONDS)
+
+    response = client.get("/api/v1/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["reason"] == "health check is stale"
+
+
+def test_probes_fora_dos_logs_da_api(client, monkeypatch):
+    logged = []
+    monkeypatch.setattr(api_log_store, "record", logged.append)
+
+    for path in settings.API_LOG_EXCLUDED_PATHS:
+        client.get(path)
+    client.get("/api/v1/books/1")
+
+    assert [row["endpoint"] for row in logged] == ["/api/v1/books/1"]
@@ -0,0 +1,203 @@
+"""
+Testes do runner de jobs: recuperação de jobs interrompidos e progresso
+
+Os jobs são gravados na tabela jobs do banco compartilhado e removidos ao
+final de cada teste.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+from app.services.job_service import JobAlreadyRunning, JobRunner, worker_id
+from app.services.scraper_service import ScrapeCancelled
+
+
+@pytest.fixture
+def jobs():
+    """Cria jobs com os campos dados; todos são apagados ao final"""
+    created = []
+
+    def create(**fields) -> int:
+        db = SessionLocal()
+        try:
+            job = Job(**{"job_type": "scrape", "status": "running", **fields})
+            db.add(job)
+            db.commit()
+            created.append(job.id)
+            return job.id
+        finally:
+            db.close()
+
+    yield create
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id.in_(created)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def job_status(job_id: int) -> str:
+    db = SessionLocal()
+    try:
+        return db.get(Job, job_id).status
+    finally:
+        db.close()
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_recuperacao_nao_falha_jobs_de_workers_vivos(jobs):
+    host = socket.gethostname()
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS + 60)
+
+    sibling = jobs(owner=f"{host}:{os.getppid()}", heartbeat_at=now)
+    other_host = jobs(owner="other-host:1234", heartbeat_at=now)
+    dead_owner = jobs(owner=f"{host}:{dead_pid()}", heartbeat_at=now)
+    reused_pid = jobs(owner=worker_id(), heartbeat_at=now)
+    stale_other_host = jobs(owner="other-host:1234", heartbeat_at=stale)
+    legacy = jobs(created_at=stale)
+
+    assert JobRunner.recover_interrupted_jobs() == 4
+
+    assert job_status(sibling) == "running"
+    assert job_status(other_host) == "running"
+    for job_id in (dead_owner, reused_pid, stale_other_host, legacy):
+        assert job_status(job_id) == "failed"
+
+
+def test_progresso_gravado_fora_do_event_loop(jobs, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_PROGRESS_FLUSH_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "COVERS_ENABLED", False)
+    job_id = jobs(status="pending", owner=worker_id())
+
+    runner = JobRunner()
+    update_threads = []
+    update_job = JobRunner._update_job
+
+    def recording_update(job_id, **fields):
+        update_threads.append(threading.current_thread())
+        return update_job(job_id, **fields)
+
+    def scrape_and_load(progress, cancel_event):
+        progress.stage = "loading"
+        threading.Event().wait(0.1)
+        return "ok"
+
+    monkeypatch.setattr(runner, "_update_job", recording_update)
+    monkeypatch.setattr(runner, "_scrape_and_load", scrape_and_load)
+
+    asyncio.run(runner._run_scrape(job_id, threading.Event()))
+
+    assert len(update_threads) >= 4  # running, progresso, succeeded, final
+    assert threading.main_thread() not in update_threads
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        assert (job.status, job.message, job.stage) == ("succeeded", "ok", "loading")
+        assert job.heartbeat_at is not None
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("stops", [True, False])
+def test_timeout_do_job_e_um_limite_rigido(jobs, monkeypatch, stops):
+    """A thread é cancelada no timeout; se não parar dentro da tolerância, o job falha assim mesmo"""
+    monkeypatch.setattr(settings, "JOB_PROGRESS_FLUSH_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "SCRAPER_JOB_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "SCRAPER_JOB_STOP_GRACE_SECONDS", 0.2)
+    job_id = jobs(status="pending", owner=worker_id())
+    runner = JobRunner()
+    release = threading.Event()
+
+    def scrape_and_load(progress, cancel_event):
+        if stops:
+            cancel_event.wait(5)
+            raise ScrapeCancelled()
+        release.wait(5)  # download travado que ignora o cancelamento
+        return "ok"
+
+    monkeypatch.setattr(runner, "_scrape_and_load", scrape_and_load)
+    cancel_event = threading.Event()
+
+    async def run():
+        # Medido dentro do loop: asyncio.run ainda espera a thread abandonada ao fechar o executor
+        started = time.monotonic()
+        await runner._run_scrape(job_id, cancel_event)
+        release.set()
+        return time.monotonic() - started
+
+    try:
+        elapsed = asyncio.run(run())
+    finally:
+        release.set()
+
+    assert elapsed < 2
+    assert cancel_event.is_set()
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        assert (job.status, job.error_message) == ("failed", "Timed out after 0.2s")
+        assert job.finished_at is not None
+    finally:
+        db.close()
+
+
+def test_disparos_simultaneos_em_workers_diferentes_criam_um_job(monkeypatch):
+    """Cada worker tem o seu JobRunner (e o seu lock): só a transação do banco separa os dois"""
+    get_active_job = JobRunner.get_active_job
+
+    def slow_get_active_job(db, job_type="scrape"):
+        active = get_active_job(db, job_type)
+        time.sleep(0.2)  # alarga a janela entre a leitura e o insert
+        return active
+
+    monkeypatch.setattr(JobRunner, "get_active_job", staticmethod(slow_get_active_job))
+    start = threading.Barrier(2)
+    outcomes = []
+
+    def trigger():
+        runner = JobRunner()
+
+        async def run_scrape(job_id, cancel_event):
+            pass
+
+        runner._run_scrape = run_scrape
+        start.wait()
+        try:
+            outcomes.append(asyncio.run(runner.start_scrape(triggered_by="test")).id)
+        except JobAlreadyRunning as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=trigger) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    created = [outcome for outcome in outcomes if isinstance(outcome, int)]
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id.in_(created)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    assert len(created) == 1
+    [rejected] = [outcome for outcome in outcomes if isinstance(outcome, JobAlreadyRunning)]
+    assert rejected.job_id == created[0]
@@ -0,0 +1,61 @@
+"""
+Testes do ranking pré-calculado de livros mais bem avaliados (leaderboard)
+"""
+import pytest
+
+from app.core.catalog_version import catalog_version
+from app.database import SessionLocal
+from app.models.book import Book
+from app.services.leaderboard_service import LeaderboardService
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def top_rated_sql(db, limit, category=None):
+    """Consulta original do endpoint (rating >= 4, rating DESC, price ASC)"""
+    query = db.query(Book.id).filter(Book.rating >= 4)
+    if category is not None:
+        query = query.filter(Book.category == category)
+    return [row.id for row in query.order_by(Book.rating.desc(), Book.price.asc(), Book.id.asc()).limit(limit)]
+
+
+@pytest.mark.parametrize("limit", [1, 10, 100, 5_000])
+def test_ranking_igual_ao_da_consulta_sql(db, limit):
+    service = LeaderboardService()
+
+    assert [book.id for book in service.get_top_rated_books(db, limit)] == top_rated_sql(db, limit)
+
+
+def test_ranking_por_categoria(db):
+    board = LeaderboardService().get_leaderboard(db)
+    categories = [row[0] for row in db.query(Book.category).distinct().limit(5)]
+
+    for category in categories:
+        assert board.top_ids(20, category) == top_rated_sql(db, 20, category)
+    assert board.top_ids(20, "Categoria inexistente") == []
+
+
+def test_reconstroi_somente_quando_a_versao_muda(db, monkeypatch):
+    service = LeaderboardService()
+    builds = []
+    build = service.build
+
+    def counting_build(db, version):
+        builds.append(version)
+        return build(db, version)
+
+    monkeypatch.setattr(service, "build", counting_build)
+
+    first = service.get_leaderboard(db)
+    assert service.get_leaderboard(db) is first
+
+    catalog_version.bump()
+    rebuilt = service.get_leaderboard(db)
+    assert rebuilt is not first
+    assert builds == [first.version, rebuilt.version]
+    assert rebuilt.version == catalog_version.current
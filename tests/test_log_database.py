@@ -0,0 +1,75 @@
+"""
+Testes do banco de telemetria separado (LOG_DATABASE_URL) e da gravação em
+lote dos logs da API
+
+Nos testes os logs vão para logs.db, ao lado do banco do catálogo (conftest).
+"""
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.schema import DropTable
+
+from app.database import engine, log_engine
+from app.services.api_log_store import APILogStore, api_log_store, partition_name, partition_table
+from tests.conftest import DB_PATH
+
+
+def catalog_tables():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """Linhas que o middleware entrega ao buffer, sem passar pelo flusher do app"""
+    rows = []
+    monkeypatch.setattr(api_log_store, "record", rows.append)
+    return rows
+
+
+def test_logs_em_outro_arquivo(client):
+    client.get("/api/v1/books/1")
+
+    assert log_engine.url.database != engine.url.database
+    assert not any(name.startswith("api_logs") for name in catalog_tables())
+
+
+def test_middleware_so_enfileira_e_o_lote_vai_para_o_banco_de_logs(client, captured):
+    assert client.get("/api/v1/books/1", params={"teste": "log-db"}).status_code == 200
+
+    [row] = captured
+    assert (row["endpoint"], row["route"], row["status_code"]) == ("/api/v1/books/1", "/api/v1/books/{book_id}", 200)
+    assert row["query_params"] == "{'teste': 'log-db'}"
+
+    assert api_log_store.write(captured) == 1
+    with log_engine.connect() as conn:
+        stored = conn.execute(text(
+            f"SELECT COUNT(*) FROM {partition_name(row['timestamp'].date())} WHERE query_params = :params"
+        ), {"params": row["query_params"]}).scalar()
+    assert stored == 1
+
+
+def test_gravacao_de_logs_nao_espera_o_lock_do_catalogo():
+    day = datetime(2002, 2, 1)
+    writer = sqlite3.connect(DB_PATH, timeout=0)
+    writer.execute("BEGIN IMMEDIATE")  # uma recarga do catálogo segurando o lock de escrita
+    try:
+        start = time.perf_counter()
+        assert APILogStore().write([{
+            "endpoint": "/api/v1/books/1", "route": "/api/v1/books/{book_id}", "method": "GET",
+            "status_code": 200, "response_time": 1.0, "timestamp": day,
+        }]) == 1
+        elapsed = time.perf_counter() - start
+    finally:
+        writer.rollback()
+        writer.close()
+        with log_engine.begin() as conn:
+            conn.execute(DropTable(partition_table(day.date()), if_exists=True))
+
+    assert elapsed < 1.0
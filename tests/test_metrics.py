@@ -0,0 +1,142 @@
+"""
+Testes das métricas em processo (app/utils/metrics.py) e do endpoint /metrics
+"""
+import json
+import threading
+import timeit
+
+import pytest
+
+from app.utils.metrics import (
+    MetricsRegistry, histogram_quantile, http_request_duration, log_buckets, summarize_interval
+)
+
+# Orçamento por registro do pedido original: menos de 1µs (folga para máquinas lentas)
+RECORD_BUDGET_US = 2.0
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_histograma_no_formato_do_prometheus(registry):
+    latency = registry.histogram("latency_seconds", "Latência", ("route",), buckets=(0.1, 1.0))
+    requests = registry.counter("requests_total", "Requisições", ("path",))
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, ("/books",))
+    requests.inc(('/a"b\\',), 2)
+
+    text = registry.render(registry.collect())
+
+    assert text.splitlines() == [
+        "# HELP latency_seconds Latência",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/books",le="0.1"} 2',
+        'latency_seconds_bucket{route="/books",le="1"} 3',
+        'latency_seconds_bucket{route="/books",le="+Inf"} 4',
+        'latency_seconds_sum{route="/books"} 3.65',
+        'latency_seconds_count{route="/books"} 4',
+        "# HELP requests_total Requisições",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a\\"b\\\\"} 2',
+    ]
+
+
+def test_shards_por_thread_somados_na_coleta(registry):
+    counter = registry.counter("events_total", "Eventos")
+    histogram = registry.histogram("values", "Valores", buckets=(1.0,))
+
+    def record():
+        for _ in range(1000):
+            counter.inc()
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.samples() == {(): 4000}
+    assert histogram.samples()[()] == [4000, 0, 2000.0]
+    with pytest.raises(ValueError):
+        registry.counter("events_total", "Duplicada")
+
+
+def test_soma_os_snapshots_dos_outros_workers(registry, tmp_path):
+    requests = registry.counter("requests_total", "Requisições", ("route",))
+    latency = registry.histogram("latency_seconds", "Latência", buckets=(0.1, 1.0))
+    requests.inc(("/books",), 3)
+    latency.observe(0.5)
+
+    registry.write_snapshot(str(tmp_path))
+    other = registry.collect()
+    other["requests_total"]["samples"] = [[["/books"], 2], [["/stats"], 1]]
+    (tmp_path / "metrics-99999.json").write_text(json.dumps(other))
+    (tmp_path / "metrics-99998.json").write_text("{corrompido")
+
+    merged = registry.collect_all(str(tmp_path))
+
+    # O snapshot deste processo é ignorado: os valores vivos já estão na coleta
+    samples = merged["requests_total"]["samples"]
+    assert sorted((tuple(labels), value) for labels, value in samples) == [(("/books",), 5), (("/stats",), 1)]
+    assert merged["latency_seconds"]["samples"] == [[[], [0, 2, 0, 1.0]]]
+    assert not list(tmp_path.glob("*.tmp"))
+
+    other_buckets = dict(other["latency_seconds"], buckets=[0.5])
+    skipped = registry.merge([registry.collect(), {"latency_seconds": other_buckets}])
+    assert skipped["latency_seconds"]["samples"] == [[[], [0, 1, 0, 0.5]]]
+
+
+def test_quantis_interpolados_como_no_prometheus():
+    bounds = (0.1, 0.2, 0.4)
+
+    assert histogram_quantile(bounds, [0, 0, 0, 0], 0.5) is None
+    assert histogram_quantile(bounds, [10, 0, 0, 0], 0.5) == pytest.approx(0.05)
+    assert histogram_quantile(bounds, [0, 10, 10, 0], 0.75) == pytest.approx(0.3)
+    assert histogram_quantile(bounds, [0, 0, 0, 5], 0.99) == 0.4  # +Inf: último limite
+    assert log_buckets(0.001, 0.01) == (0.001, 0.002, 0.004, 0.008, 0.016)
+
+
+def test_resumo_do_intervalo():
+    buckets = (0.01, 0.1)
+    previous = {("GET", "/books", "200"): [5, 0, 0, 0.02]}
+    current = {
+        ("GET", "/books", "200"): [5, 8, 0, 0.5],
+        ("GET", "/books/{book_id}", "404"): [2, 0, 0, 0.01],
+    }
+
+    summary = summarize_interval(previous, current, buckets, 2.0)
+
+    assert summary["requests"] == 10 and summary["errors"] == 2
+    assert summary["rps"] == 5.0
+    assert summary["mean_ms"] == pytest.approx(49.0)
+    assert summary["p50_ms"] == pytest.approx(43.75)  # 3ª de 8 no bucket 10-100ms
+
+
+def test_custo_por_registro(registry):
+    latency = registry.histogram("latency_seconds", "Latência", ("method", "route", "status"))
+    requests = registry.counter("requests_total", "Requisições", ("cache", "result"))
+    labels = ("GET", "/api/v1/books", "200")
+
+    for record in (lambda: latency.observe(0.0123, labels), lambda: requests.inc(("books", "hit"))):
+        seconds = min(timeit.repeat(record, number=20_000, repeat=5)) / 20_000
+        assert seconds * 1e6 < RECORD_BUDGET_US
+
+
+def test_endpoint_metrics(client):
+    labels = ("GET", "/api/v1/books/{book_id}", 200)
+    before = sum(http_request_duration.samples().get(labels, [0])[:-1])
+    assert client.get("/api/v1/books/1").status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert sum(http_request_duration.samples()[labels][:-1]) == before + 1
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/books/{book_id}",status="200"}' in text
+    assert "# TYPE db_query_duration_seconds histogram" in text
+    assert "# TYPE event_loop_lag_seconds histogram" in text
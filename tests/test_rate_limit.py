@@ -0,0 +1,160 @@
+"""
+Testes dos limites de taxa e do controle de admissão (RateLimitMiddleware)
+
+Os testes de saturação montam um app próprio com o middleware real, os
+routers de saúde e uma rota lenta, com limites pequenos.
+"""
+import asyncio
+import re
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.api.v1 import health
+from app.config import settings
+from app.utils.middleware import RateLimitMiddleware
+from app.utils.rate_limit import TokenBucketLimiter
+from tests.conftest import ROOT_DIR
+
+
+def test_token_bucket_rajada_espera_e_reembolso():
+    limiter = TokenBucketLimiter(rate=10, burst=20)
+
+    assert limiter.acquire("a", 20, now=0.0) == 0
+    assert limiter.acquire("a", 1, now=0.0) == pytest.approx(0.1)
+    assert limiter.acquire("b", 1, now=0.0) == 0  # buckets por chave
+    assert limiter.acquire("a", 5, now=0.5) == 0  # 0,5 s repõe 5 tokens
+
+    limiter.refund("a", 5)
+    assert limiter.acquire("a", 5, now=0.5) == 0
+
+
+@pytest.fixture
+def saturable_app(monkeypatch):
+    """App com 2 vagas e fila de 2; /slow só termina quando `release` é setado"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_CONCURRENT", 2)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_QUEUE", 2)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_WAIT_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ROUTE_COSTS", {"/expensive": 40})
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_BURST", 100.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ROUTE_BURST", 100.0)
+
+    app = FastAPI()
+    app.include_router(health.router, prefix="/api/v1")
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/expensive")
+    async def expensive():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware)
+    return app, release
+
+
+def test_health_responde_com_o_servidor_saturado(saturable_app):
+    app, release = saturable_app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # 2 em andamento + 2 na fila
+            slow = [asyncio.ensure_future(client.get("/slow")) for _ in range(4)]
+            await asyncio.sleep(0.1)
+
+            overloaded = await client.get("/slow")
+            live = await asyncio.wait_for(client.get("/api/v1/health/live"), 1)
+            ready = await asyncio.wait_for(client.get("/api/v1/health/ready"), 1)
+
+            release.set()
+            finished = await asyncio.gather(*slow)
+        return overloaded, live, ready, finished
+
+    overloaded, live, ready, finished = asyncio.run(run())
+
+    assert overloaded.status_code == 503
+    assert overloaded.headers["retry-after"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+    assert live.status_code == 200
+    assert ready.status_code in (200, 503)  # responde (o estado depende da inicialização do processo)
+    assert [response.status_code for response in finished] == [200] * 4
+
+
+def test_limite_por_cliente_com_retry_after(saturable_app):
+    app, _ = saturable_app
+
+    async def run():
+        statuses = {}
+        for address in ("10.0.0.1", "10.0.0.2"):
+            transport = httpx.ASGITransport(app=app, client=(address, 1234))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                statuses[address] = [await client.get("/expensive") for _ in range(3)]
+        return statuses
+
+    statuses = asyncio.run(run())
+
+    first = statuses["10.0.0.1"]
+    assert [response.status_code for response in first] == [200, 200, 429]
+    assert int(first[2].headers["retry-after"]) >= 1
+    # Outro endereço tem os seus próprios buckets
+    assert [response.status_code for response in statuses["10.0.0.2"]][:2] == [200, 200]
+
+
+def spoofed_statuses(app, proxy="10.1.2.3"):
+    """Três chamadas caras do mesmo cliente (203.0.113.7), cada uma com um X-Forwarded-For inventado à esquerda"""
+    async def run():
+        transport = httpx.ASGITransport(app=app, client=(proxy, 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                (await client.get("/expensive", headers={"X-Forwarded-For": f"198.51.100.{n}, 203.0.113.7"})).status_code
+                for n in range(3)
+            ]
+
+    return asyncio.run(run())
+
+
+def test_x_forwarded_for_forjado_nao_ganha_bucket_novo(saturable_app, monkeypatch):
+    app, _ = saturable_app
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED_FOR", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", ["10.0.0.0/8"])
+
+    assert spoofed_statuses(app) == [200, 200, 429]
+
+    middleware = RateLimitMiddleware(app)
+    scope = {"client": ("10.1.2.3", 1), "headers": [(b"x-forwarded-for", b"1.1.1.1, 203.0.113.7, 10.9.9.9")]}
+    assert middleware.client_key(scope) == "203.0.113.7"  # proxies confiáveis à direita são pulados
+    scope["client"] = ("192.0.2.1", 1)
+    assert middleware.client_key(scope) == "192.0.2.1"  # quem não é proxy não escolhe o próprio endereço
+
+
+@pytest.mark.parametrize("deploy_file", ["Procfile", "render.yaml"])
+def test_proxy_headers_do_deploy_confiam_so_na_rede_do_proxy(saturable_app, deploy_file):
+    """--forwarded-allow-ips do deploy: o uvicorn fica com o salto mais à direita que não é proxy"""
+    app, _ = saturable_app
+    [allowed] = re.findall(r"--forwarded-allow-ips='([^']*)'", (ROOT_DIR / deploy_file).read_text())
+    assert allowed != "*"
+
+    assert spoofed_statuses(ProxyHeadersMiddleware(app, trusted_hosts=allowed)) == [200, 200, 429]
+
+
+def test_rejeicoes_do_app_levam_headers_de_cors(client, monkeypatch):
+    """O limitador fica dentro do CORS: o navegador vê o 429, não um erro de rede"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    headers = {"Origin": "https://front.example.com"}
+
+    statuses = []
+    for _ in range(4):
+        response = client.post("/api/v1/auth/login", data={"username": "nobody", "password": "x"}, headers=headers)
+        statuses.append(response.status_code)
+        if response.status_code == 429:
+            break
+
+    assert statuses[-1] == 429
+    assert response.headers["access-control-allow-origin"] in ("*", "https://front.example.com")
+    assert "retry-after" in response.headers
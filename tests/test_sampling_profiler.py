@@ -0,0 +1,110 @@
+"""
+Testes do profiler de amostragem (app/utils/sampling_profiler.py) e dos
+endpoints de admin que o controlam
+"""
+import threading
+import time
+
+import pytest
+
+from app.utils.sampling_profiler import ProfilerBusy, SamplingProfiler, sampling_profiler
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def wait_finished(session, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while session.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not session.running
+
+
+def test_sessao_por_tempo_gera_pilhas_colapsadas(busy_thread):
+    profiler = SamplingProfiler()
+    release = threading.Event()
+    idle = threading.Thread(target=release.wait, name="idle")
+    idle.start()
+
+    try:
+        session = profiler.start(seconds=0.3, interval_ms=2)
+        with pytest.raises(ProfilerBusy):
+            profiler.start(seconds=1)
+        wait_finished(session)
+    finally:
+        release.set()
+        idle.join()
+
+    assert session.samples > 0
+    lines = profiler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and "test_sampling_profiler.py:busy_loop" in busy[0]
+    assert int(busy[0].rsplit(" ", 1)[1]) > 0
+    # Threads paradas (esperando em um Event) não aparecem no perfil
+    assert not any(line.startswith("idle;") for line in lines)
+    assert session.to_dict()["mode"] == "duration"
+
+
+def test_parametros_invalidos_e_parada_antecipada():
+    profiler = SamplingProfiler()
+
+    for kwargs in ({}, {"seconds": 1, "requests": 1, "route": "/x"}, {"requests": 3}):
+        with pytest.raises(ValueError):
+            profiler.start(**kwargs)
+
+    session = profiler.start(seconds=60, interval_ms=5)
+    assert profiler.stop() is session
+    assert not session.running
+    assert not any(thread.name == "sampling-profiler" for thread in threading.enumerate())
+
+    capped = profiler.start(seconds=60, max_seconds=0.05)
+    wait_finished(capped, timeout=2.0)
+
+
+@pytest.fixture
+def idle_profiler(monkeypatch):
+    """O profiler do app sem sessão anterior"""
+    monkeypatch.setattr(sampling_profiler, "session", None)
+    yield sampling_profiler
+    sampling_profiler.stop()
+
+
+def test_sessao_pelas_proximas_requisicoes_de_uma_rota(admin_client, idle_profiler):
+    assert admin_client.get("/api/v1/admin/profiler/result").status_code == 404
+
+    response = admin_client.post("/api/v1/admin/profiler/start", params={
+        "requests": 2, "route": "/api/v1/books/{book_id}", "interval_ms": 1
+    })
+    assert response.status_code == 202
+    assert response.json()["mode"] == "requests"
+    assert admin_client.get("/api/v1/admin/profiler/result").status_code == 409
+    assert admin_client.post("/api/v1/admin/profiler/start", params={"seconds": 1}).status_code == 409
+
+    admin_client.get("/api/v1/categories")  # outra rota: não conta
+    admin_client.get("/api/v1/books/1")
+    admin_client.get("/api/v1/books/2")
+
+    status = admin_client.get("/api/v1/admin/profiler/status").json()
+    assert (status["running"], status["requests_seen"]) == (False, 2)
+    assert idle_profiler.request_session is None  # o middleware volta a só ler um atributo
+
+    result = admin_client.get("/api/v1/admin/profiler/result")
+    assert result.status_code == 200
+    assert result.headers["content-disposition"] == f'attachment; filename="profile-{status["id"]}.folded"'
+
+
+def test_endpoints_do_profiler_exigem_admin(client, idle_profiler):
+    assert client.post("/api/v1/admin/profiler/start", params={"seconds": 1}).status_code == 401
+    assert idle_profiler.session is None
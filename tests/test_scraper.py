@@ -0,0 +1,241 @@
+"""
+Testes do scraper: parsing das páginas, crawl de um site local e retomada
+
+O site tem o formato de books.toscrape.com e é servido por uma sessão HTTP
+falsa (sem rede); cada teste monta o seu. A fronteira de crawl fica em um
+arquivo temporário.
+"""
+import pytest
+import requests
+
+from app.services import html_parsing
+from app.services.crawl_frontier import MAX_ATTEMPTS
+from app.services.html_parsing import parse_listing, parse_product
+from app.services.scraper_service import ScrapeCancelled, iter_books
+
+BASE_URL = "http://books.local/"
+STARS = ["One", "Two", "Three", "Four", "Five"]
+PER_PAGE = 3
+
+
+def listing_html(page: int, total_pages: int) -> str:
+    articles = "".join(f"""<li><article class="product_pod">
+<div class="image_container"><a href="book-{n}_{n}/index.html"><img src="../media/cache/{n}.jpg" class="thumbnail"></a></div>
+<p class="star-rating {STARS[n % 5]}"><i class="icon-star"></i></p>
+<h3><a href="book-{n}_{n}/index.html" title="Livro &amp; {n}">Livro &amp; {n}</a></h3>
+<div class="product_price"><p class="price_color">£{n}.00</p></div></article></li>"""
+                       for n in range((page - 1) * PER_PAGE + 1, page * PER_PAGE + 1))
+    next_link = f'<li class="next"><a href="page-{page + 1}.html">next</a></li>' if page < total_pages else ""
+    return f"""<html><body><ol class="row">{articles}</ol>
+<ul class="pager"><li class="current">
+    Page {page} of {total_pages}
+</li>{next_link}</ul></body></html>"""
+
+
+def product_html(n: int) -> str:
+    return f"""<html><body>
+<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li><li><a href="#">Books</a></li>
+<li><a href="#">Categoria {n % 2}</a></li><li class="active">Livro {n}</li></ul>
+<p class="price_color">£99.99</p>
+<table class="table table-striped">
+<tr><th>UPC</th><td>a{n}</td></tr><tr><th>Product Type</th><td>Books</td></tr>
+<tr><th>Price (excl. tax)</th><td>Â£{n}.50</td></tr><tr><th>Price (incl. tax)</th><td>Â£{n}.75</td></tr>
+<tr><th>Tax</th><td>£0.00</td></tr><tr><th>Availability</th><td>In stock ({n} available)</td></tr>
+</table></body></html>"""
+
+
+def site_pages(total_pages: int) -> dict:
+    pages = {f"{BASE_URL}catalogue/page-{page}.html": listing_html(page, total_pages)
+             for page in range(1, total_pages + 1)}
+    for n in range(1, total_pages * PER_PAGE + 1):
+        pages[f"{BASE_URL}catalogue/book-{n}_{n}/index.html"] = product_html(n)
+    return pages
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = ""):
+        self.status_code = status_code
+        self.text = text
+
+
+class FakeSite:
+    """Sessão HTTP falsa: serve `pages` e registra as URLs pedidas"""
+
+    def __init__(self):
+        self.pages = {}
+        self.requested = []
+        self.timeouts = set()
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        self.timeouts.add(timeout)
+        page = self.pages.get(url)
+        if isinstance(page, Exception):
+            raise page
+        if page is None:
+            return FakeResponse(404)
+        return FakeResponse(200, page)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def site(monkeypatch):
+    fake = FakeSite()
+    monkeypatch.setattr(requests, "Session", lambda: fake)
+    return fake
+
+
+@pytest.fixture(params=["lxml", "soupstrainer"])
+def parser(request, monkeypatch):
+    """Roda o teste com lxml e com o fallback do BeautifulSoup"""
+    if request.param == "soupstrainer":
+        monkeypatch.setattr(html_parsing, "_lxml_html", lambda: None)
+    return request.param
+
+
+def test_parse_da_listagem(parser):
+    items, next_page, page_count = parse_listing(listing_html(2, 3), BASE_URL)
+
+    assert (next_page, page_count) == ("catalogue/page-3.html", 3)
+    assert items[0] == {
+        "title": "Livro & 4",
+        "detail_path": "catalogue/book-4_4/index.html",
+        "image_url": BASE_URL + "../media/cache/4.jpg",  # como no CSV do scraper original
+        "rating": 5,
+    }
+    assert [item["rating"] for item in items] == [5, 1, 2]
+
+    last_items, last_next, _ = parse_listing(listing_html(3, 3), BASE_URL)
+    assert last_next is None and len(last_items) == PER_PAGE
+
+
+def test_parse_do_produto(parser):
+    # Preço com o "Â" da codificação errada do site, como no scraper original
+    assert parse_product(product_html(7)) == (7.75, 7, "Categoria 1")
+
+
+@pytest.mark.parametrize("parse_workers", [0, 1])
+def test_crawl_completo_em_ordem_do_catalogo(site, parse_workers):
+    site.pages.update(site_pages(3))
+
+    books = list(iter_books(base_url=BASE_URL, parse_workers=parse_workers, checkpoint_every=4))
+
+    assert [book["id"] for book in books] == list(range(1, 10))
+    assert [book["title"] for book in books] == [f"Livro & {n}" for n in range(1, 10)]
+    assert books[4] == {
+        "id": 5,
+        "title": "Livro & 5",
+        "price": 5.75,
+        "rating": 1,
+        "availability": 5,
+        "category": "Categoria 1",
+        "image_url": BASE_URL + "../media/cache/5.jpg",
+    }
+
+
+def test_livros_produzidos_antes_do_fim_do_crawl(site):
+    site.pages.update(site_pages(3))
+    books = iter_books(base_url=BASE_URL, parse_workers=0, checkpoint_every=2)
+
+    first = next(books)
+    # Só o primeiro lote de produtos foi baixado: os livros seguem para o loader
+    assert first["id"] == 1
+    assert sum("/book-" in url for url in site.requested) == 2
+    assert len(list(books)) == 8
+
+
+def test_crawl_interrompido_retoma_do_checkpoint(site, tmp_path):
+    site.pages.update(site_pages(4))
+    state = str(tmp_path / "crawl_state.db")
+    full = list(iter_books(base_url=BASE_URL, parse_workers=0, state_path=str(tmp_path / "full.db")))
+
+    scraped = []
+    with pytest.raises(ScrapeCancelled):
+        for book in iter_books(base_url=BASE_URL, parse_workers=0, state_path=state, checkpoint_every=5,
+                               should_stop=lambda: len(scraped) >= 5):
+            scraped.append(book)
+
+    site.requested.clear()
+    resumed = list(iter_books(base_url=BASE_URL, parse_workers=0, state_path=state, checkpoint_every=5))
+
+    # Só as páginas de produto pendentes são baixadas de novo
+    assert all("/book-" in url for url in site.requested)
+    assert len(site.requested) == 12 - 5
+    # Os livros do checkpoint são produzidos de novo, com os mesmos ids
+    assert resumed == full
+    assert scraped == full[:5]
+
+    # Crawl terminado: o próximo começa do zero
+    site.requested.clear()
+    assert list(iter_books(base_url=BASE_URL, parse_workers=0, state_path=state)) == full
+    assert len(site.requested) == 4 + 12
+
+
+def test_falha_em_uma_listagem_mantem_o_checkpoint(site, tmp_path):
+    pages = site_pages(4)
+    site.pages.update(pages)
+    del site.pages[f"{BASE_URL}catalogue/page-3.html"]
+    state = str(tmp_path / "crawl_state.db")
+
+    with pytest.raises(RuntimeError):
+        list(iter_books(base_url=BASE_URL, parse_workers=0, state_path=state))
+
+    site.pages.update(pages)
+    site.requested.clear()
+    books = list(iter_books(base_url=BASE_URL, parse_workers=0, state_path=state))
+
+    assert [url for url in site.requested if "/page-" in url] == [f"{BASE_URL}catalogue/page-3.html"]
+    assert [book["id"] for book in books] == list(range(1, 13))
+
+    # fresh=True ignora o checkpoint
+    site.requested.clear()
+    list(iter_books(base_url=BASE_URL, parse_workers=0, state_path=state, fresh=True))
+    assert len([url for url in site.requested if "/page-" in url]) == 4
+
+
+def test_pagina_de_produto_com_falha_e_pulada_sem_mudar_os_ids_seguintes(site):
+    site.pages.update(site_pages(2))
+    complete = {book["title"]: book["id"] for book in iter_books(base_url=BASE_URL, parse_workers=0)}
+    missing = f"{BASE_URL}catalogue/book-2_2/index.html"
+    del site.pages[missing]
+    site.requested.clear()
+
+    books = list(iter_books(base_url=BASE_URL, parse_workers=0))
+
+    assert site.requested.count(missing) == MAX_ATTEMPTS
+    assert [book["title"] for book in books] == [f"Livro & {n}" for n in (1, 3, 4, 5, 6)]
+    assert [book["id"] for book in books] == [1, 3, 4, 5, 6]
+    assert all(complete[book["title"]] == book["id"] for book in books)
+
+
+def test_erro_de_conexao_conta_como_falha_da_pagina(site):
+    site.pages.update(site_pages(2))
+    slow = f"{BASE_URL}catalogue/book-3_3/index.html"
+    site.pages[slow] = requests.ReadTimeout("read timed out")
+
+    books = list(iter_books(base_url=BASE_URL, parse_workers=0, fetch_timeout=(1.0, 2.0)))
+
+    assert site.timeouts == {(1.0, 2.0)}
+    assert site.requested.count(slow) == MAX_ATTEMPTS
+    assert "Livro & 3" not in [book["title"] for book in books]
+
+
+def test_cancelamento_atendido_antes_de_cada_download(site):
+    site.pages.update(site_pages(4))
+    stop = []
+    site.pages[f"{BASE_URL}catalogue/book-2_2/index.html"] = product_html(2)
+
+    def get(url, timeout=None):
+        if "/book-2_" in url:
+            stop.append(True)  # o job foi cancelado no meio do lote
+        return FakeSite.get(site, url, timeout)
+
+    site.get = get
+    with pytest.raises(ScrapeCancelled):
+        list(iter_books(base_url=BASE_URL, parse_workers=0, fetch_concurrency=1, checkpoint_every=12,
+                        should_stop=lambda: bool(stop)))
+
+    # O lote tinha 12 páginas de produto; nenhuma depois do cancelamento foi baixada
+    assert [url for url in site.requested if "/book-" in url][-1].endswith("book-2_2/index.html")
@@ -0,0 +1,125 @@
+"""
+Testes do single-flight (coalescência de leituras idênticas simultâneas)
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.database import worker_engine
+from app.utils.singleflight import SingleFlight, SingleFlightTimeout, flight_key
+
+
+def test_flight_key_normaliza_parametros():
+    assert flight_key("/books/price-range", min=0, max=50) == flight_key("/books/price-range", max=50, min=0.0)
+    assert flight_key("/books/search", title="a", category=None) == flight_key("/books/search", title="a")
+
+
+def test_chamadas_simultaneas_compartilham_uma_execucao():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute(db):
+        calls.append(db)
+        release.wait(5)
+        return "ok"
+
+    async def run():
+        waiters = [asyncio.ensure_future(flights.do(flight_key("/x"), compute, 5)) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == ["ok"] * 10
+    assert len(calls) == 1
+    assert flights.in_flight == 0
+
+
+def test_computacao_usa_sessao_propria_do_engine_de_threads():
+    flights = SingleFlight()
+    sessions = []
+
+    def compute(db):
+        sessions.append(db)
+        return db.get_bind()
+
+    bind = asyncio.run(flights.do(flight_key("/x"), compute))
+
+    assert bind is worker_engine
+    # A sessão é fechada pela thread ao terminar
+    assert not sessions[0].in_transaction()
+
+
+def test_erro_chega_a_todos_e_timeout_libera_a_chave():
+    flights = SingleFlight()
+
+    def fail(db):
+        raise ValueError("falhou")
+
+    async def errors():
+        return await asyncio.gather(*(flights.do(flight_key("/x"), fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(errors()))
+
+    release = threading.Event()
+
+    async def timeout():
+        with pytest.raises(SingleFlightTimeout):
+            await flights.do(flight_key("/slow"), lambda db: release.wait(5), 0.05)
+        assert flights.in_flight == 0
+        release.set()
+
+    asyncio.run(timeout())
+
+
+def test_rotas_nao_usam_a_sessao_da_requisicao_na_thread(client, monkeypatch):
+    """A sessão de get_db (StaticPool, uma conexão para todas) não pode ir para outra thread"""
+    from app.services.book_service import book_service
+    from app.services.stats_service import stats_service
+
+    binds = []
+
+    def recording(method):
+        def wrapper(db, *args, **kwargs):
+            binds.append(db.get_bind())
+            return method(db, *args, **kwargs)
+        return wrapper
+
+    for service, name in [
+        (book_service, "search_books"), (book_service, "get_books_by_price_range"),
+        (book_service, "get_categories"), (stats_service, "get_overview_stats"),
+        (stats_service, "get_category_stats"),
+    ]:
+        monkeypatch.setattr(service, name, recording(getattr(service, name)))
+
+    for path in [
+        "/api/v1/books/search?title=single-flight", "/api/v1/books/price-range?min=1&max=2",
+        "/api/v1/categories", "/api/v1/stats/overview", "/api/v1/stats/categories",
+    ]:
+        assert client.get(path).status_code == 200
+
+    assert binds and all(bind is worker_engine for bind in binds)
+
+
+def test_rotas_coalescidas_sob_carga_concorrente(client):
+    """
+    Buscas diferentes e simultâneas rodam em threads ao mesmo tempo; cada uma
+    precisa da sua conexão (antes, todas usavam a da sessão da requisição)
+    """
+    paths = [
+        *(f"/api/v1/books/search?title={word}" for word in ("love", "the", "of", "war", "girl", "life")),
+        *(f"/api/v1/books/price-range?min={low}&max={low + 5}" for low in range(10, 40, 5)),
+        "/api/v1/categories",
+        "/api/v1/stats/overview",
+        "/api/v1/stats/categories",
+    ]
+    expected = {path: client.get(path).json() for path in paths}
+
+    with ThreadPoolExecutor(max_workers=24) as pool:
+        responses = list(pool.map(lambda path: (path, client.get(path)), paths * 6))
+
+    for path, response in responses:
+        assert response.status_code == 200, (path, response.text)
+        assert response.json() == expected[path]
@@ -0,0 +1,125 @@
+"""
+Testes do profiling de SQL por requisição (app/utils/sql_profiler.py)
+
+Cada teste instrumenta um engine próprio com um SQLProfiler novo; no app
+compartilhado o profiling fica desligado (padrão).
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from app.database import engine as app_engine
+from app.utils.middleware import SQLProfilerMiddleware
+from app.utils.sql_profiler import OTHER_STATEMENT, SQLProfiler, normalize_statement, sql_profiler
+
+
+@pytest.fixture
+def profiler():
+    return SQLProfiler()
+
+
+@pytest.fixture
+def engine(tmp_path, profiler):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiled.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, price REAL)"))
+        conn.execute(text("INSERT INTO books (title, price) VALUES ('A', 10.5), ('B', 20)"))
+    profiler.instrument(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_normaliza_literais_e_listas_in():
+    assert normalize_statement(
+        "SELECT * FROM books\n WHERE id IN (?, ?, ?) AND title = 'O''Brien' AND price > 10.5 LIMIT 20"
+    ) == "SELECT * FROM books WHERE id IN (...) AND title = ? AND price > ? LIMIT ?"
+
+
+def test_conta_queries_da_requisicao_e_agrega_statements(engine, profiler):
+    with profiler.track_request() as stats:
+        with engine.connect() as conn:
+            for book_id in (1, 2, 3):
+                conn.execute(text(f"SELECT title FROM books WHERE id = {book_id}"))
+            conn.execute(text("SELECT COUNT(*) FROM books"))
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT COUNT(*) FROM books"))  # fora da requisição: só no ranking
+
+    assert stats.count == 4 and stats.seconds > 0
+    top = {row["statement"]: row for row in profiler.top(order_by="count")}
+    assert top["SELECT title FROM books WHERE id = ?"]["count"] == 3
+    assert top["SELECT COUNT(*) FROM books"]["count"] == 2
+    assert profiler.top(limit=1, order_by="count")[0]["count"] == 3
+
+    with pytest.raises(ValueError):
+        profiler.top(order_by="p99")
+    profiler.reset()
+    assert profiler.top() == []
+
+
+def test_limite_de_statements_distintos(engine, profiler):
+    profiler.configure(slow_query_ms=1000, explain_slow_queries=False, max_statements=2)
+
+    with engine.connect() as conn:
+        for column in ("id", "title", "price", "id, title"):
+            conn.execute(text(f"SELECT {column} FROM books"))
+
+    statements = {row["statement"] for row in profiler.top()}
+    assert statements == {"SELECT id FROM books", "SELECT title FROM books", OTHER_STATEMENT}
+
+
+def test_query_lenta_logada_com_o_plano(engine, profiler, caplog):
+    profiler.configure(slow_query_ms=0, explain_slow_queries=True, max_statements=10)
+
+    with caplog.at_level(logging.WARNING, logger="app.utils.sql_profiler"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT title FROM books WHERE id = :id"), {"id": 1})
+
+    message = next(record.getMessage() for record in caplog.records if "SELECT title" in record.getMessage())
+    assert message.startswith("Slow query")
+    assert "plan: SEARCH books USING INTEGER PRIMARY KEY" in message
+
+
+def test_desligado_nao_registra_listeners():
+    # SQL_PROFILING_ENABLED é falso nos testes: as queries não passam pelo profiler
+    assert not event.contains(app_engine, "after_cursor_execute", sql_profiler._after_cursor_execute)
+
+
+def test_header_server_timing(engine):
+    app = FastAPI()
+    app.add_middleware(SQLProfilerMiddleware)
+
+    @app.get("/books")
+    def books():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT * FROM books"))
+            conn.execute(text("SELECT COUNT(*) FROM books"))
+        return {}
+
+    with TestClient(app) as client:
+        timing = client.get("/books").headers["server-timing"]
+
+    db, app_timing = timing.split(", ")
+    assert db.startswith("db;dur=") and db.endswith(';desc="2 queries"')
+    assert app_timing.startswith("app;dur=")
+
+
+def test_ranking_no_endpoint_de_admin(admin_client, monkeypatch):
+    monkeypatch.setattr(sql_profiler, "_statements", {})
+    sql_profiler._record("SELECT * FROM books WHERE id = 7", 0.002)
+
+    response = admin_client.get("/api/v1/admin/sql/top", params={"order_by": "max"})
+
+    assert response.status_code == 200
+    assert response.json()["statements"] == [{
+        "statement": "SELECT * FROM books WHERE id = ?", "count": 1, "total_ms": 2.0, "mean_ms": 2.0, "max_ms": 2.0
+    }]
+    assert admin_client.delete("/api/v1/admin/sql/top").status_code == 204
+    assert sql_profiler.top() == []
+
+
+def test_endpoint_exige_admin(client):
+    assert client.get("/api/v1/admin/sql/top").status_code == 401
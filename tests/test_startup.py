@@ -0,0 +1,98 @@
+"""
+Testes da inicialização: orçamento de importação, etapas e readiness
+
+O orçamento é o mesmo de benchmarks/bench_startup.py (--budget-ms 1500),
+medido em um processo novo, com a mediana de algumas execuções.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+import app.main as main
+import app.services.health_checker as health_checker_module
+from app.core.startup import StartupState
+from app.services.health_checker import HealthChecker
+from tests.conftest import ROOT_DIR
+
+IMPORT_BUDGET_MS = 1500
+LAZY_MODULES = ("pandas", "bs4", "lxml", "requests", "httpx", "sklearn")
+
+IMPORT_PROBE = (
+    "import json, sys, time; start = time.perf_counter(); import app.main; "
+    "elapsed = (time.perf_counter() - start) * 1000; "
+    f"lazy = sorted({{m.split('.')[0] for m in sys.modules}} & set({list(LAZY_MODULES)!r})); "
+    "print(json.dumps({'ms': elapsed, 'lazy': lazy}))"
+)
+
+
+def test_importacao_do_app_dentro_do_orcamento():
+    runs = []
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT_DIR, env=os.environ.copy(),
+                                capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    assert runs[0]["lazy"] == [], "dependências pesadas importadas junto com app.main"
+    assert statistics.median(run["ms"] for run in runs) < IMPORT_BUDGET_MS
+
+
+def test_etapa_com_erro_impede_o_ready():
+    state = StartupState()
+    with state.stage("database"):
+        pass
+    with state.stage("catalog_snapshot"):
+        raise OSError("snapshot corrompido")
+
+    assert state.mark_ready() is False
+    assert not state.ready
+    assert state.check() == {"ok": False, "stage": None, "errors": {"catalog_snapshot": "OSError: snapshot corrompido"}}
+    assert set(state.snapshot()["stages"]) == {"database", "catalog_snapshot"}
+
+    state.reset()
+    assert state.mark_ready() is True and state.ready
+
+
+@pytest.fixture
+def fresh_startup_state(monkeypatch):
+    state = StartupState()
+    monkeypatch.setattr(main, "startup_state", state)
+    monkeypatch.setattr(health_checker_module, "startup_state", state)
+    monkeypatch.setattr(main, "start_background_tasks", lambda: None)
+    monkeypatch.setattr(main.settings, "WARMUP_ENABLED", False)
+    return state
+
+
+def test_warm_up_com_falha_deixa_o_readiness_em_503_com_os_erros(client, fresh_startup_state, monkeypatch):
+    def broken_database():
+        raise RuntimeError("disco cheio")
+
+    monkeypatch.setattr(main, "initialize_database", broken_database)
+    asyncio.run(main.warm_up())
+
+    assert not fresh_startup_state.ready
+    checker = HealthChecker()
+    asyncio.run(checker.check())
+    report = checker.readiness()
+    assert report["ready"] is False
+    assert report["checks"]["startup"]["errors"] == {"database": "RuntimeError: disco cheio"}
+    assert report["startup"]["errors"] == {"database": "RuntimeError: disco cheio"}
+
+    monkeypatch.setattr("app.api.v1.health.health_checker", checker)
+    monkeypatch.setattr("app.api.v1.health.startup_state", fresh_startup_state)
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["startup"]["errors"] == {"database": "RuntimeError: disco cheio"}
+    assert client.get("/api/v1/health/live").json() == {"status": "vivo", "ready": False}
+
+
+def test_warm_up_sem_erros_fica_pronto(fresh_startup_state):
+    asyncio.run(main.warm_up())
+
+    assert fresh_startup_state.ready
+    assert fresh_startup_state.check() == {"ok": True, "stage": None, "errors": {}}
+    assert set(fresh_startup_state.stages) >= {"database"}
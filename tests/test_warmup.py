@@ -0,0 +1,115 @@
+"""
+Testes do cache de respostas por versão do catálogo (response_cache) e do
+aquecimento após a inicialização e as recargas (warmup_service)
+
+Cada teste usa uma CatalogVersion própria no lugar da global, para que os
+"bumps" não disparem as reconstruções do app compartilhado.
+"""
+import threading
+import time
+
+import pytest
+
+import app.services.response_cache as response_cache_module
+import app.services.warmup_service as warmup_module
+from app.core.catalog_version import CatalogVersion
+from app.services.response_cache import ResponseCache, response_cache
+from app.services.warmup_service import WarmupService
+
+
+@pytest.fixture
+def version(monkeypatch):
+    version = CatalogVersion()
+    monkeypatch.setattr(response_cache_module, "catalog_version", version)
+    monkeypatch.setattr(warmup_module, "catalog_version", version)
+    return version
+
+
+def test_cache_recalcula_so_depois_de_uma_recarga(version):
+    cache = ResponseCache()
+    calls = []
+
+    def compute(limit=None):
+        calls.append(limit)
+        return len(calls)
+
+    assert cache.get("features", compute) == 1
+    assert cache.get("features", compute) == 1
+    assert cache.get("features", lambda: compute(10), 10) == 2  # parâmetros fazem parte da chave
+    assert cache.is_current("features") and cache.is_current("features", 10)
+
+    version.bump()
+
+    assert not cache.is_current("features")
+    assert cache.get("features", compute) == 3
+    assert calls == [None, 10, None]
+
+
+def test_misses_simultaneos_calculam_uma_vez(version):
+    cache = ResponseCache()
+    calls = []
+    start = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "stats"
+
+    def read(results):
+        start.wait()
+        results.append(cache.get("stats_overview", compute))
+
+    results = []
+    threads = [threading.Thread(target=read, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["stats"] * 8
+
+
+def test_aquecimento_preenche_o_cache_da_versao_atual(version, monkeypatch):
+    monkeypatch.setattr(response_cache, "_entries", {})
+
+    def broken(db):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(warmup_module.WARMUP_STEPS, "broken", broken)
+    service = WarmupService()
+
+    result = service.run(["stats_overview", "broken", "unknown", "categories"], pretouch=True)
+
+    assert set(result["steps"]) == {"sqlite_pages", "stats_overview", "broken", "categories"}
+    assert result["errors"] == {"broken": "RuntimeError: boom", "unknown": "unknown warm-up step"}
+    assert response_cache.is_current("stats_overview") and response_cache.is_current("categories")
+    assert service.is_warm and service.status()["warm"]
+
+    version.bump()
+
+    assert not service.is_warm
+    assert not response_cache.is_current("stats_overview")
+
+
+def test_recargas_durante_o_aquecimento_geram_uma_unica_nova_execucao(monkeypatch):
+    service = WarmupService()
+    release = threading.Event()
+    runs = []
+
+    def run():
+        runs.append(1)
+        release.wait(5)
+
+    monkeypatch.setattr(service, "run", run)
+
+    service.schedule()
+    for _ in range(3):
+        service.schedule()
+    release.set()
+
+    deadline = time.monotonic() + 5
+    while service._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not service._running
+    assert len(runs) == 2